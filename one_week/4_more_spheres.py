@@ -1,4 +1,5 @@
-from one_week.hittable import HitRecord, Hittable, HittableList
+from one_week.bvh import BVH
+from one_week.hittable import HitRecord, Hittable
 from one_week.ppm import PPM
 from one_week.ray import Ray
 from one_week.sphere import Sphere
@@ -10,7 +11,7 @@ import sys
 
 UNIT_VEC3: Vec3 = Vec3(1.0, 1.0, 1.0)
 
-def color(ray: Ray, world: HittableList) -> Vec3:
+def color(ray: Ray, world: Hittable) -> Vec3:
     hit_attempt: Optional[HitRecord] = world.hit(ray, 0.0, sys.float_info.max)
     if hit_attempt is not None:
         return 0.5 * Vec3(
@@ -35,7 +36,7 @@ if __name__ == "__main__":
         Sphere(Vec3(0, 0, -1), 0.5),
         Sphere(Vec3(0, -100.5, -1), 100)
     ]
-    world: HittableList = HittableList(hittables)
+    world: Hittable = BVH(hittables)
 
     for j in range(height - 1, -1, -1):
         for i in range(width):
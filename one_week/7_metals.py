@@ -1,44 +1,20 @@
-from random import SystemRandom
+"""
+Render matte spheres next to a shiny and a fuzzy metal one.
+"""
+from one_week import engine
 from one_week.camera import Camera
-from one_week.hittable import HitRecord, Hittable, HittableList
-from one_week.material import Lambertian, Metal, ReflectionRecord
-from one_week.ppm import PPM
-from one_week.ray import Ray
+from one_week.engine import Scene
+from one_week.hittable import Hittable
+from one_week.material import Lambertian, Metal
 from one_week.sphere import Sphere
-from one_week.utils import _derive_ppm_filename
 from one_week.vec3 import Vec3
-from typing import List, Optional
+from typing import List
 
-import math
-import sys
+WIDTH: int = 400
+HEIGHT: int = 200
+SAMPLES: int = 200
 
-UNIT_VEC3: Vec3 = Vec3(1.0, 1.0, 1.0)
-random = SystemRandom()
-
-def color(ray: Ray, world: HittableList, depth: int) -> Vec3:
-    # Some reflected rays hit not at zero but at some near-zero value due to
-    # floating point shennanigans. So we try to compensate for that.
-    hit_attempt: Optional[HitRecord] = world.hit(ray, 0.001, sys.float_info.max)
-    if hit_attempt is not None:
-        reflection: ReflectionRecord = hit_attempt.material.scatter(ray, hit_attempt)
-        # FIXME Is it really worthwhile to check if reflection is not None here?
-        # All our Materials assume that a hit has been made, and therefore some
-        # reflection should happen (unless it is Vanta).
-        if depth < 50 and reflection is not None:
-            # Compare this with the hard-coded reflection in 6_matterial.
-            return reflection.attenuation * color(reflection.scattering, world, depth + 1)
-        else:
-            return Vec3(0, 0, 0)
-    else:
-        unit_direction: Vec3 = ray.direction.unit_vector()
-        t: float = 0.5 * (unit_direction.y + 1)
-        return ((1.0 - t) * UNIT_VEC3) + (t * Vec3(0.5, 0.7, 1.0))
-
-if __name__ == "__main__":
-    width = 400
-    height = 200
-    sampling_size = 200
-    ppm: PPM = PPM(width, height)
+def scene(width: int, height: int) -> Scene:
     lower_left_corner: Vec3 = Vec3(-2, -1, -1)
     h_movement: Vec3 = Vec3(4, 0, 0)
     v_movement: Vec3 = Vec3(0, 2, 0)
@@ -51,35 +27,7 @@ if __name__ == "__main__":
         Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
         Sphere(Vec3(-1, 0, -1), 0.5, Metal(Vec3(0.8, 0.8, 0.8), 0.1))
     ]
-    world: HittableList = HittableList(hittables)
-
-    for j in range(height - 1, -1, -1):
-        for i in range(width):
-            print("Tracing on row %s, col %s" % (j, i))
-            print("antialiasing...", end="")
-            accumulator: Vec3 = Vec3(0, 0, 0)
-            for sample in range(sampling_size):
-                # In this instance, instead of u and v being mere ratios to
-                # our distance from the edges, they feature a random "jitter"
-                # which we use to sample the pixels around our current pixel.
-                # In this sense, the current pixel is a combination of its
-                # surroundings.
-                u: float = float(i + random.random()) / float(width)
-                v: float = float(j + random.random()) / float(height)
-                r: Ray = cam.get_ray(u, v)
-                accumulator += color(r, world, 0)
+    return Scene(hittables, cam)
 
-            accumulator /= float(sampling_size)
-            print("done")
-            # Apply gamma correction. Without this line, the spheres will be too
-            # dark despite the fact that they are only 50% reflectors. This
-            # happens because, according to Shirley, most image viewers assume
-            # that the image is gamma-corrected and so display accordingly. We
-            # just comply.
-            accumulator.map(math.sqrt)
-            accumulator *= 255.9
-            accumulator.map(int)
-
-            ppm.set_pixel((height - 1) - j, i, accumulator)
-
-    ppm.write(_derive_ppm_filename())
+if __name__ == "__main__":
+    engine.run(scene, WIDTH, HEIGHT, SAMPLES)
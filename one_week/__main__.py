@@ -0,0 +1,3 @@
+from one_week.engine import main
+
+main()
@@ -0,0 +1,131 @@
+"""
+Axis-aligned bounding boxes.
+
+This is not in _Ray Tracing in One Weekend_ but in its sequel, _The Next Week_.
+We need it early because testing every object in the scene for every ray gets
+really slow once the scene has more than a handful of spheres.
+"""
+from one_week.ray import Ray
+from one_week.vec3 import Vec3
+from typing import Optional
+
+import math
+
+class AABB(object):
+    """
+    A box whose faces are parallel to the axes. It is fully described by its
+    two opposite corners, `minimum` and `maximum`.
+
+    The box is hit by a ray if the intervals of t, where the ray is between
+    the two "slabs" of each axis, all overlap. This is the so-called _slab
+    test_.
+    """
+
+    def __init__(self, minimum: Vec3, maximum: Vec3):
+        self.minimum: Vec3 = minimum
+        self.maximum: Vec3 = maximum
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> bool:
+        origin: Vec3 = ray.origin
+        direction: Vec3 = ray.direction
+        return self.entry(
+            origin.x, origin.y, origin.z,
+            inverse_component(direction.x),
+            inverse_component(direction.y),
+            inverse_component(direction.z),
+            t_min, t_max
+        ) is not None
+
+    def entry(
+        self, ox: float, oy: float, oz: float, inv_dx: float, inv_dy: float,
+        inv_dz: float, t_min: float, t_max: float
+    ) -> Optional[float]:
+        """
+        The slab test, on plain floats. Return the t at which the ray enters
+        this box (clamped to t_min) or None if the ray misses it within
+        (t_min, t_max).
+
+        The ray is passed in pieces because a traversal tests a lot of boxes
+        against the same ray, so the caller computes the inverse of the
+        direction only once.
+        """
+        # Multiplying by the inverse is cheaper than dividing and, when a
+        # component of the direction is 0, IEEE infinities make the slab of
+        # that axis either "always" or "never" overlap, which is what we want.
+        t0: float = (self.minimum.r - ox) * inv_dx
+        t1: float = (self.maximum.r - ox) * inv_dx
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
+        if t_max <= t_min:
+            return None
+
+        t0 = (self.minimum.g - oy) * inv_dy
+        t1 = (self.maximum.g - oy) * inv_dy
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
+        if t_max <= t_min:
+            return None
+
+        t0 = (self.minimum.b - oz) * inv_dz
+        t1 = (self.maximum.b - oz) * inv_dz
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
+        if t_max <= t_min:
+            return None
+
+        return t_min
+
+    def centroid(self) -> Vec3:
+        return (self.minimum + self.maximum) * 0.5
+
+    def surface_area(self) -> float:
+        extent: Vec3 = self.maximum - self.minimum
+        return 2 * (
+            extent.x * extent.y + extent.y * extent.z + extent.z * extent.x
+        )
+
+    def longest_axis(self) -> int:
+        """
+        0 for x, 1 for y and 2 for z.
+        """
+        extent: Vec3 = self.maximum - self.minimum
+        extents = extent.make_tuple()
+        return extents.index(max(extents))
+
+    def __str__(self):
+        return "AABB(%s, %s)" % (self.minimum, self.maximum)
+
+def surrounding_box(a: AABB, b: AABB) -> AABB:
+    return AABB(
+        Vec3(
+            min(a.minimum.x, b.minimum.x),
+            min(a.minimum.y, b.minimum.y),
+            min(a.minimum.z, b.minimum.z)
+        ),
+        Vec3(
+            max(a.maximum.x, b.maximum.x),
+            max(a.maximum.y, b.maximum.y),
+            max(a.maximum.z, b.maximum.z)
+        )
+    )
+
+def inverse_component(component: float) -> float:
+    """
+    1 / component, except that 0 maps to an (appropriately signed) infinity
+    instead of raising ZeroDivisionError.
+    """
+    if component == 0:
+        return math.copysign(math.inf, component)
+    return 1 / component
@@ -0,0 +1,220 @@
+"""
+Adaptive sampling: instead of the same `sampling_size` for every pixel, keep
+sampling a pixel only for as long as its color is still uncertain.
+
+Every pixel gets `min_samples` samples first. From then on, each round adds
+`step` more samples to the pixels which are not done yet. A pixel is done when
+it has `max_samples` samples, or when the confidence interval of its mean
+color is narrower than `tolerance` on every channel, and so are the intervals
+of its eight neighbors. The running mean and variance of every pixel are kept
+with Welford's algorithm (in the batched form of Chan et al.), so no samples
+are stored.
+
+The intervals are measured after gamma correction, where the eye sees them: a
+given amount of noise is much more visible on a dark pixel than on a bright
+one. The neighbors have to agree because a few samples can be unlucky enough
+to all look the same (say, a pixel on the edge of a sphere whose first samples
+all missed it), and a pixel like that usually sits next to a noisy one.
+
+If there is a total `budget` of samples and a round would go over it, the
+round goes to the pixels with the widest intervals first.
+
+`python -m one_week render SCENE --adaptive` renders this way, with --samples
+as `min_samples`, and writes the sample-count map next to the image.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from one_week.camera import Camera
+from one_week.progress import Progress
+from one_week.sampler import Sampler
+from one_week.wavefront import (
+    BATCH_SIZE, MAX_DEPTH, WavefrontCamera, WavefrontScene, new_seed,
+    render_pixels
+)
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+import one_week.wavefront as wavefront
+
+MIN_SAMPLES: int = 16
+MAX_SAMPLES: int = 256
+# Half-width of the confidence interval at which a pixel is done, in gamma
+# corrected color. One step of the 0-255 scale is about 0.004.
+TOLERANCE: float = 0.03
+# 95% confidence.
+Z_SCORE: float = 1.96
+
+class AdaptiveImage(NamedTuple):
+    """
+    `colors` are the (height, width, 3) linear colors and `samples` the
+    (height, width) number of samples each pixel got.
+    """
+    colors: np.ndarray
+    samples: np.ndarray
+
+    def sample_map(self) -> np.ndarray:
+        """
+        The sample counts as a (height, width, 3) grayscale image, white being
+        the most samples any pixel got. Write it out without gamma correction
+        to see where the time went.
+        """
+        most: int = max(int(self.samples.max()), 1)
+        gray: np.ndarray = self.samples / most
+        return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+
+class PixelStatistics(object):
+    """
+    Sample count, running mean and sum of squared deviations (M2) of the
+    color of every pixel, flattened.
+    """
+
+    def __init__(self, pixel_count: int):
+        self.counts: np.ndarray = np.zeros(pixel_count, dtype=np.int64)
+        self.means: np.ndarray = np.zeros((pixel_count, 3))
+        self.m2: np.ndarray = np.zeros((pixel_count, 3))
+
+    def add(self, pixels: np.ndarray, samples: np.ndarray):
+        """
+        Merge in a (P, k, 3) batch of samples, k for every one of `pixels`.
+        """
+        batch_count: int = samples.shape[1]
+        batch_means: np.ndarray = samples.mean(axis=1)
+        batch_m2: np.ndarray = (
+            (samples - batch_means[:, np.newaxis]) ** 2
+        ).sum(axis=1)
+
+        counts: np.ndarray = self.counts[pixels][:, np.newaxis]
+        total: np.ndarray = counts + batch_count
+        delta: np.ndarray = batch_means - self.means[pixels]
+        self.means[pixels] += delta * (batch_count / total)
+        self.m2[pixels] += (
+            batch_m2 + delta ** 2 * (counts * batch_count / total)
+        )
+        self.counts[pixels] += batch_count
+
+    def errors(self, pixels: np.ndarray, z_score: float=Z_SCORE) -> np.ndarray:
+        """
+        Half-width of the confidence interval of the mean of each of the
+        pixels after gamma correction, on the worst channel.
+        """
+        counts: np.ndarray = self.counts[pixels][:, np.newaxis]
+        variances: np.ndarray = self.m2[pixels] / np.maximum(counts - 1, 1)
+        linear: np.ndarray = z_score * np.sqrt(variances / counts)
+        # The derivative of sqrt, to carry the interval over to gamma
+        # corrected color. Black would make it blow up, so the darkest color
+        # considered is one step of the 0-255 scale.
+        slopes: np.ndarray = 0.5 / np.sqrt(
+            np.maximum(self.means[pixels], 1 / 256)
+        )
+        return (linear * slopes).max(axis=1)
+
+def render(
+    scene: WavefrontScene, camera: Union[Camera, WavefrontCamera],
+    width: int, height: int, min_samples: int=MIN_SAMPLES,
+    max_samples: int=MAX_SAMPLES, tolerance: float=TOLERANCE,
+    step: Optional[int]=None, budget: Optional[int]=None,
+    seed: Optional[int]=None, shading: str="path", max_depth: int=MAX_DEPTH,
+    sampler: Optional[Sampler]=None, progress: Optional[Progress]=None
+) -> AdaptiveImage:
+    """
+    Like `wavefront.render`, but with anywhere between `min_samples` and
+    `max_samples` samples per pixel. `step`, the samples added per round,
+    defaults to `min_samples`. `budget` caps the samples of the whole image.
+    Halton and Sobol samplers are spread well at any count of samples, so
+    they suit this better than a stratified one.
+
+    Every round is reported to `progress`, if given, with the pixels that
+    are done as the units done.
+    """
+    if not 1 < min_samples <= max_samples:
+        raise ValueError(
+            "Need 1 < min_samples <= max_samples, got %s and %s" %
+            (min_samples, max_samples)
+        )
+    if seed is None:
+        seed = new_seed()
+    if not isinstance(camera, WavefrontCamera):
+        camera = WavefrontCamera.from_camera(camera)
+    step = step or min_samples
+    budget = budget if budget is not None else max_samples * width * height
+
+    statistics: PixelStatistics = PixelStatistics(width * height)
+    active: np.ndarray = np.arange(width * height)
+    samples: int = min_samples
+
+    while len(active) and budget >= samples:
+        # Pixels left out for want of budget are as done as they get.
+        undone: int = len(active)
+        if samples * len(active) > budget:
+            # Not enough left for everyone: worst first.
+            worst: np.ndarray = np.argsort(-statistics.errors(active))
+            active = active[worst[:budget // samples]]
+        rays: int = wavefront.traced_rays
+        _sample(
+            scene, camera, width, height, statistics, active, samples, seed,
+            shading, max_depth, sampler
+        )
+        budget -= samples * len(active)
+        sampled: int = len(active)
+
+        uncertain: np.ndarray = np.zeros(width * height, dtype=bool)
+        uncertain[active[statistics.errors(active) >= tolerance]] = True
+        active = active[
+            (statistics.counts[active] < max_samples) &
+            _with_neighbors(uncertain.reshape(height, width)).ravel()[active]
+        ]
+        if progress is not None:
+            progress.update(
+                undone - len(active), samples * sampled,
+                wavefront.traced_rays - rays
+            )
+        samples = step
+        if len(active):
+            # Don't go over max_samples (all active pixels have the same
+            # count, so the first one will do).
+            samples = min(step, max_samples - statistics.counts[active[0]])
+
+    if progress is not None and len(active):
+        # Out of budget: these are as done as they get.
+        progress.update(len(active))
+    return AdaptiveImage(
+        statistics.means.reshape(height, width, 3),
+        statistics.counts.reshape(height, width)
+    )
+
+def _with_neighbors(mask: np.ndarray) -> np.ndarray:
+    """
+    Grow a 2D mask by one pixel in every direction, diagonals included.
+    """
+    grown: np.ndarray = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    columns: np.ndarray = grown.copy()
+    grown[:, 1:] |= columns[:, :-1]
+    grown[:, :-1] |= columns[:, 1:]
+    return grown
+
+def _sample(
+    scene: WavefrontScene, camera: WavefrontCamera, width: int, height: int,
+    statistics: PixelStatistics, pixels: np.ndarray, samples: int,
+    seed: int, shading: str, max_depth: int, sampler: Optional[Sampler]
+):
+    """
+    Add `samples` samples to each of the pixels, a batch at a time.
+    """
+    pixels_per_batch: int = max(1, BATCH_SIZE // samples)
+    for start in range(0, len(pixels), pixels_per_batch):
+        batch: np.ndarray = pixels[start:start + pixels_per_batch]
+        # One sample per entry, so that the individual samples come back.
+        repeated: np.ndarray = np.repeat(batch, samples)
+        # Each of which is the next sample of its pixel.
+        first_samples: np.ndarray = (
+            np.repeat(statistics.counts[batch], samples) +
+            np.tile(np.arange(samples), len(batch))
+        )
+        colors: np.ndarray = render_pixels(
+            scene, camera, width, height, repeated // width, repeated % width,
+            1, seed, shading, max_depth, first_samples, sampler
+        )
+        statistics.add(batch, colors.reshape(len(batch), samples, 3))
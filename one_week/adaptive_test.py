@@ -0,0 +1,72 @@
+from one_week.progress import Progress
+from one_week.testing import dielectrics
+
+import unittest
+
+try:
+    import numpy as np
+    from one_week import adaptive
+    from one_week.wavefront import WavefrontScene
+except ImportError:
+    adaptive = None
+
+@unittest.skipIf(adaptive is None, "needs NumPy")
+class AdaptiveTest(unittest.TestCase):
+
+    def setUp(self):
+        scene = dielectrics()
+        self.scene = WavefrontScene.from_hittables(scene.hittables)
+        self.camera = scene.camera
+
+    def test_statistics_match_numpy(self):
+        samples = np.random.default_rng(0).random((4, 12, 3))
+        pixels = np.array([5, 0, 2, 3])
+        statistics = adaptive.PixelStatistics(6)
+        for start, stop in ((0, 4), (4, 7), (7, 12)):
+            statistics.add(pixels, samples[:, start:stop])
+
+        self.assertEqual([12, 0, 12, 12, 0, 12], list(statistics.counts))
+        np.testing.assert_allclose(
+            samples.mean(axis=1), statistics.means[pixels]
+        )
+        np.testing.assert_allclose(
+            samples.var(axis=1) * 12, statistics.m2[pixels]
+        )
+
+    def test_sky_converges_early(self):
+        image = adaptive.render(
+            self.scene, self.camera, 32, 16, min_samples=8, max_samples=64,
+            tolerance=0.05, seed=1
+        )
+
+        self.assertEqual((16, 32, 3), image.colors.shape)
+        self.assertEqual((16, 32), image.samples.shape)
+        # The top rows are all sky, which hardly varies within a pixel.
+        self.assertTrue((image.samples[:2] == 8).all())
+        self.assertEqual(64, image.samples.max())
+        self.assertEqual(1, image.sample_map().max())
+
+    def test_budget(self):
+        image = adaptive.render(
+            self.scene, self.camera, 16, 8, min_samples=4, max_samples=64,
+            tolerance=0, budget=16 * 8 * 4 + 100, seed=2
+        )
+
+        self.assertLessEqual(image.samples.sum(), 16 * 8 * 4 + 100)
+        self.assertTrue((image.samples >= 4).all())
+
+    def test_progress(self):
+        for budget in (None, 16 * 8 * 4 + 100):
+            with Progress(16 * 8, 0, "pixels", "none") as progress:
+                image = adaptive.render(
+                    self.scene, self.camera, 16, 8, min_samples=4,
+                    max_samples=16, tolerance=0.05, budget=budget, seed=2,
+                    progress=progress
+                )
+            # Every pixel gets done, one way or another.
+            self.assertEqual(16 * 8, progress.done)
+            self.assertEqual(image.samples.sum(), progress.samples)
+            self.assertLess(0, progress.rays)
+
+if __name__ == "__main__":
+    unittest.main()
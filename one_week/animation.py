@@ -0,0 +1,354 @@
+"""
+Render a sequence of frames: a camera flying through a scene, spheres moving
+about in it, or both.
+
+An animation is a scene's spheres, plus keyframes for where the camera is
+and what it looks at (a `CameraPath`) and for where some of the spheres are
+and how big (a `Motion` each). Between keyframes, everything moves in a
+straight line. Posing the animation for a frame moves the very same Sphere
+objects, so nothing is built again between frames:
+
+- the plain Python backend keeps its BVH and `refit`s it to where the
+  spheres went, building a new one only once the tree has got too loose for
+  how far they've moved (see REBUILD);
+- the flat backend does the same, and packs the refit tree for one_week.flat
+  to trace every frame, which is next to nothing against the tracing;
+- the NumPy backend packs the scene once and `move`s the spheres of its
+  SphereArray, the materials staying where they are.
+
+Frames are encoded (PNG, or PPM if the file names end in .ppm) while the next
+ones render: in a thread of its own with one worker, or in this process while
+a pool of processes renders the frames after it with more. Every frame uses
+the same seed, so the noise holds still instead of crawling all over the
+image from one frame to the next.
+
+From the command line, with a module that has an `animation()` function
+(like one_week.fly_through):
+
+    python -m one_week animate fly_through --frames 48 --output /tmp/fly-%04d.png
+"""
+from one_week.bvh import BVH
+from one_week.camera import PositionableCamera
+from one_week.engine import Scene, pick_backend, trace_scalar
+from one_week.hittable import Hittable
+from one_week.progress import Progress
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import Any, Deque, Iterator, List, NamedTuple, Optional, Sequence
+
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import random
+import struct
+import zlib
+
+# How many times bigger (on average, by surface area) the boxes of a refit
+# BVH may get than they were when it was built before it is built again.
+REBUILD: float = 2.0
+
+class Key(NamedTuple):
+    """
+    A value (a Vec3 or a float) at a frame.
+    """
+    frame: float
+    value: Any
+
+def interpolate(keys: Sequence[Key], frame: float) -> Any:
+    """
+    The value of `keys` (sorted by frame) at `frame`: on a straight line
+    between the keys around it, and that of the first or last key before or
+    after all of them.
+    """
+    if not keys:
+        raise ValueError("Nothing to interpolate")
+    if frame <= keys[0].frame:
+        return keys[0].value
+    for before, after in zip(keys, keys[1:]):
+        if frame <= after.frame:
+            if after.frame == before.frame:
+                return after.value
+            ratio: float = (frame - before.frame) / (after.frame - before.frame)
+            return before.value + (after.value - before.value) * ratio
+    return keys[-1].value
+
+class CameraPath(NamedTuple):
+    """
+    Keyframes for a PositionableCamera: where it is, what it aims at and its
+    vertical field of view. Without a `focus_dist`, whatever it aims at is in
+    focus.
+    """
+    positions: Sequence[Key]
+    aims: Sequence[Key]
+    vfovs: Sequence[Key] = (Key(0, 20.0),)
+    up_vector: Vec3 = Vec3(0, 1, 0)
+    aperture: float = 0.0
+    focus_dist: Optional[float] = None
+
+    def camera(self, frame: float, aspect_ratio: float) -> PositionableCamera:
+        position: Vec3 = interpolate(self.positions, frame)
+        aim: Vec3 = interpolate(self.aims, frame)
+        focus_dist: float = (
+            self.focus_dist if self.focus_dist is not None
+            else (position - aim).length()
+        )
+        return PositionableCamera(
+            position, aim, self.up_vector, interpolate(self.vfovs, frame),
+            aspect_ratio, self.aperture, focus_dist
+        )
+
+class Motion(NamedTuple):
+    """
+    Keyframes for the center and the radius of sphere number `sphere` of an
+    animation. Either can be left out, to keep what the sphere has.
+    """
+    sphere: int
+    centers: Sequence[Key] = ()
+    radii: Sequence[Key] = ()
+
+class Animation(NamedTuple):
+    """
+    `frames` frames, numbered from 0, of `spheres` seen through `camera`.
+    """
+    spheres: List[Sphere]
+    camera: CameraPath
+    motions: Sequence[Motion] = ()
+    frames: int = 24
+    shading: str = "path"
+
+    def scene(self, frame: float, aspect_ratio: float) -> Scene:
+        """
+        Move the spheres to where they are at `frame` (in place) and return
+        the scene as seen from there.
+        """
+        for motion in self.motions:
+            sphere: Sphere = self.spheres[motion.sphere]
+            if motion.centers:
+                sphere.center = interpolate(motion.centers, frame)
+            if motion.radii:
+                sphere.radius = interpolate(motion.radii, frame)
+        hittables: List[Hittable] = list(self.spheres)
+        return Scene(
+            hittables, self.camera.camera(frame, aspect_ratio), self.shading
+        )
+
+def png(width: int, height: int, pixels: bytes) -> bytes:
+    """
+    An 8-bit RGB PNG of `pixels`, the rows from the top down, with nothing but
+    zlib.
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data +
+            struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    stride: int = width * 3
+    # Every row starts with its filter type, none.
+    rows: bytes = b"".join(
+        b"\x00" + pixels[row * stride:(row + 1) * stride]
+        for row in range(height)
+    )
+    return (
+        b"\x89PNG\r\n\x1a\n" +
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+        chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+    )
+
+def write_frame(filename: str, width: int, height: int, pixels: bytes):
+    with open(filename, "wb") as frame_file:
+        if filename.endswith(".ppm"):
+            frame_file.write(b"P6\n%d %d\n255\n" % (width, height))
+            frame_file.write(pixels)
+        else:
+            frame_file.write(png(width, height, pixels))
+
+class FrameRenderer(object):
+    """
+    Renders the frames of an animation, in any order, keeping the world it
+    traces from one frame to the next. `backend` is "scalar", "flat" or
+    "numpy".
+    """
+
+    def __init__(
+        self, animation: Animation, width: int, height: int, samples: int,
+        seed: int, backend: str="scalar", sampler: str="random"
+    ):
+        self.animation: Animation = animation
+        self.width: int = width
+        self.height: int = height
+        self.samples: int = samples
+        self.seed: int = seed
+        self.backend: str = backend
+        self.sampler: str = sampler
+        self.builds: int = 0
+        self.__bvh: Optional[BVH] = None
+        self.__wavefront: Any = None
+
+    def render(self, frame: int) -> bytes:
+        """
+        Frame number `frame` as 8-bit RGB, the rows from the top down.
+        """
+        scene: Scene = self.animation.scene(frame, self.width / self.height)
+        if self.backend == "numpy":
+            return self.__render_numpy(scene)
+
+        if self.__bvh is None or self.__bvh.refit() > REBUILD:
+            self.__bvh = BVH(scene.hittables)
+            self.builds += 1
+        if self.backend == "flat":
+            from one_week import flat
+
+            return bytes(
+                component
+                for row in flat.trace(
+                    flat.FlatScene.from_hittables(
+                        scene.hittables, self.__bvh
+                    ),
+                    scene.camera, self.width, self.height, self.samples,
+                    self.seed, scene.shading, scene.gamma_correct
+                )
+                for component in row
+            )
+        return bytes(
+            component
+            for row in trace_scalar(
+                scene._replace(world=self.__bvh), self.width, self.height,
+                self.samples, self.seed
+            )
+            for pixel in row for component in pixel.make_tuple()
+        )
+
+    def __render_numpy(self, scene: Scene) -> bytes:
+        from one_week import wavefront
+        from one_week.framebuffer import quantize
+        from one_week.sampler import make_sampler
+        import numpy as np
+
+        if self.__wavefront is None:
+            self.__wavefront = wavefront.WavefrontScene.from_hittables(
+                scene.hittables
+            )
+            self.builds += 1
+        else:
+            self.__wavefront.spheres.move(
+                np.array([
+                    sphere.center.make_tuple() for sphere in self.animation.spheres
+                ]),
+                np.array([sphere.radius for sphere in self.animation.spheres])
+            )
+        pixels: np.ndarray = wavefront.render(
+            self.__wavefront, scene.camera, self.width, self.height,
+            self.samples, self.seed, scene.shading,
+            sampler=make_sampler(self.sampler, self.samples)
+        )
+        return quantize(pixels, scene.gamma_correct).tobytes()
+
+# The FrameRenderer of a worker process.
+_renderer: Optional[FrameRenderer] = None
+
+def _start_worker(*arguments):
+    global _renderer
+    _renderer = FrameRenderer(*arguments)
+
+def _render_frame(frame: int) -> bytes:
+    return _renderer.render(frame)  # type: ignore
+
+def render_frames(
+    animation: Animation, width: int, height: int, samples: int,
+    workers: int=1, seed: Optional[int]=None, backend: str="scalar",
+    sampler: str="random"
+) -> Iterator[bytes]:
+    """
+    Every frame of `animation`, in order, as `FrameRenderer.render` has it.
+    With more than one worker, the frames are rendered by as many processes,
+    a few frames ahead of the one the caller is on.
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    arguments = (animation, width, height, samples, seed, backend, sampler)
+    if workers == 1:
+        renderer: FrameRenderer = FrameRenderer(*arguments)
+        for frame in range(animation.frames):
+            yield renderer.render(frame)
+        return
+
+    # Not forked: a pool started from a program with threads of its own (like
+    # the encoder) could fork one while it holds a lock.
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, mp_context=context, initializer=_start_worker,
+        initargs=arguments
+    ) as executor:
+        # Enough frames in flight to keep every worker busy, and few enough
+        # that the rendered ones don't pile up waiting to be encoded.
+        pending: Deque[concurrent.futures.Future] = collections.deque()
+        frames: Iterator[int] = iter(range(animation.frames))
+        for frame in frames:
+            pending.append(executor.submit(_render_frame, frame))
+            if len(pending) == 2 * workers:
+                break
+        while pending:
+            pixels: bytes = pending.popleft().result()
+            for frame in frames:
+                pending.append(executor.submit(_render_frame, frame))
+                break
+            yield pixels
+
+def render(
+    animation: Animation, width: int, height: int, samples: int,
+    pattern: str, workers: Optional[int]=None, backend: str="auto",
+    seed: Optional[int]=None, sampler: str="random", progress: str="human"
+) -> List[str]:
+    """
+    Render every frame of `animation` into `pattern % frame` and return the
+    file names. `backend` is "scalar", "flat", "numpy", or "auto" for NumPy
+    if it's there (the parallel backend renders frames in parallel the same
+    way).
+    Every frame written is reported in the `progress` mode (see
+    one_week.progress).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    backend = pick_backend(backend, workers)
+    if backend == "distributed":
+        raise ValueError("Animations can't be rendered on other machines yet")
+    if backend == "parallel":
+        backend = "numpy"
+    if backend in ("scalar", "flat") and sampler != "random":
+        raise ValueError("The %s backend only samples at random" % backend)
+    if backend == "flat":
+        from one_week import flat
+
+        # Better now than in every worker at the first frame.
+        if not flat.can_trace(animation.spheres):
+            raise ValueError(
+                "The flat backend only traces spheres of the materials in "
+                "one_week.material"
+            )
+
+    filenames: List[str] = []
+    # One frame being written while the next one renders.
+    with concurrent.futures.ThreadPoolExecutor(1) as encoder, Progress(
+        animation.frames, animation.frames * width * height * samples,
+        "frames", progress
+    ) as reporter:
+        writing: Optional[concurrent.futures.Future] = None
+        for frame, pixels in enumerate(render_frames(
+            animation, width, height, samples, workers, seed, backend, sampler
+        )):
+            if writing is not None:
+                writing.result()
+                reporter.update(1, width * height * samples)
+            filenames.append(pattern % frame)
+            writing = encoder.submit(
+                write_frame, filenames[-1], width, height, pixels
+            )
+        if writing is not None:
+            writing.result()
+            reporter.update(1, width * height * samples)
+    return filenames
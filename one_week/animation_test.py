@@ -0,0 +1,173 @@
+from one_week import animation
+from one_week.animation import Animation, CameraPath, Key, Motion
+from one_week.engine import trace_scalar
+from one_week.material import Lambertian, Metal
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+try:
+    import numpy as np
+    from one_week import wavefront
+    from one_week.framebuffer import quantize
+except ImportError:
+    wavefront = None
+
+class Shiny(Metal):
+    """
+    Scatters like a Metal, but the flat tracer can't know that.
+    """
+
+def make_animation(frames=3):
+    spheres = [
+        Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.8, 0.3, 0.3))),
+        Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0))),
+        Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3))
+    ]
+    camera = CameraPath(
+        [Key(0, Vec3(0, 0.5, 1)), Key(frames - 1, Vec3(1, 1, 1))],
+        [Key(0, Vec3(0, 0, -1))], [Key(0, 60.0)]
+    )
+    motions = [
+        Motion(0, [Key(0, Vec3(0, 0, -1)), Key(frames - 1, Vec3(-1, 0.5, -1))],
+               [Key(0, 0.5), Key(frames - 1, 0.3)])
+    ]
+    return Animation(spheres, camera, motions, frames)
+
+class AnimationTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pattern = os.path.join(directory.name, "frame-%02d.ppm")
+
+    def test_interpolate(self):
+        keys = [Key(2, 1.0), Key(4, 3.0), Key(4, 10.0), Key(6, 0.0)]
+        self.assertEqual(1.0, animation.interpolate(keys, 0))
+        self.assertEqual(2.0, animation.interpolate(keys, 3))
+        self.assertEqual(3.0, animation.interpolate(keys, 4))
+        self.assertEqual(5.0, animation.interpolate(keys, 5))
+        self.assertEqual(0.0, animation.interpolate(keys, 9))
+        self.assertEqual(
+            Vec3(0.5, 1, 0),
+            animation.interpolate(
+                [Key(0, Vec3(0, 0, 0)), Key(2, Vec3(1, 2, 0))], 1
+            )
+        )
+        with self.assertRaises(ValueError):
+            animation.interpolate([], 0)
+
+    def test_scene(self):
+        made = make_animation()
+        scene = made.scene(1, 2)
+        self.assertEqual(Vec3(-0.5, 0.25, -1), made.spheres[0].center)
+        self.assertAlmostEqual(0.4, made.spheres[0].radius)
+        self.assertEqual(Vec3(0.5, 0.75, 1), scene.camera.origin)
+        # Everything around the aim is in focus.
+        self.assertEqual(0, scene.camera.lens_radius)
+        self.assertEqual(made.spheres, scene.hittables)
+
+    def test_png(self):
+        pixels = bytes(range(2 * 3 * 3))
+        data = animation.png(3, 2, pixels)
+        self.assertEqual(b"\x89PNG\r\n\x1a\n", data[:8])
+        self.assertEqual((3, 2), struct.unpack(">II", data[16:24]))
+        length, = struct.unpack(">I", data[33:37])
+        self.assertEqual(b"IDAT", data[37:41])
+        rows = zlib.decompress(data[41:41 + length])
+        self.assertEqual(
+            b"\x00" + pixels[:9] + b"\x00" + pixels[9:], rows
+        )
+
+    def read_frames(self, filenames):
+        frames = []
+        for filename in filenames:
+            with open(filename, "rb") as frame_file:
+                self.assertEqual(b"P6\n8 4\n255\n", frame_file.read(11))
+                frames.append(frame_file.read())
+        return frames
+
+    def test_refit_matches_a_new_world(self):
+        filenames = animation.render(
+            make_animation(), 8, 4, 2, self.pattern, workers=1,
+            backend="scalar", seed=5
+        )
+        self.assertEqual(
+            [self.pattern % frame for frame in range(3)], filenames
+        )
+        frames = self.read_frames(filenames)
+        self.assertNotEqual(frames[0], frames[2])
+
+        # Built from scratch for the last frame only.
+        scene = make_animation().scene(2, 2)
+        expected = bytes(
+            component for row in trace_scalar(scene, 8, 4, 2, 5)
+            for pixel in row for component in pixel.make_tuple()
+        )
+        self.assertEqual(expected, frames[2])
+
+    def test_workers(self):
+        one = self.read_frames(animation.render(
+            make_animation(4), 8, 4, 2, self.pattern, workers=1,
+            backend="scalar", seed=5
+        ))
+        two = self.read_frames(animation.render(
+            make_animation(4), 8, 4, 2, self.pattern, workers=2,
+            backend="scalar", seed=5
+        ))
+        self.assertEqual(one, two)
+
+    def test_backends(self):
+        with self.assertRaises(ValueError):
+            animation.render(
+                make_animation(), 8, 4, 2, self.pattern, backend="distributed"
+            )
+        with self.assertRaises(ValueError):
+            animation.render(
+                make_animation(), 8, 4, 2, self.pattern, backend="scalar",
+                sampler="sobol"
+            )
+
+    def test_flat(self):
+        # The flat tracer walks the same refit BVH as the scalar one, so
+        # the frames come out the same.
+        scalar = self.read_frames(animation.render(
+            make_animation(), 8, 4, 2, self.pattern, workers=1,
+            backend="scalar", seed=5
+        ))
+        flat = self.read_frames(animation.render(
+            make_animation(), 8, 4, 2, self.pattern, workers=1,
+            backend="flat", seed=5
+        ))
+        self.assertEqual(scalar, flat)
+
+        unknown = make_animation()
+        unknown.spheres[0].material = Shiny(Vec3(0.8, 0.6, 0.2), 0.3)
+        with self.assertRaises(ValueError):
+            animation.render(unknown, 8, 4, 2, self.pattern, backend="flat")
+        with self.assertRaises(ValueError):
+            animation.render(
+                make_animation(), 8, 4, 2, self.pattern, backend="flat",
+                sampler="sobol"
+            )
+
+    @unittest.skipIf(wavefront is None, "needs NumPy")
+    def test_numpy(self):
+        frames = self.read_frames(animation.render(
+            make_animation(), 8, 4, 2, self.pattern, workers=1,
+            backend="numpy", seed=5
+        ))
+        scene = make_animation().scene(2, 2)
+        expected = quantize(wavefront.render(
+            wavefront.WavefrontScene.from_hittables(scene.hittables),
+            scene.camera, 8, 4, 2, 5
+        ))
+        self.assertEqual(expected.tobytes(), frames[2])
+
+if __name__ == "__main__":
+    unittest.main()
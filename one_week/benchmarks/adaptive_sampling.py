@@ -0,0 +1,109 @@
+"""
+How much does adaptive sampling save over a fixed number of samples per pixel?
+
+Renders the three-spheres scene of the numbered scripts adaptively (with the
+default tolerance, and again on a tight budget), and with fixed numbers of
+samples per pixel around the same total. Everything is compared against a
+reference with many more samples. Reports the error (RMS and worst pixel,
+after gamma correction) and the samples spent, and writes the adaptive render
+and its sample-count map to /tmp.
+
+Run with:
+
+    python -m one_week.benchmarks.adaptive_sampling
+"""
+from one_week.camera import Camera
+from one_week.framebuffer import FrameBuffer
+from one_week.material import Dielectric, Lambertian, Metal
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import numpy as np
+import time
+
+from one_week import adaptive, wavefront
+
+WIDTH: int = 200
+HEIGHT: int = 100
+BUDGET_SAMPLES: int = 32
+REFERENCE_SAMPLES: int = 1024
+
+def report(
+    name: str, image: np.ndarray, samples: float, reference: np.ndarray,
+    elapsed: float
+):
+    errors: np.ndarray = np.abs(np.sqrt(image) - np.sqrt(reference))
+    print("%16s %12.1f %10.5f %10.5f %9.2f" % (
+        name, samples, np.sqrt((errors ** 2).mean()), errors.max(), elapsed
+    ))
+
+if __name__ == "__main__":
+    scene = wavefront.WavefrontScene.from_hittables([
+        Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.1, 0.2, 0.5))),
+        Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0))),
+        Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
+        Sphere(Vec3(-1, 0, -1), 0.5, Dielectric(1.5)),
+        Sphere(Vec3(-1, 0, -1), -0.45, Dielectric(1.5))
+    ])
+    camera = Camera(
+        Vec3(-2, -1, -1), Vec3(4, 0, 0), Vec3(0, 2, 0), Vec3(0, 0, 0)
+    )
+    pixels: int = WIDTH * HEIGHT
+
+    reference: np.ndarray = wavefront.render(
+        scene, camera, WIDTH, HEIGHT, REFERENCE_SAMPLES, 0
+    )
+
+    print("%16s %12s %10s %10s %9s" % (
+        "", "samples/px", "RMS error", "worst", "seconds"
+    ))
+    start: float = time.perf_counter()
+    adaptive_image: adaptive.AdaptiveImage = adaptive.render(
+        scene, camera, WIDTH, HEIGHT, seed=1
+    )
+    report(
+        "adaptive", adaptive_image.colors,
+        adaptive_image.samples.sum() / pixels, reference,
+        time.perf_counter() - start
+    )
+    spent: int = int(np.ceil(adaptive_image.samples.sum() / pixels))
+
+    for samples in (spent, 2 * spent):
+        start = time.perf_counter()
+        fixed: np.ndarray = wavefront.render(
+            scene, camera, WIDTH, HEIGHT, samples, 2
+        )
+        report(
+            "fixed", fixed, samples, reference, time.perf_counter() - start
+        )
+
+    start = time.perf_counter()
+    budgeted: adaptive.AdaptiveImage = adaptive.render(
+        scene, camera, WIDTH, HEIGHT, min_samples=8,
+        budget=BUDGET_SAMPLES * pixels, seed=3
+    )
+    report(
+        "adaptive, budget", budgeted.colors, budgeted.samples.sum() / pixels,
+        reference, time.perf_counter() - start
+    )
+    start = time.perf_counter()
+    fixed = wavefront.render(
+        scene, camera, WIDTH, HEIGHT, BUDGET_SAMPLES, 4
+    )
+    report(
+        "fixed", fixed, BUDGET_SAMPLES, reference, time.perf_counter() - start
+    )
+
+    print(
+        "adaptive samples per pixel: min %d, median %d, max %d" % (
+            adaptive_image.samples.min(), np.median(adaptive_image.samples),
+            adaptive_image.samples.max()
+        )
+    )
+
+    FrameBuffer(WIDTH, HEIGHT, adaptive_image.colors).write(
+        "/tmp/adaptive_sampling.ppm"
+    )
+    FrameBuffer(WIDTH, HEIGHT, adaptive_image.sample_map()).write(
+        "/tmp/adaptive_sampling_samples.ppm", gamma_correct=False
+    )
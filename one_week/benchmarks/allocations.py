@@ -0,0 +1,127 @@
+"""
+How many objects does tracing a ray make?
+
+Traces camera rays through the 8_dielectrics scene with `integrator.color` and
+counts how many Vec3, Ray, HitRecord and ReflectionRecord objects get built
+per camera ray, along with the time per ray (measured separately, since
+counting is slow). It does that twice: with the classes as they were before
+they got `__slots__` and the hot path stopped making temporaries (kept in
+`unslotted.py`), and with the classes as they are, and prints both and the
+difference.
+
+Run with:
+
+    python -m one_week.benchmarks.allocations
+"""
+from one_week.camera import PositionableCamera
+from one_week.hittable import HitRecord, HittableList
+from one_week.integrator import color
+from one_week.material import (
+    Dielectric, Lambertian, Metal, ReflectionRecord
+)
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import one_week.benchmarks.unslotted as unslotted
+import random
+import sys
+import time
+
+RAYS: int = 2000
+# The classes the tracer uses now, to measure against `unslotted`.
+CURRENT: SimpleNamespace = SimpleNamespace(
+    Vec3=Vec3, Ray=Ray, HitRecord=HitRecord, ReflectionRecord=ReflectionRecord,
+    Sphere=Sphere, HittableList=HittableList,
+    PositionableCamera=PositionableCamera, Lambertian=Lambertian, Metal=Metal,
+    Dielectric=Dielectric
+)
+
+def count_constructions(trace, classes: List[type]) -> Dict[str, int]:
+    """
+    Run trace() and count calls to the __init__ of each class. Hooking
+    __init__ works whether or not a class has __slots__.
+    """
+    codes = {cls.__init__.__code__: cls.__name__ for cls in classes}
+    counts: Dict[str, int] = {cls.__name__: 0 for cls in classes}
+
+    def profile(frame, event, arg):
+        if event == "call" and frame.f_code in codes:
+            counts[codes[frame.f_code]] += 1
+
+    sys.setprofile(profile)
+    try:
+        trace()
+    finally:
+        sys.setprofile(None)
+
+    return counts
+
+def measure(
+    classes, rays: int=RAYS
+) -> Tuple[Dict[str, float], float]:
+    """
+    The objects made per camera ray, by class name, and the microseconds per
+    ray, tracing `rays` rays with the Vec3, Sphere, camera and materials of
+    `classes` (`CURRENT` or the `unslotted` module).
+    """
+    world = classes.HittableList([
+        classes.Sphere(
+            classes.Vec3(0, 0, -1), 0.5,
+            classes.Lambertian(classes.Vec3(0.8, 0.3, 0.3))
+        ),
+        classes.Sphere(
+            classes.Vec3(0, -100.5, -1), 100,
+            classes.Lambertian(classes.Vec3(0.8, 0.8, 0))
+        ),
+        classes.Sphere(
+            classes.Vec3(1, 0, -1), 0.5,
+            classes.Metal(classes.Vec3(0.8, 0.6, 0.2), 0.3)
+        ),
+        classes.Sphere(
+            classes.Vec3(-1, 0, -1), 0.5, classes.Dielectric(1.5)
+        )
+    ])
+    lookfrom = classes.Vec3(3, 3, 2)
+    lookat = classes.Vec3(0, 0, -1)
+    camera = classes.PositionableCamera(
+        lookfrom, lookat, classes.Vec3(0, 1, 0), 20, 2, 0.1,
+        (lookfrom - lookat).length()
+    )
+
+    def trace():
+        random.seed(0)
+        for _ in range(rays):
+            ray = camera.get_ray(random.random(), random.random())
+            color(ray, world)
+
+    counts: Dict[str, int] = count_constructions(trace, [
+        classes.Vec3, classes.Ray, classes.HitRecord, classes.ReflectionRecord
+    ])
+    start: float = time.perf_counter()
+    trace()
+    elapsed: float = time.perf_counter() - start
+
+    return (
+        {name: count / rays for name, count in counts.items()},
+        elapsed / rays * 1e6
+    )
+
+if __name__ == "__main__":
+    before, before_time = measure(unslotted)
+    after, after_time = measure(CURRENT)
+    before["total"] = sum(before.values())
+    after["total"] = sum(after.values())
+
+    print("%16s %10s %10s" % ("per ray", "before", "after"))
+    for name in before:
+        print("%16s %10.1f %10.1f %+9.0f%%" % (
+            name, before[name], after[name],
+            100 * (after[name] - before[name]) / before[name]
+        ))
+    print("%16s %10.1f %10.1f %+9.0f%%" % (
+        "time (us)", before_time, after_time,
+        100 * (after_time - before_time) / before_time
+    ))
@@ -0,0 +1,18 @@
+from one_week.benchmarks import allocations, unslotted
+
+import unittest
+
+class AllocationsTest(unittest.TestCase):
+
+    def test_measure(self):
+        before, before_time = allocations.measure(unslotted, 100)
+        after, after_time = allocations.measure(allocations.CURRENT, 100)
+        self.assertEqual(list(before), list(after))
+        self.assertEqual(
+            ["Vec3", "Ray", "HitRecord", "ReflectionRecord"], list(after)
+        )
+        # Every camera ray is a Ray, slotted or not, but the old path makes
+        # several times the Vec3s.
+        self.assertTrue(after["Ray"] >= 1)
+        self.assertTrue(before["Vec3"] > 4 * after["Vec3"])
+        self.assertTrue(before_time > 0 and after_time > 0)
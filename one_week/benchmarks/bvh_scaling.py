@@ -0,0 +1,87 @@
+"""
+How does the cost of finding the closest hit scale with the number of spheres?
+
+Traces the same set of camera rays against random_scene-style worlds of
+increasing size, once through a HittableList and once through a BVH, and
+reports the time per ray and the number of `Sphere.hit` calls per ray. If NumPy
+is around, SphereArray is timed too (it doesn't call `Sphere.hit` at all).
+
+Run with:
+
+    python -m one_week.benchmarks.bvh_scaling
+"""
+from one_week.bvh import BVH
+from one_week.camera import PositionableCamera
+from one_week.hittable import Hittable, HittableList
+from one_week.ray import Ray
+from one_week.scene_generator import random_scene
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import List
+
+import random
+import sys
+import time
+
+try:
+    from one_week.sphere_array import SphereArray
+except ImportError:
+    SphereArray = None
+
+class CountingSphere(Sphere):
+    """
+    A Sphere that keeps track of how many times it has been tested.
+    """
+
+    calls: int = 0
+
+    def hit(self, ray, t_min, t_max):
+        CountingSphere.calls += 1
+        return super().hit(ray, t_min, t_max)
+
+def counting_scene(half_extent: int) -> List[Hittable]:
+    random.seed(half_extent)
+    return [
+        CountingSphere(s.center, s.radius, s.material)  # type: ignore
+        for s in random_scene(-half_extent, half_extent, -half_extent, half_extent)
+    ]
+
+def camera_rays(count: int) -> List[Ray]:
+    camera = PositionableCamera(
+        Vec3(13, 2, 3), Vec3(0, 0, 0), Vec3(0, 1, 0), 20, 1.5, 0.1, 10.0
+    )
+    random.seed(0)
+    return [camera.get_ray(random.random(), random.random()) for _ in range(count)]
+
+def measure(world: Hittable, rays: List[Ray]) -> tuple:
+    CountingSphere.calls = 0
+    start: float = time.perf_counter()
+    for ray in rays:
+        world.hit(ray, 0.001, sys.float_info.max)
+    elapsed: float = time.perf_counter() - start
+    return elapsed / len(rays), CountingSphere.calls / len(rays)
+
+if __name__ == "__main__":
+    rays: List[Ray] = camera_rays(2000)
+    print(
+        "%8s | %14s %12s | %14s %12s %9s | %14s" % (
+            "spheres", "list us/ray", "hits/ray", "bvh us/ray", "hits/ray",
+            "speedup", "array us/ray"
+        )
+    )
+    for half_extent in (1, 2, 4, 6, 8, 11, 16):
+        scene: List[Hittable] = counting_scene(half_extent)
+        bvh: BVH = BVH(scene)
+        list_time, list_tests = measure(HittableList(scene), rays)
+        bvh_time, bvh_tests = measure(bvh, rays)
+        array_time: str = "n/a"
+        if SphereArray is not None:
+            array_time = "%.1f" % (
+                measure(SphereArray.from_spheres(scene), rays)[0] * 1e6
+            )
+        print(
+            "%8d | %14.1f %12.1f | %14.1f %12.1f %8.1fx | %14s" % (
+                len(scene), list_time * 1e6, list_tests, bvh_time * 1e6,
+                bvh_tests, list_time / bvh_time, array_time
+            )
+        )
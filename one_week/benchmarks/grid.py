@@ -0,0 +1,90 @@
+"""
+When is a uniform grid worth it, and how fine should it be?
+
+Traces the same camera rays (those of the cover) against random_scene-style
+worlds of increasing size, through a HittableList, a BVH and a UniformGrid,
+and reports the time per ray, the `Sphere.hit` calls per ray and the time to
+build each. Then does the same for the cover with most of its spheres
+crowded into one spot, which is what grids are bad at, and for the cover at
+a few grid densities. Every scene also gets what `grid.accelerate` picks for
+it, and the statistics it goes by.
+
+Run with:
+
+    python -m one_week.benchmarks.grid
+"""
+from one_week.benchmarks.bvh_scaling import (
+    CountingSphere, camera_rays, counting_scene, measure
+)
+from one_week.bvh import BVH
+from one_week.grid import GridStatistics, UniformGrid, accelerate
+from one_week.hittable import Hittable, HittableList
+from one_week.ray import Ray
+from one_week.vec3 import Vec3
+from typing import Callable, List, Tuple
+
+import random
+import time
+
+def build(make: Callable[[], Hittable]) -> Tuple[Hittable, float]:
+    start: float = time.perf_counter()
+    world: Hittable = make()
+    return world, time.perf_counter() - start
+
+def crowded_scene(count: int) -> List[Hittable]:
+    """
+    The cover, plus `count` small spheres around the glass one.
+    """
+    scene: List[Hittable] = counting_scene(11)
+    rng: random.Random = random.Random(count)
+    material = scene[-3].material
+    return scene + [
+        CountingSphere(Vec3(
+            rng.uniform(-0.8, 0.8), rng.uniform(0.2, 1.8), rng.uniform(-0.8, 0.8)
+        ), 0.03, material)
+        for _ in range(count)
+    ]
+
+def compare(name: str, scene: List[Hittable], rays: List[Ray]):
+    worlds: List[Tuple[str, Callable[[], Hittable]]] = [
+        ("list", lambda: HittableList(scene)),
+        ("bvh", lambda: BVH(scene)),
+        ("grid", lambda: UniformGrid(scene)),
+    ]
+    print(name)
+    for label, make in worlds:
+        world, build_time = build(make)
+        ray_time, tests = measure(world, rays)
+        print("  %6s %10.1f us/ray %8.1f hits/ray %9.1f ms build" % (
+            label, ray_time * 1e6, tests, build_time * 1e3
+        ))
+    grid: UniformGrid = UniformGrid(scene)
+    statistics: GridStatistics = grid.statistics()
+    print(
+        "  %d objects, %d large, grid %s, %.0f%% occupied, crowding %.2f: "
+        "accelerate picks %s" % (
+            statistics.objects, statistics.large,
+            "x".join(str(count) for count in statistics.resolution),
+            100 * statistics.occupied, statistics.crowding,
+            type(accelerate(scene)).__name__
+        )
+    )
+
+if __name__ == "__main__":
+    rays: List[Ray] = camera_rays(2000)
+    for half_extent in (1, 2, 4, 11, 16):
+        compare(
+            "random_scene(-%d, %d)" % (half_extent, half_extent),
+            counting_scene(half_extent), rays
+        )
+    compare("cover, 2000 more spheres in one spot", crowded_scene(2000), rays)
+
+    print("cover, by grid density (cells per object)")
+    cover: List[Hittable] = counting_scene(11)
+    for density in (0.5, 1, 2, 4, 8, 16):
+        grid: UniformGrid = UniformGrid(cover, density)
+        ray_time, tests = measure(grid, rays)
+        print("  %6.1f %10.1f us/ray %8.1f hits/ray   grid %s" % (
+            density, ray_time * 1e6, tests,
+            "x".join(str(count) for count in grid.resolution)
+        ))
@@ -0,0 +1,54 @@
+"""
+How does the multi-process renderer scale with the number of workers?
+
+Renders the scene_generator scene at a small resolution with 1, 2, 4, ... up to
+as many workers as there are CPUs, and reports the throughput in paths per
+second and the speedup over a single worker.
+
+Run with:
+
+    python -m one_week.benchmarks.parallel_scaling
+"""
+from one_week.camera import PositionableCamera
+from one_week.hittable import Hittable
+from one_week.scene_generator import random_scene
+from one_week.vec3 import Vec3
+from typing import List
+
+import os
+import random
+import time
+
+from one_week import parallel
+
+WIDTH: int = 240
+HEIGHT: int = 160
+SAMPLES: int = 4
+
+def worker_counts() -> List[int]:
+    cpus: int = os.cpu_count() or 1
+    counts: List[int] = []
+    count: int = 1
+    while count < cpus:
+        counts.append(count)
+        count *= 2
+    counts.append(cpus)
+    return counts
+
+if __name__ == "__main__":
+    random.seed(0)
+    scene: List[Hittable] = random_scene(-11, 11, -11, 11)
+    camera = PositionableCamera(
+        Vec3(13, 2, 3), Vec3(0, 0, 0), Vec3(0, 1, 0), 20, WIDTH / HEIGHT, 0.1,
+        10.0
+    )
+    paths: int = WIDTH * HEIGHT * SAMPLES
+
+    print("%8s %14s %9s" % ("workers", "paths/s", "speedup"))
+    single: float = 0
+    for workers in worker_counts():
+        start: float = time.perf_counter()
+        parallel.render(scene, camera, WIDTH, HEIGHT, SAMPLES, workers, seed=0)
+        elapsed: float = time.perf_counter() - start
+        single = single or elapsed
+        print("%8d %14.0f %8.2fx" % (workers, paths / elapsed, single / elapsed))
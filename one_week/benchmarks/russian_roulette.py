@@ -0,0 +1,101 @@
+"""
+How much shorter do paths get with Russian roulette?
+
+Traces camera rays through `scene_generator.random_scene` with the scalar
+integrator, with and without Russian roulette, and reports the bounces (calls
+to `Material.scatter`) and the time per camera ray. Then times the wavefront
+tracer on a frame's worth of camera rays both ways, if NumPy is around.
+
+Run with:
+
+    python -m one_week.benchmarks.russian_roulette
+"""
+from one_week.bvh import BVH
+from one_week.camera import PositionableCamera
+from one_week.integrator import ROULETTE_DEPTH, color
+from one_week.vec3 import Vec3
+
+import importlib
+import random
+import time
+
+RAYS: int = 5000
+WIDTH: int = 120
+HEIGHT: int = 80
+SAMPLES: int = 8
+
+if __name__ == "__main__":
+    scene_generator = importlib.import_module("one_week.scene_generator")
+    random.seed(0)
+    hittables = scene_generator.random_scene(-11, 11, -11, 11)
+    world = BVH(hittables)
+    camera = PositionableCamera(
+        Vec3(13, 2, 3), Vec3(0, 0, 0), Vec3(0, 1, 0), 20, WIDTH / HEIGHT, 0.1,
+        10.0
+    )
+
+    scatters: int = 0
+    materials = {type(hittable.material) for hittable in hittables}
+    originals = {cls: cls.scatter for cls in materials}
+
+    def counted(scatter):
+        def wrapper(self, incident_ray, record):
+            global scatters
+            scatters += 1
+            return scatter(self, incident_ray, record)
+        return wrapper
+
+    print("%16s %12s %12s" % ("scalar", "bounces/ray", "us/ray"))
+    for name, roulette_depth in (
+        ("no roulette", None), ("roulette", ROULETTE_DEPTH)
+    ):
+        random.seed(1)
+        rays = [
+            camera.get_ray(random.random(), random.random())
+            for _ in range(RAYS)
+        ]
+
+        for cls in materials:
+            cls.scatter = counted(originals[cls])
+        scatters = 0
+        for ray in rays:
+            color(ray, world, roulette_depth=roulette_depth)
+        for cls in materials:
+            cls.scatter = originals[cls]
+
+        start: float = time.perf_counter()
+        for ray in rays:
+            color(ray, world, roulette_depth=roulette_depth)
+        elapsed: float = time.perf_counter() - start
+        print("%16s %12.2f %12.1f" % (
+            name, scatters / RAYS, elapsed / RAYS * 1e6
+        ))
+
+    try:
+        from one_week import wavefront
+        import numpy as np
+    except ImportError:
+        wavefront = None
+
+    if wavefront is not None:
+        scene = wavefront.WavefrontScene.from_hittables(hittables)
+        rows, cols = np.mgrid[0:HEIGHT, 0:WIDTH]
+        randoms = wavefront.PathRandom(
+            2, np.repeat(np.arange(WIDTH * HEIGHT), SAMPLES),
+            np.tile(np.arange(SAMPLES), WIDTH * HEIGHT)
+        )
+        origins, directions = wavefront.camera_rays(
+            wavefront.WavefrontCamera.from_camera(camera),
+            np.repeat((cols.ravel() + 0.5) / WIDTH, SAMPLES),
+            np.repeat((rows.ravel() + 0.5) / HEIGHT, SAMPLES), randoms
+        )
+        print("%16s %12s" % ("wavefront", "seconds"))
+        for name, roulette_depth in (
+            ("no roulette", None), ("roulette", ROULETTE_DEPTH)
+        ):
+            start = time.perf_counter()
+            wavefront.trace_paths(
+                scene, origins, directions, randoms,
+                roulette_depth=roulette_depth
+            )
+            print("%16s %12.2f" % (name, time.perf_counter() - start))
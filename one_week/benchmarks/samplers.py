@@ -0,0 +1,69 @@
+"""
+How many samples per pixel does each sampler need for the noise of 200 random
+ones?
+
+Renders 8_dielectrics, and 8_positionable_cam_dielectrics (whose wide
+aperture puts the lens dimensions to work too), with every sampler at a few
+sample counts, and compares them against a Sobol reference with many more
+samples. Reports the RMS error after gamma correction, and how many samples
+each sampler needed to be at least as good as random at 200.
+
+Run with:
+
+    python -m one_week.benchmarks.samplers
+"""
+from one_week.rng import SAMPLERS
+from typing import Dict, List
+
+import importlib
+import numpy as np
+import time
+
+from one_week import sampler, wavefront
+
+WIDTH: int = 100
+HEIGHT: int = 50
+SAMPLE_COUNTS: List[int] = [16, 32, 64, 128, 200]
+REFERENCE_SAMPLES: int = 4096
+
+def rms_error(image: np.ndarray, reference: np.ndarray) -> float:
+    return float(np.sqrt(
+        ((np.sqrt(image) - np.sqrt(reference)) ** 2).mean()
+    ))
+
+if __name__ == "__main__":
+    for module_name in ("8_dielectrics", "8_positionable_cam_dielectrics"):
+        module = importlib.import_module("one_week.%s" % module_name)
+        made = module.scene(WIDTH, HEIGHT)
+        scene = wavefront.WavefrontScene.from_hittables(made.hittables)
+        reference: np.ndarray = wavefront.render(
+            scene, made.camera, WIDTH, HEIGHT, REFERENCE_SAMPLES, 0,
+            sampler=sampler.SobolSampler()
+        )
+
+        print(module_name)
+        print("%12s" % "samples" + "".join("%10d" % n for n in SAMPLE_COUNTS))
+        errors: Dict[str, List[float]] = {}
+        for name in SAMPLERS:
+            errors[name] = []
+            start: float = time.perf_counter()
+            for samples in SAMPLE_COUNTS:
+                image: np.ndarray = wavefront.render(
+                    scene, made.camera, WIDTH, HEIGHT, samples, 1,
+                    sampler=sampler.make_sampler(name, samples)
+                )
+                errors[name].append(rms_error(image, reference))
+            print("%12s" % name + "".join(
+                "%10.5f" % error for error in errors[name]
+            ) + "   (%.1fs)" % (time.perf_counter() - start))
+
+        target: float = errors["random"][SAMPLE_COUNTS.index(200)]
+        for name in SAMPLERS:
+            enough: List[int] = [
+                samples for samples, error in zip(SAMPLE_COUNTS, errors[name])
+                if error <= target
+            ]
+            print("%12s reaches random@200 at %s samples" % (
+                name, enough[0] if enough else "more than 200"
+            ))
+        print()
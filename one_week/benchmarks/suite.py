@@ -0,0 +1,470 @@
+"""
+The benchmark suite: numbers to compare interpreters (CPython vs PyPy) and
+commits with.
+
+Micro benchmarks time single operations of the core classes: Vec3 arithmetic,
+Sphere.hit, HittableList.hit, BVH.hit and UniformGrid.hit (on the cover),
+every Material.scatter and PositionableCamera.get_ray. Each one runs over a
+fixed batch of inputs, so the loop overhead is a small part of every
+operation. Macro benchmarks trace the 8_dielectrics and scene_generator scenes
+at a small resolution, with the scalar integrator, its flat twin
+(one_week.flat, the same paths on plain floats) and, if NumPy is around, the
+wavefront one. After a run, the flat tracer's speedup over the scalar one is
+printed for every scene: run the suite under CPython and PyPy to see how much
+of it is the JIT's.
+
+Every random number is seeded, so every run does the same work. Each benchmark
+is first run until it takes at least `--min-time` seconds (which also warms up
+a JIT like PyPy's), then timed `--repeat` times. The results go to a JSON file:
+
+    {
+      "format": 1,
+      "python": {"implementation": "CPython", "version": "3.10.10", ...},
+      "commit": "24063de...",
+      "benchmarks": [
+        {"name": "vec3.add", "kind": "micro", "unit": "ns/op",
+         "runs": [...], "mean": ..., "stdev": ..., "min": ..., "cv": ...},
+        {"name": "render.8_dielectrics.scalar", "kind": "macro",
+         "unit": "rays/s", "runs": [...], ...}
+      ]
+    }
+
+where `cv` (stdev / mean) is the run-to-run variance. Run with:
+
+    python -m one_week.benchmarks.suite --output results.json
+
+and compare two result files (say, CPython's and PyPy's) with:
+
+    python -m one_week.benchmarks.suite --compare before.json after.json
+"""
+from one_week.bvh import BVH
+from one_week.camera import PositionableCamera
+from one_week.grid import UniformGrid, accelerate
+from one_week.hittable import HitRecord, Hittable, HittableList
+from one_week.integrator import color
+from one_week.material import Dielectric, Lambertian, Material, Metal
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import argparse
+import datetime
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+FORMAT: int = 1
+# How many inputs every micro benchmark goes through per call.
+BATCH: int = 256
+REPEAT: int = 5
+MIN_TIME: float = 0.2
+# The macro benchmarks' render: pixels across, pixels down, samples per pixel.
+RENDER_SIZE = (40, 20, 4)
+
+class Benchmark(NamedTuple):
+    """
+    `setup` builds the inputs and returns the function to time, which does
+    `operations` of whatever is being measured. Micro benchmarks report
+    nanoseconds per operation, macro ones rays (operations) per second.
+    """
+    name: str
+    kind: str
+    operations: int
+    setup: Callable[[], Callable[[], object]]
+
+def random_vectors(rng: random.Random, count: int=BATCH) -> List[Vec3]:
+    return [
+        Vec3(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1))
+        for _ in range(count)
+    ]
+
+def vec3_benchmark(name: str, operation: Callable[[Vec3, Vec3], object]):
+    def setup() -> Callable[[], object]:
+        rng: random.Random = random.Random(name)
+        pairs = list(zip(random_vectors(rng), random_vectors(rng)))
+
+        def run():
+            for a, b in pairs:
+                operation(a, b)
+
+        return run
+
+    return Benchmark("vec3.%s" % name, "micro", BATCH, setup)
+
+def three_spheres() -> List[Sphere]:
+    # The 8_dielectrics scene.
+    return [
+        Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.8, 0.3, 0.3))),
+        Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0))),
+        Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
+        Sphere(Vec3(-1, 0, -1), 0.5, Dielectric(1.5))
+    ]
+
+def camera_rays(rng: random.Random, count: int=BATCH) -> List[Ray]:
+    """
+    Rays from the origin into the -z half, where three_spheres are.
+    """
+    return [
+        Ray(Vec3(0, 0, 0), Vec3(rng.uniform(-2, 2), rng.uniform(-1, 1), -1))
+        for _ in range(count)
+    ]
+
+def sphere_hit_benchmark() -> Benchmark:
+    def setup() -> Callable[[], object]:
+        sphere: Sphere = three_spheres()[0]
+        rng: random.Random = random.Random("sphere.hit")
+        # About half of these hit.
+        rays: List[Ray] = [
+            Ray(
+                Vec3(0, 0, 0),
+                Vec3(rng.uniform(-0.8, 0.8), rng.uniform(-0.8, 0.8), -1)
+            ) for _ in range(BATCH)
+        ]
+
+        def run():
+            for ray in rays:
+                sphere.hit(ray, 0.001, sys.float_info.max)
+
+        return run
+
+    return Benchmark("sphere.hit", "micro", BATCH, setup)
+
+def hittable_list_benchmark() -> Benchmark:
+    def setup() -> Callable[[], object]:
+        world: HittableList = HittableList(three_spheres())
+        rays: List[Ray] = camera_rays(random.Random("hittable_list.hit"))
+
+        def run():
+            for ray in rays:
+                world.hit(ray, 0.001, sys.float_info.max)
+
+        return run
+
+    return Benchmark("hittable_list.hit", "micro", BATCH, setup)
+
+def accelerator_benchmark(
+    name: str, make: Callable[[List[Hittable]], Hittable]
+) -> Benchmark:
+    def setup() -> Callable[[], object]:
+        from one_week.scene_generator import random_scene
+
+        random.seed("cover")
+        world: Hittable = make(random_scene(-11, 11, -11, 11))
+        rng: random.Random = random.Random(name)
+        camera: PositionableCamera = PositionableCamera(
+            Vec3(13, 2, 3), Vec3(0, 0, 0), Vec3(0, 1, 0), 20, 1.5, 0.1, 10
+        )
+        random.seed(name)
+        rays: List[Ray] = [
+            camera.get_ray(rng.random(), rng.random()) for _ in range(BATCH)
+        ]
+
+        def run():
+            for ray in rays:
+                world.hit(ray, 0.001, sys.float_info.max)
+
+        return run
+
+    return Benchmark("%s.hit" % name, "micro", BATCH, setup)
+
+def scatter_benchmark(name: str, material: Material) -> Benchmark:
+    def setup() -> Callable[[], object]:
+        rng: random.Random = random.Random(name)
+        sphere: Sphere = Sphere(Vec3(0, 0, -1), 0.5, material)
+        hits: List[HitRecord] = []
+        rays: List[Ray] = []
+        while len(hits) < BATCH:
+            ray: Ray = Ray(
+                Vec3(0, 0, 0),
+                Vec3(rng.uniform(-0.5, 0.5), rng.uniform(-0.5, 0.5), -1)
+            )
+            record: Optional[HitRecord] = sphere.hit(
+                ray, 0.001, sys.float_info.max
+            )
+            if record is not None:
+                rays.append(ray)
+                hits.append(record)
+        pairs = list(zip(rays, hits))
+
+        def run():
+            random.seed(name)
+            for ray, record in pairs:
+                material.scatter(ray, record)
+
+        return run
+
+    return Benchmark("material.%s.scatter" % name, "micro", BATCH, setup)
+
+def get_ray_benchmark() -> Benchmark:
+    def setup() -> Callable[[], object]:
+        rng: random.Random = random.Random("camera.get_ray")
+        camera: PositionableCamera = PositionableCamera(
+            Vec3(3, 3, 2), Vec3(0, 0, -1), Vec3(0, 1, 0), 20, 2, 0.1, 4
+        )
+        uvs = [(rng.random(), rng.random()) for _ in range(BATCH)]
+
+        def run():
+            random.seed("camera.get_ray")
+            for u, v in uvs:
+                camera.get_ray(u, v)
+
+        return run
+
+    return Benchmark("positionable_camera.get_ray", "micro", BATCH, setup)
+
+def render_benchmark(module_name: str, backend: str) -> Benchmark:
+    width, height, samples = RENDER_SIZE
+
+    def setup() -> Callable[[], object]:
+        module = importlib.import_module("one_week.%s" % module_name)
+        # scene_generator's scene is random.
+        random.seed(module_name)
+        scene = module.scene(width, height)
+
+        if backend == "numpy":
+            from one_week import wavefront
+
+            packed = wavefront.WavefrontScene.from_hittables(scene.hittables)
+
+            def run_numpy():
+                wavefront.render(
+                    packed, scene.camera, width, height, samples, 0,
+                    scene.shading
+                )
+
+            return run_numpy
+
+        if backend == "flat":
+            from one_week import flat
+
+            flattened = flat.FlatScene.from_hittables(scene.hittables)
+
+            def run_flat():
+                random.seed(0)
+                for _ in flat.trace(
+                    flattened, scene.camera, width, height, samples,
+                    shading=scene.shading
+                ):
+                    pass
+
+            return run_flat
+
+        world = accelerate(scene.hittables)
+        camera = scene.camera
+
+        def run():
+            random.seed(0)
+            for j in range(height):
+                for i in range(width):
+                    for _ in range(samples):
+                        color(camera.get_ray(
+                            (i + random.random()) / width,
+                            (j + random.random()) / height
+                        ), world)
+
+        return run
+
+    return Benchmark(
+        "render.%s.%s" % (module_name, backend), "macro",
+        width * height * samples, setup
+    )
+
+def benchmarks() -> List[Benchmark]:
+    suite: List[Benchmark] = [
+        vec3_benchmark("add", lambda a, b: a + b),
+        vec3_benchmark("sub", lambda a, b: a - b),
+        vec3_benchmark("mul", lambda a, b: a * 0.5),
+        vec3_benchmark("dot", lambda a, b: a.dot(b)),
+        vec3_benchmark("cross", lambda a, b: a.cross(b)),
+        vec3_benchmark("length", lambda a, b: a.length()),
+        vec3_benchmark("unit_vector", lambda a, b: a.unit_vector()),
+        vec3_benchmark("mul_add", lambda a, b: a.mul_add(0.5, b)),
+        sphere_hit_benchmark(),
+        hittable_list_benchmark(),
+        accelerator_benchmark("bvh", BVH),
+        accelerator_benchmark("grid", UniformGrid),
+        scatter_benchmark("lambertian", Lambertian(Vec3(0.8, 0.3, 0.3))),
+        scatter_benchmark("metal", Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
+        scatter_benchmark("dielectric", Dielectric(1.5)),
+        get_ray_benchmark()
+    ]
+    backends: List[str] = ["scalar", "flat"]
+    if importlib.util.find_spec("numpy") is not None:
+        backends.append("numpy")
+    for module_name in ("8_dielectrics", "scene_generator"):
+        for backend in backends:
+            suite.append(render_benchmark(module_name, backend))
+    return suite
+
+def measure(
+    benchmark: Benchmark, repeat: int=REPEAT, min_time: float=MIN_TIME
+) -> Dict[str, object]:
+    run: Callable[[], object] = benchmark.setup()
+
+    # Find how many calls take at least min_time. This doubles as warm-up.
+    number: int = 1
+    while True:
+        elapsed: float = _time(run, number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    runs: List[float] = []
+    for _ in range(repeat):
+        per_operation: float = (
+            _time(run, number) / (number * benchmark.operations)
+        )
+        if benchmark.kind == "micro":
+            runs.append(per_operation * 1e9)
+        else:
+            runs.append(1 / per_operation)
+
+    mean: float = statistics.mean(runs)
+    stdev: float = statistics.stdev(runs) if len(runs) > 1 else 0.0
+    return {
+        "name": benchmark.name,
+        "kind": benchmark.kind,
+        "unit": "ns/op" if benchmark.kind == "micro" else "rays/s",
+        "operations": number * benchmark.operations,
+        "runs": runs,
+        "mean": mean,
+        "stdev": stdev,
+        "min": min(runs),
+        "cv": stdev / mean if mean else 0.0
+    }
+
+def _time(run: Callable[[], object], number: int) -> float:
+    start: float = time.perf_counter()
+    for _ in range(number):
+        run()
+    return time.perf_counter() - start
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(
+    pattern: Optional[str]=None, repeat: int=REPEAT, min_time: float=MIN_TIME,
+    report: Optional[Callable[[Dict[str, object]], None]]=None
+) -> Dict[str, object]:
+    """
+    Run every benchmark whose name matches the regular expression `pattern`
+    (all of them by default). `report` gets every result as it comes.
+    """
+    results: List[Dict[str, object]] = []
+    for benchmark in benchmarks():
+        if pattern is not None and not re.search(pattern, benchmark.name):
+            continue
+        result: Dict[str, object] = measure(benchmark, repeat, min_time)
+        results.append(result)
+        if report is not None:
+            report(result)
+
+    return {
+        "format": FORMAT,
+        "python": {
+            "implementation": platform.python_implementation(),
+            "version": platform.python_version(),
+            "executable": sys.executable
+        },
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "commit": _commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "repeat": repeat,
+        "benchmarks": results
+    }
+
+def print_result(result: dict):
+    print("%-36s %14.1f %-7s +- %5.1f%%" % (
+        result["name"], result["mean"], result["unit"],
+        100 * result["cv"]
+    ))
+
+def flat_speedups(results: dict) -> Dict[str, float]:
+    """
+    How many times faster the flat tracer rendered every scene than the
+    scalar one, in one run of the suite.
+    """
+    rates: Dict[str, float] = {
+        result["name"]: result["mean"] for result in results["benchmarks"]
+        if result["kind"] == "macro"
+    }
+    speedups: Dict[str, float] = {}
+    for name, rate in rates.items():
+        if name.endswith(".flat"):
+            scalar: str = name[:-len("flat")] + "scalar"
+            if scalar in rates:
+                speedups[name[:-len(".flat")]] = rate / rates[scalar]
+    return speedups
+
+def compare(before: dict, after: dict):
+    """
+    Print how much faster `after` is than `before`, benchmark by benchmark.
+    """
+    old: Dict[str, dict] = {
+        result["name"]: result for result in before["benchmarks"]
+    }
+    print("%-36s %14s %14s %8s" % ("", "before", "after", "speedup"))
+    for result in after["benchmarks"]:
+        if result["name"] not in old:
+            continue
+        previous: dict = old[result["name"]]
+        # Lower is better for ns/op, higher for rays/s.
+        speedup: float = (
+            previous["mean"] / result["mean"] if result["unit"] == "ns/op"
+            else result["mean"] / previous["mean"]
+        )
+        print("%-36s %14.1f %14.1f %7.2fx" % (
+            result["name"], previous["mean"], result["mean"], speedup
+        ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the benchmark suite, or compare two of its results."
+    )
+    parser.add_argument("--output", help="Where to write the JSON results.")
+    parser.add_argument(
+        "--filter", help="Only run benchmarks matching this regular expression."
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--min-time", type=float, default=MIN_TIME,
+        help="Seconds every timed run should take at least."
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+        help="Compare two result files instead of running anything."
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+    else:
+        results: Dict[str, object] = run_suite(
+            args.filter, args.repeat, args.min_time, print_result
+        )
+        implementation: str = platform.python_implementation()
+        for name, speedup in flat_speedups(results).items():
+            print("%s: flat is %.2fx as fast as scalar on %s" % (
+                name, speedup, implementation
+            ))
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(results, output, indent=2)
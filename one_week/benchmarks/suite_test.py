@@ -0,0 +1,35 @@
+from one_week.benchmarks import suite
+
+import json
+import unittest
+
+class SuiteTest(unittest.TestCase):
+
+    def test_run_suite(self):
+        results = suite.run_suite("^vec3.dot$|^sphere.hit$", 2, 0.001)
+        self.assertEqual(suite.FORMAT, results["format"])
+        self.assertEqual(
+            ["vec3.dot", "sphere.hit"],
+            [result["name"] for result in results["benchmarks"]]
+        )
+        for result in results["benchmarks"]:
+            self.assertEqual("ns/op", result["unit"])
+            self.assertEqual(2, len(result["runs"]))
+            self.assertTrue(result["mean"] > 0)
+        # It all has to survive being written out.
+        self.assertEqual(results, json.loads(json.dumps(results)))
+
+    def test_every_benchmark_sets_up(self):
+        names = set()
+        for benchmark in suite.benchmarks():
+            self.assertNotIn(benchmark.name, names)
+            names.add(benchmark.name)
+            if benchmark.kind == "micro":
+                self.assertTrue(callable(benchmark.setup()))
+        self.assertIn("render.8_dielectrics.flat", names)
+
+    def test_flat_speedups(self):
+        results = suite.run_suite("^render.8_dielectrics.(scalar|flat)$", 1, 0)
+        speedups = suite.flat_speedups(results)
+        self.assertEqual(["render.8_dielectrics"], list(speedups))
+        self.assertTrue(speedups["render.8_dielectrics"] > 0)
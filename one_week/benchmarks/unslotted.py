@@ -0,0 +1,308 @@
+"""
+The hot path of the scalar tracer as it was before the core classes got
+`__slots__` and the temporaries were taken out of it: Vec3, Ray, HitRecord,
+ReflectionRecord, Sphere.hit, the camera's get_ray and the materials' scatter,
+copied over unchanged (bar the docstrings and line wrapping).
+
+It is only here for `allocations.py` to have something to compare with. Don't
+render with it.
+"""
+from typing import List, Optional
+
+import math
+import random
+
+class Vec3(object):
+
+    def __init__(self, r: float=0.0, g: float=0.0, b: float=0.0):
+        self.r: float = r
+        self.g: float = g
+        self.b: float = b
+
+    @property
+    def x(self):
+        return self.r
+
+    @property
+    def y(self):
+        return self.g
+
+    @property
+    def z(self):
+        return self.b
+
+    def length(self) -> float:
+        return math.sqrt(
+            self.r ** 2 + self.g ** 2 + self.b ** 2
+        )
+
+    def squared_length(self) -> float:
+        return self.r ** 2 + self.g ** 2 + self.b ** 2
+
+    def __add__(self, other) -> "Vec3":
+        return Vec3(self.r + other.r, self.g + other.g, self.b + other.b)
+
+    def __sub__(self, other) -> "Vec3":
+        return Vec3(self.r - other.r, self.g - other.g, self.b - other.b)
+
+    def __mul__(self, other) -> "Vec3":
+        if isinstance(other, Vec3):
+            return Vec3(self.r * other.r, self.g * other.g, self.b * other.b)
+        else:
+            return Vec3(self.r * other, self.g * other, self.b * other)
+
+    def __rmul__(self, other) -> "Vec3":
+        return self.__mul__(other)
+
+    def __truediv__(self, other) -> "Vec3":
+        return Vec3(self.r / other, self.g / other, self.b / other)
+
+    def make_tuple(self) -> tuple:
+        return (self.r, self.g, self.b)
+
+    def dot(self, other) -> float:
+        return sum((self * other).make_tuple())
+
+    def cross(self, other) -> "Vec3":
+        return Vec3(
+            self.g * other.b - self.b * other.g,
+            -(self.r * other.b - self.b * other.r),
+            self.r * other.g - self.g * other.r
+        )
+
+    def unit_vector(self) -> "Vec3":
+        return self / self.length()
+
+class Ray(object):
+
+    def __init__(self, a: Vec3, b: Vec3):
+        self.a = a
+        self.b = b
+
+    @property
+    def origin(self):
+        return self.a
+
+    @property
+    def direction(self):
+        return self.b
+
+    def point_at_parameter(self, t: float) -> Vec3:
+        return self.a + (t * self.b)
+
+class ReflectionRecord(object):
+
+    def __init__(self, attenuation: Vec3, scattering: Ray):
+        self.attenuation: Vec3 = attenuation
+        self.scattering: Ray = scattering
+
+class HitRecord(object):
+
+    def __init__(self, t: float, p: Vec3, normal: Vec3, material):
+        self.t: float = t
+        self.p: Vec3 = p
+        self.normal: Vec3 = normal
+        self.material = material
+        self.hit_object: str = "unspecified"
+
+class Sphere(object):
+
+    def __init__(self, center: Vec3, radius: float, material):
+        self.center: Vec3 = center
+        self.radius: float = radius
+        self.material = material
+
+    def __decide_conjugate(
+        self, t_min: float, t_max: float, neg_conjugate: float,
+        pos_conjugate: float
+    ) -> Optional[float]:
+        if t_min < neg_conjugate < t_max:
+            return neg_conjugate
+        elif t_min < pos_conjugate < t_max:
+            return pos_conjugate
+        else:
+            return None
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        origin_to_center: Vec3 = ray.origin - self.center
+        a: float = ray.direction.dot(ray.direction)
+        b: float = origin_to_center.dot(ray.direction)
+        c: float = origin_to_center.dot(origin_to_center) - (self.radius ** 2)
+        discriminant: float = (b ** 2) - (a * c)
+
+        if discriminant > 0:
+            neg_conjugate: float = (-b - math.sqrt(discriminant)) / a
+            pos_conjugate: float = (-b + math.sqrt(discriminant)) / a
+            chosen_conjugate = self.__decide_conjugate(
+                t_min, t_max, neg_conjugate, pos_conjugate
+            )
+            if chosen_conjugate is not None:
+                t = chosen_conjugate
+                p = ray.point_at_parameter(t)
+                normal = (p - self.center) / self.radius
+                return HitRecord(t, p, normal, self.material)
+
+        return None
+
+class HittableList(object):
+
+    def __init__(self, hittables: List[Sphere]):
+        self.hittables: List[Sphere] = hittables
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        hit_attempt: Optional[HitRecord] = None
+        closest_so_far: float = t_max
+
+        for hittable in self.hittables:
+            hit_attempt = (
+                hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+            )
+            if hit_attempt is not None:
+                closest_so_far = hit_attempt.t
+
+        return hit_attempt
+
+class PositionableCamera(object):
+
+    def __init__(
+        self, camera_posn: Vec3, camera_aim: Vec3, up_vector: Vec3, vfov: float,
+        aspect_ratio: float, aperture: float = 2, focus_dist: float = 1
+    ):
+        self.lens_radius: float = aperture / 2
+        vfov_rad: float = vfov * math.pi / 180
+        half_height: float = math.tan(vfov_rad / 2)
+        half_width: float = aspect_ratio * half_height
+        self.__w = (camera_posn - camera_aim).unit_vector()
+        self.__u = up_vector.cross(self.__w).unit_vector()
+        self.__v = self.__w.cross(self.__u)
+        self.lower_left_corner: Vec3 = camera_posn - focus_dist * (
+            (half_width * self.__u) + (half_height * self.__v) + self.__w
+        )
+        self.h_movement: Vec3 = 2 * half_width * focus_dist * self.__u
+        self.v_movement: Vec3 = 2 * half_height * focus_dist * self.__v
+        self.origin: Vec3 = camera_posn
+
+    def get_ray(self, s: float, t: float) -> Ray:
+        random_point_in_disc: Vec3 = random_in_unit_disk() * self.lens_radius
+        offset: Vec3 = (
+            self.__u * random_point_in_disc.x +
+            self.__v * random_point_in_disc.y
+        )
+        return Ray(
+            self.origin + offset,
+            self.lower_left_corner + (self.h_movement * s) +
+            (self.v_movement * t) - self.origin - offset
+        )
+
+def random_in_unit_disk() -> Vec3:
+    point: Vec3 = 2 * Vec3(random.random(), random.random(), 0) - Vec3(1, 1, 0)
+
+    while point.dot(point) >= 1:
+        point = 2 * Vec3(random.random(), random.random(), 0) - Vec3(1, 1, 0)
+
+    return point
+
+class Lambertian(object):
+
+    def __init__(self, albedo: Vec3):
+        self.albedo: Vec3 = albedo
+
+    def scatter(self, incident_ray: Ray, record: HitRecord) -> ReflectionRecord:
+        target: Vec3 = record.p + record.normal + random_unit_sphere_point()
+        scattered: Ray = Ray(record.p, target - record.p)
+        return ReflectionRecord(self.albedo, scattered)
+
+class Metal(object):
+
+    def __init__(self, albedo: Vec3, fuzz: float):
+        self.albedo: Vec3 = albedo
+        self.fuzz: float = fuzz if fuzz < 1 else 1
+
+    def scatter(self, incident_ray: Ray, record: HitRecord) -> ReflectionRecord:
+        reflected: Vec3 = reflect(
+            incident_ray.direction.unit_vector(), record.normal
+        )
+        scattered: Ray = Ray(
+            record.p, reflected + self.fuzz * random_unit_sphere_point()
+        )
+        return ReflectionRecord(self.albedo, scattered)
+
+class Dielectric(object):
+
+    def __init__(self, refractive_index: float):
+        self.refractive_index: float = refractive_index
+
+    def __schlick_approximation(self, cosine: float):
+        r0 : float = (
+            (1 - self.refractive_index) / (1 + self.refractive_index) ** 2
+        )
+        return r0 + (1 - r0) * (1 - cosine) ** 5
+
+    def scatter(self, incident_ray: Ray, record: HitRecord) -> ReflectionRecord:
+        reflected: Vec3 = reflect(incident_ray.direction, record.normal)
+        attenuation: Vec3 = Vec3(1, 1, 1)
+
+        outward_normal: Vec3 = Vec3(1, 1, 1)
+        nint: float = 0
+        cosine: float = 0
+
+        if incident_ray.direction.dot(record.normal) > 0:
+            outward_normal = -1 * record.normal
+            nint = self.refractive_index
+            cosine = (
+                self.refractive_index *
+                incident_ray.direction.dot(record.normal) /
+                incident_ray.direction.length()
+            )
+        else:
+            outward_normal = record.normal
+            nint = 1 / self.refractive_index
+            cosine = -(
+                incident_ray.direction.dot(record.normal) /
+                incident_ray.direction.length()
+            )
+
+        refracted: Vec3 = Vec3(0, 0, 0)
+        _refracted: Optional[Vec3] = refract(
+            incident_ray.direction, outward_normal, nint
+        )
+        reflection_probability: float = 1
+        if _refracted is not None:
+            reflection_probability = self.__schlick_approximation(cosine)
+            refracted = _refracted
+
+        if reflection_probability == 1:
+            return ReflectionRecord(attenuation, Ray(record.p, reflected))
+        else:
+            return ReflectionRecord(attenuation, Ray(record.p, refracted))
+
+def random_unit_sphere_point() -> Vec3:
+    rand_point: Vec3 = Vec3(
+        random.uniform(-1, 1),
+        random.uniform(-1, 1),
+        random.uniform(-1, 1)
+    )
+
+    while rand_point.squared_length() >= 1:
+        rand_point = Vec3(
+            random.uniform(-1, 1),
+            random.uniform(-1, 1),
+            random.uniform(-1, 1)
+        )
+
+    return rand_point
+
+def reflect(v: Vec3, n: Vec3) -> Vec3:
+    return v - 2 * v.dot(n) * n
+
+def refract(v: Vec3, n: Vec3, nint: float) -> Optional[Vec3]:
+    uv: Vec3 = v.unit_vector()
+    dt: float = uv.dot(n)
+    discriminant: float = 1 - (nint ** 2) * (1 - dt ** 2)
+
+    if discriminant > 0:
+        return (
+            nint * (uv - n * dt) - n * math.sqrt(discriminant)
+        )
+
+    return None
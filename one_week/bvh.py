@@ -0,0 +1,313 @@
+"""
+A Bounding Volume Hierarchy (BVH), yet another thing borrowed from _The Next
+Week_.
+
+HittableList tests every object for every ray. The idea here is to put the
+objects in a binary tree of boxes, each box surrounding everything below it.
+If a ray misses a box, it misses everything in that box too, so a whole subtree
+is skipped with a single (cheap) slab test. For the ~480 spheres of
+scene_generator, that turns hundreds of `Sphere.hit` calls per ray into a
+couple dozen box tests and a handful of `Sphere.hit` calls.
+"""
+from array import array
+from one_week.aabb import AABB, inverse_component, surrounding_box
+from one_week.hittable import HitRecord, Hittable
+from one_week.ray import Ray
+from one_week.vec3 import Vec3
+from typing import List, Optional, Tuple
+
+class BVHNode(object):
+    """
+    A node in the hierarchy. Interior nodes have a `left` and a `right` child;
+    leaves have neither and instead hold a (small) list of hittables.
+    """
+
+    def __init__(
+        self,
+        box: AABB,
+        left: Optional["BVHNode"]=None,
+        right: Optional["BVHNode"]=None,
+        hittables: Optional[List[Hittable]]=None
+    ):
+        self.box: AABB = box
+        self.left: Optional[BVHNode] = left
+        self.right: Optional[BVHNode] = right
+        self.hittables: Optional[List[Hittable]] = hittables
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.hittables is not None
+
+class BVH(Hittable):
+    """
+    Drop-in replacement for HittableList: build it from the same list of
+    hittables and it answers `hit` the same way, only faster for scenes with a
+    lot of objects.
+    """
+
+    # How many objects a leaf may hold before it gets split. Testing two
+    # spheres directly is cheaper than testing two more boxes and then the
+    # spheres anyway.
+    LEAF_SIZE: int = 2
+
+    def __init__(self, hittables: List[Hittable]):
+        super().__init__()
+        self.hittables: List[Hittable] = hittables
+        # Objects without a bounding box can't go in the tree. They are just
+        # tested for every ray, like HittableList would.
+        self.unbounded: List[Hittable] = []
+        bounded: List[Tuple[Hittable, AABB]] = []
+
+        for hittable in hittables:
+            box: Optional[AABB] = hittable.bounding_box()
+            if box is None:
+                self.unbounded.append(hittable)
+            else:
+                bounded.append((hittable, box))
+
+        self.root: Optional[BVHNode] = None
+        if bounded:
+            self.root = self.__build(bounded)
+        self.__built_areas: List[float] = self.__areas()
+
+    def __build(self, bounded: List[Tuple[Hittable, AABB]]) -> BVHNode:
+        box: AABB = bounded[0][1]
+        for _, hittable_box in bounded[1:]:
+            box = surrounding_box(box, hittable_box)
+
+        if len(bounded) <= self.LEAF_SIZE:
+            return BVHNode(box, hittables=[hittable for hittable, _ in bounded])
+
+        # Split along the axis where the centers are most spread out, at the
+        # median. This is not the smartest split there is (see the Surface Area
+        # Heuristic) but it is simple and it always gives a balanced tree.
+        centroids: List[Vec3] = [
+            hittable_box.centroid() for _, hittable_box in bounded
+        ]
+        centroid_bounds: AABB = AABB(centroids[0], centroids[0])
+        for centroid in centroids[1:]:
+            centroid_bounds = surrounding_box(
+                centroid_bounds, AABB(centroid, centroid)
+            )
+        axis: int = centroid_bounds.longest_axis()
+        ordered: List[Tuple[Hittable, AABB]] = [
+            item for _, item in sorted(
+                zip(centroids, bounded),
+                key=lambda pair: pair[0].make_tuple()[axis]
+            )
+        ]
+        half: int = len(ordered) // 2
+
+        return BVHNode(
+            box, self.__build(ordered[:half]), self.__build(ordered[half:])
+        )
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        """
+        Same contract as HittableList.hit: the record returned is for the
+        object closest to the source of the ray.
+
+        The tree is walked with an explicit stack instead of recursion. Out of
+        the two children of a node, the one the ray enters first is visited
+        first. Whatever it hits shrinks `closest_so_far`, and with it, the
+        chance that the farther child needs visiting at all.
+        """
+        hit_attempt: Optional[HitRecord] = None
+        closest_so_far: float = t_max
+
+        for hittable in self.unbounded:
+            hit_attempt = hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+            if hit_attempt is not None:
+                closest_so_far = hit_attempt.t
+
+        if self.root is None:
+            return hit_attempt
+
+        origin: Vec3 = ray.origin
+        direction: Vec3 = ray.direction
+        ox: float = origin.x
+        oy: float = origin.y
+        oz: float = origin.z
+        inv_dx: float = inverse_component(direction.x)
+        inv_dy: float = inverse_component(direction.y)
+        inv_dz: float = inverse_component(direction.z)
+
+        root_entry: Optional[float] = self.root.box.entry(
+            ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest_so_far
+        )
+        if root_entry is None:
+            return hit_attempt
+
+        # Every node in the stack is paired with the t at which the ray enters
+        # its box. By the time it gets popped, something closer might have been
+        # hit already, in which case the node is skipped.
+        stack: List[Tuple[BVHNode, float]] = [(self.root, root_entry)]
+        while stack:
+            node, entry = stack.pop()
+            if entry >= closest_so_far:
+                continue
+
+            if node.hittables is not None:
+                for hittable in node.hittables:
+                    hit_attempt = (
+                        hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+                    )
+                    if hit_attempt is not None:
+                        closest_so_far = hit_attempt.t
+                continue
+
+            left: BVHNode = node.left  # type: ignore
+            right: BVHNode = node.right  # type: ignore
+            left_entry: Optional[float] = left.box.entry(
+                ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest_so_far
+            )
+            right_entry: Optional[float] = right.box.entry(
+                ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest_so_far
+            )
+
+            # Stacks are LIFO so the nearer child is pushed last.
+            if left_entry is not None and right_entry is not None:
+                if left_entry <= right_entry:
+                    stack.append((right, right_entry))
+                    stack.append((left, left_entry))
+                else:
+                    stack.append((left, left_entry))
+                    stack.append((right, right_entry))
+            elif left_entry is not None:
+                stack.append((left, left_entry))
+            elif right_entry is not None:
+                stack.append((right, right_entry))
+
+        return hit_attempt
+
+    def __areas(self) -> List[float]:
+        """
+        The surface area of every box, in preorder. How likely a ray is to
+        have to test a box goes with its surface area.
+        """
+        areas: List[float] = []
+        stack: List[BVHNode] = [self.root] if self.root is not None else []
+        while stack:
+            node: BVHNode = stack.pop()
+            areas.append(node.box.surface_area())
+            if node.hittables is None:
+                stack.append(node.right)  # type: ignore
+                stack.append(node.left)  # type: ignore
+        return areas
+
+    def refit(self) -> float:
+        """
+        Make every box fit its objects again, for when they have moved, but
+        keep the tree. That's a lot cheaper than building a new one (no
+        sorting), only the tree was split for where the objects were: the
+        farther they go from there, the more its boxes overlap.
+
+        Return how much worse the tree got: how many times bigger its boxes
+        are than when it was built, on average (by surface area, see
+        `__areas`; a total would be all ground sphere). Once that's well over
+        one, building a new BVH is worth it.
+        """
+        def fit(node: BVHNode) -> AABB:
+            if node.hittables is not None:
+                box: AABB = node.hittables[0].bounding_box()  # type: ignore
+                for hittable in node.hittables[1:]:
+                    box = surrounding_box(
+                        box, hittable.bounding_box()  # type: ignore
+                    )
+            else:
+                box = surrounding_box(
+                    fit(node.left), fit(node.right)  # type: ignore
+                )
+            node.box = box
+            return box
+
+        # Balanced, so this recurses only about log2(n) deep.
+        if self.root is not None:
+            fit(self.root)
+        ratios: List[float] = [
+            area / built
+            for area, built in zip(self.__areas(), self.__built_areas)
+            if built > 0
+        ]
+        return sum(ratios) / len(ratios) if ratios else 1.0
+
+    def flatten(self) -> Tuple[List[Hittable], array, array]:
+        """
+        The tree as flat arrays, for saving it somewhere: rebuilding it with
+        `unflatten` skips all the sorting of the build.
+
+        Return the objects in the order the leaves hold them (followed by the
+        unbounded ones), the boxes and the nodes. The nodes are in preorder
+        with two ints each: for a leaf, the index of its first object and how
+        many it has; for an interior node, -1 and the index of its right
+        child, the left one being the next node. `boxes` holds the minimum and
+        maximum corners of every node, six doubles each.
+        """
+        hittables: List[Hittable] = []
+        boxes: array = array("d")
+        nodes: array = array("i")
+
+        def visit(node: BVHNode) -> int:
+            index: int = len(nodes) // 2
+            boxes.extend(node.box.minimum.make_tuple())
+            boxes.extend(node.box.maximum.make_tuple())
+            nodes.extend((-1, 0))
+            if node.hittables is not None:
+                nodes[2 * index] = len(hittables)
+                nodes[2 * index + 1] = len(node.hittables)
+                hittables.extend(node.hittables)
+            else:
+                visit(node.left)  # type: ignore
+                nodes[2 * index + 1] = visit(node.right)  # type: ignore
+            return index
+
+        # The tree is balanced, so this recurses only about log2(n) deep.
+        if self.root is not None:
+            visit(self.root)
+        hittables.extend(self.unbounded)
+        return hittables, boxes, nodes
+
+    @classmethod
+    def unflatten(
+        cls, hittables: List[Hittable], boxes: array, nodes: array
+    ) -> "BVH":
+        """
+        The BVH that `flatten` gave these arrays for.
+        """
+        # Plain lists index faster than arrays, and make floats only once.
+        corners: List[float] = boxes.tolist()
+        links: List[int] = nodes.tolist()
+
+        def build(index: int) -> BVHNode:
+            c: int = 6 * index
+            box: AABB = AABB(
+                Vec3(corners[c], corners[c + 1], corners[c + 2]),
+                Vec3(corners[c + 3], corners[c + 4], corners[c + 5])
+            )
+            first: int = links[2 * index]
+            if first >= 0:
+                return BVHNode(
+                    box, hittables=hittables[first:first + links[2 * index + 1]]
+                )
+            return BVHNode(box, build(index + 1), build(links[2 * index + 1]))
+
+        bvh: BVH = cls.__new__(cls)
+        Hittable.__init__(bvh)
+        bvh.hittables = hittables
+        bvh.root = build(0) if links else None
+        # Everything after the last leaf's objects.
+        bounded: int = max(
+            (
+                links[i] + links[i + 1] for i in range(0, len(links), 2)
+                if links[i] >= 0
+            ),
+            default=0
+        )
+        bvh.unbounded = hittables[bounded:]
+        bvh.__built_areas = bvh.__areas()
+        return bvh
+
+    def bounding_box(self) -> Optional[AABB]:
+        if self.unbounded or self.root is None:
+            return None
+        return self.root.box
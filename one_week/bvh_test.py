@@ -0,0 +1,93 @@
+from one_week.bvh import BVH
+from one_week.hittable import HittableList
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.testing import random_spheres
+from one_week.vec3 import Vec3
+
+import random
+import sys
+import unittest
+
+class BVHTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spheres, self.rays = random_spheres()
+
+    def test_same_hits_as_hittable_list(self):
+        hittable_list = HittableList(self.spheres)
+        bvh = BVH(self.spheres)
+
+        for ray in self.rays:
+            expected = hittable_list.hit(ray, 0.001, sys.float_info.max)
+            actual = bvh.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertIsNotNone(actual)
+                self.assertEqual(expected.t, actual.t)
+                self.assertEqual(expected.p, actual.p)
+
+    def test_flatten_round_trip(self):
+        bvh = BVH(self.spheres)
+        hittables, boxes, nodes = bvh.flatten()
+        self.assertCountEqual(self.spheres, hittables)
+        self.assertEqual(len(nodes) * 3, len(boxes))
+
+        rebuilt = BVH.unflatten(hittables, boxes, nodes)
+        self.assertEqual([], rebuilt.unbounded)
+        for ray in self.rays:
+            expected = bvh.hit(ray, 0.001, sys.float_info.max)
+            actual = rebuilt.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertEqual(expected.t, actual.t)
+
+    def test_respects_t_max(self):
+        bvh = BVH([Sphere(Vec3(0, 0, -5), 1)])
+        ray = Ray(Vec3(0, 0, 0), Vec3(0, 0, -1))
+
+        self.assertIsNotNone(bvh.hit(ray, 0.001, 10))
+        self.assertIsNone(bvh.hit(ray, 0.001, 3))
+
+    def test_bounding_box(self):
+        bvh = BVH([Sphere(Vec3(0, 0, 0), 1), Sphere(Vec3(4, 0, 0), -0.5)])
+        box = bvh.bounding_box()
+
+        self.assertEqual(Vec3(-1, -1, -1), box.minimum)
+        self.assertEqual(Vec3(4.5, 1, 1), box.maximum)
+
+    def test_refit(self):
+        bvh = BVH(self.spheres)
+        self.assertEqual(1.0, bvh.refit())
+
+        # A little nudge: the same tree, boxes a bit bigger.
+        rng = random.Random(4096)
+        for sphere in self.spheres[:-1]:
+            sphere.center += Vec3(rng.uniform(-1, 1), 0, rng.uniform(-1, 1))
+        nudged = bvh.refit()
+        self.assertLess(1.0, nudged)
+        hittable_list = HittableList(self.spheres)
+        for ray in self.rays:
+            expected = hittable_list.hit(ray, 0.001, sys.float_info.max)
+            actual = bvh.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertEqual(expected.t, actual.t)
+
+        # Scattered all over: the boxes overlap a lot more.
+        centers = [sphere.center for sphere in self.spheres[:-1]]
+        rng.shuffle(centers)
+        for sphere, center in zip(self.spheres, centers):
+            sphere.center = center
+        self.assertLess(nudged, bvh.refit())
+
+    def test_empty(self):
+        self.assertIsNone(
+            BVH([]).hit(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), 0.001, 10)
+        )
+
+if __name__ == "__main__":
+    unittest.main()
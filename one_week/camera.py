@@ -2,7 +2,9 @@
 A pretty hardcoded abstraction for a camera (for now).
 """
 from one_week.ray import Ray
+from one_week.rng import disk_point
 from one_week.vec3 import Vec3
+from typing import Tuple
 
 import math
 import random
@@ -19,9 +21,19 @@ class Camera(object):
         self.origin: Vec3 = origin
 
     def get_ray(self, u: float, v: float) -> Ray:
+        # lower_left_corner + (h_movement * u) + (v_movement * v) - origin,
+        # without the four intermediate Vec3's.
+        corner: Vec3 = self.lower_left_corner
+        h_movement: Vec3 = self.h_movement
+        v_movement: Vec3 = self.v_movement
+        origin: Vec3 = self.origin
         return Ray(
-            self.origin,
-            self.lower_left_corner + (self.h_movement * u) + (self.v_movement * v) - self.origin
+            origin,
+            Vec3(
+                corner.r + h_movement.r * u + v_movement.r * v - origin.r,
+                corner.g + h_movement.g * u + v_movement.g * v - origin.g,
+                corner.b + h_movement.b * u + v_movement.b * v - origin.b
+            )
         )
 
 class PositionableCamera(Camera):
@@ -56,18 +68,48 @@ class PositionableCamera(Camera):
             camera_posn
         )
 
+    @property
+    def horizontal_axis(self) -> Vec3:
+        """
+        Unit vector pointing to the right of the camera. This is `u` in the
+        text.
+        """
+        return self.__u
+
+    @property
+    def vertical_axis(self) -> Vec3:
+        """
+        Unit vector pointing "up" from the camera's point of view. This is `v`
+        in the text.
+        """
+        return self.__v
+
     # Minor note: the change in parameter names, because u and v take on a new
     # meaning in this class.
     def get_ray(self, s: float, t: float) -> Ray:
-        random_point_in_disc: Vec3 = random_in_unit_disk() * self.lens_radius
-        offset: Vec3 = (
-            self.__u * random_point_in_disc.x +
-            self.__v * random_point_in_disc.y
-        )
+        disk_x, disk_y = random_in_unit_disk_floats()
+        disk_x *= self.lens_radius
+        disk_y *= self.lens_radius
+        # offset = u * disk_x + v * disk_y, on floats, as in Camera.get_ray.
+        u: Vec3 = self.__u
+        v: Vec3 = self.__v
+        offset_x: float = u.r * disk_x + v.r * disk_y
+        offset_y: float = u.g * disk_x + v.g * disk_y
+        offset_z: float = u.b * disk_x + v.b * disk_y
+        corner: Vec3 = self.lower_left_corner
+        h_movement: Vec3 = self.h_movement
+        v_movement: Vec3 = self.v_movement
+        origin: Vec3 = self.origin
         return Ray(
-            self.origin + offset,
-            self.lower_left_corner + (self.h_movement * s) +
-            (self.v_movement * t) - self.origin - offset
+            Vec3(origin.r + offset_x, origin.g + offset_y, origin.b + offset_z),
+            Vec3(
+                corner.r + h_movement.r * s + v_movement.r * t - origin.r -
+                offset_x,
+                corner.g + h_movement.g * s + v_movement.g * t - origin.g -
+                offset_y,
+                corner.b + h_movement.b * s + v_movement.b * t - origin.b -
+                offset_z
+            )
         )
 
 def irandom_in_unit_disk() -> Vec3:
@@ -79,9 +121,12 @@ def irandom_in_unit_disk() -> Vec3:
     return point
 
 def random_in_unit_disk() -> Vec3:
-    point: Vec3 = 2 * Vec3(random.random(), random.random(), 0) - Vec3(1, 1, 0)
+    x, y = random_in_unit_disk_floats()
+    return Vec3(x, y, 0)
 
-    while point.dot(point) >= 1:
-        point = 2 * Vec3(random.random(), random.random(), 0) - Vec3(1, 1, 0)
-
-    return point
+def random_in_unit_disk_floats() -> Tuple[float, float]:
+    """
+    Same as random_in_unit_disk but the point is just its x and y. Drawn
+    without rejection, see `rng.disk_point`.
+    """
+    return disk_point(random.random(), random.random())
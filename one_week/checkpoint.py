@@ -0,0 +1,233 @@
+"""
+Checkpoints, so that a long render can pick up where it left off after a crash
+(or the machine getting taken away from under it).
+
+What gets saved is the accumulation state of the render: the sum of all the
+samples of every pixel, how many samples that is, and which tiles are done.
+Only plain `array` and `struct` are used, so the scalar render path can
+checkpoint without NumPy.
+
+The file is laid out as:
+
+    header      see HEADER below
+    finished    one bit per tile, LSB first
+    sums        height * width * 3 doubles, row-major
+    counts      height * width unsigned ints, row-major
+
+everything in little-endian.
+"""
+from array import array
+from one_week.tile import Tile, split_tiles
+from one_week.vec3 import Vec3
+from typing import List, Optional
+
+import os
+import struct
+import sys
+import time
+
+MAGIC: bytes = b"PRAYCKPT"
+VERSION: int = 1
+# magic, version, width, height, tile size, tile count, seed
+HEADER: struct.Struct = struct.Struct("<8sIIIIIQ")
+# The seed is unsigned, 64 bits.
+MAX_SEED: int = 2 ** 64 - 1
+
+# Default for how often Checkpointer saves, in seconds.
+CHECKPOINT_INTERVAL: float = 300
+
+class CheckpointError(Exception):
+    pass
+
+class AccumulationState(object):
+    """
+    Per-pixel running sums and sample counts of a render, plus the set of tiles
+    that have all the samples they need.
+
+    `sums` is a flat array of height * width * 3 doubles and `counts` a flat
+    array of height * width unsigned ints, both row-major with rows counted
+    from the top. NumPy code can wrap them without copying:
+
+        np.frombuffer(state.sums).reshape(state.height, state.width, 3)
+    """
+
+    def __init__(self, width: int, height: int, tile_size: int, seed: int):
+        """
+        `seed` is whatever the render needs to come out the same on a resume;
+        the engine seeds random scenes and every pixel's samples with it.
+        It has to fit the header, from 0 to MAX_SEED.
+        """
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(
+                "A checkpoint's seed has to be from 0 to %d, not %d" %
+                (MAX_SEED, seed)
+            )
+        self.width: int = width
+        self.height: int = height
+        self.tile_size: int = tile_size
+        self.seed: int = seed
+        self.tiles: List[Tile] = split_tiles(width, height, tile_size)
+        self.sums: array = array("d", bytes(8 * width * height * 3))
+        self.counts: array = array("I", bytes(4 * width * height))
+        self.finished: bytearray = bytearray((len(self.tiles) + 7) // 8)
+
+    def add(self, row: int, col: int, color: Vec3, samples: int=1):
+        """
+        Add `color`, the sum of `samples` samples, to the pixel at (row, col).
+        """
+        index: int = row * self.width + col
+        self.sums[3 * index] += color.r
+        self.sums[3 * index + 1] += color.g
+        self.sums[3 * index + 2] += color.b
+        self.counts[index] += samples
+
+    def count(self, row: int, col: int) -> int:
+        return self.counts[row * self.width + col]
+
+    def mean(self, row: int, col: int) -> Vec3:
+        index: int = row * self.width + col
+        count: int = self.counts[index] or 1
+        return Vec3(
+            self.sums[3 * index] / count, self.sums[3 * index + 1] / count,
+            self.sums[3 * index + 2] / count
+        )
+
+    def mark_finished(self, tile: Tile):
+        self.finished[tile.index // 8] |= 1 << (tile.index % 8)
+
+    def is_finished(self, tile: Tile) -> bool:
+        return bool(self.finished[tile.index // 8] & (1 << (tile.index % 8)))
+
+    def unfinished_tiles(self) -> List[Tile]:
+        return [tile for tile in self.tiles if not self.is_finished(tile)]
+
+    def tile_samples(self, tile: Tile) -> int:
+        """
+        The fewest samples any pixel of the tile has.
+        """
+        return min(
+            min(self.counts[
+                row * self.width + tile.x0:row * self.width + tile.x1
+            ]) for row in range(tile.y0, tile.y1)
+        )
+
+def save(state: AccumulationState, path: str):
+    """
+    Write the state to `path`, atomically: the data goes to a temporary file in
+    the same directory first, which then replaces `path` in one go. A crash
+    halfway leaves the previous checkpoint intact.
+    """
+    temporary_path: str = "%s.tmp" % path
+    with open(temporary_path, "wb") as checkpoint_file:
+        checkpoint_file.write(HEADER.pack(
+            MAGIC, VERSION, state.width, state.height, state.tile_size,
+            len(state.tiles), state.seed
+        ))
+        checkpoint_file.write(state.finished)
+        write_array(checkpoint_file, state.sums)
+        write_array(checkpoint_file, state.counts)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+
+    os.replace(temporary_path, path)
+
+def load(path: str) -> AccumulationState:
+    with open(path, "rb") as checkpoint_file:
+        header: bytes = checkpoint_file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise CheckpointError("%s is not a checkpoint" % path)
+        magic, version, width, height, tile_size, tile_count, seed = (
+            HEADER.unpack(header)
+        )
+        if magic != MAGIC:
+            raise CheckpointError("%s is not a checkpoint" % path)
+        if version != VERSION:
+            raise CheckpointError(
+                "%s is a version %s checkpoint, expected version %s" %
+                (path, version, VERSION)
+            )
+
+        state: AccumulationState = AccumulationState(
+            width, height, tile_size, seed
+        )
+        if tile_count != len(state.tiles):
+            raise CheckpointError("%s has the wrong number of tiles" % path)
+        state.finished = bytearray(checkpoint_file.read(len(state.finished)))
+        read_array(checkpoint_file, state.sums)
+        read_array(checkpoint_file, state.counts)
+
+    return state
+
+def write_array(checkpoint_file, data: array):
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    checkpoint_file.write(data.tobytes())
+
+def read_array(checkpoint_file, data: array):
+    """
+    Fill `data` (already of the right size) from the file.
+    """
+    raw: bytes = checkpoint_file.read(len(data) * data.itemsize)
+    if len(raw) != len(data) * data.itemsize:
+        raise CheckpointError("Checkpoint is truncated")
+    data[:] = array(data.typecode, raw)
+    if sys.byteorder != "little":
+        data.byteswap()
+
+class Checkpointer(object):
+    """
+    Saves a state to `path`, but only if at least `interval` seconds have
+    passed since it last did. Call `maybe_save` as often as convenient (say,
+    after every tile).
+    """
+
+    def __init__(self, path: str, interval: float=CHECKPOINT_INTERVAL):
+        self.path: str = path
+        self.interval: float = interval
+        self.last_saved: float = time.monotonic()
+
+    def maybe_save(self, state: AccumulationState) -> bool:
+        if time.monotonic() - self.last_saved < self.interval:
+            return False
+        self.save(state)
+        return True
+
+    def save(self, state: AccumulationState):
+        save(state, self.path)
+        self.last_saved = time.monotonic()
+
+def saved_seed(path: str) -> Optional[int]:
+    """
+    The seed of the checkpoint at `path`, if there is one, without reading
+    the rest of it. A random scene has to be made with it before the render
+    resumes.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as checkpoint_file:
+        header: bytes = checkpoint_file.read(HEADER.size)
+    if len(header) != HEADER.size or not header.startswith(MAGIC):
+        raise CheckpointError("%s is not a checkpoint" % path)
+    return HEADER.unpack(header)[-1]
+
+def resume_or_start(
+    path: Optional[str], resume: bool, width: int, height: int, tile_size: int,
+    seed: int
+) -> AccumulationState:
+    """
+    Load the checkpoint at `path` if resuming (and it exists), else start from
+    scratch. A checkpoint of a different resolution or tiling is an error,
+    rather than something to quietly throw away.
+    """
+    if resume and path is not None and os.path.exists(path):
+        state: AccumulationState = load(path)
+        dimensions: tuple = (state.width, state.height, state.tile_size)
+        if dimensions != (width, height, tile_size):
+            raise CheckpointError(
+                "%s is for a %sx%s render in %s-pixel tiles" %
+                (path, state.width, state.height, state.tile_size)
+            )
+        return state
+
+    return AccumulationState(width, height, tile_size, seed)
@@ -0,0 +1,78 @@
+from one_week import checkpoint
+from one_week.checkpoint import AccumulationState, CheckpointError
+from one_week.vec3 import Vec3
+
+import os
+import tempfile
+import unittest
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "render.ckpt")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        state = AccumulationState(5, 3, 2, 2 ** 63 + 1)
+        state.add(0, 0, Vec3(1, 2, 3), 4)
+        state.add(2, 4, Vec3(0.5, 0.25, 0.125))
+        state.mark_finished(state.tiles[0])
+        state.mark_finished(state.tiles[-1])
+        checkpoint.save(state, self.path)
+
+        loaded = checkpoint.load(self.path)
+        self.assertEqual((5, 3, 2), (loaded.width, loaded.height, loaded.tile_size))
+        self.assertEqual(2 ** 63 + 1, loaded.seed)
+        self.assertEqual(list(state.sums), list(loaded.sums))
+        self.assertEqual(list(state.counts), list(loaded.counts))
+        self.assertEqual(Vec3(0.25, 0.5, 0.75), loaded.mean(0, 0))
+        self.assertEqual(
+            [tile.index for tile in state.tiles[1:-1]],
+            [tile.index for tile in loaded.unfinished_tiles()]
+        )
+        self.assertFalse(os.path.exists("%s.tmp" % self.path))
+
+    def test_seed_range(self):
+        AccumulationState(4, 4, 2, checkpoint.MAX_SEED)
+        for seed in (-1, checkpoint.MAX_SEED + 1):
+            with self.assertRaises(ValueError):
+                AccumulationState(4, 4, 2, seed)
+
+    def test_tile_samples(self):
+        state = AccumulationState(4, 4, 2, 0)
+        tile = state.tiles[3]
+        for row in range(tile.y0, tile.y1):
+            for col in range(tile.x0, tile.x1):
+                state.add(row, col, Vec3(1, 1, 1), 3)
+        state.add(3, 3, Vec3(1, 1, 1), 3)
+
+        self.assertEqual(3, state.tile_samples(tile))
+        self.assertEqual(0, state.tile_samples(state.tiles[0]))
+
+    def test_resume_or_start(self):
+        fresh = checkpoint.resume_or_start(self.path, True, 4, 4, 2, 7)
+        self.assertEqual(7, fresh.seed)
+        fresh.add(1, 1, Vec3(1, 1, 1))
+        checkpoint.save(fresh, self.path)
+
+        resumed = checkpoint.resume_or_start(self.path, True, 4, 4, 2, 8)
+        self.assertEqual(7, resumed.seed)
+        self.assertEqual(1, resumed.count(1, 1))
+        restarted = checkpoint.resume_or_start(self.path, False, 4, 4, 2, 8)
+        self.assertEqual(0, restarted.count(1, 1))
+
+        with self.assertRaises(CheckpointError):
+            checkpoint.resume_or_start(self.path, True, 8, 4, 2, 8)
+
+    def test_not_a_checkpoint(self):
+        with open(self.path, "wb") as not_a_checkpoint:
+            not_a_checkpoint.write(b"P3\n1 1\n255\n0 0 0\n" * 4)
+
+        with self.assertRaises(CheckpointError):
+            checkpoint.load(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Counters for the scalar tracer's hot paths, to tell where a slow render spends
+its time: on many primitives, on deep paths or on one expensive material.
+
+Nothing is counted, and nothing costs anything, unless a `Counters` is active:
+
+    counters = Counters()
+    with counters:
+        ...trace with shade = counters.count_paths(color)...
+    counters.write("/tmp/counters.json")
+
+While active, `Sphere.hit` and the `scatter` of every Material class are
+swapped for counting wrappers (the way benchmarks/russian_roulette counts
+bounces), and put back on exit. Paths are counted by the tracer itself
+wrapping its shading function with `count_paths`: every call is a primary
+ray, every further cast into the world a secondary one, and the number of
+secondary rays is the depth the path reached.
+
+engine.render does all of this when given a `counters` file name (scalar
+backend only):
+
+    python -m one_week render 8_dielectrics --backend scalar \\
+        --counters /tmp/counters.json
+"""
+from one_week.hittable import HitRecord, Hittable
+from one_week.material import Material, ReflectionRecord
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import Callable, Dict, List, Optional
+
+import json
+
+class _CountedWorld(Hittable):
+    """
+    Stands in for the world in a single `color()` call, counting its casts.
+    """
+
+    def __init__(self, world: Hittable):
+        self.world: Hittable = world
+        self.casts: int = 0
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        self.casts += 1
+        return self.world.hit(ray, t_min, t_max)
+
+class Counters(object):
+
+    def __init__(self):
+        self.primary_rays: int = 0
+        self.secondary_rays: int = 0
+        self.sphere_tests: int = 0
+        self.sphere_hits: int = 0
+        self.scatters: Dict[str, int] = {}
+        # Paths by the depth they reached.
+        self.depths: Dict[int, int] = {}
+        self._originals: Dict[type, Callable] = {}
+
+    def __enter__(self) -> "Counters":
+        original_hit = Sphere.hit
+        self._originals[Sphere] = original_hit
+
+        def hit(
+            sphere: Sphere, ray: Ray, t_min: float, t_max: float
+        ) -> Optional[HitRecord]:
+            self.sphere_tests += 1
+            record: Optional[HitRecord] = original_hit(
+                sphere, ray, t_min, t_max
+            )
+            if record is not None:
+                self.sphere_hits += 1
+            return record
+
+        Sphere.hit = hit  # type: ignore
+
+        for cls in _material_classes():
+            if "scatter" in vars(cls):
+                self._originals[cls] = cls.scatter
+                cls.scatter = self._count_scatter(cls)  # type: ignore
+        return self
+
+    def __exit__(self, *exc_info):
+        Sphere.hit = self._originals.pop(Sphere)  # type: ignore
+        for cls, scatter in self._originals.items():
+            cls.scatter = scatter  # type: ignore
+        self._originals.clear()
+
+    def _count_scatter(self, cls: type) -> Callable:
+        original_scatter = cls.scatter  # type: ignore
+
+        def scatter(
+            material: Material, incident_ray: Ray, record: HitRecord
+        ) -> ReflectionRecord:
+            # Subclasses that don't override scatter land here too; count them
+            # under their own name.
+            key: str = type(material).__name__
+            self.scatters[key] = self.scatters.get(key, 0) + 1
+            return original_scatter(material, incident_ray, record)
+
+        return scatter
+
+    def count_paths(
+        self, shade: Callable[[Ray, Hittable], Vec3]
+    ) -> Callable[[Ray, Hittable], Vec3]:
+        """
+        Wrap a shading function like `integrator.color` so that every call
+        counts as one path.
+        """
+        def counted(ray: Ray, world: Hittable) -> Vec3:
+            counted_world: _CountedWorld = _CountedWorld(world)
+            result: Vec3 = shade(ray, counted_world)
+            depth: int = counted_world.casts - 1
+            self.primary_rays += 1
+            self.secondary_rays += depth
+            self.depths[depth] = self.depths.get(depth, 0) + 1
+            return result
+
+        return counted
+
+    def report(self) -> dict:
+        return {
+            "rays": {
+                "primary": self.primary_rays,
+                "secondary": self.secondary_rays
+            },
+            "sphere_hit": {
+                "calls": self.sphere_tests,
+                "hits": self.sphere_hits
+            },
+            "scatter": dict(sorted(self.scatters.items())),
+            # JSON keys are strings; these are the depths.
+            "path_depths": {
+                str(depth): self.depths[depth] for depth in sorted(self.depths)
+            }
+        }
+
+    def write(self, filename: str):
+        with open(filename, "w") as report:
+            json.dump(self.report(), report, indent=2)
+
+def _material_classes() -> List[type]:
+    classes: List[type] = []
+    pending: List[type] = [Material]
+    while pending:
+        cls: type = pending.pop()
+        for subclass in cls.__subclasses__():
+            if subclass not in classes:
+                classes.append(subclass)
+                pending.append(subclass)
+    return classes
@@ -0,0 +1,79 @@
+from one_week.counters import Counters
+from one_week.engine import Scene, render
+from one_week.hittable import HittableList
+from one_week.integrator import MAX_DEPTH, color
+from one_week.material import Identity, Lambertian
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+
+class CountersTest(unittest.TestCase):
+
+    def test_counts_one_path(self):
+        # Identity lets the ray through, so it hits the sphere at every depth
+        # down to the last.
+        world = HittableList([Sphere(Vec3(0, 0, -1), 0.5, Identity())])
+        counters = Counters()
+        with counters:
+            shade = counters.count_paths(color)
+            shade(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), world)
+            shade(Ray(Vec3(0, 0, 0), Vec3(0, 1, 0)), world)
+
+        self.assertEqual(
+            {
+                "rays": {"primary": 2, "secondary": MAX_DEPTH},
+                "sphere_hit": {"calls": MAX_DEPTH + 2, "hits": MAX_DEPTH + 1},
+                "scatter": {"Identity": MAX_DEPTH},
+                "path_depths": {"0": 1, str(MAX_DEPTH): 1}
+            },
+            counters.report()
+        )
+
+    def test_nothing_counted_outside(self):
+        original_hit = Sphere.hit
+        original_scatter = Lambertian.scatter
+        counters = Counters()
+        with counters:
+            self.assertIsNot(original_hit, Sphere.hit)
+            self.assertIsNot(original_scatter, Lambertian.scatter)
+
+        self.assertIs(original_hit, Sphere.hit)
+        self.assertIs(original_scatter, Lambertian.scatter)
+        world = HittableList(
+            [Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(1, 1, 1)))]
+        )
+        color(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), world)
+        self.assertEqual(0, counters.sphere_tests)
+        self.assertEqual({}, counters.scatters)
+
+    def test_render_report(self):
+        dielectrics = importlib.import_module("one_week.8_dielectrics")
+        with tempfile.TemporaryDirectory() as directory:
+            report_file = os.path.join(directory, "counters.json")
+            backend = render(
+                dielectrics.scene(8, 4), 8, 4, 2,
+                os.path.join(directory, "image.ppm"), seed=1,
+                counters=report_file
+            )
+            with open(report_file) as report_json:
+                report = json.load(report_json)
+
+        self.assertEqual("scalar", backend)
+        self.assertEqual(8 * 4 * 2, report["rays"]["primary"])
+        self.assertEqual(
+            report["rays"]["secondary"], sum(report["scatter"].values())
+        )
+        self.assertEqual(
+            report["rays"]["primary"], sum(report["path_depths"].values())
+        )
+
+    def test_render_other_backends(self):
+        scene = Scene([Sphere(Vec3(0, 0, -1), 0.5)], None)
+        with self.assertRaises(ValueError):
+            render(scene, 1, 1, 1, "unused.ppm", backend="numpy", counters="x")
@@ -0,0 +1,150 @@
+"""
+Take the noise out of a render with few samples per pixel.
+
+The filter is the edge-avoiding à-trous wavelet transform (Dammertz et al.,
+"Edge-Avoiding À-Trous Wavelet Transform for fast Global Illumination
+Filtering", 2010). Every pass blurs each pixel with its neighbors 5 x 5 apart
+on a grid whose spacing doubles from one pass to the next (1, 2, 4, ... pixels,
+the "holes" of à trous), so five passes cover 125 x 125 pixels at the cost of
+25 neighbors each. A plain blur would smear the edges as much as the noise;
+here, every neighbor counts for less the more it differs from the pixel:
+
+- in its first-hit normal, depth and albedo (the AOVs, see
+  `wavefront.render_aovs`), which don't have any noise to speak of, but change
+  abruptly where one sphere ends and another starts;
+- in its color, so that a shadow's edge (which the AOVs don't see) survives.
+  This one is relaxed at each pass, as the colors being compared get smoother.
+
+Before filtering, the colors are divided by the albedo, leaving the light
+falling on every pixel. Textures (here, spheres of different colors) would
+otherwise be blurred into each other. The albedo goes back in afterwards.
+
+Everything works on whole images at a time, so the cost is 25 array
+operations per pass whatever the size of the image.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from one_week.framebuffer import FrameBuffer
+from one_week.wavefront import AOVs
+from typing import List, NamedTuple
+
+import numpy as np
+
+# The B3 spline, which is what the à-trous transform is usually built on.
+KERNEL: np.ndarray = np.array([1 / 16, 1 / 4, 3 / 8, 1 / 4, 1 / 16])
+
+class Settings(NamedTuple):
+    """
+    How hard the filter works. `passes` is how many times it filters, each
+    with twice the spacing of the one before. The sigmas say how much a
+    neighbor can differ from a pixel before it hardly counts: in color (in
+    the light falling on it, gamma corrected, and at the first pass: it
+    halves at every one), in albedo, in normal (as the
+    distance between the unit vectors) and in depth (relative to the
+    pixel's).
+    """
+    passes: int = 5
+    color_sigma: float = 0.3
+    albedo_sigma: float = 0.2
+    normal_sigma: float = 0.3
+    depth_sigma: float = 0.05
+
+def _shifted(padded: np.ndarray, pad: int, dy: int, dx: int) -> np.ndarray:
+    height: int = padded.shape[0] - 2 * pad
+    width: int = padded.shape[1] - 2 * pad
+    return padded[pad + dy:pad + dy + height, pad + dx:pad + dx + width]
+
+def atrous_pass(
+    colors: np.ndarray, aovs: AOVs, step: int, color_sigma: float,
+    settings: Settings
+) -> np.ndarray:
+    """
+    One pass of the filter over the (height, width, 3) linear `colors`, the
+    neighbors `step` pixels apart.
+    """
+    pad: int = 2 * step
+    padding = ((pad, pad), (pad, pad), (0, 0))
+    padded_colors: np.ndarray = np.pad(colors, padding, mode="edge")
+    # Compared gamma corrected, which is closer to how different colors
+    # look, so that the filter goes as easy on the shadows as on the rest.
+    looks: np.ndarray = np.sqrt(colors)
+    padded_looks: np.ndarray = np.pad(looks, padding, mode="edge")
+    padded_normals: np.ndarray = np.pad(aovs.normals, padding, mode="edge")
+    padded_albedos: np.ndarray = np.pad(aovs.albedos, padding, mode="edge")
+    padded_depths: np.ndarray = np.pad(aovs.depths, padding[:2], mode="edge")
+    # Far enough to be the same, near the camera or in the sky.
+    depth_scale: np.ndarray = settings.depth_sigma * np.maximum(
+        aovs.depths, 1e-3
+    )
+
+    total: np.ndarray = np.zeros_like(colors)
+    weights: np.ndarray = np.zeros(colors.shape[:2])
+    for i, kernel_y in enumerate(KERNEL):
+        for j, kernel_x in enumerate(KERNEL):
+            dy: int = (i - 2) * step
+            dx: int = (j - 2) * step
+            neighbors: np.ndarray = _shifted(padded_colors, pad, dy, dx)
+            distance: np.ndarray = (
+                np.sum(
+                    (_shifted(padded_looks, pad, dy, dx) - looks) ** 2, axis=2
+                ) / color_sigma ** 2 +
+                np.sum(
+                    (_shifted(padded_normals, pad, dy, dx) - aovs.normals) ** 2,
+                    axis=2
+                ) / settings.normal_sigma ** 2 +
+                np.sum(
+                    (_shifted(padded_albedos, pad, dy, dx) - aovs.albedos) ** 2,
+                    axis=2
+                ) / settings.albedo_sigma ** 2 +
+                ((_shifted(padded_depths, pad, dy, dx) - aovs.depths) /
+                 depth_scale) ** 2
+            )
+            weight: np.ndarray = kernel_y * kernel_x * np.exp(-distance)
+            total += weight[:, :, np.newaxis] * neighbors
+            weights += weight
+
+    # The pixel itself always has some weight, so this never divides by 0.
+    return total / weights[:, :, np.newaxis]
+
+def denoise(
+    pixels: np.ndarray, aovs: AOVs, settings: Settings=Settings()
+) -> np.ndarray:
+    """
+    Filter the (height, width, 3) linear colors of a render, its AOVs
+    telling where the edges are. Return the filtered linear colors.
+    """
+    # Dark albedos would blow the noise up, so those pixels keep more of
+    # their own colors' noise rather than be divided by nearly 0.
+    albedos: np.ndarray = np.maximum(aovs.albedos, 0.05)
+    light: np.ndarray = np.clip(pixels / albedos, 0, None)
+
+    for i in range(settings.passes):
+        light = atrous_pass(
+            light, aovs, 1 << i, settings.color_sigma / (1 << i), settings
+        )
+
+    return np.clip(light * albedos, 0, 1)
+
+def write_aovs(filename: str, aovs: AOVs) -> List[str]:
+    """
+    Save the AOVs as PPMs next to `filename` (a render's), to have a look at:
+    the normals as 5_antialiasing colors them, the albedos and the depths
+    (nearer is brighter, the sky black). Return the names of the files.
+    """
+    base: str = (
+        filename[:-len(".ppm")] if filename.endswith(".ppm") else filename
+    )
+    height, width = aovs.depths.shape
+    hit: np.ndarray = aovs.depths > 0
+    depths: np.ndarray = np.zeros((height, width, 3))
+    if hit.any():
+        depths[hit] = (1 - aovs.depths[hit] / aovs.depths.max())[:, np.newaxis]
+    filenames: List[str] = []
+    for name, pixels, gamma_correct in (
+        ("normal", 0.5 * (aovs.normals + 1), False),
+        ("albedo", aovs.albedos, True),
+        ("depth", depths, False)
+    ):
+        filenames.append("%s.%s.ppm" % (base, name))
+        FrameBuffer(width, height, pixels).write(filenames[-1], gamma_correct)
+    return filenames
@@ -0,0 +1,56 @@
+from one_week.testing import dielectrics_hittables, scripts_camera
+
+import unittest
+
+try:
+    import numpy as np
+    from one_week import denoise, wavefront
+except ImportError:
+    denoise = None
+
+@unittest.skipIf(denoise is None, "needs NumPy")
+class DenoiseTest(unittest.TestCase):
+
+    def setUp(self):
+        # The matte sphere on the ground: nothing a denoiser can't see.
+        self.scene = wavefront.WavefrontScene.from_hittables(
+            dielectrics_hittables()[:2]
+        )
+        self.camera = scripts_camera()
+
+    def render(self, samples, seed=11):
+        return wavefront.render(
+            self.scene, self.camera, 100, 50, samples, seed
+        )
+
+    def error(self, pixels, reference):
+        # As it looks: gamma corrected.
+        return np.mean((np.sqrt(pixels) - np.sqrt(reference)) ** 2)
+
+    def test_closer_to_many_samples(self):
+        reference = self.render(256, seed=1)
+        noisy = self.render(16)
+        aovs = wavefront.render_aovs(self.scene, self.camera, 100, 50, 16, 11)
+        denoised = denoise.denoise(noisy, aovs)
+        self.assertEqual(noisy.shape, denoised.shape)
+        self.assertLess(
+            self.error(denoised, reference), self.error(noisy, reference) / 2
+        )
+
+    def test_keeps_edges(self):
+        # Half sphere, half sky, and no noise: the filter has nothing to do.
+        aovs = wavefront.AOVs(
+            np.zeros((8, 8, 3)), np.ones((8, 8, 3)), np.zeros((8, 8))
+        )
+        aovs.normals[:, 4:] = [0, 0, 1]
+        aovs.albedos[:, 4:] = [0.8, 0.3, 0.3]
+        aovs.depths[:, 4:] = 1
+        pixels = np.where(
+            np.arange(8)[None, :, None] < 4, [0.5, 0.7, 1.0], [0.4, 0.15, 0.15]
+        ) * np.ones((8, 1, 1))
+        np.testing.assert_allclose(
+            pixels, denoise.denoise(pixels, aovs), atol=1e-6
+        )
+
+if __name__ == "__main__":
+    unittest.main()
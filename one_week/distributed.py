@@ -0,0 +1,617 @@
+"""
+Render tiles on other machines.
+
+A coordinator listens on a TCP port. Workers (`python -m one_week worker
+HOST:PORT`, on as many machines as there are) connect to it, get the scene
+and the render settings, and then keep asking for tiles. A tile is only
+_leased_ to a worker: if the worker doesn't send it back (or at least say it's
+still on it, which it does every few seconds while rendering) before the lease
+runs out, or if its connection drops, the tile goes back to be handed to
+someone else. So a worker that dies, hangs or gets unplugged costs the render
+a few seconds, not the render. Whichever copy of a tile comes back first is
+kept; they are all the same anyway, the random numbers being keyed by pixel
+and sample (see one_week.rng).
+
+For testing, or to use the machine the coordinator runs on too, the
+coordinator can start workers of its own (`local_workers`). They connect over
+the loopback, like any other worker would.
+
+Every message is a JSON header, maybe followed by a binary payload:
+
+    4 bytes   length of the header
+    4 bytes   length of the payload
+    header    JSON, with at least a "type"
+    payload
+
+The scene goes out as the arrays one_week.parallel shares with its workers,
+in a .npz. Tiles come back as float32, with the bytes of every float
+regrouped by significance before compressing (see `pack_pixels`). Nothing is
+ever unpickled, but there's no authentication either: run it on a network
+you trust.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from one_week.camera import Camera
+from one_week.framebuffer import StreamingPPM
+from one_week.hittable import Hittable
+from one_week.parallel import (
+    TILE_SIZE, TileTask, cache_key, scene_arrays, scene_from_arrays
+)
+from one_week.progress import Progress
+from one_week.sampler import make_sampler
+from one_week.tile import Tile, iter_tiles
+from one_week.tile_cache import TileCache
+from one_week.wavefront import MAX_DEPTH, WavefrontCamera, WavefrontScene
+from typing import (
+    Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+)
+
+import collections
+import io
+import itertools
+import json
+import multiprocessing
+import numpy as np
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+import zlib
+
+import one_week.wavefront as wavefront
+
+# Seconds a worker has to send a tile back, or say it's still rendering it.
+LEASE_TIMEOUT: float = 10.0
+# Seconds a worker waits when all the tiles are out but not all are back:
+# one of them might come up for grabs again.
+WAIT: float = 0.25
+# Seconds a worker keeps trying to reach a coordinator which isn't up yet.
+CONNECT_TIMEOUT: float = 30.0
+
+_HEADER: struct.Struct = struct.Struct("!II")
+
+Message = Tuple[Dict[str, Any], bytes]
+# A tile that came back, or why it didn't.
+_Result = Tuple[TileTask, Optional[np.ndarray], Optional[Exception]]
+
+def send_message(
+    connection: socket.socket, header: Dict[str, Any], payload: bytes=b""
+):
+    encoded: bytes = json.dumps(header).encode("utf-8")
+    connection.sendall(
+        _HEADER.pack(len(encoded), len(payload)) + encoded + payload
+    )
+
+def receive_message(connection: socket.socket) -> Message:
+    """
+    The next message. Raise ConnectionError if the other side hung up.
+    """
+    header_size, payload_size = _HEADER.unpack(
+        _receive_exactly(connection, _HEADER.size)
+    )
+    header: Dict[str, Any] = json.loads(
+        _receive_exactly(connection, header_size).decode("utf-8")
+    )
+    return header, _receive_exactly(connection, payload_size)
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes:
+    data: bytearray = bytearray()
+    while len(data) < size:
+        chunk: bytes = connection.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+def pack_pixels(pixels: np.ndarray) -> bytes:
+    """
+    Compress the colors of a tile. float32 is plenty for colors which end up
+    as bytes, and takes half the bandwidth. The bytes are then shuffled so
+    that all the first bytes of the floats come first, then all the second
+    ones and so on: the exponents and the top of the mantissas vary little
+    across a tile and compress well together, while the noisy low bytes
+    don't, whatever is done to them.
+    """
+    floats: np.ndarray = np.ascontiguousarray(pixels, dtype="<f4")
+    shuffled: np.ndarray = floats.view(np.uint8).reshape(-1, 4).T
+    return zlib.compress(shuffled.tobytes())
+
+def unpack_pixels(data: bytes, height: int, width: int) -> np.ndarray:
+    shuffled: np.ndarray = np.frombuffer(
+        zlib.decompress(data), dtype=np.uint8
+    ).reshape(4, -1)
+    return np.ascontiguousarray(shuffled.T).view("<f4").reshape(
+        height, width, 3
+    ).astype(np.float64)
+
+def pack_scene(scene: WavefrontScene, camera: WavefrontCamera) -> bytes:
+    buffer: io.BytesIO = io.BytesIO()
+    np.savez_compressed(buffer, **scene_arrays(scene, camera))
+    return buffer.getvalue()
+
+def unpack_scene(data: bytes) -> Tuple[WavefrontScene, WavefrontCamera]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return scene_from_arrays({key: arrays[key] for key in arrays.files})
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    "host:port" to a (host, port) pair.
+    """
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError("Expected HOST:PORT, not %s" % address)
+    return host, int(port)
+
+class _Lease(object):
+
+    __slots__ = ("task", "holder", "deadline")
+
+    def __init__(self, task: TileTask, holder: int, deadline: float):
+        self.task: TileTask = task
+        self.holder: int = holder
+        self.deadline: float = deadline
+
+class _Handler(socketserver.BaseRequestHandler):
+    """
+    One worker's connection.
+    """
+
+    server: "_Server"
+
+    def handle(self):
+        coordinator: Coordinator = self.server.coordinator
+        connection: socket.socket = self.request
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        holder: int = coordinator._connected(connection)
+        try:
+            header, _ = receive_message(connection)
+            if header.get("type") != "hello":
+                return
+            send_message(connection, coordinator._job, coordinator._scene)
+            while True:
+                header, payload = receive_message(connection)
+                kind: str = header.get("type", "")
+                if kind == "lease":
+                    send_message(connection, coordinator._lease(holder))
+                elif kind == "renew":
+                    coordinator._renew(holder, header["index"])
+                elif kind == "result":
+                    coordinator._finish(holder, header["index"], payload)
+                elif kind == "error":
+                    coordinator._fail(header["index"], header["traceback"])
+        except (ConnectionError, OSError, ValueError, KeyError):
+            # Anything from a clean goodbye to a garbled message: this worker
+            # is done either way.
+            pass
+        finally:
+            coordinator._disconnected(holder)
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    coordinator: "Coordinator"
+
+class Coordinator(object):
+    """
+    Hands out the tiles of one render to whichever workers connect. Use it as
+    a context manager, like parallel.TileRenderer:
+
+        with Coordinator(hittables, camera, width, height, samples) as job:
+            print("Workers can connect to %s:%d" % job.address)
+            for task, pixels in job.render():
+                ...
+    """
+
+    def __init__(
+        self, hittables: List[Hittable], camera: Camera, width: int,
+        height: int, samples: int, address: Tuple[str, int]=("127.0.0.1", 0),
+        local_workers: int=0, seed: Optional[int]=None, shading: str="path",
+        max_depth: int=MAX_DEPTH, tile_size: int=TILE_SIZE,
+        sampler: str="random", lease_timeout: float=LEASE_TIMEOUT
+    ):
+        """
+        Listen on `address` (port 0 picks a free one, see `self.address`)
+        and start `local_workers` worker processes on this machine.
+        `samples` is the samples per pixel of the tasks `render` makes up if
+        given none, and what the sampler is made for.
+        """
+        self.width: int = width
+        self.height: int = height
+        self.samples: int = samples
+        self.tile_size: int = tile_size
+        self.lease_timeout: float = lease_timeout
+        self.seed: int = seed if seed is not None else wavefront.new_seed()
+        self._job: Dict[str, Any] = {
+            "type": "job", "width": width, "height": height,
+            "seed": self.seed, "shading": shading, "max_depth": max_depth,
+            "sampler": sampler, "samples": samples,
+            "heartbeat": lease_timeout / 3
+        }
+        self._scene: bytes = pack_scene(
+            WavefrontScene.from_hittables(hittables),
+            WavefrontCamera.from_camera(camera)
+        )
+
+        self.__lock: threading.Lock = threading.Lock()
+        self.__tasks: Iterator[TileTask] = iter(())
+        # Tasks whose leases were lost, to hand out before any new ones.
+        self.__returned: Deque[TileTask] = collections.deque()
+        self.__leases: Dict[int, _Lease] = {}
+        self.__finished: Set[int] = set()
+        # Workers that come before `render` wait for it.
+        self.__started: bool = False
+        # -1 until the tasks run out, then how many are not back yet.
+        self.__outstanding: int = -1
+        self.__results: queue.Queue = queue.Queue()
+        self.__connections: Dict[int, socket.socket] = {}
+        self.__next_holder: int = 0
+        self.__processes: List[multiprocessing.Process] = []
+
+        self.__server: _Server = _Server(address, _Handler)
+        self.__server.coordinator = self
+        self.address: Tuple[str, int] = self.__server.server_address[:2]
+        self.__thread: threading.Thread = threading.Thread(
+            target=self.__server.serve_forever, daemon=True
+        )
+        self.__thread.start()
+
+        try:
+            host: str = self.address[0]
+            if host in ("0.0.0.0", ""):
+                host = "127.0.0.1"
+            for _ in range(local_workers):
+                process = multiprocessing.Process(
+                    target=run_worker, args=("%s:%d" % (host, self.address[1]),)
+                )
+                process.start()
+                self.__processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "Coordinator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def render(
+        self, tasks: Optional[Iterable[TileTask]]=None
+    ) -> Iterator[Tuple[TileTask, np.ndarray]]:
+        """
+        Hand out the tasks (every tile at `self.samples` samples, if not
+        given) and yield every one as soon as some worker sends it back,
+        along with the (tile height, tile width, 3) average colors of the
+        samples it rendered.
+
+        The tasks can be a generator: they are taken from it only when a
+        worker asks for one. Every task must be for a different tile.
+        """
+        if tasks is None:
+            tasks = (
+                TileTask(tile, self.samples)
+                for tile in iter_tiles(self.width, self.height, self.tile_size)
+            )
+        remaining: Iterator[TileTask] = iter(tasks)
+        first: Optional[TileTask] = next(remaining, None)
+        if first is None:
+            return
+        with self.__lock:
+            self.__tasks = itertools.chain([first], remaining)
+            self.__started = True
+
+        while True:
+            try:
+                result: Optional[_Result] = self.__results.get(timeout=1)
+            except queue.Empty:
+                self.__check_workers()
+                continue
+            if result is None:
+                # All done.
+                break
+            task, pixels, error = result
+            if error is not None:
+                raise error
+            yield task, pixels
+
+    def __check_workers(self):
+        # Workers elsewhere can join any time, but if the only ones there
+        # were are the local ones and they're gone, nobody is coming.
+        if not self.__processes or self.__connections:
+            return
+        if all(process.exitcode is not None for process in self.__processes):
+            raise RuntimeError("The render workers died")
+
+    def __expire(self, now: float):
+        for index, lease in list(self.__leases.items()):
+            if lease.deadline < now:
+                del self.__leases[index]
+                self.__returned.append(lease.task)
+
+    def __take(self) -> Optional[TileTask]:
+        if self.__returned:
+            return self.__returned.popleft()
+        if not self.__started or self.__outstanding >= 0:
+            return None
+        task: Optional[TileTask] = next(self.__tasks, None)
+        if task is None:
+            self.__outstanding = len(self.__leases)
+            if not self.__outstanding:
+                self.__results.put(None)
+        elif task.tile.width > self.tile_size or task.tile.height > self.tile_size:
+            self.__results.put((task, None, ValueError(
+                "Tile %s is bigger than %s pixels a side" %
+                (task.tile.index, self.tile_size)
+            )))
+            return None
+        return task
+
+    def _lease(self, holder: int) -> Dict[str, Any]:
+        with self.__lock:
+            now: float = time.monotonic()
+            self.__expire(now)
+            task: Optional[TileTask] = self.__take()
+            if task is None:
+                if self.__started and self.__outstanding == 0:
+                    return {"type": "done"}
+                return {"type": "wait", "seconds": WAIT}
+            self.__leases[task.tile.index] = _Lease(
+                task, holder, now + self.lease_timeout
+            )
+            tile: Tile = task.tile
+            return {
+                "type": "tile", "index": tile.index, "x0": tile.x0,
+                "y0": tile.y0, "x1": tile.x1, "y1": tile.y1,
+                "samples": task.samples, "first_sample": task.first_sample
+            }
+
+    def _renew(self, holder: int, index: int):
+        with self.__lock:
+            lease: Optional[_Lease] = self.__leases.get(index)
+            if lease is not None and lease.holder == holder:
+                lease.deadline = time.monotonic() + self.lease_timeout
+
+    def _finish(self, holder: int, index: int, payload: bytes):
+        with self.__lock:
+            if index in self.__finished:
+                return
+            lease: Optional[_Lease] = self.__leases.pop(index, None)
+            task: Optional[TileTask] = lease.task if lease is not None else None
+            if task is None:
+                # The lease ran out, but here's the tile anyway. Keep it, and
+                # drop the copy that's waiting to be handed out again.
+                for returned in self.__returned:
+                    if returned.tile.index == index:
+                        task = returned
+                        self.__returned.remove(returned)
+                        break
+            if task is None:
+                return
+            self.__finished.add(index)
+            # Decompressed under the lock, so that the tiles are in the
+            # queue before the end of them.
+            self.__results.put((task, unpack_pixels(
+                payload, task.tile.height, task.tile.width
+            ), None))
+            if self.__outstanding > 0:
+                self.__outstanding -= 1
+                if not self.__outstanding:
+                    self.__results.put(None)
+
+    def _fail(self, index: int, error: str):
+        with self.__lock:
+            lease: Optional[_Lease] = self.__leases.get(index)
+        if lease is not None:
+            self.__results.put((lease.task, None, RuntimeError(
+                "Rendering tile %s failed:\n%s" % (index, error)
+            )))
+
+    def _connected(self, connection: socket.socket) -> int:
+        with self.__lock:
+            self.__connections[self.__next_holder] = connection
+            self.__next_holder += 1
+            return self.__next_holder - 1
+
+    def _disconnected(self, holder: int):
+        with self.__lock:
+            del self.__connections[holder]
+            for index, lease in list(self.__leases.items()):
+                if lease.holder == holder:
+                    del self.__leases[index]
+                    self.__returned.append(lease.task)
+
+    def close(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        with self.__lock:
+            connections: List[socket.socket] = list(
+                self.__connections.values()
+            )
+        for connection in connections:
+            # Workers still at it notice and quit.
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for process in self.__processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.__processes = []
+
+def run_worker(address: str, connect_timeout: float=CONNECT_TIMEOUT):
+    """
+    Render tiles for the coordinator at `address` ("host:port") until it has
+    no more, or goes away.
+    """
+    connection: socket.socket = _connect(
+        parse_address(address), connect_timeout
+    )
+    with connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_message(connection, {
+            "type": "hello", "name": "%s:%d" % (socket.gethostname(), os.getpid())
+        })
+        try:
+            job, payload = receive_message(connection)
+            scene, camera = unpack_scene(payload)
+            sampler = make_sampler(job["sampler"], job["samples"])
+            # The heartbeat shares the connection.
+            sending: threading.Lock = threading.Lock()
+
+            while True:
+                with sending:
+                    send_message(connection, {"type": "lease"})
+                header, _ = receive_message(connection)
+                if header["type"] == "done":
+                    break
+                if header["type"] == "wait":
+                    time.sleep(header["seconds"])
+                    continue
+
+                index: int = header["index"]
+                rendering: threading.Event = threading.Event()
+                heartbeat: threading.Thread = threading.Thread(
+                    target=_heartbeat,
+                    args=(connection, sending, index, rendering, job["heartbeat"]),
+                    daemon=True
+                )
+                heartbeat.start()
+                try:
+                    pixels: np.ndarray = wavefront.render_tile(
+                        scene, camera, job["width"], job["height"],
+                        header["x0"], header["y0"], header["x1"], header["y1"],
+                        header["samples"], job["seed"], job["shading"],
+                        job["max_depth"], header["first_sample"], sampler
+                    )
+                    message: Message = (
+                        {"type": "result", "index": index}, pack_pixels(pixels)
+                    )
+                except Exception:
+                    message = (
+                        {
+                            "type": "error", "index": index,
+                            "traceback": traceback.format_exc()
+                        },
+                        b""
+                    )
+                finally:
+                    rendering.set()
+                    heartbeat.join()
+                with sending:
+                    send_message(connection, *message)
+        except ConnectionError:
+            # The coordinator is gone, which is its way of saying it's done.
+            pass
+
+def _heartbeat(
+    connection: socket.socket, sending: threading.Lock, index: int,
+    rendering: threading.Event, interval: float
+):
+    while not rendering.wait(interval):
+        try:
+            with sending:
+                send_message(connection, {"type": "renew", "index": index})
+        except OSError:
+            return
+
+def _connect(address: Tuple[str, int], timeout: float) -> socket.socket:
+    deadline: float = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection(address)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+def render_tiles(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, address: Tuple[str, int]=("127.0.0.1", 0),
+    local_workers: int=0, seed: Optional[int]=None, tile_size: int=TILE_SIZE,
+    shading: str="path", max_depth: int=MAX_DEPTH, sampler: str="random",
+    lease_timeout: float=LEASE_TIMEOUT, cache: Optional[TileCache]=None
+) -> Iterator[Tuple[Tile, np.ndarray]]:
+    """
+    Every tile of the image with its pixels, like `parallel.render_tiles`.
+    Nobody is waited for if the cache has every tile.
+    """
+    def render_missing(
+        tiles: Iterable[Tile]
+    ) -> Iterator[Tuple[Tile, np.ndarray]]:
+        with Coordinator(
+            hittables, camera, width, height, samples, address,
+            local_workers, seed, shading, max_depth, tile_size, sampler,
+            lease_timeout
+        ) as coordinator:
+            print(
+                "Waiting for workers on %s:%d" % coordinator.address,
+                flush=True
+            )
+            for task, pixels in coordinator.render(
+                TileTask(tile, samples) for tile in tiles
+            ):
+                yield task.tile, pixels
+
+    tiles: Iterator[Tile] = iter_tiles(width, height, tile_size)
+    if cache is None:
+        return render_missing(tiles)
+    return cache.render(
+        cache_key(
+            hittables, camera, width, height, samples, seed, shading,
+            max_depth, make_sampler(sampler, samples)
+        ),
+        tiles, render_missing
+    )
+
+def render(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, address: Tuple[str, int]=("127.0.0.1", 0),
+    local_workers: int=0, seed: Optional[int]=None, tile_size: int=TILE_SIZE,
+    shading: str="path", max_depth: int=MAX_DEPTH, sampler: str="random",
+    lease_timeout: float=LEASE_TIMEOUT, cache: Optional[TileCache]=None
+) -> np.ndarray:
+    """
+    Like `parallel.render`, on whatever workers connect to `address`. Return
+    the (height, width, 3) linear colors.
+
+    Given the same seed, the result is the same as `wavefront.render`'s, up
+    to the float32 the tiles travel as.
+    """
+    image: np.ndarray = np.empty((height, width, 3))
+    for tile, pixels in render_tiles(
+        hittables, camera, width, height, samples, address, local_workers,
+        seed, tile_size, shading, max_depth, sampler, lease_timeout, cache
+    ):
+        image[tile.y0:tile.y1, tile.x0:tile.x1] = pixels
+
+    return image
+
+def render_to_file(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, filename: str, address: Tuple[str, int]=("127.0.0.1", 0),
+    local_workers: int=0, seed: Optional[int]=None, tile_size: int=TILE_SIZE,
+    shading: str="path", max_depth: int=MAX_DEPTH, gamma_correct: bool=True,
+    sampler: str="random", lease_timeout: float=LEASE_TIMEOUT,
+    cache: Optional[TileCache]=None, progress: Optional[Progress]=None
+):
+    """
+    Like `render`, but stream the image into a binary PPM at `filename`, like
+    `parallel.render_to_file`. The workers don't count their rays, so
+    `progress` only hears about tiles and samples.
+    """
+    with StreamingPPM(
+        filename, width, height, tile_size, gamma_correct
+    ) as ppm:
+        for tile, pixels in render_tiles(
+            hittables, camera, width, height, samples, address,
+            local_workers, seed, tile_size, shading, max_depth, sampler,
+            lease_timeout, cache
+        ):
+            ppm.write_tile(tile, pixels)
+            if progress is not None:
+                progress.update(1, tile.pixel_count * samples)
@@ -0,0 +1,102 @@
+from one_week.testing import dielectrics_hittables, lens_camera
+
+import socket
+import threading
+import unittest
+
+try:
+    import numpy as np
+    from one_week import distributed, wavefront
+except ImportError:
+    distributed = None
+
+@unittest.skipIf(distributed is None, "needs NumPy")
+class DistributedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hittables = dielectrics_hittables()
+        self.camera = lens_camera()
+        self.expected = wavefront.render(
+            wavefront.WavefrontScene.from_hittables(self.hittables),
+            self.camera, 20, 10, 2, 16
+        )
+
+    def test_same_as_wavefront(self):
+        image = distributed.render(
+            self.hittables, self.camera, 20, 10, 2, local_workers=2, seed=16,
+            tile_size=4
+        )
+        self.assertTrue(np.allclose(self.expected, image, rtol=1e-6))
+
+    def test_pack_pixels(self):
+        pixels = np.random.default_rng(0).random((3, 5, 3))
+        self.assertTrue(np.allclose(
+            pixels,
+            distributed.unpack_pixels(distributed.pack_pixels(pixels), 3, 5),
+            rtol=1e-6
+        ))
+
+    def render_after_bad_worker(self, hang):
+        """
+        A worker takes a tile and then either hangs up or just hangs.
+        Another one comes along afterwards.
+        """
+        with distributed.Coordinator(
+            self.hittables, self.camera, 20, 10, 2, seed=16, tile_size=4,
+            lease_timeout=0.5
+        ) as coordinator:
+            address = "%s:%d" % coordinator.address
+            leased = threading.Event()
+            finished = threading.Event()
+
+            def bad_worker():
+                with socket.create_connection(coordinator.address) as bad:
+                    distributed.send_message(bad, {"type": "hello"})
+                    distributed.receive_message(bad)
+                    while True:
+                        distributed.send_message(bad, {"type": "lease"})
+                        header, _ = distributed.receive_message(bad)
+                        if header["type"] == "tile":
+                            break
+                    leased.set()
+                    if hang:
+                        finished.wait()
+
+            def good_worker():
+                leased.wait()
+                distributed.run_worker(address)
+
+            threads = [
+                threading.Thread(target=bad_worker),
+                threading.Thread(target=good_worker)
+            ]
+            for thread in threads:
+                thread.start()
+            image = np.empty((10, 20, 3))
+            tiles = []
+            for task, pixels in coordinator.render():
+                tile = task.tile
+                image[tile.y0:tile.y1, tile.x0:tile.x1] = pixels
+                tiles.append(tile.index)
+            finished.set()
+
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(15)), sorted(tiles))
+        self.assertTrue(np.allclose(self.expected, image, rtol=1e-6))
+
+    def test_disconnected_worker(self):
+        self.render_after_bad_worker(hang=False)
+
+    def test_expired_lease(self):
+        self.render_after_bad_worker(hang=True)
+
+    def test_parse_address(self):
+        self.assertEqual(
+            ("example.com", 7070), distributed.parse_address("example.com:7070")
+        )
+        with self.assertRaises(ValueError):
+            distributed.parse_address("7070")
+
+if __name__ == "__main__":
+    unittest.main()
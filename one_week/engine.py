@@ -0,0 +1,1289 @@
+"""
+One way to render a scene, whatever the scene.
+
+The numbered scripts used to each carry their own `color()` and their own loop
+over the pixels. Now they only describe a scene: a module with a
+`scene(width, height)` function returning a `Scene`, and optionally `WIDTH`,
+`HEIGHT` and `SAMPLES` to render it at by default. A scene whose camera fits
+the image has a `camera(width, height)` function too, for the render service
+to render it at other sizes without making it all again. Rendering is done
+here, by one of these backends:
+
+- _scalar_: one ray at a time, with `integrator.color`. Needs nothing but the
+  standard library.
+- _flat_: the same, on plain floats instead of Vec3's (one_week.flat). Same
+  image, only faster, especially under PyPy.
+- _numpy_: the wavefront tracer of one_week.wavefront, in this process.
+- _parallel_: the wavefront tracer on a pool of processes (one_week.parallel),
+  streaming the image to disk.
+- _distributed_: the wavefront tracer on worker processes anywhere on the
+  network (one_week.distributed), started with
+
+      python -m one_week worker HOST:PORT
+
+  and on `--workers` processes on this machine, also streaming to disk.
+
+By default (`auto`) the fastest one available is used: parallel if NumPy is
+installed (or numpy, if asked for a single worker), scalar otherwise. Under
+PyPy, or without NumPy, it's flat instead, if the scene is all spheres of
+materials it knows. The NumPy backends are only imported when used, so a
+scalar draft render starts right away.
+
+From the command line:
+
+    python -m one_week render 8_dielectrics --samples 50 --workers 4
+
+A long render can be checkpointed, and resumed after a crash:
+
+    python -m one_week render scene_generator --checkpoint --resume
+
+A JSON scene file (see one_week.scene_file) works in place of a module:
+
+    python -m one_week render scenes/8_dielectrics.json
+
+or run a scene module directly, which takes the same options:
+
+    python -m one_week.8_dielectrics --samples 50
+
+Animations have a command of their own (see one_week.animation):
+
+    python -m one_week animate fly_through --frames 48
+"""
+from one_week.camera import Camera
+from one_week.checkpoint import (
+    CHECKPOINT_INTERVAL, MAX_SEED, AccumulationState, CheckpointError,
+    Checkpointer, resume_or_start, saved_seed
+)
+from one_week.counters import Counters
+from one_week.grid import accelerate
+from one_week.hittable import Hittable
+from one_week.integrator import color, normal_color
+from one_week.ppm import PPM
+from one_week.progress import MODES, Progress, RayCounter
+from one_week.ray import Ray
+from one_week.rng import SAMPLERS, seed_pixel
+from one_week.tile import Tile, count_tiles, iter_tiles
+from one_week.utils import _derive_ppm_filename
+from one_week.vec3 import Vec3
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING, Callable, Iterable, Iterator, List, NamedTuple, Optional,
+    Tuple
+)
+
+import argparse
+import importlib
+import importlib.util
+import math
+import os
+import platform
+import random
+
+if TYPE_CHECKING:
+    from one_week.tile_cache import TileCache
+    import numpy as np
+
+BACKENDS: List[str] = [
+    "auto", "scalar", "numpy", "parallel", "distributed", "flat"
+]
+SHADINGS: List[str] = ["path", "normals"]
+# The names of incremental.POLICIES, without importing NumPy.
+POLICIES: List[str] = ["visible", "nearby", "cautious"]
+# parallel.TILE_SIZE, likewise.
+TILE_SIZE: int = 32
+# adaptive.MAX_SAMPLES, TOLERANCE and Z_SCORE, likewise.
+MAX_SAMPLES: int = 256
+TOLERANCE: float = 0.03
+Z_SCORE: float = 1.96
+
+# For scene modules that don't say.
+WIDTH: int = 400
+HEIGHT: int = 200
+SAMPLES: int = 200
+
+class Scene(NamedTuple):
+    """
+    What to render. `shading` is either "path", for full path tracing, or
+    "normals", which colors every hit by its normal like 5_antialiasing.
+    `world`, if given, is what the scalar backend traces instead of putting
+    the hittables in whatever `grid.accelerate` picks for them.
+    """
+    hittables: List[Hittable]
+    camera: Camera
+    shading: str = "path"
+    world: Optional[Hittable] = None
+
+    @property
+    def gamma_correct(self) -> bool:
+        # The normals are a color already, not light to be displayed.
+        return self.shading != "normals"
+
+def pick_backend(
+    backend: str="auto", workers: Optional[int]=None,
+    scene: Optional[Scene]=None
+) -> str:
+    """
+    Resolve "auto" to the fastest backend that can run here. Given the
+    `scene`, that's the flat one if it can trace the scene and this is PyPy
+    (whose JIT makes more of it than of NumPy) or there's no NumPy.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown backend %s, expected one of %s" % (backend, BACKENDS)
+        )
+    if backend != "auto":
+        return backend
+    # Only look for NumPy; importing it is what takes the time.
+    has_numpy: bool = importlib.util.find_spec("numpy") is not None
+    if (
+        scene is not None and
+        (platform.python_implementation() == "PyPy" or not has_numpy)
+    ):
+        from one_week import flat
+
+        # The flat tracer ignores the world of the scene, if it has one.
+        if scene.world is None and flat.can_trace(scene.hittables):
+            return "flat"
+    if not has_numpy:
+        return "scalar"
+    return "numpy" if workers == 1 else "parallel"
+
+def render(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    workers: Optional[int]=None, backend: str="auto",
+    seed: Optional[int]=None, counters: Optional[str]=None,
+    sampler: str="random", listen: Optional[str]=None,
+    cache: Optional[str]=None, cache_size: Optional[int]=None,
+    incremental: Optional[str]=None, policy: str="nearby",
+    denoise: bool=False, aovs: bool=False, progress: str="human",
+    checkpoint: Optional[str]=None, resume: bool=False,
+    checkpoint_interval: float=CHECKPOINT_INTERVAL, adaptive: bool=False,
+    max_samples: int=MAX_SAMPLES, tolerance: float=TOLERANCE
+) -> str:
+    """
+    Render `scene` into a PPM at `filename`. `workers` only matters to the
+    parallel and distributed backends, where it defaults to one per CPU.
+    Return the name of the backend used.
+
+    `listen` is the "host:port" the distributed backend waits for workers
+    on, which makes it the one "auto" picks. Without it, the distributed
+    backend only has its `workers` on this machine.
+
+    `sampler` is one of SAMPLERS (see one_week.sampler). Only the NumPy
+    backends have any but "random".
+
+    The flat backend renders the same image as the scalar one, faster, but
+    only of spheres of the materials in one_week.material (see
+    one_week.flat).
+
+    If `counters` is given, the hot paths are counted (see one_week.counters)
+    and the report is written there. Only the scalar backend counts, so it is
+    the one "auto" picks then.
+
+    `cache` is a directory to keep the rendered tiles in, at most
+    `cache_size` bytes of them (see one_week.tile_cache). Rendering the same
+    thing with the same seed again reads them back instead. Only the NumPy
+    backends cache.
+
+    `incremental` is a file to keep the scene and the image in, so that the
+    next render into the same file only renders again the tiles that changes
+    to the scene can have reached, as the `policy` (one of
+    incremental.POLICIES) sees it. See one_week.incremental. Only the numpy
+    and parallel backends render incrementally.
+
+    With `denoise`, the image is filtered, guided by what the camera rays hit
+    first (see one_week.denoise), which lets far fewer samples do. With
+    `aovs`, those first hits are written next to the image. Both are for the
+    numpy and parallel backends only, which then keep the whole image in
+    memory.
+
+    `progress` is how to report on the render as it goes: one of
+    progress.MODES (see one_week.progress).
+
+    `checkpoint` is a file to save the render to every `checkpoint_interval`
+    seconds (see one_week.checkpoint). With `resume`, the render continues
+    from what was saved there, if anything. The seed has to be the same, so
+    it comes from the checkpoint if not given. Only the scalar, numpy and
+    parallel backends checkpoint.
+
+    With `adaptive`, pixels get anywhere from `samples` to `max_samples`
+    samples, as many as it takes for their color to be known to within
+    `tolerance` (see one_week.adaptive), and how many each got is written
+    next to the image as a grayscale map. Only the scalar and numpy
+    backends sample adaptively, so they're the ones "auto" picks then.
+    """
+    if scene.shading not in SHADINGS:
+        raise ValueError(
+            "Unknown shading %s, expected one of %s" % (scene.shading, SHADINGS)
+        )
+    if counters is not None:
+        if backend not in ("auto", "scalar"):
+            raise ValueError(
+                "Only the scalar backend keeps counters, not %s" % backend
+            )
+        backend = "scalar"
+    if adaptive:
+        if backend == "auto":
+            backend = pick_backend(backend, 1)
+        if backend not in ("scalar", "numpy"):
+            raise ValueError(
+                "Only the scalar and numpy backends sample adaptively, not %s"
+                % backend
+            )
+        if not 1 < samples <= max_samples:
+            raise ValueError(
+                "Adaptive sampling needs 1 < samples <= max samples, got %s "
+                "and %s" % (samples, max_samples)
+            )
+        if (
+            counters is not None or listen is not None or
+            cache is not None or incremental is not None or denoise or
+            aovs or checkpoint is not None
+        ):
+            raise ValueError(
+                "An adaptive render can't also be counted, distributed, "
+                "cached, incremental, denoised or checkpointed"
+            )
+    if listen is not None:
+        if backend not in ("auto", "distributed"):
+            raise ValueError(
+                "Only the distributed backend listens for workers, not %s" %
+                backend
+            )
+        backend = "distributed"
+    # Only a plain render can be drawn by the flat backend.
+    plain: bool = (
+        sampler == "random" and cache is None and incremental is None and
+        not (denoise or aovs) and checkpoint is None
+    )
+    backend = pick_backend(backend, workers, scene if plain else None)
+    if sampler not in SAMPLERS:
+        raise ValueError(
+            "Unknown sampler %s, expected one of %s" % (sampler, SAMPLERS)
+        )
+    if sampler != "random" and backend in ("scalar", "flat"):
+        raise ValueError(
+            "The %s backend only samples at random, not with %s" %
+            (backend, sampler)
+        )
+    if cache is not None and backend in ("scalar", "flat"):
+        raise ValueError("The %s backend has no tile cache" % backend)
+    if incremental is not None:
+        if backend not in ("numpy", "parallel"):
+            raise ValueError(
+                "Only the numpy and parallel backends render incrementally, "
+                "not %s" % backend
+            )
+        if cache is not None:
+            raise ValueError(
+                "An incremental render keeps its own tiles, without a cache"
+            )
+    if denoise or aovs:
+        if backend not in ("numpy", "parallel"):
+            raise ValueError(
+                "Only the numpy and parallel backends have AOVs to denoise "
+                "with, not %s" % backend
+            )
+        if incremental is not None:
+            raise ValueError("Incremental renders can't be denoised")
+    if resume and checkpoint is None:
+        raise ValueError("Only a checkpointed render can be resumed")
+    if checkpoint is not None:
+        if backend not in ("scalar", "numpy", "parallel"):
+            raise ValueError(
+                "Only the scalar, numpy and parallel backends checkpoint, not "
+                "%s" % backend
+            )
+        # Better now than at the first save, with the render half done.
+        if seed is not None and not 0 <= seed <= MAX_SEED:
+            raise ValueError(
+                "A checkpointed render needs a seed from 0 to %d, not %d" %
+                (MAX_SEED, seed)
+            )
+        if (
+            counters is not None or cache is not None or
+            incremental is not None or denoise or aovs
+        ):
+            raise ValueError(
+                "A checkpointed render can't also be counted, cached, "
+                "incremental or denoised"
+            )
+    tile_cache = None
+    if cache is not None:
+        from one_week.tile_cache import MAX_BYTES, TileCache
+
+        tile_cache = TileCache(
+            cache, cache_size if cache_size is not None else MAX_BYTES
+        )
+
+    if checkpoint is not None:
+        # Sized once it's known what's left to do.
+        reporter: Progress = Progress(0, 0, "tiles", progress)
+    elif adaptive:
+        # Done when they need no more samples.
+        reporter = Progress(width * height, 0, "pixels", progress)
+    elif backend in ("scalar", "flat"):
+        reporter = Progress(
+            height, width * height * samples, "rows", progress
+        )
+    else:
+        reporter = Progress(
+            count_tiles(width, height, TILE_SIZE),
+            width * height * samples, "tiles", progress
+        )
+
+    if adaptive:
+        with reporter:
+            render_adaptive(
+                scene, width, height, samples, filename, max_samples,
+                tolerance, backend, seed, sampler, reporter
+            )
+    elif checkpoint is not None:
+        with reporter:
+            render_checkpointed(
+                scene, width, height, samples, filename, checkpoint, resume,
+                checkpoint_interval, backend, workers, seed, sampler, reporter
+            )
+    elif backend == "scalar" and counters is not None:
+        counted: Counters = Counters()
+        with counted, reporter:
+            render_scalar(
+                scene, width, height, samples, filename, seed, counted,
+                reporter
+            )
+        counted.write(counters)
+    elif backend == "scalar":
+        with reporter:
+            render_scalar(
+                scene, width, height, samples, filename, seed,
+                progress=reporter
+            )
+    elif backend == "flat":
+        with reporter:
+            render_flat(
+                scene, width, height, samples, filename, seed, reporter
+            )
+    elif incremental is not None:
+        with reporter:
+            render_incremental(
+                scene, width, height, samples, filename, incremental,
+                1 if backend == "numpy" else workers, seed, sampler, policy,
+                reporter
+            )
+    elif denoise or aovs:
+        with reporter:
+            render_denoised(
+                scene, width, height, samples, filename,
+                1 if backend == "numpy" else workers, seed, sampler,
+                tile_cache, denoise, aovs, reporter
+            )
+    elif backend == "numpy":
+        with reporter:
+            render_numpy(
+                scene, width, height, samples, filename, seed, sampler,
+                tile_cache, reporter
+            )
+    elif backend == "distributed":
+        from one_week import distributed
+
+        with reporter:
+            distributed.render_to_file(
+                scene.hittables, scene.camera, width, height, samples,
+                filename, distributed.parse_address(listen or "127.0.0.1:0"),
+                workers if workers is not None else os.cpu_count() or 1, seed,
+                shading=scene.shading, gamma_correct=scene.gamma_correct,
+                sampler=sampler, cache=tile_cache, progress=reporter
+            )
+    else:
+        from one_week import parallel
+        from one_week.sampler import make_sampler
+
+        with reporter:
+            parallel.render_to_file(
+                scene.hittables, scene.camera, width, height, samples,
+                filename, workers, seed, shading=scene.shading,
+                gamma_correct=scene.gamma_correct,
+                sampler=make_sampler(sampler, samples), cache=tile_cache,
+                progress=reporter
+            )
+
+    if tile_cache is not None and tile_cache.hits:
+        print(
+            "%d tiles came from the cache, %d were rendered" %
+            (tile_cache.hits, tile_cache.misses)
+        )
+    return backend
+
+def render_scalar(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    seed: Optional[int]=None, counters: Optional[Counters]=None,
+    progress: Optional[Progress]=None
+):
+    ppm: PPM = PPM(width, height)
+    for row, colors in enumerate(
+        trace_scalar(scene, width, height, samples, seed, counters, progress)
+    ):
+        for col, pixel in enumerate(colors):
+            ppm.set_pixel(row, col, pixel)
+    ppm.write(filename)
+
+def trace_scalar(
+    scene: Scene, width: int, height: int, samples: int,
+    seed: Optional[int]=None, counters: Optional[Counters]=None,
+    progress: Optional[Progress]=None
+) -> Iterator[List[Vec3]]:
+    """
+    The rows of the image, top to bottom, as they are traced one ray at a
+    time. The colors are ready to write: 0 to 255, gamma corrected if need
+    be. Every row is reported to `progress`, if given.
+    """
+    shade: Callable[[Ray, Hittable], Vec3] = (
+        normal_color if scene.shading == "normals" else color
+    )
+    if counters is not None:
+        shade = counters.count_paths(shade)
+    world: Hittable = (
+        scene.world if scene.world is not None else accelerate(scene.hittables)
+    )
+    if progress is not None:
+        world = counted = RayCounter(world)
+
+    for j in range(height - 1, -1, -1):
+        colors: List[Vec3] = []
+        for i in range(width):
+            if seed is not None:
+                # A stream per pixel, so that the pixel comes out the same
+                # whatever was rendered before it.
+                seed_pixel(seed, ((height - 1) - j) * width + i)
+            accumulator: Vec3 = Vec3(0, 0, 0)
+            for sample in range(samples):
+                # In this instance, instead of u and v being mere ratios to
+                # our distance from the edges, they feature a random "jitter"
+                # which we use to sample the pixels around our current pixel.
+                # In this sense, the current pixel is a combination of its
+                # surroundings.
+                u: float = (i + random.random()) / width
+                v: float = (j + random.random()) / height
+                accumulator += shade(scene.camera.get_ray(u, v), world)
+
+            accumulator /= samples
+            # Most image viewers assume that the image is gamma-corrected and
+            # display it accordingly, so we comply.
+            if scene.gamma_correct:
+                accumulator.map(math.sqrt)
+            accumulator *= 255.9
+            accumulator.map(int)
+            colors.append(accumulator)
+
+        if progress is not None:
+            progress.update(1, width * samples, counted.take())
+        yield colors
+
+def render_flat(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    seed: Optional[int]=None, progress: Optional[Progress]=None
+):
+    """
+    render_scalar, with the tracer of one_week.flat: the same image.
+    """
+    from one_week import flat
+
+    ppm: PPM = PPM(width, height)
+    rays: int = flat.traced_rays
+    for row, colors in enumerate(flat.trace(
+        flat.FlatScene.from_hittables(scene.hittables), scene.camera, width,
+        height, samples, seed, scene.shading, scene.gamma_correct
+    )):
+        for col in range(width):
+            ppm.set_pixel(row, col, Vec3(*colors[3 * col:3 * col + 3]))
+        if progress is not None:
+            progress.update(1, width * samples, flat.traced_rays - rays)
+            rays = flat.traced_rays
+    ppm.write(filename)
+
+def render_adaptive(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    max_samples: int=MAX_SAMPLES, tolerance: float=TOLERANCE,
+    backend: str="numpy", seed: Optional[int]=None, sampler: str="random",
+    progress: Optional[Progress]=None
+):
+    """
+    Render with `samples` to `max_samples` samples per pixel on the scalar
+    or numpy backend, and write how many every pixel got next to the image,
+    as <filename>.samples.ppm: the whiter, the more.
+    """
+    samples_filename: str = "%s.samples.ppm" % (
+        filename[:-len(".ppm")] if filename.endswith(".ppm") else filename
+    )
+    if backend == "scalar":
+        colors, counts = trace_adaptive(
+            scene, width, height, samples, max_samples, tolerance, seed,
+            progress
+        )
+        ppm: PPM = PPM(width, height)
+        sample_map: PPM = PPM(width, height)
+        most: int = max(max(counts), 1)
+        for row in range(height):
+            for col in range(width):
+                pixel: Vec3 = colors[row * width + col]
+                if scene.gamma_correct:
+                    pixel.map(math.sqrt)
+                pixel *= 255.9
+                pixel.map(int)
+                ppm.set_pixel(row, col, pixel)
+                gray: int = int(counts[row * width + col] / most * 255.9)
+                sample_map.set_pixel(row, col, Vec3(gray, gray, gray))
+        ppm.write(filename)
+        sample_map.write(samples_filename)
+    else:
+        from one_week import adaptive, wavefront
+        from one_week.framebuffer import FrameBuffer
+        from one_week.sampler import make_sampler
+
+        image: adaptive.AdaptiveImage = adaptive.render(
+            wavefront.WavefrontScene.from_hittables(scene.hittables),
+            scene.camera, width, height, samples, max_samples, tolerance,
+            seed=seed, shading=scene.shading,
+            sampler=make_sampler(sampler, max_samples), progress=progress
+        )
+        FrameBuffer(width, height, image.colors).write(
+            filename, gamma_correct=scene.gamma_correct
+        )
+        FrameBuffer(width, height, image.sample_map()).write(
+            samples_filename, gamma_correct=False
+        )
+    print("Wrote %s" % samples_filename)
+
+def trace_adaptive(
+    scene: Scene, width: int, height: int, min_samples: int,
+    max_samples: int, tolerance: float=TOLERANCE, seed: Optional[int]=None,
+    progress: Optional[Progress]=None
+) -> Tuple[List[Vec3], List[int]]:
+    """
+    adaptive.render, one ray at a time: the mean linear color of every
+    pixel, row by row from the top, and how many samples each got. Every
+    round adds `min_samples` samples to the pixels that need more, the way
+    adaptive.render decides it, neighbors and all, with a running mean and
+    variance per pixel (Welford's) on floats.
+    """
+    shade: Callable[[Ray, Hittable], Vec3] = (
+        normal_color if scene.shading == "normals" else color
+    )
+    world: RayCounter = RayCounter(
+        scene.world if scene.world is not None else accelerate(scene.hittables)
+    )
+    pixel_count: int = width * height
+    counts: List[int] = [0] * pixel_count
+    means: List[List[float]] = [[0.0, 0.0, 0.0] for _ in range(pixel_count)]
+    m2: List[List[float]] = [[0.0, 0.0, 0.0] for _ in range(pixel_count)]
+    active: List[int] = list(range(pixel_count))
+    samples: int = min_samples
+
+    while active:
+        for pixel in active:
+            row, i = divmod(pixel, width)
+            j: int = (height - 1) - row
+            if seed is not None:
+                # The pixel's stream, from its next sample on.
+                seed_pixel(seed, pixel, counts[pixel])
+            mean: List[float] = means[pixel]
+            deviations: List[float] = m2[pixel]
+            for sample in range(samples):
+                u: float = (i + random.random()) / width
+                v: float = (j + random.random()) / height
+                sampled: Vec3 = shade(scene.camera.get_ray(u, v), world)
+                counts[pixel] += 1
+                for channel, value in enumerate(sampled.make_tuple()):
+                    delta: float = value - mean[channel]
+                    mean[channel] += delta / counts[pixel]
+                    deviations[channel] += delta * (value - mean[channel])
+
+        uncertain: List[bool] = [False] * pixel_count
+        for pixel in active:
+            count: int = counts[pixel]
+            for channel in range(3):
+                linear: float = Z_SCORE * math.sqrt(
+                    m2[pixel][channel] / max(count - 1, 1) / count
+                )
+                # Carried over to gamma corrected color, as in
+                # PixelStatistics.errors.
+                slope: float = 0.5 / math.sqrt(
+                    max(means[pixel][channel], 1 / 256)
+                )
+                if linear * slope >= tolerance:
+                    uncertain[pixel] = True
+        still: List[int] = [
+            pixel for pixel in active
+            if counts[pixel] < max_samples and any(
+                uncertain[row * width + col]
+                for row in range(
+                    max(pixel // width - 1, 0),
+                    min(pixel // width + 2, height)
+                )
+                for col in range(
+                    max(pixel % width - 1, 0), min(pixel % width + 2, width)
+                )
+            )
+        ]
+        if progress is not None:
+            progress.update(
+                len(active) - len(still), samples * len(active), world.take()
+            )
+        active = still
+        if active:
+            # Every active pixel has the same count.
+            samples = min(min_samples, max_samples - counts[active[0]])
+
+    return [Vec3(*mean) for mean in means], counts
+
+def render_checkpointed(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    checkpoint: str, resume: bool=False,
+    interval: float=CHECKPOINT_INTERVAL, backend: str="parallel",
+    workers: Optional[int]=None, seed: Optional[int]=None,
+    sampler: str="random", progress: Optional[Progress]=None
+):
+    """
+    Render a tile at a time into an AccumulationState, saved to `checkpoint`
+    every `interval` seconds and once done. With `resume`, start from what
+    was saved there: the tiles that have all their samples are skipped, and
+    the rest only get the samples they lack. Raising `samples` on a resumed
+    render adds samples to all of them.
+
+    The scalar backend traces one ray at a time, the others on the
+    wavefront tracer (with one worker for "numpy"). Every pixel's samples
+    come from its own stream, from the number it already has on, so the
+    image is the same however many times the render was stopped.
+    """
+    resumed: bool = resume and os.path.exists(checkpoint)
+    state: AccumulationState = resume_or_start(
+        checkpoint, resume, width, height, TILE_SIZE,
+        seed if seed is not None else random.getrandbits(63)
+    )
+    if seed is not None and state.seed != seed:
+        raise CheckpointError(
+            "%s was rendered with seed %d, not %d" %
+            (checkpoint, state.seed, seed)
+        )
+    # Tiles which already have all their samples are skipped.
+    tiles: List[Tile] = [
+        tile for tile in state.tiles
+        if not (
+            state.is_finished(tile) and state.tile_samples(tile) >= samples
+        )
+    ]
+    if progress is not None:
+        progress.total = len(tiles)
+        progress.total_samples = sum(
+            max(samples - state.count(row, i), 0) for tile in tiles
+            for row in range(tile.y0, tile.y1) for i in range(tile.x0, tile.x1)
+        )
+        if resumed:
+            progress.note(
+                "Resuming %s: %d of %d tiles left" %
+                (checkpoint, len(tiles), len(state.tiles))
+            )
+
+    checkpointer: Checkpointer = Checkpointer(checkpoint, interval)
+    if backend == "scalar":
+        accumulate_scalar(scene, state, tiles, samples, checkpointer, progress)
+    else:
+        accumulate_numpy(
+            scene, state, tiles, samples, checkpointer,
+            1 if backend == "numpy" else workers, sampler, progress
+        )
+    checkpointer.save(state)
+
+    if backend == "scalar":
+        ppm: PPM = PPM(width, height)
+        for row in range(height):
+            for i in range(width):
+                accumulator: Vec3 = state.mean(row, i)
+                if scene.gamma_correct:
+                    accumulator.map(math.sqrt)
+                accumulator *= 255.9
+                accumulator.map(int)
+                ppm.set_pixel(row, i, accumulator)
+        ppm.write(filename)
+    else:
+        from one_week.framebuffer import FrameBuffer
+        import numpy as np
+
+        sums: np.ndarray = np.frombuffer(state.sums).reshape(height, width, 3)
+        counts: np.ndarray = np.frombuffer(
+            state.counts, dtype=np.uint32
+        ).reshape(height, width, 1)
+        FrameBuffer(width, height, sums / np.maximum(counts, 1)).write(
+            filename, gamma_correct=scene.gamma_correct
+        )
+
+def accumulate_scalar(
+    scene: Scene, state: AccumulationState, tiles: List[Tile],
+    samples: int, checkpointer: Checkpointer,
+    progress: Optional[Progress]=None
+):
+    """
+    Bring every pixel of `tiles` up to `samples` samples, one ray at a time
+    as `trace_scalar` traces them.
+    """
+    shade: Callable[[Ray, Hittable], Vec3] = (
+        normal_color if scene.shading == "normals" else color
+    )
+    world: RayCounter = RayCounter(
+        scene.world if scene.world is not None else accelerate(scene.hittables)
+    )
+    width: int = state.width
+    height: int = state.height
+    for tile in tiles:
+        tile_samples: int = 0
+        for row in range(tile.y0, tile.y1):
+            j: int = (height - 1) - row
+            for i in range(tile.x0, tile.x1):
+                done: int = state.count(row, i)
+                seed_pixel(state.seed, row * width + i, done)
+                accumulator: Vec3 = Vec3(0, 0, 0)
+                for sample in range(done, samples):
+                    u: float = (i + random.random()) / width
+                    v: float = (j + random.random()) / height
+                    accumulator += shade(scene.camera.get_ray(u, v), world)
+                state.add(row, i, accumulator, max(samples - done, 0))
+                tile_samples += max(samples - done, 0)
+
+        state.mark_finished(tile)
+        checkpointer.maybe_save(state)
+        if progress is not None:
+            progress.update(1, tile_samples, world.take())
+
+def accumulate_numpy(
+    scene: Scene, state: AccumulationState, tiles: List[Tile],
+    samples: int, checkpointer: Checkpointer, workers: Optional[int]=None,
+    sampler: str="random", progress: Optional[Progress]=None
+):
+    """
+    `accumulate_scalar` on a pool of `workers` processes running the
+    wavefront tracer.
+    """
+    from one_week import parallel
+    from one_week.sampler import make_sampler
+    import numpy as np
+
+    width: int = state.width
+    height: int = state.height
+    sums: np.ndarray = np.frombuffer(state.sums).reshape(height, width, 3)
+    counts: np.ndarray = np.frombuffer(
+        state.counts, dtype=np.uint32
+    ).reshape(height, width)
+    tasks: List[parallel.TileTask] = []
+    for tile in tiles:
+        done: int = state.tile_samples(tile)
+        tasks.append(parallel.TileTask(tile, samples - done, done))
+
+    with parallel.TileRenderer(
+        scene.hittables, scene.camera, width, height, workers, state.seed,
+        scene.shading, tile_size=TILE_SIZE,
+        sampler=make_sampler(sampler, samples)
+    ) as renderer:
+        rays: int = 0
+        for task, pixels in renderer.render(tasks):
+            tile = task.tile
+            sums[tile.y0:tile.y1, tile.x0:tile.x1] += pixels * task.samples
+            counts[tile.y0:tile.y1, tile.x0:tile.x1] += task.samples
+            state.mark_finished(tile)
+            checkpointer.maybe_save(state)
+            if progress is not None:
+                progress.update(
+                    1, tile.pixel_count * task.samples, renderer.rays - rays
+                )
+            rays = renderer.rays
+
+def render_numpy(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    seed: Optional[int]=None, sampler: str="random",
+    cache: Optional["TileCache"]=None, progress: Optional[Progress]=None
+):
+    from one_week.framebuffer import FrameBuffer
+
+    FrameBuffer(
+        width, height,
+        numpy_pixels(
+            scene, width, height, samples, seed, sampler, cache, progress
+        )
+    ).write(filename, gamma_correct=scene.gamma_correct)
+
+def numpy_pixels(
+    scene: Scene, width: int, height: int, samples: int,
+    seed: Optional[int]=None, sampler: str="random",
+    cache: Optional["TileCache"]=None, progress: Optional[Progress]=None
+) -> "np.ndarray":
+    """
+    The (height, width, 3) linear colors of `scene`, rendered in this
+    process by the wavefront tracer, a tile at a time so that the tiles
+    already in `cache` can be skipped and every other one reported to
+    `progress`.
+    """
+    from one_week import parallel, wavefront
+    from one_week.sampler import Sampler, make_sampler
+    from one_week.tile import Tile
+    import numpy as np
+
+    wavefront_scene = wavefront.WavefrontScene.from_hittables(scene.hittables)
+    made_sampler: Sampler = make_sampler(sampler, samples)
+    pixels: np.ndarray = np.empty((height, width, 3))
+    tile_seed: int = seed if seed is not None else wavefront.new_seed()
+
+    # The rays of the tile rendered last, for `progress`.
+    rays: int = 0
+
+    def render_tiles(
+        tiles: Iterable[Tile]
+    ) -> Iterator[Tuple[Tile, np.ndarray]]:
+        nonlocal rays
+        for tile in tiles:
+            rays_before: int = wavefront.traced_rays
+            tile_pixels: np.ndarray = wavefront.render_tile(
+                wavefront_scene, scene.camera, width, height, tile.x0,
+                tile.y0, tile.x1, tile.y1, samples, tile_seed,
+                scene.shading, sampler=made_sampler
+            )
+            rays = wavefront.traced_rays - rays_before
+            yield tile, tile_pixels
+
+    tiles: Iterator[Tile] = iter_tiles(width, height, TILE_SIZE)
+    for tile, tile_pixels in (
+        cache.render(
+            parallel.cache_key(
+                scene.hittables, scene.camera, width, height, samples, seed,
+                scene.shading, sampler=made_sampler
+            ),
+            tiles, render_tiles
+        ) if cache is not None else render_tiles(tiles)
+    ):
+        pixels[tile.y0:tile.y1, tile.x0:tile.x1] = tile_pixels
+        if progress is not None:
+            progress.update(1, tile.pixel_count * samples, rays)
+        rays = 0
+    return pixels
+
+def render_denoised(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    workers: Optional[int]=None, seed: Optional[int]=None,
+    sampler: str="random", cache: Optional["TileCache"]=None,
+    denoise: bool=True, aovs: bool=False, progress: Optional[Progress]=None
+):
+    """
+    Render in this process (with one worker) or in parallel, then denoise
+    the image and/or write its AOVs next to it.
+    """
+    from one_week import denoise as denoiser
+    from one_week import parallel, wavefront
+    from one_week.framebuffer import FrameBuffer
+    from one_week.sampler import make_sampler
+    import numpy as np
+
+    pixels: np.ndarray
+    if workers == 1:
+        pixels = numpy_pixels(
+            scene, width, height, samples, seed, sampler, cache, progress
+        )
+    else:
+        pixels = parallel.render(
+            scene.hittables, scene.camera, width, height, samples, workers,
+            seed, shading=scene.shading,
+            sampler=make_sampler(sampler, samples), cache=cache,
+            progress=progress
+        )
+    # Through the same points of the pixels as the render, given a seed.
+    first_hits: wavefront.AOVs = wavefront.render_aovs(
+        wavefront.WavefrontScene.from_hittables(scene.hittables),
+        scene.camera, width, height, samples, seed,
+        make_sampler(sampler, samples)
+    )
+    if denoise:
+        pixels = denoiser.denoise(pixels, first_hits)
+    if aovs:
+        print(
+            "Wrote %s" % ", ".join(denoiser.write_aovs(filename, first_hits))
+        )
+    FrameBuffer(width, height, pixels).write(
+        filename, gamma_correct=scene.gamma_correct
+    )
+
+def render_incremental(
+    scene: Scene, width: int, height: int, samples: int, filename: str,
+    state: str, workers: Optional[int]=None, seed: Optional[int]=None,
+    sampler: str="random", policy: str="nearby",
+    progress: Optional[Progress]=None
+):
+    from one_week import incremental
+    from one_week.framebuffer import FrameBuffer
+
+    if policy not in incremental.POLICIES:
+        raise ValueError(
+            "Unknown policy %s, expected one of %s" %
+            (policy, list(incremental.POLICIES))
+        )
+    pixels, _ = incremental.render(
+        scene.hittables, scene.camera, width, height, samples, state, workers,
+        seed, shading=scene.shading, sampler=sampler,
+        policy=incremental.POLICIES[policy], progress=progress
+    )
+    FrameBuffer(width, height, pixels).write(
+        filename, gamma_correct=scene.gamma_correct
+    )
+
+def load_scene(name: str, function: str="scene") -> ModuleType:
+    """
+    Import a scene module, given either its full name or its name within
+    one_week (like "8_dielectrics"). A path to the file works too. For an
+    animation (see one_week.animation), look for an `animation` function
+    instead.
+    """
+    if name.endswith(".py"):
+        name = name[:-len(".py")]
+    name = name.replace("/", ".")
+    if "." not in name:
+        name = "one_week.%s" % name
+    module: ModuleType = importlib.import_module(name)
+    if not callable(getattr(module, function, None)):
+        raise ValueError(
+            "%s has no %s function" %
+            (name, "scene(width, height)" if function == "scene" else
+             "%s()" % function)
+        )
+    return module
+
+def add_render_arguments(
+    parser: argparse.ArgumentParser, width: int=WIDTH, height: int=HEIGHT,
+    samples: int=SAMPLES
+):
+    parser.add_argument("--width", type=int, default=width)
+    parser.add_argument("--height", type=int, default=height)
+    parser.add_argument(
+        "--samples", type=int, default=samples, help="Samples per pixel."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processes to render on (on this machine, for the distributed "
+        "backend). Defaults to one per CPU."
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default="auto",
+        help="Defaults to the fastest one available."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Seed the scene and the render, to make them repeatable."
+    )
+    parser.add_argument(
+        "--sampler", choices=SAMPLERS, default="random",
+        help="How to spread the samples of a pixel. Anything but random "
+        "needs NumPy."
+    )
+    parser.add_argument(
+        "--listen", default=None, metavar="HOST:PORT",
+        help="Render on the distributed backend, with workers connecting "
+        "here (python -m one_week worker HOST:PORT) as well as --workers "
+        "local ones."
+    )
+    parser.add_argument(
+        "--counters", default=None, metavar="FILE",
+        help="Count rays, intersection tests and scatters, and write the "
+        "report to FILE as JSON. Scalar backend only."
+    )
+    parser.add_argument(
+        "--cache", default=None, metavar="DIRECTORY",
+        help="Keep the rendered tiles in DIRECTORY, and take them from there "
+        "when rendering the same thing with the same --seed. NumPy backends "
+        "only."
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=None, metavar="MB",
+        help="How big the cache can get before the tiles least recently used "
+        "go. Defaults to a gigabyte."
+    )
+    parser.add_argument(
+        "--incremental", nargs="?", default=None, const="", metavar="STATE",
+        help="Keep the scene and the image in STATE (next to the output if "
+        "not given), and next time only render the tiles that changes to the "
+        "scene reach. numpy and parallel backends only."
+    )
+    parser.add_argument(
+        "--policy", choices=POLICIES, default="nearby",
+        help="How far an incremental render assumes a change reaches: only "
+        "where the sphere is seen, its shadows and light bounced nearby too, "
+        "or its reflections as well."
+    )
+    parser.add_argument(
+        "--denoise", action="store_true",
+        help="Filter the noise out of the image, telling edges from noise by "
+        "the normal, albedo and depth of what every pixel sees. Lets 16 to 32 "
+        "samples do. numpy and parallel backends only."
+    )
+    parser.add_argument(
+        "--aovs", action="store_true",
+        help="Write those normals, albedos and depths next to the image, as "
+        "<output>.normal.ppm and so on. numpy and parallel backends only."
+    )
+    parser.add_argument(
+        "--adaptive", action="store_true",
+        help="Give every pixel from --samples to --max-samples samples, as "
+        "many as it takes for its color to settle, and write how many it got "
+        "to <output>.samples.ppm. scalar and numpy backends only."
+    )
+    parser.add_argument(
+        "--max-samples", type=int, default=MAX_SAMPLES,
+        help="The most samples an adaptive render gives a pixel."
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help="How sure of a pixel's color an adaptive render has to be to "
+        "stop sampling it: the 95%% confidence interval, on a scale of 0 to "
+        "1. Lower is less noisy and slower."
+    )
+    parser.add_argument(
+        "--progress", choices=MODES, default="human",
+        help="How to report on the render as it goes: for people, as a line "
+        "of JSON a second for whatever runs the render, or not at all."
+    )
+    parser.add_argument(
+        "--checkpoint", nargs="?", default=None, const="", metavar="FILE",
+        help="Save the render to FILE (next to the output if not given) every "
+        "--checkpoint-interval seconds, to --resume it from. scalar, numpy "
+        "and parallel backends only."
+    )
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+        metavar="SECONDS", help="Seconds between checkpoints."
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue from the checkpoint instead of starting over. Raise "
+        "--samples to keep adding samples to a finished render."
+    )
+    parser.add_argument(
+        "--output", default=None,
+        help="Where to write the PPM. Defaults to /tmp/<scene>.ppm."
+    )
+
+def render_with_arguments(
+    make_scene: Callable[[int, int], Scene], args: argparse.Namespace,
+    filename: str
+) -> str:
+    """
+    Render what `make_scene` makes with the options of
+    `add_render_arguments`, into `args.output` if given and `filename`
+    otherwise. Return the name of the file.
+    """
+    filename = args.output or filename
+    checkpoint: Optional[str] = (
+        args.checkpoint or "%s.ckpt" % filename
+        if args.checkpoint is not None or args.resume else None
+    )
+    if checkpoint is not None and args.seed is None:
+        # A resumed render has to be of the same scene, random or not.
+        saved: Optional[int] = saved_seed(checkpoint) if args.resume else None
+        args.seed = saved if saved is not None else random.getrandbits(63)
+    if args.seed is not None:
+        # Some scenes are random themselves.
+        random.seed(args.seed)
+    scene: Scene = make_scene(args.width, args.height)
+    backend: str = render(
+        scene, args.width, args.height, args.samples, filename,
+        workers=args.workers, backend=args.backend, seed=args.seed,
+        counters=args.counters, sampler=args.sampler, listen=args.listen,
+        cache=args.cache,
+        cache_size=(
+            args.cache_size << 20 if args.cache_size is not None else None
+        ),
+        incremental=(
+            None if args.incremental is None
+            else args.incremental or "%s.incremental.npz" % filename
+        ),
+        policy=args.policy, denoise=args.denoise, aovs=args.aovs,
+        progress=args.progress, checkpoint=checkpoint, resume=args.resume,
+        checkpoint_interval=args.checkpoint_interval, adaptive=args.adaptive,
+        max_samples=args.max_samples, tolerance=args.tolerance
+    )
+    print("Rendered %s with the %s backend" % (filename, backend))
+    return filename
+
+def run(
+    make_scene: Callable[[int, int], Scene], width: int=WIDTH,
+    height: int=HEIGHT, samples: int=SAMPLES, argv: Optional[List[str]]=None
+):
+    """
+    The `if __name__ == "__main__"` of a scene module.
+    """
+    parser = argparse.ArgumentParser()
+    add_render_arguments(parser, width, height, samples)
+    render_with_arguments(
+        make_scene, parser.parse_args(argv), _derive_ppm_filename()
+    )
+
+def animate(args: argparse.Namespace):
+    """
+    The `animate` command: whatever wasn't given comes from the module.
+    """
+    from one_week import animation
+
+    module: ModuleType = load_scene(args.animation, "animation")
+    name: str = module.__name__.rsplit(".", 1)[-1]
+    width: int = args.width or getattr(module, "WIDTH", WIDTH)
+    height: int = args.height or getattr(module, "HEIGHT", HEIGHT)
+    samples: int = args.samples or getattr(module, "SAMPLES", SAMPLES)
+    frames: Optional[int] = args.frames or getattr(module, "FRAMES", None)
+    made: animation.Animation = (
+        module.animation(frames) if frames is not None else module.animation()
+    )
+    filenames: List[str] = animation.render(
+        made, width, height, samples,
+        args.output or os.path.join("/tmp", "%s-%%04d.png" % name),
+        args.workers, args.backend, args.seed, args.sampler, args.progress
+    )
+    print(
+        "Rendered %d frames, %s to %s" %
+        (len(filenames), filenames[0], filenames[-1]) if filenames
+        else "No frames to render"
+    )
+
+def main(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(prog="python -m one_week")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    render_parser = commands.add_parser("render", help="Render a scene.")
+    render_parser.add_argument(
+        "scene",
+        help="A scene module, like 8_dielectrics or scene_generator, or a "
+        "JSON scene file."
+    )
+    add_render_arguments(render_parser)
+    worker_parser = commands.add_parser(
+        "worker", help="Render tiles for a distributed render."
+    )
+    worker_parser.add_argument(
+        "address", metavar="HOST:PORT",
+        help="Where the render's coordinator listens (see --listen)."
+    )
+    animate_parser = commands.add_parser(
+        "animate", help="Render the frames of an animation."
+    )
+    animate_parser.add_argument(
+        "animation",
+        help="A module with an animation() function, like fly_through."
+    )
+    animate_parser.add_argument("--width", type=int, default=None)
+    animate_parser.add_argument("--height", type=int, default=None)
+    animate_parser.add_argument(
+        "--samples", type=int, default=None, help="Samples per pixel."
+    )
+    animate_parser.add_argument(
+        "--frames", type=int, default=None,
+        help="How many frames to spread the animation over."
+    )
+    animate_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processes to render frames on. Defaults to one per CPU."
+    )
+    animate_parser.add_argument(
+        "--backend", choices=BACKENDS[:3] + ["flat"], default="auto",
+        help="Defaults to NumPy if it's installed."
+    )
+    animate_parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Seed the render, to make it repeatable."
+    )
+    animate_parser.add_argument(
+        "--sampler", choices=SAMPLERS, default="random",
+        help="How to spread the samples of a pixel. Anything but random "
+        "needs NumPy."
+    )
+    animate_parser.add_argument(
+        "--output", default=None, metavar="PATTERN",
+        help="Where to write frame N, as PATTERN %% N. PNG, or PPM if it ends "
+        "in .ppm. Defaults to /tmp/<animation>-%%04d.png."
+    )
+    animate_parser.add_argument(
+        "--progress", choices=MODES, default="human",
+        help="How to report on the frames as they're written."
+    )
+    serve_parser = commands.add_parser(
+        "serve", help="Take render jobs over HTTP (see one_week.service)."
+    )
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1",
+        help="Where to listen. Anything but the loopback lets anyone who can "
+        "reach it render, and write images into --output-directory."
+    )
+    serve_parser.add_argument("--port", type=int, default=7878)
+    serve_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processes to render on. Defaults to one per CPU."
+    )
+    serve_parser.add_argument(
+        "--cache", default=None, metavar="DIRECTORY",
+        help="Keep the tiles of jobs with a seed in DIRECTORY, and take them "
+        "from there for jobs asking for the same thing."
+    )
+    serve_parser.add_argument(
+        "--cache-size", type=int, default=None, metavar="MB",
+        help="How big the cache can get. Defaults to a gigabyte."
+    )
+    serve_parser.add_argument(
+        "--output-directory", default=None, metavar="DIRECTORY",
+        help="Where jobs can write their images to, by file name. Without "
+        "it, they can't."
+    )
+    serve_parser.add_argument(
+        "--scenes-directory", default=None, metavar="DIRECTORY",
+        help="Where jobs can render JSON scene files from, by file name. "
+        "Without it, only scene modules and inline scenes."
+    )
+    serve_parser.add_argument(
+        "--history", type=int, default=16, metavar="JOBS",
+        help="How many jobs to keep, images and all, once they're over."
+    )
+    # Parse twice: the scene's own defaults apply to whatever wasn't given.
+    args = parser.parse_args(argv)
+    if args.command == "worker":
+        from one_week import distributed
+
+        distributed.run_worker(args.address)
+        return
+    if args.command == "animate":
+        animate(args)
+        return
+    if args.command == "serve":
+        from one_week import service
+        from one_week.tile_cache import MAX_BYTES, TileCache
+
+        service.run(
+            args.host, args.port, args.workers,
+            TileCache(
+                args.cache,
+                args.cache_size << 20 if args.cache_size is not None
+                else MAX_BYTES
+            ) if args.cache is not None else None,
+            args.history, args.output_directory, args.scenes_directory
+        )
+        return
+    if args.scene.endswith(".json"):
+        from one_week import scene_file
+
+        compiled: scene_file.CompiledScene = scene_file.load(args.scene)
+        make_scene: Callable[[int, int], Scene] = compiled.scene
+        name: str = os.path.basename(args.scene)[:-len(".json")]
+        # Fit the height to the width, below, unless given.
+        render_parser.set_defaults(height=None)
+    else:
+        module: ModuleType = load_scene(args.scene)
+        make_scene = module.scene
+        name = module.__name__.rsplit(".", 1)[-1]
+        render_parser.set_defaults(
+            width=getattr(module, "WIDTH", WIDTH),
+            height=getattr(module, "HEIGHT", HEIGHT),
+            samples=getattr(module, "SAMPLES", SAMPLES)
+        )
+    args = parser.parse_args(argv)
+    if args.height is None:
+        args.height = max(1, round(args.width / compiled.aspect_ratio))
+    render_with_arguments(make_scene, args, _derive_ppm_filename(name))
@@ -0,0 +1,400 @@
+from one_week import checkpoint, engine
+from one_week.material import Lambertian, Material, ReflectionRecord
+from one_week.sphere import Sphere
+from one_week.testing import dielectrics
+from one_week.vec3 import Vec3
+
+from unittest import mock
+
+import importlib.util
+import os
+import tempfile
+import unittest
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+class CountingSphere(Sphere):
+
+    def hit(self, ray, t_min, t_max):
+        return super().hit(ray, t_min, t_max)
+
+class Glow(Material):
+
+    def __init__(self, albedo):
+        self.albedo = albedo
+
+    def scatter(self, incident_ray, record):
+        return ReflectionRecord(self.albedo, incident_ray)
+
+class EngineTest(unittest.TestCase):
+
+    def setUp(self):
+        # The matte sphere on the ground, which renders fast.
+        scene = dielectrics()
+        self.scene = scene._replace(hittables=scene.hittables[:2])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "render.ppm")
+
+    def read_header(self):
+        with open(self.filename, "rb") as ppm:
+            return ppm.read().split(maxsplit=4)[:4]
+
+    def test_pick_backend(self):
+        self.assertEqual("scalar", engine.pick_backend("scalar"))
+        expected = "numpy" if HAS_NUMPY else "scalar"
+        self.assertEqual(expected, engine.pick_backend("auto", workers=1))
+        with self.assertRaises(ValueError):
+            engine.pick_backend("gpu")
+
+    def test_pick_flat(self):
+        # Under CPython with NumPy, the scene doesn't matter.
+        with mock.patch.object(
+            engine.platform, "python_implementation", return_value="CPython"
+        ):
+            expected = "numpy" if HAS_NUMPY else "flat"
+            self.assertEqual(
+                expected, engine.pick_backend("auto", 1, self.scene)
+            )
+        with mock.patch.object(
+            engine.platform, "python_implementation", return_value="PyPy"
+        ):
+            self.assertEqual(
+                "flat", engine.pick_backend("auto", 4, self.scene)
+            )
+            self.assertEqual(
+                "scalar", engine.pick_backend("scalar", 4, self.scene)
+            )
+            # Only what the flat tracer knows to trace.
+            counted = self.scene._replace(
+                hittables=self.scene.hittables + [CountingSphere(
+                    Vec3(0, 0, -2), 0.5, Lambertian(Vec3(0.5, 0.5, 0.5))
+                )]
+            )
+            glowing = self.scene._replace(hittables=[
+                Sphere(Vec3(0, 0, -1), 0.5, Glow(Vec3(1, 1, 1)))
+            ])
+            with_world = self.scene._replace(world=self.scene.hittables[0])
+            for scene in (counted, glowing, with_world):
+                self.assertNotEqual(
+                    "flat", engine.pick_backend("auto", 4, scene)
+                )
+
+    def test_auto_flat(self):
+        with mock.patch.object(
+            engine.platform, "python_implementation", return_value="PyPy"
+        ):
+            self.assertEqual("flat", engine.render(
+                self.scene, 4, 2, 2, self.filename, seed=1, progress="none"
+            ))
+            # The flat backend only samples at random.
+            if HAS_NUMPY:
+                self.assertEqual("parallel", engine.render(
+                    self.scene, 4, 2, 2, self.filename, workers=2, seed=1,
+                    sampler="halton", progress="none"
+                ))
+
+    def test_scalar(self):
+        backend = engine.render(
+            self.scene, 4, 2, 2, self.filename, backend="scalar", seed=1
+        )
+        self.assertEqual("scalar", backend)
+        self.assertEqual([b"P3", b"4", b"2", b"255"], self.read_header())
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_numpy_agrees_with_scalar(self):
+        scene = self.scene._replace(shading="normals")
+        engine.render(
+            scene, 8, 4, 64, self.filename, backend="scalar", seed=2
+        )
+        with open(self.filename) as ppm:
+            scalar = [int(value) for value in ppm.read().split()[4:]]
+
+        engine.render(
+            scene, 8, 4, 64, self.filename, backend="numpy", seed=3
+        )
+        with open(self.filename, "rb") as ppm:
+            numpy = list(ppm.read()[-8 * 4 * 3:])
+        # Edge pixels can differ a lot on so few samples, the image can't.
+        differences = [abs(s - n) for s, n in zip(scalar, numpy)]
+        self.assertEqual(len(scalar), len(differences))
+        self.assertLess(sum(differences) / len(differences), 4)
+
+    def test_sampler(self):
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 4, 2, 1, self.filename, backend="scalar",
+                sampler="sobol"
+            )
+        with self.assertRaises(ValueError):
+            engine.render(self.scene, 4, 2, 1, self.filename, sampler="grid")
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_numpy_sampler(self):
+        engine.render(
+            self.scene, 4, 2, 4, self.filename, backend="numpy", seed=4,
+            sampler="sobol"
+        )
+        self.assertEqual([b"P6", b"4", b"2", b"255"], self.read_header())
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_distributed(self):
+        backend = engine.render(
+            self.scene, 4, 2, 2, self.filename, workers=1, seed=5,
+            listen="127.0.0.1:0", sampler="halton"
+        )
+        self.assertEqual("distributed", backend)
+        self.assertEqual([b"P6", b"4", b"2", b"255"], self.read_header())
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 4, 2, 1, self.filename, backend="numpy",
+                listen="127.0.0.1:0"
+            )
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_cache(self):
+        cache = os.path.join(os.path.dirname(self.filename), "tiles")
+        images = []
+        for backend in ("numpy", "numpy", "parallel"):
+            engine.render(
+                self.scene, 40, 20, 2, self.filename, workers=2,
+                backend=backend, seed=6, cache=cache
+            )
+            with open(self.filename, "rb") as ppm:
+                images.append(ppm.read())
+            self.assertEqual(
+                images[0], images[-1], "%s, render %d" % (backend, len(images))
+            )
+        self.assertEqual(2, len(os.listdir(cache)))
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 4, 2, 1, self.filename, backend="scalar",
+                cache=cache
+            )
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_denoise(self):
+        images = []
+        for backend in ("numpy", "parallel"):
+            engine.render(
+                self.scene, 40, 20, 2, self.filename, workers=2,
+                backend=backend, seed=6, denoise=True, aovs=True
+            )
+            with open(self.filename, "rb") as ppm:
+                images.append(ppm.read())
+        self.assertEqual(images[0], images[1])
+        for aov in ("normal", "albedo", "depth"):
+            self.assertTrue(
+                os.path.exists(self.filename.replace(".ppm", ".%s.ppm" % aov))
+            )
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 4, 2, 1, self.filename, backend="scalar",
+                denoise=True
+            )
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_incremental(self):
+        state = "%s.npz" % self.filename
+        images = []
+        for backend in ("numpy", "parallel"):
+            engine.render(
+                self.scene, 40, 20, 2, self.filename, workers=2,
+                backend=backend, seed=6, incremental=state, policy="visible"
+            )
+            with open(self.filename, "rb") as ppm:
+                images.append(ppm.read())
+        self.assertEqual(images[0], images[1])
+        self.assertTrue(os.path.exists(state))
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 4, 2, 1, self.filename, backend="scalar",
+                incremental=state
+            )
+
+    def test_checkpoint(self):
+        engine.render(
+            self.scene, 8, 4, 2, self.filename, backend="scalar", seed=5
+        )
+        with open(self.filename, "rb") as ppm:
+            expected = ppm.read()
+        saved = "%s.ckpt" % self.filename
+        engine.render(
+            self.scene, 8, 4, 2, self.filename, backend="scalar", seed=5,
+            checkpoint=saved
+        )
+        # Every pixel's samples are drawn as they would be without.
+        with open(self.filename, "rb") as ppm:
+            self.assertEqual(expected, ppm.read())
+
+        # The seed comes from the checkpoint.
+        engine.render(
+            self.scene, 8, 4, 3, self.filename, backend="scalar",
+            checkpoint=saved, resume=True
+        )
+        state = checkpoint.load(saved)
+        self.assertEqual(5, state.seed)
+        self.assertEqual([3] * 8 * 4, list(state.counts))
+
+        with self.assertRaises(checkpoint.CheckpointError):
+            engine.render(
+                self.scene, 8, 4, 3, self.filename, backend="scalar", seed=6,
+                checkpoint=saved, resume=True
+            )
+        with self.assertRaises(ValueError):
+            engine.render(self.scene, 8, 4, 3, self.filename, resume=True)
+
+    def test_checkpoint_seed_range(self):
+        # A seed the checkpoint can't hold fails before anything renders,
+        # not at the first save.
+        saved = "%s.ckpt" % self.filename
+        for seed in (-1, checkpoint.MAX_SEED + 1):
+            with self.assertRaises(ValueError):
+                engine.render(
+                    self.scene, 8, 4, 2, self.filename, backend="scalar",
+                    seed=seed, checkpoint=saved, progress="none"
+                )
+        self.assertFalse(os.path.exists(self.filename))
+        self.assertFalse(os.path.exists(saved))
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 8, 4, 3, self.filename, backend="flat",
+                checkpoint=saved
+            )
+
+    @unittest.skipIf(not HAS_NUMPY, "needs NumPy")
+    def test_checkpoint_numpy(self):
+        saved = "%s.ckpt" % self.filename
+        for backend, samples in (("numpy", 2), ("parallel", 4)):
+            engine.render(
+                self.scene, 40, 20, samples, self.filename, workers=2,
+                backend=backend, seed=5, checkpoint=saved, resume=True
+            )
+            self.assertEqual(
+                [samples] * 40 * 20, list(checkpoint.load(saved).counts)
+            )
+        self.assertEqual([b"P6", b"40", b"20", b"255"], self.read_header())
+
+    def test_main_checkpoint(self):
+        # The random scene comes out the same when resumed.
+        saved = "%s.ckpt" % self.filename
+        arguments = [
+            "render", "scene_generator", "--width", "6", "--height", "4",
+            "--backend", "scalar", "--output", self.filename, "--checkpoint",
+            saved, "--progress", "none"
+        ]
+        engine.main(arguments + ["--samples", "1"])
+        seed = checkpoint.load(saved).seed
+        engine.main(arguments + ["--samples", "2", "--resume"])
+        state = checkpoint.load(saved)
+        self.assertEqual(seed, state.seed)
+        self.assertEqual([2] * 6 * 4, list(state.counts))
+
+    def test_adaptive(self):
+        samples_filename = self.filename.replace(".ppm", ".samples.ppm")
+        for backend in ("scalar", "numpy") if HAS_NUMPY else ("scalar",):
+            self.assertEqual(backend, engine.render(
+                self.scene, 8, 4, 4, self.filename, backend=backend, seed=1,
+                adaptive=True, max_samples=16, progress="none"
+            ))
+            with open(samples_filename, "rb") as ppm:
+                self.assertIn(ppm.read(2), (b"P3", b"P6"))
+        for backend in ("parallel", "flat"):
+            with self.assertRaises(ValueError):
+                engine.render(
+                    self.scene, 8, 4, 4, self.filename, backend=backend,
+                    adaptive=True
+                )
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene, 8, 4, 1, self.filename, backend="scalar",
+                adaptive=True
+            )
+
+    def test_trace_adaptive(self):
+        sky = self.scene._replace(hittables=[])
+        # Anything will do, or nothing will.
+        colors, counts = engine.trace_adaptive(sky, 8, 4, 4, 16, 1.0, 1)
+        self.assertEqual([4] * 8 * 4, counts)
+        self.assertEqual(8 * 4, len(colors))
+        colors, counts = engine.trace_adaptive(sky, 8, 4, 4, 16, 0.0, 1)
+        self.assertEqual([16] * 8 * 4, counts)
+        # The edges of the sphere take longer than the sky above it.
+        colors, counts = engine.trace_adaptive(
+            self.scene, 16, 8, 4, 64, 0.05, 1
+        )
+        self.assertEqual(4, counts[0])
+        self.assertEqual(64, max(counts))
+
+    def test_unknown_shading(self):
+        with self.assertRaises(ValueError):
+            engine.render(
+                self.scene._replace(shading="toon"), 4, 2, 1, self.filename
+            )
+
+    def test_main(self):
+        engine.main([
+            "render", "5_antialiasing", "--width", "6", "--height", "3",
+            "--samples", "1", "--backend", "scalar", "--output", self.filename
+        ])
+        self.assertEqual([b"P3", b"6", b"3", b"255"], self.read_header())
+
+    def test_main_options(self):
+        # Every option reaches render() under its own name.
+        with mock.patch.object(
+            engine, "render", return_value="numpy"
+        ) as render:
+            engine.main([
+                "render", "5_antialiasing", "--width", "6", "--height", "3",
+                "--samples", "4", "--output", self.filename, "--workers", "2",
+                "--seed", "3", "--sampler", "halton", "--listen", "host:1",
+                "--cache", "tiles", "--cache-size", "2", "--denoise",
+                "--progress", "json", "--policy", "visible",
+                "--max-samples", "64", "--tolerance", "0.1"
+            ])
+        arguments = render.call_args[1]
+        self.assertEqual(2, arguments["workers"])
+        self.assertEqual(3, arguments["seed"])
+        self.assertEqual("halton", arguments["sampler"])
+        self.assertEqual("host:1", arguments["listen"])
+        self.assertEqual("tiles", arguments["cache"])
+        self.assertEqual(2 << 20, arguments["cache_size"])
+        self.assertEqual(None, arguments["incremental"])
+        self.assertEqual("visible", arguments["policy"])
+        self.assertEqual((True, False), (
+            arguments["denoise"], arguments["aovs"]
+        ))
+        self.assertEqual("json", arguments["progress"])
+        self.assertEqual((None, False), (
+            arguments["checkpoint"], arguments["resume"]
+        ))
+        self.assertEqual((False, 64, 0.1), (
+            arguments["adaptive"], arguments["max_samples"],
+            arguments["tolerance"]
+        ))
+
+    def test_animate(self):
+        pattern = self.filename.replace("render", "frame-%d")
+        engine.main([
+            "animate", "fly_through", "--frames", "2", "--width", "6",
+            "--height", "3", "--samples", "1", "--workers", "1",
+            "--backend", "scalar", "--output", pattern
+        ])
+        for frame in range(2):
+            with open(pattern % frame, "rb") as ppm:
+                self.assertEqual(b"P6\n6 3\n255\n", ppm.read(11))
+
+    def test_load_scene(self):
+        for name in (
+            "8_dielectrics", "one_week.8_dielectrics", "one_week/8_dielectrics.py"
+        ):
+            module = engine.load_scene(name)
+            self.assertEqual("one_week.8_dielectrics", module.__name__)
+        with self.assertRaises(ValueError):
+            engine.load_scene("vec3")
+        engine.load_scene("fly_through", "animation")
+        with self.assertRaises(ValueError):
+            engine.load_scene("fly_through")
+
+if __name__ == "__main__":
+    unittest.main()
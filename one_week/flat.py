@@ -0,0 +1,730 @@
+"""
+The scalar tracer again, written for PyPy's JIT.
+
+`integrator.color` and friends make objects all the time: a Ray and a Vec3 or
+two per bounce, a HitRecord per hit, a ReflectionRecord per scatter, and every
+Vec3 operator goes through `isinstance` first. CPython spends most of a render
+making and dropping them, and even PyPy, which gets rid of a lot of them, has
+to go through a method call (and a guard on the type of everything) per
+operation.
+
+Here, nothing but floats and ints: a ray is six local floats, a hit is the
+index of a sphere and a t, a color is three floats. The scene is packed once
+into `array("d")` and `array("i")` buffers (a `FlatScene`): the spheres, what
+they are made of, and the BVH or uniform grid that `grid.accelerate` picks
+for them. The intersection, the walk through the BVH or the grid and the
+scattering are those of Sphere.hit, BVH.hit, UniformGrid.hit and
+one_week.material, written out on those floats. The JIT turns loops like
+these into straight machine code on unboxed doubles. CPython gains too, just
+less (about a third faster, see benchmarks/suite.py).
+
+The random numbers are drawn in the same order as the scalar tracer draws
+them, and every float is computed in the same order too. So, given the same
+seed, this renders exactly the same image as the scalar backend does, quirks
+and all: only spheres of the materials of one_week.material, the way the
+wavefront tracer has them.
+
+No NumPy needed, like the scalar backend:
+
+    pypy3 -m one_week render 8_dielectrics --backend flat
+"""
+from array import array
+from one_week.aabb import inverse_component
+from one_week.bvh import BVH
+from one_week.camera import Camera, PositionableCamera
+from one_week.grid import UniformGrid, accelerate
+from one_week.hittable import Hittable
+from one_week.integrator import MAX_DEPTH, ROULETTE_DEPTH, T_MIN
+from one_week.material import (
+    Dielectric, Identity, Lambertian, Material, Metal, Vanta
+)
+from one_week.rng import TAU, seed_pixel
+from one_week.sphere import Sphere
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import math
+import random
+import sys
+
+VANTA: int = 0
+IDENTITY: int = 1
+LAMBERTIAN: int = 2
+METAL: int = 3
+DIELECTRIC: int = 4
+
+# The t_max of every ray, as the scalar tracer has it.
+FAR: float = sys.float_info.max
+# Every sphere's center and radius, and its material's albedo and fuzz (or
+# refractive index): the doubles per sphere in `FlatScene.spheres` and
+# `FlatScene.materials`.
+SPHERE_SIZE: int = 4
+MATERIAL_SIZE: int = 4
+
+# How many rays this process has traced so far, for progress reports (see
+# one_week.progress). Added to once per path.
+traced_rays: int = 0
+
+# Exact types, since a subclass might scatter in a way we don't know of.
+KINDS: Dict[type, int] = {
+    Vanta: VANTA, Identity: IDENTITY, Lambertian: LAMBERTIAN, Metal: METAL,
+    Dielectric: DIELECTRIC
+}
+
+def material_kind(material: Material) -> int:
+    if type(material) not in KINDS:
+        raise ValueError(
+            "The flat tracer does not know how %s scatters" %
+            type(material).__name__
+        )
+    return KINDS[type(material)]
+
+def can_trace(hittables: List[Hittable]) -> bool:
+    """
+    Whether the flat tracer renders `hittables` as the scalar one would:
+    if they are all spheres, and not some subclass that hits differently, of
+    materials it knows.
+    """
+    return all(
+        type(hittable) is Sphere and type(hittable.material) in KINDS
+        for hittable in hittables
+    )
+
+class FlatScene(object):
+    """
+    Spheres, their materials and whatever `grid.accelerate` would put them
+    in, as flat buffers.
+
+    Sphere `i` has its center and radius at `spheres[4 * i:4 * i + 4]`, the
+    kind of its material at `kinds[i]` and the rest of it (albedo and fuzz or
+    refractive index) at `materials[4 * i:4 * i + 4]`. The spheres from
+    number `large` on are tested for every ray: all of them for a
+    HittableList, the large ones for a UniformGrid.
+
+    For a BVH, `boxes` and `nodes` are those of `BVH.flatten`. For a
+    UniformGrid (then `grid` is true), `boxes` is the minimum and maximum
+    corners of the grid and the size of its cells, and `nodes` the
+    resolution, followed by where the spheres of every cell start in the
+    rest of `nodes` (and where the last one ends), followed by those spheres.
+    """
+
+    def __init__(
+        self, spheres: array, kinds: array, materials: array, large: int,
+        boxes: array, nodes: array, grid: bool=False
+    ):
+        self.spheres: array = spheres
+        self.kinds: array = kinds
+        self.materials: array = materials
+        self.large: int = large
+        self.boxes: array = boxes
+        self.nodes: array = nodes
+        self.grid: bool = grid
+
+    @classmethod
+    def from_hittables(
+        cls, hittables: List[Hittable], world: Optional[Hittable]=None
+    ) -> "FlatScene":
+        """
+        Pack `hittables` as laid out in `world`, a BVH, UniformGrid or
+        HittableList of them: whichever `grid.accelerate` picks, if not
+        given.
+        """
+        for hittable in hittables:
+            if not isinstance(hittable, Sphere):
+                raise ValueError(
+                    "The flat tracer can only trace spheres, got %s" %
+                    type(hittable)
+                )
+        if world is None:
+            world = accelerate(hittables)
+        ordered: List[Hittable]
+        boxes: array = array("d")
+        nodes: array = array("i")
+        large: int = 0
+        if isinstance(world, BVH):
+            ordered, boxes, nodes = world.flatten()
+            large = len(ordered)
+        elif isinstance(world, UniformGrid):
+            tested: List[Hittable] = world.unbounded + world.large
+            tested_ids: Set[int] = set(id(sphere) for sphere in tested)
+            ordered = [
+                sphere for sphere in hittables if id(sphere) not in tested_ids
+            ]
+            large = len(ordered)
+            indices: Dict[int, int] = {
+                id(sphere): index for index, sphere in enumerate(ordered)
+            }
+            ordered += tested
+            if world.box is not None:
+                boxes.extend(world.box.minimum.make_tuple())
+                boxes.extend(world.box.maximum.make_tuple())
+                boxes.extend(world.cell_sizes)
+                nodes.extend(world.resolution)
+                start: int = len(nodes) + len(world.cells) + 1
+                for cell in world.cells:
+                    nodes.append(start)
+                    start += len(cell)
+                nodes.append(start)
+                for cell in world.cells:
+                    nodes.extend(indices[id(sphere)] for sphere in cell)
+        else:
+            ordered = list(hittables)
+
+        spheres: array = array("d")
+        kinds: array = array("i")
+        materials: array = array("d")
+        for sphere in ordered:
+            spheres.extend(sphere.center.make_tuple())  # type: ignore
+            spheres.append(sphere.radius)  # type: ignore
+            material: Material = sphere.material
+            kinds.append(material_kind(material))
+            if isinstance(material, (Lambertian, Metal)):
+                materials.extend(material.albedo.make_tuple())
+            else:
+                materials.extend((1.0, 1.0, 1.0))
+            materials.append(
+                material.fuzz if isinstance(material, Metal)
+                else material.refractive_index
+                if isinstance(material, Dielectric) else 0.0
+            )
+        return cls(
+            spheres, kinds, materials, large, boxes, nodes,
+            isinstance(world, UniformGrid)
+        )
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+def _entry(
+    boxes: List[float], node: int, ox: float, oy: float, oz: float,
+    inv_dx: float, inv_dy: float, inv_dz: float, t_min: float, t_max: float
+) -> float:
+    """
+    `AABB.entry` for box number `node`, only a miss is -1 (a hit is never
+    before t_min, which isn't negative).
+    """
+    b: int = 6 * node
+    t0: float = (boxes[b] - ox) * inv_dx
+    t1: float = (boxes[b + 3] - ox) * inv_dx
+    if t0 > t1:
+        t0, t1 = t1, t0
+    if t0 > t_min:
+        t_min = t0
+    if t1 < t_max:
+        t_max = t1
+    if t_max <= t_min:
+        return -1.0
+
+    t0 = (boxes[b + 1] - oy) * inv_dy
+    t1 = (boxes[b + 4] - oy) * inv_dy
+    if t0 > t1:
+        t0, t1 = t1, t0
+    if t0 > t_min:
+        t_min = t0
+    if t1 < t_max:
+        t_max = t1
+    if t_max <= t_min:
+        return -1.0
+
+    t0 = (boxes[b + 2] - oz) * inv_dz
+    t1 = (boxes[b + 5] - oz) * inv_dz
+    if t0 > t1:
+        t0, t1 = t1, t0
+    if t0 > t_min:
+        t_min = t0
+    if t1 < t_max:
+        t_max = t1
+    if t_max <= t_min:
+        return -1.0
+
+    return t_min
+
+def _hit(
+    spheres: List[float], index: int, ox: float, oy: float, oz: float,
+    dx: float, dy: float, dz: float, a: float, t_min: float, t_max: float
+) -> float:
+    """
+    Sphere.hit, for sphere number `index`: the t of the hit, or -1.
+    """
+    s: int = SPHERE_SIZE * index
+    radius: float = spheres[s + 3]
+    cx: float = ox - spheres[s]
+    cy: float = oy - spheres[s + 1]
+    cz: float = oz - spheres[s + 2]
+    b: float = cx * dx + cy * dy + cz * dz
+    c: float = cx * cx + cy * cy + cz * cz - radius * radius
+    discriminant: float = b * b - a * c
+    if discriminant > 0:
+        root: float = math.sqrt(discriminant)
+        t: float = (-b - root) / a
+        if t_min < t < t_max:
+            return t
+        t = (-b + root) / a
+        if t_min < t < t_max:
+            return t
+    return -1.0
+
+def closest_hit(
+    spheres: List[float], large: int, boxes: List[float], nodes: List[int],
+    grid: bool, ox: float, oy: float, oz: float, dx: float, dy: float,
+    dz: float, t_min: float
+) -> Tuple[int, float]:
+    """
+    `world.hit` for a FlatScene's buffers as lists: the index of the sphere
+    the ray hits first, or -1, and the t it hits it at. Lists index faster
+    than arrays on CPython, and are just as unboxed on PyPy.
+    """
+    closest: float = FAR
+    hit: int = -1
+    # The same for every sphere, see Sphere.hit.
+    a: float = dx * dx + dy * dy + dz * dz
+    t: float
+    # Whatever these hit (the ground, mostly) cuts the walk short.
+    for index in range(large, len(spheres) // SPHERE_SIZE):
+        t = _hit(spheres, index, ox, oy, oz, dx, dy, dz, a, t_min, closest)
+        if t >= 0:
+            closest = t
+            hit = index
+    if not nodes:
+        return hit, closest
+    if grid:
+        return _walk_grid(
+            spheres, boxes, nodes, ox, oy, oz, dx, dy, dz, a, t_min, closest,
+            hit
+        )
+    return _walk_bvh(
+        spheres, boxes, nodes, ox, oy, oz, dx, dy, dz, a, t_min, closest, hit
+    )
+
+def _walk_bvh(
+    spheres: List[float], boxes: List[float], nodes: List[int], ox: float,
+    oy: float, oz: float, dx: float, dy: float, dz: float, a: float,
+    t_min: float, closest: float, hit: int
+) -> Tuple[int, float]:
+    """
+    BVH.hit, past the unbounded objects.
+    """
+    inv_dx: float = inverse_component(dx)
+    inv_dy: float = inverse_component(dy)
+    inv_dz: float = inverse_component(dz)
+    entry: float = _entry(
+        boxes, 0, ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest
+    )
+    if entry < 0:
+        return hit, closest
+
+    # Two stacks rather than one of pairs, to make nothing per node.
+    stack: List[int] = [0]
+    entries: List[float] = [entry]
+    while stack:
+        node: int = stack.pop()
+        entry = entries.pop()
+        if entry >= closest:
+            continue
+
+        first: int = nodes[2 * node]
+        if first >= 0:
+            for index in range(first, first + nodes[2 * node + 1]):
+                t: float = _hit(
+                    spheres, index, ox, oy, oz, dx, dy, dz, a, t_min, closest
+                )
+                if t >= 0:
+                    closest = t
+                    hit = index
+            continue
+
+        left: int = node + 1
+        right: int = nodes[2 * node + 1]
+        left_entry: float = _entry(
+            boxes, left, ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest
+        )
+        right_entry: float = _entry(
+            boxes, right, ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest
+        )
+        # The nearer child goes on top.
+        if left_entry >= 0 and right_entry >= 0:
+            if left_entry <= right_entry:
+                stack.append(right)
+                entries.append(right_entry)
+                stack.append(left)
+                entries.append(left_entry)
+            else:
+                stack.append(left)
+                entries.append(left_entry)
+                stack.append(right)
+                entries.append(right_entry)
+        elif left_entry >= 0:
+            stack.append(left)
+            entries.append(left_entry)
+        elif right_entry >= 0:
+            stack.append(right)
+            entries.append(right_entry)
+
+    return hit, closest
+
+def _walk_grid(
+    spheres: List[float], boxes: List[float], nodes: List[int], ox: float,
+    oy: float, oz: float, dx: float, dy: float, dz: float, a: float,
+    t_min: float, closest: float, hit: int
+) -> Tuple[int, float]:
+    """
+    UniformGrid.hit, past the large and unbounded objects.
+    """
+    inv_dx: float = inverse_component(dx)
+    inv_dy: float = inverse_component(dy)
+    inv_dz: float = inverse_component(dz)
+    entry: float = _entry(
+        boxes, 0, ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest
+    )
+    if entry < 0:
+        return hit, closest
+
+    nx: int = nodes[0]
+    ny: int = nodes[1]
+    nz: int = nodes[2]
+    min_x: float = boxes[0]
+    min_y: float = boxes[1]
+    min_z: float = boxes[2]
+    size_x: float = boxes[6]
+    size_y: float = boxes[7]
+    size_z: float = boxes[8]
+    ix: int = min(nx - 1, max(0, int((ox + entry * dx - min_x) / size_x)))
+    iy: int = min(ny - 1, max(0, int((oy + entry * dy - min_y) / size_y)))
+    iz: int = min(nz - 1, max(0, int((oz + entry * dz - min_z) / size_z)))
+
+    step_x: int = 0
+    next_x: float = math.inf
+    delta_x: float = 0.0
+    out_x: int = -1
+    if dx > 0:
+        step_x, out_x = 1, nx
+        next_x = (min_x + (ix + 1) * size_x - ox) * inv_dx
+        delta_x = size_x * inv_dx
+    elif dx < 0:
+        step_x, out_x = -1, -1
+        next_x = (min_x + ix * size_x - ox) * inv_dx
+        delta_x = -size_x * inv_dx
+
+    step_y: int = 0
+    next_y: float = math.inf
+    delta_y: float = 0.0
+    out_y: int = -1
+    if dy > 0:
+        step_y, out_y = 1, ny
+        next_y = (min_y + (iy + 1) * size_y - oy) * inv_dy
+        delta_y = size_y * inv_dy
+    elif dy < 0:
+        step_y, out_y = -1, -1
+        next_y = (min_y + iy * size_y - oy) * inv_dy
+        delta_y = -size_y * inv_dy
+
+    step_z: int = 0
+    next_z: float = math.inf
+    delta_z: float = 0.0
+    out_z: int = -1
+    if dz > 0:
+        step_z, out_z = 1, nz
+        next_z = (min_z + (iz + 1) * size_z - oz) * inv_dz
+        delta_z = size_z * inv_dz
+    elif dz < 0:
+        step_z, out_z = -1, -1
+        next_z = (min_z + iz * size_z - oz) * inv_dz
+        delta_z = -size_z * inv_dz
+
+    stride_y: int = step_y * nx
+    stride_z: int = step_z * nx * ny
+    # Where the cells' spheres start, after the resolution.
+    cell: int = 3 + ix + nx * (iy + ny * iz)
+    while True:
+        for item in range(nodes[cell], nodes[cell + 1]):
+            index: int = nodes[item]
+            t: float = _hit(
+                spheres, index, ox, oy, oz, dx, dy, dz, a, t_min, closest
+            )
+            if t >= 0:
+                closest = t
+                hit = index
+
+        if next_x < next_y and next_x < next_z:
+            if closest <= next_x:
+                return hit, closest
+            ix += step_x
+            if ix == out_x:
+                return hit, closest
+            cell += step_x
+            next_x += delta_x
+        elif next_y < next_z:
+            if closest <= next_y:
+                return hit, closest
+            iy += step_y
+            if iy == out_y:
+                return hit, closest
+            cell += stride_y
+            next_y += delta_y
+        else:
+            if closest <= next_z:
+                return hit, closest
+            iz += step_z
+            if iz == out_z:
+                return hit, closest
+            cell += stride_z
+            next_z += delta_z
+
+def color(
+    spheres: List[float], kinds: List[int], materials: List[float],
+    large: int, boxes: List[float], nodes: List[int], grid: bool, ox: float,
+    oy: float, oz: float, dx: float, dy: float, dz: float,
+    max_depth: int=MAX_DEPTH,
+    roulette_depth: Optional[int]=ROULETTE_DEPTH
+) -> Tuple[float, float, float]:
+    """
+    `integrator.color` of the ray from (ox, oy, oz) along (dx, dy, dz), for
+    a FlatScene's buffers as lists.
+    """
+    global traced_rays
+    uniform = random.random
+    sqrt = math.sqrt
+    r: float = 1.0
+    g: float = 1.0
+    b: float = 1.0
+    depth: int = 0
+
+    while True:
+        hit, t = closest_hit(
+            spheres, large, boxes, nodes, grid, ox, oy, oz, dx, dy, dz, T_MIN
+        )
+        if hit < 0:
+            traced_rays += depth + 1
+            t = 0.5 * (dy / sqrt(dx * dx + dy * dy + dz * dz) + 1)
+            return r * (1.0 - 0.5 * t), g * (1.0 - 0.3 * t), b
+
+        if depth >= max_depth:
+            break
+
+        if roulette_depth is not None and depth >= roulette_depth:
+            survival: float = max(r, g, b)
+            if survival < 1:
+                if uniform() >= survival:
+                    break
+                r /= survival
+                g /= survival
+                b /= survival
+
+        s: int = SPHERE_SIZE * hit
+        radius: float = spheres[s + 3]
+        px: float = ox + t * dx
+        py: float = oy + t * dy
+        pz: float = oz + t * dz
+        nx: float = (px - spheres[s]) / radius
+        ny: float = (py - spheres[s + 1]) / radius
+        nz: float = (pz - spheres[s + 2]) / radius
+        kind: int = kinds[hit]
+        m: int = MATERIAL_SIZE * hit
+
+        if kind == LAMBERTIAN or kind == METAL:
+            # rng.ball_point.
+            z: float = 2 * uniform() - 1
+            angle: float = TAU * uniform()
+            distance: float = uniform() ** (1 / 3)
+            ring: float = distance * sqrt(1 - z * z)
+            bx: float = ring * math.cos(angle)
+            by: float = ring * math.sin(angle)
+            bz: float = distance * z
+            if kind == LAMBERTIAN:
+                dx = bx + nx
+                dy = by + ny
+                dz = bz + nz
+            else:
+                length: float = sqrt(dx * dx + dy * dy + dz * dz)
+                ux: float = dx / length
+                uy: float = dy / length
+                uz: float = dz / length
+                scale: float = 2 * (ux * nx + uy * ny + uz * nz)
+                fuzz: float = materials[m + 3]
+                dx = ux - scale * nx + bx * fuzz
+                dy = uy - scale * ny + by * fuzz
+                dz = uz - scale * nz + bz * fuzz
+            r *= materials[m]
+            g *= materials[m + 1]
+            b *= materials[m + 2]
+            if not (r or g or b):
+                break
+        elif kind == DIELECTRIC:
+            refractive_index: float = materials[m + 3]
+            length = sqrt(dx * dx + dy * dy + dz * dz)
+            incidence: float = dx * nx + dy * ny + dz * nz
+            # The outward normal.
+            onx: float = nx
+            ony: float = ny
+            onz: float = nz
+            nint: float
+            cosine: float
+            if incidence > 0:
+                onx = -nx
+                ony = -ny
+                onz = -nz
+                nint = refractive_index
+                cosine = refractive_index * incidence / length
+            else:
+                nint = 1 / refractive_index
+                cosine = -(incidence / length)
+
+            # material.refract_into.
+            ux = dx / length
+            uy = dy / length
+            uz = dz / length
+            dt: float = ux * onx + uy * ony + uz * onz
+            discriminant: float = 1 - (nint * nint) * (1 - dt * dt)
+            reflection_probability: float = 1
+            if discriminant > 0:
+                root: float = sqrt(discriminant)
+                rx: float = nint * (ux - onx * dt) - onx * root
+                ry: float = nint * (uy - ony * dt) - ony * root
+                rz: float = nint * (uz - onz * dt) - onz * root
+                # Dielectric's Schlick approximation, parentheses and all.
+                r0: float = (
+                    (1 - refractive_index) / (1 + refractive_index) ** 2
+                )
+                reflection_probability = r0 + (1 - r0) * (1 - cosine) ** 5
+
+            if reflection_probability == 1:
+                scale = 2 * (dx * nx + dy * ny + dz * nz)
+                dx = dx - scale * nx
+                dy = dy - scale * ny
+                dz = dz - scale * nz
+            else:
+                dx = rx
+                dy = ry
+                dz = rz
+        elif kind == VANTA:
+            break
+        else:
+            # Identity lets the ray through, from where it was.
+            depth += 1
+            continue
+
+        ox = px
+        oy = py
+        oz = pz
+        depth += 1
+
+    traced_rays += depth + 1
+    return 0.0, 0.0, 0.0
+
+def normal_color(
+    spheres: List[float], large: int, boxes: List[float], nodes: List[int],
+    grid: bool, ox: float, oy: float, oz: float, dx: float, dy: float,
+    dz: float
+) -> Tuple[float, float, float]:
+    """
+    `integrator.normal_color`, likewise.
+    """
+    global traced_rays
+    traced_rays += 1
+    hit, t = closest_hit(
+        spheres, large, boxes, nodes, grid, ox, oy, oz, dx, dy, dz, 0.0
+    )
+    if hit < 0:
+        t = 0.5 * (dy / math.sqrt(dx * dx + dy * dy + dz * dz) + 1)
+        return 1.0 - 0.5 * t, 1.0 - 0.3 * t, 1.0
+
+    s: int = SPHERE_SIZE * hit
+    radius: float = spheres[s + 3]
+    return (
+        0.5 * ((ox + t * dx - spheres[s]) / radius + 1),
+        0.5 * ((oy + t * dy - spheres[s + 1]) / radius + 1),
+        0.5 * ((oz + t * dz - spheres[s + 2]) / radius + 1)
+    )
+
+def trace(
+    scene: FlatScene, camera: Camera, width: int, height: int, samples: int,
+    seed: Optional[int]=None, shading: str="path", gamma_correct: bool=True
+) -> Iterator[List[int]]:
+    """
+    The rows of the image, top to bottom, as `engine.trace_scalar` has them,
+    only every row is its pixels' red, green and blue, one after the other.
+    """
+    spheres: List[float] = scene.spheres.tolist()
+    kinds: List[int] = scene.kinds.tolist()
+    materials: List[float] = scene.materials.tolist()
+    boxes: List[float] = scene.boxes.tolist()
+    nodes: List[int] = scene.nodes.tolist()
+    large: int = scene.large
+    grid: bool = scene.grid
+    uniform = random.random
+
+    # Camera.get_ray and PositionableCamera.get_ray, on floats.
+    lens: bool = isinstance(camera, PositionableCamera)
+    lens_radius: float = camera.lens_radius if lens else 0.0  # type: ignore
+    origin_x, origin_y, origin_z = camera.origin.make_tuple()
+    corner_x, corner_y, corner_z = camera.lower_left_corner.make_tuple()
+    h_x, h_y, h_z = camera.h_movement.make_tuple()
+    v_x, v_y, v_z = camera.v_movement.make_tuple()
+    if lens:
+        u_axis_x, u_axis_y, u_axis_z = (
+            camera.horizontal_axis.make_tuple()  # type: ignore
+        )
+        v_axis_x, v_axis_y, v_axis_z = (
+            camera.vertical_axis.make_tuple()  # type: ignore
+        )
+
+    for j in range(height - 1, -1, -1):
+        row: List[int] = []
+        for i in range(width):
+            if seed is not None:
+                seed_pixel(seed, ((height - 1) - j) * width + i)
+            red: float = 0
+            green: float = 0
+            blue: float = 0
+            for sample in range(samples):
+                s: float = (i + uniform()) / width
+                t: float = (j + uniform()) / height
+                ox: float = origin_x
+                oy: float = origin_y
+                oz: float = origin_z
+                offset_x: float = 0.0
+                offset_y: float = 0.0
+                offset_z: float = 0.0
+                if lens:
+                    # rng.disk_point.
+                    distance: float = math.sqrt(uniform())
+                    angle: float = TAU * uniform()
+                    disk_x: float = distance * math.cos(angle) * lens_radius
+                    disk_y: float = distance * math.sin(angle) * lens_radius
+                    offset_x = u_axis_x * disk_x + v_axis_x * disk_y
+                    offset_y = u_axis_y * disk_x + v_axis_y * disk_y
+                    offset_z = u_axis_z * disk_x + v_axis_z * disk_y
+                    ox = origin_x + offset_x
+                    oy = origin_y + offset_y
+                    oz = origin_z + offset_z
+                dx: float = corner_x + h_x * s + v_x * t - origin_x
+                dy: float = corner_y + h_y * s + v_y * t - origin_y
+                dz: float = corner_z + h_z * s + v_z * t - origin_z
+                if lens:
+                    dx -= offset_x
+                    dy -= offset_y
+                    dz -= offset_z
+                if shading == "normals":
+                    r, g, b = normal_color(
+                        spheres, large, boxes, nodes, grid, ox, oy, oz, dx,
+                        dy, dz
+                    )
+                else:
+                    r, g, b = color(
+                        spheres, kinds, materials, large, boxes, nodes, grid,
+                        ox, oy, oz, dx, dy, dz
+                    )
+                red += r
+                green += g
+                blue += b
+
+            red /= samples
+            green /= samples
+            blue /= samples
+            if gamma_correct:
+                red = math.sqrt(red)
+                green = math.sqrt(green)
+                blue = math.sqrt(blue)
+            row.append(int(red * 255.9))
+            row.append(int(green * 255.9))
+            row.append(int(blue * 255.9))
+        yield row
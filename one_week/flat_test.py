@@ -0,0 +1,152 @@
+from one_week import engine, flat
+from one_week.bvh import BVH
+from one_week.camera import Camera, PositionableCamera
+from one_week.engine import Scene, trace_scalar
+from one_week.grid import UniformGrid, accelerate
+from one_week.hittable import HittableList
+from one_week.material import Dielectric, Identity, Lambertian, Metal, Vanta
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import os
+import random
+import tempfile
+import unittest
+
+def three_spheres():
+    return [
+        Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.8, 0.3, 0.3))),
+        Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0))),
+        Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
+        Sphere(Vec3(-1, 0, -1), 0.5, Dielectric(1.5)),
+        Sphere(Vec3(-1, 0, -1), -0.45, Dielectric(1.5))
+    ]
+
+def crowded_spheres():
+    """
+    Enough small spheres in one spot that `accelerate` picks a BVH.
+    """
+    rng = random.Random("crowded")
+    materials = [
+        Lambertian(Vec3(0.5, 0.7, 0.2)), Metal(Vec3(0.7, 0.7, 0.7), 0.1),
+        Dielectric(1.5)
+    ]
+    spheres = [Sphere(Vec3(0, -100.5, -1), 100, materials[0])]
+    for index in range(200):
+        spheres.append(Sphere(
+            Vec3(rng.uniform(-1, 1), rng.uniform(-0.5, 0.5),
+                 rng.uniform(-2, -1)),
+            rng.uniform(0.02, 0.1), materials[index % len(materials)]
+        ))
+    spheres.append(Sphere(Vec3(6, 0, -4), 0.3, materials[1]))
+    return spheres
+
+CAMERA = Camera(Vec3(-2, -1, -1), Vec3(4, 0, 0), Vec3(0, 2, 0), Vec3(0, 0, 0))
+LENS = PositionableCamera(
+    Vec3(-2, 2, 1), Vec3(0, 0, -1), Vec3(0, 1, 0), 40, 2, 0.2, 3
+)
+
+class FlatTest(unittest.TestCase):
+
+    def assertSameImage(self, scene, width=16, height=8, samples=3, seed=4):
+        expected = [
+            [component for pixel in row for component in pixel.make_tuple()]
+            for row in trace_scalar(scene, width, height, samples, seed)
+        ]
+        flattened = flat.FlatScene.from_hittables(scene.hittables)
+        self.assertEqual(expected, list(flat.trace(
+            flattened, scene.camera, width, height, samples, seed,
+            scene.shading, scene.gamma_correct
+        )))
+
+    def test_grid(self):
+        spheres = three_spheres()
+        self.assertIsInstance(accelerate(spheres), UniformGrid)
+        flattened = flat.FlatScene.from_hittables(spheres)
+        self.assertTrue(flattened.grid)
+        # The ground is too big for the grid.
+        self.assertEqual(4, flattened.large)
+        self.assertEqual(5, len(flattened))
+        self.assertSameImage(Scene(spheres, CAMERA))
+        self.assertSameImage(Scene(spheres, LENS))
+
+    def test_bvh(self):
+        spheres = crowded_spheres()
+        self.assertIsInstance(accelerate(spheres), BVH)
+        self.assertFalse(flat.FlatScene.from_hittables(spheres).grid)
+        self.assertSameImage(Scene(spheres, CAMERA), 12, 6, 2)
+
+    def test_list(self):
+        spheres = three_spheres()[:2]
+        self.assertIsInstance(accelerate(spheres), HittableList)
+        self.assertEqual(0, flat.FlatScene.from_hittables(spheres).large)
+        self.assertSameImage(Scene(spheres, LENS))
+        self.assertSameImage(Scene([], CAMERA))
+
+    def test_normals(self):
+        self.assertSameImage(
+            Scene(three_spheres(), LENS, shading="normals"), samples=1
+        )
+
+    def test_vanta_and_identity(self):
+        spheres = three_spheres()
+        spheres[0].material = Vanta()
+        spheres[2].material = Identity()
+        self.assertSameImage(Scene(spheres, CAMERA))
+
+    def test_unseeded(self):
+        # Whatever `random` is at, the same numbers are drawn for the same
+        # things.
+        scene = Scene(three_spheres(), LENS)
+        random.seed(8)
+        expected = [
+            [component for pixel in row for component in pixel.make_tuple()]
+            for row in trace_scalar(scene, 4, 2, 2)
+        ]
+        random.seed(8)
+        self.assertEqual(expected, list(flat.trace(
+            flat.FlatScene.from_hittables(scene.hittables), LENS, 4, 2, 2
+        )))
+
+    def test_counts_rays(self):
+        before = flat.traced_rays
+        list(flat.trace(
+            flat.FlatScene.from_hittables(three_spheres()), CAMERA, 4, 2, 3,
+            seed=1
+        ))
+        # At least the camera rays, and some of them bounced.
+        self.assertGreater(flat.traced_rays - before, 4 * 2 * 3)
+
+    def test_only_spheres_it_knows(self):
+        class Glowing(Lambertian):
+            pass
+
+        with self.assertRaises(ValueError):
+            flat.FlatScene.from_hittables(
+                [Sphere(Vec3(0, 0, -1), 0.5, Glowing(Vec3(1, 1, 1)))]
+            )
+        with self.assertRaises(ValueError):
+            flat.FlatScene.from_hittables([BVH(three_spheres())])
+
+    def test_engine(self):
+        scene = Scene(three_spheres(), LENS)
+        with tempfile.TemporaryDirectory() as directory:
+            images = []
+            for backend in ("scalar", "flat"):
+                filename = os.path.join(directory, "%s.ppm" % backend)
+                self.assertEqual(backend, engine.render(
+                    scene, 8, 4, 2, filename, backend=backend, seed=6,
+                    progress="none"
+                ))
+                with open(filename) as image:
+                    images.append(image.read())
+            self.assertEqual(images[0], images[1])
+
+            with self.assertRaises(ValueError):
+                engine.render(
+                    scene, 8, 4, 2, filename, backend="flat",
+                    sampler="halton"
+                )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Fly around the spheres of 8_dielectrics while a small one bounces between
+them.
+"""
+from one_week.animation import Animation, CameraPath, Key, Motion
+from one_week.material import Dielectric, Lambertian, Metal
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import List
+
+WIDTH: int = 320
+HEIGHT: int = 180
+SAMPLES: int = 20
+FRAMES: int = 48
+
+def animation(frames: int=FRAMES) -> Animation:
+    spheres: List[Sphere] = [
+        Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.8, 0.3, 0.3))),
+        Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0))),
+        Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.8, 0.6, 0.2), 0.3)),
+        Sphere(Vec3(-1, 0, -1), 0.5, Dielectric(1.5)),
+        Sphere(Vec3(-0.5, -0.4, -0.5), 0.1, Lambertian(Vec3(0.1, 0.2, 0.9)))
+    ]
+    last: int = frames - 1
+    # From the front left, over the top, to the right side.
+    camera: CameraPath = CameraPath(
+        positions=[
+            Key(0, Vec3(-2, 0.5, 1.5)), Key(last / 2, Vec3(0, 2, 1.5)),
+            Key(last, Vec3(2.5, 0.5, 0))
+        ],
+        aims=[Key(0, Vec3(0, 0, -1))],
+        vfovs=[Key(0, 50.0), Key(last, 40.0)]
+    )
+    # Two hops, from between the matte and glass spheres to the front of
+    # the metal one.
+    bounce: Motion = Motion(4, centers=[
+        Key(0, Vec3(-0.5, -0.4, -0.5)),
+        Key(last / 4, Vec3(-0.25, 0.3, -0.4)),
+        Key(last / 2, Vec3(0, -0.4, -0.3)),
+        Key(3 * last / 4, Vec3(0.25, 0.3, -0.4)),
+        Key(last, Vec3(0.5, -0.4, -0.5))
+    ])
+    return Animation(spheres, camera, [bounce], frames)
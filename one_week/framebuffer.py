@@ -0,0 +1,202 @@
+"""
+A framebuffer backed by a NumPy array, for when PPM's grid of Vec3's is too
+slow (or too big).
+
+Pixels are kept as linear float32 colors, the way the tracer computes them.
+Gamma correction and quantization, which the scripts do one pixel at a time,
+happen for the whole image at once on export.
+
+StreamingPPM is for images too big for even that: it writes the PPM as the
+tiles come in.
+
+Needs NumPy.
+"""
+from one_week.tile import Tile
+from one_week.vec3 import Vec3
+from typing import BinaryIO, List, Optional
+
+import numpy as np
+import os
+import tempfile
+
+def quantize(pixels: np.ndarray, gamma_correct: bool=True) -> np.ndarray:
+    """
+    Turn linear colors into uint8 ones. This is the `map(math.sqrt)`,
+    `*= 255.9`, `map(int)` dance of the scripts.
+    """
+    # Colors out of [0, 1] never come out of the tracer, but anything
+    # outside would wrap around in uint8 (or be NaN after the sqrt).
+    pixels = np.clip(pixels, 0, 1)
+    if gamma_correct:
+        pixels = np.sqrt(pixels)
+    return (pixels * 255.9).astype(np.uint8)
+
+def ppm_header(width: int, height: int, binary: bool=True) -> bytes:
+    return b"%s\n%d %d\n255\n" % (b"P6" if binary else b"P3", width, height)
+
+class FrameBuffer(object):
+
+    def __init__(
+        self, width: int, height: int, pixels: Optional[np.ndarray]=None
+    ):
+        """
+        `pixels`, if given, is a (height, width, 3) array of linear colors to
+        start with. Otherwise the image starts out black.
+
+        Rows are counted from the top of the image, like in PPM.
+        """
+        self.width: int = width
+        self.height: int = height
+        self.pixels: np.ndarray = np.zeros((height, width, 3), dtype=np.float32)
+        if pixels is not None:
+            self.pixels[...] = pixels
+
+    def set_pixel(self, row: int, col: int, color: Vec3):
+        self.pixels[row, col] = color.make_tuple()
+
+    def write_tile(self, x0: int, y0: int, tile: np.ndarray):
+        """
+        Copy a (tile height, tile width, 3) array of linear colors into the
+        image, with its top-left corner at column x0 and row y0.
+        """
+        tile_height, tile_width, _ = tile.shape
+        self.pixels[y0:y0 + tile_height, x0:x0 + tile_width] = tile
+
+    def quantize(self, gamma_correct: bool=True) -> np.ndarray:
+        """
+        The (height, width, 3) uint8 version of the image.
+        """
+        return quantize(self.pixels, gamma_correct)
+
+    def write(self, filename: str, gamma_correct: bool=True, binary: bool=True):
+        """
+        Save as PPM. The binary flavor (P6) is the pixel bytes as they are, so
+        no per-pixel strings are involved at all; the text flavor (P3), which
+        is what PPM.write makes, is formatted a row at a time by NumPy.
+        """
+        if not filename.endswith(".ppm"):
+            filename = "%s.ppm" % filename
+
+        quantized: np.ndarray = self.quantize(gamma_correct)
+        with open(filename, "wb") as ppm_file:
+            ppm_file.write(ppm_header(self.width, self.height, binary))
+            if binary:
+                ppm_file.write(quantized.tobytes())
+            else:
+                np.savetxt(
+                    ppm_file, quantized.reshape(self.height, self.width * 3),
+                    fmt="%d"
+                )
+
+class StreamingPPM(object):
+    """
+    A binary PPM which gets written while the image is being rendered, so the
+    image never has to be in memory all at once.
+
+    The image is tiled as `split_tiles(width, height, tile_size)` does it, and
+    every tile has to be written exactly once, in any order. Whenever the
+    topmost unwritten row of tiles is complete, it goes to the file. Tiles
+    further down that arrive early wait in a memory-mapped scratch file next
+    to the output (which, being sparse, takes disk space only for the tiles
+    actually in it), so memory use stays at about a row of tiles however
+    large the image. Use it as a context manager:
+
+        with StreamingPPM(filename, width, height, tile_size) as ppm:
+            for tile, pixels in rendered_tiles:
+                ppm.write_tile(tile, pixels)
+    """
+
+    def __init__(
+        self, filename: str, width: int, height: int, tile_size: int,
+        gamma_correct: bool=True
+    ):
+        if not filename.endswith(".ppm"):
+            filename = "%s.ppm" % filename
+
+        self.filename: str = filename
+        self.width: int = width
+        self.height: int = height
+        self.tile_size: int = tile_size
+        self.gamma_correct: bool = gamma_correct
+        self.__columns: int = -(-width // tile_size)
+        # How many tiles of every row of tiles have been written so far.
+        self.__written: List[int] = [0] * -(-height // tile_size)
+        # The row of tiles to go to the file next, and its pixels.
+        self.__band: int = 0
+        self.__pixels: np.ndarray = np.zeros(
+            (min(tile_size, height), width, 3), dtype=np.uint8
+        )
+        self.__scratch_file: Optional[BinaryIO] = None
+        self.__scratch: Optional[np.memmap] = None
+        self.__file: BinaryIO = open(filename, "wb")
+        self.__file.write(ppm_header(width, height))
+
+    def __enter__(self) -> "StreamingPPM":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def complete(self) -> bool:
+        return self.__band == len(self.__written)
+
+    def write_tile(self, tile: Tile, pixels: np.ndarray):
+        """
+        `pixels` are the (tile height, tile width, 3) linear colors of the
+        tile.
+        """
+        band: int = tile.y0 // self.tile_size
+        if band < self.__band:
+            raise ValueError("Tile %s is already in the file" % (tile,))
+
+        quantized: np.ndarray = quantize(pixels, self.gamma_correct)
+        if band == self.__band:
+            self.__pixels[:, tile.x0:tile.x1] = quantized
+        else:
+            self.__scratch_pixels()[tile.y0:tile.y1, tile.x0:tile.x1] = (
+                quantized
+            )
+        self.__written[band] += 1
+        self.__flush()
+
+    def __scratch_pixels(self) -> np.memmap:
+        if self.__scratch is None:
+            self.__scratch_file = tempfile.TemporaryFile(
+                dir=os.path.dirname(os.path.abspath(self.filename))
+            )
+            self.__scratch = np.memmap(
+                self.__scratch_file, dtype=np.uint8, mode="w+",
+                shape=(self.height, self.width, 3)
+            )
+        return self.__scratch
+
+    def __flush(self):
+        while (
+            not self.complete and
+            self.__written[self.__band] == self.__columns
+        ):
+            self.__file.write(self.__pixels.tobytes())
+            self.__band += 1
+            if self.complete:
+                break
+
+            y0: int = self.__band * self.tile_size
+            y1: int = min(y0 + self.tile_size, self.height)
+            if self.__scratch is None:
+                self.__pixels = np.zeros(
+                    (y1 - y0, self.width, 3), dtype=np.uint8
+                )
+            else:
+                # Whatever of this row arrived early.
+                self.__pixels = np.array(self.__scratch[y0:y1])
+
+    def close(self):
+        """
+        Close the file, complete or not.
+        """
+        self.__file.close()
+        self.__scratch = None
+        if self.__scratch_file is not None:
+            self.__scratch_file.close()
+            self.__scratch_file = None
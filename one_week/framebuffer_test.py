@@ -0,0 +1,111 @@
+from one_week.ppm import PPM
+from one_week.tile import split_tiles
+from one_week.vec3 import Vec3
+
+import math
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from one_week.framebuffer import FrameBuffer, StreamingPPM
+except ImportError:
+    FrameBuffer = None
+
+@unittest.skipIf(FrameBuffer is None, "needs NumPy")
+class FrameBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.width, self.height = 5, 3
+        self.colors = [
+            [Vec3(col / 5, row / 3, 0.25) for col in range(self.width)]
+            for row in range(self.height)
+        ]
+        self.framebuffer = FrameBuffer(self.width, self.height)
+        for row in range(self.height):
+            for col in range(self.width):
+                self.framebuffer.set_pixel(row, col, self.colors[row][col])
+
+    def __ppm(self) -> PPM:
+        """
+        What the scripts would have made out of the same colors.
+        """
+        ppm = PPM(self.width, self.height)
+        for row in range(self.height):
+            for col in range(self.width):
+                color = Vec3(*map(math.sqrt, self.colors[row][col].make_tuple()))
+                color *= 255.9
+                ppm.set_pixel(row, col, Vec3(*map(int, color.make_tuple())))
+        return ppm
+
+    def test_quantize_matches_scripts(self):
+        quantized = self.framebuffer.quantize()
+        ppm = self.__ppm()
+        for row in range(self.height):
+            for col in range(self.width):
+                self.assertEqual(
+                    ppm.grid[row][col].make_tuple(),
+                    tuple(quantized[row, col])
+                )
+
+    def test_quantize_clips(self):
+        self.framebuffer.set_pixel(0, 0, Vec3(4, -1, 1))
+        self.assertEqual((255, 0, 255), tuple(self.framebuffer.quantize()[0, 0]))
+
+    def test_write_tile(self):
+        tile = np.full((2, 3, 3), 0.5)
+        self.framebuffer.write_tile(1, 1, tile)
+        np.testing.assert_array_equal(tile, self.framebuffer.pixels[1:3, 1:4])
+        self.assertEqual(0.25, self.framebuffer.pixels[0, 1, 2])
+
+    def test_text_matches_ppm(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected_path = os.path.join(directory, "expected.ppm")
+            actual_path = os.path.join(directory, "actual")
+            self.__ppm().write(expected_path)
+            self.framebuffer.write(actual_path, binary=False)
+
+            with open(expected_path) as expected, \
+                    open(actual_path + ".ppm") as actual:
+                self.assertEqual(expected.read().split(), actual.read().split())
+
+    def test_binary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "binary.ppm")
+            self.framebuffer.write(path)
+            with open(path, "rb") as ppm_file:
+                data = ppm_file.read()
+
+        header = b"P6\n5 3\n255\n"
+        self.assertTrue(data.startswith(header))
+        self.assertEqual(
+            self.framebuffer.quantize().tobytes(), data[len(header):]
+        )
+
+    def test_streaming_out_of_order(self):
+        width, height, tile_size = 7, 10, 3
+        image = np.random.default_rng(0).random((height, width, 3))
+        tiles = split_tiles(width, height, tile_size)
+        # Last row of tiles first, then the rest backwards.
+        order = tiles[-3:] + tiles[-4::-1]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "streamed.ppm")
+            with StreamingPPM(path, width, height, tile_size) as ppm:
+                for tile in order:
+                    self.assertFalse(ppm.complete)
+                    ppm.write_tile(
+                        tile, image[tile.y0:tile.y1, tile.x0:tile.x1]
+                    )
+                self.assertTrue(ppm.complete)
+                with self.assertRaises(ValueError):
+                    ppm.write_tile(tiles[0], image[:3, :3])
+            with open(path, "rb") as ppm_file:
+                data = ppm_file.read()
+
+        expected = FrameBuffer(width, height, image).quantize().tobytes()
+        self.assertEqual(b"P6\n7 10\n255\n" + expected, data)
+
+if __name__ == "__main__":
+    unittest.main()
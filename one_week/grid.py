@@ -0,0 +1,340 @@
+"""
+A uniform grid, the other classic way to skip most of the objects in a scene.
+
+The BVH (see one_week.bvh) adapts to wherever the objects are. A grid does
+not: it chops the box around the scene into equal cells and files every
+object under each cell its bounding box overlaps. A ray then walks the cells
+it passes through, nearest first, and only tests the objects filed there. The
+walk is a 3D-DDA (Amanatides and Woo, _A Fast Voxel Traversal Algorithm for
+Ray Tracing_): from one cell to the next is an add and a couple of compares,
+and since the cells come in order, the walk stops at the first cell that ends
+past the closest hit so far.
+
+That suits scene_generator well: a lattice of small spheres of one size,
+evenly spread over the ground. It suits it badly too, because of the ground
+itself, a sphere of radius 1000 which would stretch the grid over a box
+thousands of units wide, and land in every cell anyway. So objects bigger
+than the whole layout of the scene are kept out of the grid and tested for
+every ray, like BVH does with objects that have no bounding box at all.
+
+Which one to use for a scene is for `accelerate` to decide, from a few
+statistics of the scene (see `GridStatistics`).
+"""
+from one_week.aabb import AABB, inverse_component, surrounding_box
+from one_week.bvh import BVH
+from one_week.hittable import HitRecord, Hittable, HittableList
+from one_week.ray import Ray
+from one_week.vec3 import Vec3
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import math
+
+class GridStatistics(NamedTuple):
+    """
+    How the objects of a scene sit in its grid.
+
+    `crowding` is the number of objects in the cell of an average object
+    (counting every cell an object overlaps). It's about 1 if the objects are
+    evenly spread, and grows with the number of objects that end up in a few
+    cells (the "teapot in a stadium"), which are the ones a grid does badly.
+    """
+    objects: int
+    large: int
+    unbounded: int
+    resolution: Tuple[int, int, int]
+    occupied: float
+    crowding: float
+
+class UniformGrid(Hittable):
+    """
+    Drop-in replacement for HittableList, like BVH.
+    """
+
+    # Cells per object. A few more cells than objects keeps the cells nearly
+    # empty without making the walk across them too long. Tuned with
+    # benchmarks/grid.py: from 2 to 16 are about as fast for the cover, below
+    # 1 the cells fill up.
+    DENSITY: float = 4.0
+    # An object whose box is longer than this many times the layout of the
+    # scene (see __init__) is large.
+    LARGE_FACTOR: float = 1.0
+    MAX_RESOLUTION: int = 128
+
+    def __init__(self, hittables: List[Hittable], density: float=DENSITY):
+        super().__init__()
+        self.hittables: List[Hittable] = hittables
+        # Both kinds are tested for every ray, before the walk.
+        self.unbounded: List[Hittable] = []
+        self.large: List[Hittable] = []
+        bounded: List[Tuple[Hittable, AABB]] = []
+
+        for hittable in hittables:
+            box: Optional[AABB] = hittable.bounding_box()
+            if box is None:
+                self.unbounded.append(hittable)
+            else:
+                bounded.append((hittable, box))
+
+        if bounded:
+            # Large means large next to the layout of the scene, the box
+            # around the centers of the objects: the ground is wider than all
+            # of the cover put together. (Next to the typical object would
+            # make every sphere of the cover large, with enough tiny ones
+            # crowded in somewhere.)
+            centers: List[Vec3] = [box.centroid() for _, box in bounded]
+            layout: AABB = AABB(centers[0], centers[0])
+            for center in centers[1:]:
+                layout = surrounding_box(layout, AABB(center, center))
+            limit: float = self.LARGE_FACTOR * max(_longest_extent(layout), 1e-9)
+            gridded: List[Tuple[Hittable, AABB]] = []
+            for hittable, box in bounded:
+                if _longest_extent(box) > limit:
+                    self.large.append(hittable)
+                else:
+                    gridded.append((hittable, box))
+            bounded = gridded
+
+        self.box: Optional[AABB] = None
+        self.resolution: Tuple[int, int, int] = (0, 0, 0)
+        self.cells: List[Sequence[Hittable]] = []
+        if bounded:
+            self.__build(bounded, density)
+
+    def __build(self, bounded: List[Tuple[Hittable, AABB]], density: float):
+        box: AABB = bounded[0][1]
+        for _, hittable_box in bounded[1:]:
+            box = surrounding_box(box, hittable_box)
+        self.box = box
+
+        # Cubic cells, as many as `density` per object. A flat scene (like
+        # the cover, 22 units wide and 2 high) gets a flat grid.
+        extents: Tuple[float, float, float] = (
+            box.maximum - box.minimum
+        ).make_tuple()
+        volume: float = 1.0
+        dimensions: int = 0
+        for extent in extents:
+            if extent > 0:
+                volume *= extent
+                dimensions += 1
+        cell_size: float = (
+            (volume / (density * len(bounded))) ** (1 / dimensions)
+            if dimensions else 1.0
+        )
+        nx, ny, nz = (
+            min(self.MAX_RESOLUTION, max(1, int(round(extent / cell_size))))
+            for extent in extents
+        )
+        self.resolution = (nx, ny, nz)
+        # An axis with no extent still has a cell, of whatever size.
+        self.cell_sizes: Tuple[float, float, float] = tuple(
+            extent / count if extent > 0 else 1.0
+            for extent, count in zip(extents, self.resolution)
+        )  # type: ignore
+
+        cells: List[List[Hittable]] = [[] for _ in range(nx * ny * nz)]
+        for hittable, hittable_box in bounded:
+            x0, y0, z0 = self.__cell_of(hittable_box.minimum)
+            x1, y1, z1 = self.__cell_of(hittable_box.maximum)
+            for z in range(z0, z1 + 1):
+                for y in range(y0, y1 + 1):
+                    row: int = nx * (y + ny * z)
+                    for x in range(x0, x1 + 1):
+                        cells[row + x].append(hittable)
+        # Tuples iterate a bit faster, and all the empty ones are the same.
+        self.cells = [tuple(cell) for cell in cells]
+
+    def __cell_of(self, point: Vec3) -> Tuple[int, int, int]:
+        box: AABB = self.box  # type: ignore
+        return tuple(
+            min(count - 1, max(0, int((coordinate - low) / size)))
+            for coordinate, low, size, count in zip(
+                point.make_tuple(), box.minimum.make_tuple(), self.cell_sizes,
+                self.resolution
+            )
+        )  # type: ignore
+
+    def statistics(self) -> GridStatistics:
+        filed: int = sum(len(cell) for cell in self.cells)
+        occupied: int = sum(1 for cell in self.cells if cell)
+        return GridStatistics(
+            len(self.hittables), len(self.large), len(self.unbounded),
+            self.resolution,
+            occupied / len(self.cells) if self.cells else 0.0,
+            (
+                sum(len(cell) ** 2 for cell in self.cells) / filed
+                if filed else 0.0
+            )
+        )
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        """
+        Same contract as HittableList.hit.
+
+        The large and unbounded objects go first: whatever they hit (the
+        ground, mostly) cuts the walk short.
+        """
+        hit_attempt: Optional[HitRecord] = None
+        closest_so_far: float = t_max
+
+        for hittable in self.unbounded:
+            hit_attempt = hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+            if hit_attempt is not None:
+                closest_so_far = hit_attempt.t
+        for hittable in self.large:
+            hit_attempt = hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+            if hit_attempt is not None:
+                closest_so_far = hit_attempt.t
+
+        if self.box is None:
+            return hit_attempt
+
+        origin: Vec3 = ray.origin
+        direction: Vec3 = ray.direction
+        ox: float = origin.x
+        oy: float = origin.y
+        oz: float = origin.z
+        dx: float = direction.x
+        dy: float = direction.y
+        dz: float = direction.z
+        inv_dx: float = inverse_component(dx)
+        inv_dy: float = inverse_component(dy)
+        inv_dz: float = inverse_component(dz)
+
+        box: AABB = self.box
+        entry: Optional[float] = box.entry(
+            ox, oy, oz, inv_dx, inv_dy, inv_dz, t_min, closest_so_far
+        )
+        if entry is None:
+            return hit_attempt
+
+        nx, ny, nz = self.resolution
+        size_x, size_y, size_z = self.cell_sizes
+        min_x: float = box.minimum.x
+        min_y: float = box.minimum.y
+        min_z: float = box.minimum.z
+
+        # The cell the ray enters the grid in. Rounding can put the entry
+        # point a hair outside, hence the clamping.
+        ix: int = min(nx - 1, max(0, int((ox + entry * dx - min_x) / size_x)))
+        iy: int = min(ny - 1, max(0, int((oy + entry * dy - min_y) / size_y)))
+        iz: int = min(nz - 1, max(0, int((oz + entry * dz - min_z) / size_z)))
+
+        # For every axis: which way the ray steps, the t at which it crosses
+        # into the next cell along that axis, how much t one cell takes, and
+        # the index that means it left the grid. An axis the ray runs
+        # parallel to is never crossed.
+        step_x: int = 0
+        next_x: float = math.inf
+        delta_x: float = 0.0
+        out_x: int = -1
+        if dx > 0:
+            step_x, out_x = 1, nx
+            next_x = (min_x + (ix + 1) * size_x - ox) * inv_dx
+            delta_x = size_x * inv_dx
+        elif dx < 0:
+            step_x, out_x = -1, -1
+            next_x = (min_x + ix * size_x - ox) * inv_dx
+            delta_x = -size_x * inv_dx
+
+        step_y: int = 0
+        next_y: float = math.inf
+        delta_y: float = 0.0
+        out_y: int = -1
+        if dy > 0:
+            step_y, out_y = 1, ny
+            next_y = (min_y + (iy + 1) * size_y - oy) * inv_dy
+            delta_y = size_y * inv_dy
+        elif dy < 0:
+            step_y, out_y = -1, -1
+            next_y = (min_y + iy * size_y - oy) * inv_dy
+            delta_y = -size_y * inv_dy
+
+        step_z: int = 0
+        next_z: float = math.inf
+        delta_z: float = 0.0
+        out_z: int = -1
+        if dz > 0:
+            step_z, out_z = 1, nz
+            next_z = (min_z + (iz + 1) * size_z - oz) * inv_dz
+            delta_z = size_z * inv_dz
+        elif dz < 0:
+            step_z, out_z = -1, -1
+            next_z = (min_z + iz * size_z - oz) * inv_dz
+            delta_z = -size_z * inv_dz
+
+        cells: List[Sequence[Hittable]] = self.cells
+        stride_y: int = step_y * nx
+        stride_z: int = step_z * nx * ny
+        index: int = ix + nx * (iy + ny * iz)
+        while True:
+            for hittable in cells[index]:
+                hit_attempt = (
+                    hittable.hit(ray, t_min, closest_so_far) or hit_attempt
+                )
+                if hit_attempt is not None:
+                    closest_so_far = hit_attempt.t
+
+            # On to whichever cell boundary is nearest. A hit before it is
+            # closer than anything in the cells after, even if the object hit
+            # lies partly in them. (Objects in several cells get tested once
+            # per cell; remembering which were tested costs more than that.)
+            if next_x < next_y and next_x < next_z:
+                if closest_so_far <= next_x:
+                    return hit_attempt
+                ix += step_x
+                if ix == out_x:
+                    return hit_attempt
+                index += step_x
+                next_x += delta_x
+            elif next_y < next_z:
+                if closest_so_far <= next_y:
+                    return hit_attempt
+                iy += step_y
+                if iy == out_y:
+                    return hit_attempt
+                index += stride_y
+                next_y += delta_y
+            else:
+                if closest_so_far <= next_z:
+                    return hit_attempt
+                iz += step_z
+                if iz == out_z:
+                    return hit_attempt
+                index += stride_z
+                next_z += delta_z
+
+    def bounding_box(self) -> Optional[AABB]:
+        if self.unbounded:
+            return None
+        box: Optional[AABB] = self.box
+        for hittable in self.large:
+            hittable_box: AABB = hittable.bounding_box()  # type: ignore
+            box = hittable_box if box is None else surrounding_box(box, hittable_box)
+        return box
+
+def _longest_extent(box: AABB) -> float:
+    return max((box.maximum - box.minimum).make_tuple())
+
+# Up to this many objects, testing them all is as fast as anything (with 3,
+# the grid is already 15% faster).
+LIST_LIMIT: int = 2
+# The cover has a crowding of about 1.8, and the grid traces it in two thirds
+# of the time the BVH takes. 500 spheres crowded into a spot the camera looks
+# at make it about 20, and the grid five times slower than the BVH.
+CROWDING_LIMIT: float = 4.0
+
+def accelerate(hittables: List[Hittable]) -> Hittable:
+    """
+    Pick what to put the hittables in, going by what the benchmarks
+    (benchmarks/grid.py) say about scenes like this one: a plain
+    HittableList for a handful of objects, a UniformGrid if they spread
+    evenly over it, a BVH otherwise.
+    """
+    if len(hittables) <= LIST_LIMIT:
+        return HittableList(hittables)
+    grid: UniformGrid = UniformGrid(hittables)
+    statistics: GridStatistics = grid.statistics()
+    if grid.box is None or statistics.crowding > CROWDING_LIMIT:
+        return BVH(hittables)
+    return grid
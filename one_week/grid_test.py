@@ -0,0 +1,87 @@
+from one_week.bvh import BVH
+from one_week.grid import UniformGrid, accelerate
+from one_week.hittable import HittableList
+from one_week.ray import Ray
+from one_week.scene_generator import random_scene
+from one_week.sphere import Sphere
+from one_week.testing import random_spheres
+from one_week.vec3 import Vec3
+
+import random
+import sys
+import unittest
+
+class UniformGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spheres, self.rays = random_spheres()
+        # Along the axes, which the walk treats specially.
+        for axis in (Vec3(1, 0, 0), Vec3(0, 0, -1), Vec3(0, -1, 0)):
+            self.rays.append(Ray(Vec3(-15, 0.3, 0.2), axis))
+            self.rays.append(Ray(Vec3(0.1, 0.2, 15), axis))
+
+    def assertSameHits(self, expected_world, world, rays):
+        for ray in rays:
+            expected = expected_world.hit(ray, 0.001, sys.float_info.max)
+            actual = world.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertIsNotNone(actual)
+                self.assertEqual(expected.t, actual.t)
+                self.assertEqual(expected.p, actual.p)
+
+    def test_same_hits_as_hittable_list(self):
+        grid = UniformGrid(self.spheres)
+        self.assertEqual([self.spheres[-1]], grid.large)
+        self.assertSameHits(HittableList(self.spheres), grid, self.rays)
+
+    def test_density(self):
+        for density in (0.1, 1, 20):
+            self.assertSameHits(
+                HittableList(self.spheres),
+                UniformGrid(self.spheres, density), self.rays[:100]
+            )
+
+    def test_flat_scene(self):
+        # All in one plane, so one of the axes has no extent at all.
+        spheres = [Sphere(Vec3(x, 0, z), 0) for x in range(5) for z in range(5)]
+        grid = UniformGrid(spheres)
+        self.assertEqual(1, grid.resolution[1])
+        self.assertSameHits(HittableList(spheres), grid, self.rays)
+
+    def test_respects_t_max(self):
+        grid = UniformGrid([Sphere(Vec3(0, 0, -5), 1), Sphere(Vec3(3, 0, -5), 1)])
+        ray = Ray(Vec3(0, 0, 0), Vec3(0, 0, -1))
+
+        self.assertIsNotNone(grid.hit(ray, 0.001, 10))
+        self.assertIsNone(grid.hit(ray, 0.001, 3))
+
+    def test_bounding_box(self):
+        grid = UniformGrid([
+            Sphere(Vec3(0, 0, 0), 1), Sphere(Vec3(4, 0, 0), -0.5),
+            Sphere(Vec3(0, -100, 0), 100)
+        ])
+        box = grid.bounding_box()
+
+        self.assertEqual(Vec3(-100, -200, -100), box.minimum)
+        self.assertEqual(Vec3(100, 1, 100), box.maximum)
+
+    def test_empty(self):
+        self.assertIsNone(
+            UniformGrid([]).hit(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), 0.001, 10)
+        )
+
+    def test_accelerate(self):
+        self.assertIsInstance(accelerate(self.spheres[:2]), HittableList)
+        random.seed(0)
+        self.assertIsInstance(accelerate(random_scene(-11, 11, -11, 11)), UniformGrid)
+        # Most of the spheres in one spot.
+        crowd = [
+            Sphere(Vec3(random.random(), random.random(), random.random()), 0.01)
+            for _ in range(300)
+        ]
+        self.assertIsInstance(accelerate(crowd + self.spheres), BVH)
+
+if __name__ == "__main__":
+    unittest.main()
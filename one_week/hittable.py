@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from one_week.aabb import AABB, surrounding_box
 from one_week.material import Material, Vanta
 from one_week.ray import Ray
 from one_week.vec3 import Vec3
@@ -11,6 +12,8 @@ class HitRecord(object):
     what that means) and p is the point at which the ray hit our object.
     """
 
+    __slots__ = ("t", "p", "normal", "material", "hit_object")
+
     def __init__(
         self,
         t: float,
@@ -49,6 +52,15 @@ class Hittable(ABC):
         """
         pass
 
+    def bounding_box(self) -> Optional[AABB]:
+        """
+        Return a box that fully contains this object, so that rays which miss
+        the box can skip the (usually more expensive) call to `hit`. Objects
+        which can't be bounded (think of an infinite plane) return None, which
+        is also the default.
+        """
+        return None
+
 class HittableList(Hittable):
 
     def __init__(self, hittables: List[Hittable]):
@@ -76,3 +88,13 @@ class HittableList(Hittable):
                 closest_so_far = hit_attempt.t
 
         return hit_attempt
+
+    def bounding_box(self) -> Optional[AABB]:
+        box: Optional[AABB] = None
+        for hittable in self.hittables:
+            hittable_box: Optional[AABB] = hittable.bounding_box()
+            if hittable_box is None:
+                return None
+            box = hittable_box if box is None else surrounding_box(box, hittable_box)
+
+        return box
@@ -0,0 +1,333 @@
+"""
+Re-render only what an edit to a scene changed.
+
+An incremental render keeps its state in a file: the scene (packed the way
+one_week.wavefront wants it), the camera, the render settings and the linear
+colors of the image. The next incremental render into the same file compares
+its scene with that one. If the camera or any setting changed, nothing of
+the old image is any good, so it all gets rendered again. Otherwise the
+spheres that changed, were added or went away (they are compared by what
+they are, not by where they are in the list) have their bounds projected
+through the camera, lens included, and only the tiles they cover get
+rendered again. The rest come from the old image. Pixels come out the same
+whatever else is rendered with them (see `wavefront.render_tile`), so with
+the same seed, a tile rendered again is the tile a full render would have
+made.
+
+That much is exact for what the camera sees of the spheres directly, but not
+for their shadows, the light they bounce onto their neighbors or their
+reflections in metal and glass. A `Policy` says how much of that to go after,
+and when it's not worth it and everything should be rendered again.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from one_week.camera import Camera
+from one_week.hittable import Hittable
+from one_week.parallel import TILE_SIZE, render_tiles, scene_arrays
+from one_week.progress import Progress
+from one_week.sampler import make_sampler
+from one_week.tile import Tile, iter_tiles
+from one_week.tile_cache import VERSION
+from one_week.wavefront import (
+    DIELECTRIC, MAX_DEPTH, METAL, WavefrontCamera, WavefrontScene
+)
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import collections
+import json
+import numpy as np
+import os
+
+import one_week.wavefront as wavefront
+
+class Policy(NamedTuple):
+    """
+    How far the change to a sphere is assumed to reach beyond where the
+    camera sees it.
+
+    `reach` grows the bounds of every changed sphere by that many of its
+    radii, which is where its shadow and the light it bounces mostly fall.
+    With `specular`, the tiles of every metal and glass sphere are rendered
+    again too, since they can reflect the change from anywhere. If more than
+    `max_fraction` of the tiles would be rendered again, all of them are.
+    """
+    reach: float = 1.0
+    specular: bool = False
+    max_fraction: float = 0.5
+
+POLICIES: Dict[str, Policy] = {
+    # Only what the camera sees of the changed spheres. Fast, and wrong
+    # about shadows and reflections.
+    "visible": Policy(0.0, False, 1.0),
+    # Shadows and bounced light close by, which is most of it.
+    "nearby": Policy(),
+    # Reflections too, which in a scene with many mirrors is most tiles.
+    "cautious": Policy(2.0, True, 0.5),
+}
+
+class Plan(NamedTuple):
+    """
+    The tiles to render again, and why.
+    """
+    tiles: List[Tile]
+    full: bool
+    reason: str
+
+def sphere_rows(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Every sphere of a scene (as `parallel.scene_arrays` has it) as a row:
+    center, radius, then its material's kind, albedo, fuzz and refractive
+    index.
+    """
+    materials: np.ndarray = arrays["material_indices"]
+    return np.column_stack((
+        arrays["centers"], arrays["radii"], arrays["kinds"][materials],
+        arrays["albedos"][materials], arrays["fuzz"][materials],
+        arrays["refractive_indices"][materials]
+    )).astype(np.float64)
+
+def changed_spheres(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """
+    The rows of `sphere_rows` that are in only one of `old` and `new`,
+    counting duplicates.
+    """
+    remaining: "collections.Counter[bytes]" = collections.Counter(
+        row.tobytes() for row in old
+    )
+    added: List[np.ndarray] = []
+    for row in new:
+        key: bytes = row.tobytes()
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            added.append(row)
+    removed: List[np.ndarray] = [
+        np.frombuffer(key, dtype=np.float64)
+        for key, count in remaining.items() for _ in range(count)
+    ]
+    return np.array(added + removed).reshape(-1, old.shape[1])
+
+def screen_bounds(
+    camera: WavefrontCamera, low: np.ndarray, high: np.ndarray
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    The smallest and largest s and t (as in `Camera.get_ray`) at which any
+    part of the box from `low` to `high` can be seen, from any point of the
+    lens. None if the box reaches behind the lens, where it can turn up
+    anywhere.
+    """
+    normal: np.ndarray = np.cross(camera.h_movement, camera.v_movement)
+    screen: float = float(
+        np.dot(normal, camera.lower_left_corner - camera.origin)
+    )
+    corners: np.ndarray = np.array([
+        [x, y, z] for x in (low[0], high[0]) for y in (low[1], high[1])
+        for z in (low[2], high[2])
+    ])
+    # How far in front of the lens every corner is, in units of the screen's
+    # distance. The lens is parallel to the screen, so this doesn't depend
+    # on where on the lens the ray starts.
+    depths: np.ndarray = (corners - camera.origin) @ normal / screen
+    if np.any(depths <= 1e-6):
+        return None
+
+    # Where a point lands on the screen is affine in where on the lens its
+    # ray starts, so the corners of the square around the lens bound it.
+    lens: float = camera.lens_radius
+    offsets: np.ndarray = np.array([
+        camera.horizontal_axis * x + camera.vertical_axis * y
+        for x in (-lens, lens) for y in (-lens, lens)
+    ])
+    starts: np.ndarray = camera.origin + offsets
+    scale: np.ndarray = (1 / depths)[None, :, None]
+    hits: np.ndarray = (
+        starts[:, None, :] * (1 - scale) + corners[None, :, :] * scale
+    ).reshape(-1, 3) - camera.lower_left_corner
+    s: np.ndarray = hits @ camera.h_movement / np.dot(
+        camera.h_movement, camera.h_movement
+    )
+    t: np.ndarray = hits @ camera.v_movement / np.dot(
+        camera.v_movement, camera.v_movement
+    )
+    return float(s.min()), float(t.min()), float(s.max()), float(t.max())
+
+def _covered_tiles(
+    bounds: Tuple[float, float, float, float], width: int, height: int,
+    tiles: List[Tile], covered: List[bool]
+):
+    s0, t0, s1, t1 = bounds
+    # A pixel's samples land anywhere in it, so a pixel of margin.
+    x0: float = s0 * width - 1
+    x1: float = s1 * width + 1
+    y0: float = (1 - t1) * height - 1
+    y1: float = (1 - t0) * height + 1
+    for tile in tiles:
+        if tile.x0 < x1 and x0 < tile.x1 and tile.y0 < y1 and y0 < tile.y1:
+            covered[tile.index] = True
+
+def plan(
+    old: Dict[str, np.ndarray], new: Dict[str, np.ndarray], width: int,
+    height: int, tile_size: int=TILE_SIZE, policy: Policy=Policy()
+) -> Plan:
+    """
+    Which tiles to render again to go from a render of the scene and camera
+    in `old` (as `parallel.scene_arrays` has them) to one of those in `new`,
+    with the settings otherwise the same.
+    """
+    tiles: List[Tile] = list(iter_tiles(width, height, tile_size))
+    if not np.array_equal(old["camera"], new["camera"]):
+        return Plan(tiles, True, "the camera moved")
+    changed: np.ndarray = changed_spheres(sphere_rows(old), sphere_rows(new))
+    if not len(changed):
+        return Plan([], False, "nothing changed")
+
+    camera: WavefrontCamera = WavefrontCamera.unpack(new["camera"])
+    covered: List[bool] = [False] * len(tiles)
+    for row in changed:
+        reach: float = row[3] * (1 + policy.reach)
+        bounds = screen_bounds(camera, row[:3] - reach, row[:3] + reach)
+        if bounds is None:
+            return Plan(tiles, True, "a sphere around the camera changed")
+        _covered_tiles(bounds, width, height, tiles, covered)
+    if policy.specular:
+        rows: np.ndarray = sphere_rows(new)
+        for row in rows[np.isin(rows[:, 4], (METAL, DIELECTRIC))]:
+            bounds = screen_bounds(camera, row[:3] - row[3], row[:3] + row[3])
+            if bounds is None:
+                return Plan(
+                    tiles, True, "a mirror or glass sphere is around the camera"
+                )
+            _covered_tiles(bounds, width, height, tiles, covered)
+
+    again: List[Tile] = [tile for tile in tiles if covered[tile.index]]
+    if len(again) > policy.max_fraction * len(tiles):
+        return Plan(
+            tiles, True,
+            "%d spheres changed, over %d of %d tiles" %
+            (len(changed), len(again), len(tiles))
+        )
+    return Plan(again, False, "%d spheres changed" % len(changed))
+
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    """
+    What `save_state` saved at `path`, if anything: the settings, the scene
+    arrays and the image.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as saved:
+        return {
+            "settings": json.loads(str(saved["settings"])),
+            "arrays": {
+                key[len("scene/"):]: saved[key] for key in saved.files
+                if key.startswith("scene/")
+            },
+            "image": saved["image"]
+        }
+
+def save_state(
+    path: str, settings: Dict[str, Any], arrays: Dict[str, np.ndarray],
+    image: np.ndarray
+):
+    temporary: str = "%s.part" % path
+    with open(temporary, "wb") as state_file:
+        np.savez(
+            state_file, settings=np.array(json.dumps(settings)), image=image,
+            **{"scene/%s" % key: value for key, value in arrays.items()}
+        )
+    os.replace(temporary, path)
+
+def render(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, state: str, workers: Optional[int]=None,
+    seed: Optional[int]=None, tile_size: int=TILE_SIZE, shading: str="path",
+    max_depth: int=MAX_DEPTH, sampler: str="random", policy: Policy=Policy(),
+    progress: Optional[Progress]=None
+) -> Tuple[np.ndarray, Plan]:
+    """
+    Render like `parallel.render` (or in this process, with one worker),
+    only rendering again what changed since the last render with the same
+    `state` file. Return the (height, width, 3) linear colors, and what was
+    rendered.
+
+    Without a seed, the one of the last render is used again, since the
+    tiles rendered again have to have the same noise as the rest.
+
+    `progress`, if given, is told what is rendered again and why, and then
+    about every tile of that.
+    """
+    saved: Optional[Dict[str, Any]] = load_state(state)
+    if seed is None:
+        seed = (
+            saved["settings"]["seed"] if saved is not None
+            else wavefront.new_seed()
+        )
+    scene: WavefrontScene = WavefrontScene.from_hittables(hittables)
+    arrays: Dict[str, np.ndarray] = scene_arrays(
+        scene, WavefrontCamera.from_camera(camera)
+    )
+    settings: Dict[str, Any] = {
+        "width": width, "height": height, "samples": samples, "seed": seed,
+        "tile_size": tile_size, "shading": shading, "max_depth": max_depth,
+        "sampler": sampler, "version": VERSION
+    }
+
+    image: np.ndarray
+    todo: Plan
+    if saved is None:
+        image = np.empty((height, width, 3))
+        todo = Plan(
+            list(iter_tiles(width, height, tile_size)), True,
+            "there was no render before"
+        )
+    elif saved["settings"] != settings:
+        image = np.empty((height, width, 3))
+        changed: List[str] = sorted(
+            key for key in settings
+            if saved["settings"].get(key) != settings[key]
+        )
+        todo = Plan(
+            list(iter_tiles(width, height, tile_size)), True,
+            "the %s changed" % ", ".join(changed).replace("_", " ")
+        )
+    else:
+        image = saved["image"]
+        todo = plan(
+            saved["arrays"], arrays, width, height, tile_size, policy
+        )
+
+    if progress is not None:
+        # Only what is rendered again is to be done.
+        progress.total = len(todo.tiles)
+        progress.total_samples = samples * sum(
+            tile.pixel_count for tile in todo.tiles
+        )
+        progress.note(
+            "Rendering %s tiles, since %s" %
+            ("all" if todo.full else len(todo.tiles), todo.reason)
+        )
+
+    made_sampler = make_sampler(sampler, samples)
+    if workers == 1:
+        for tile in todo.tiles:
+            rays: int = wavefront.traced_rays
+            image[tile.y0:tile.y1, tile.x0:tile.x1] = wavefront.render_tile(
+                scene, camera, width, height, tile.x0, tile.y0, tile.x1,
+                tile.y1, samples, seed, shading, max_depth,
+                sampler=made_sampler
+            )
+            if progress is not None:
+                progress.update(
+                    1, tile.pixel_count * samples,
+                    wavefront.traced_rays - rays
+                )
+    elif todo.tiles:
+        for tile, pixels in render_tiles(
+            hittables, camera, width, height, samples, workers, seed,
+            tile_size, shading, max_depth, made_sampler, tiles=todo.tiles,
+            progress=progress
+        ):
+            image[tile.y0:tile.y1, tile.x0:tile.x1] = pixels
+
+    save_state(state, settings, arrays, image)
+    return image, todo
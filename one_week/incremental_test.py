@@ -0,0 +1,175 @@
+from one_week.camera import Camera, PositionableCamera
+from one_week.material import Lambertian
+from one_week.progress import Progress
+from one_week.sphere import Sphere
+from one_week.testing import dielectrics_hittables, lens_camera
+from one_week.vec3 import Vec3
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from one_week import incremental, parallel, wavefront
+except ImportError:
+    incremental = None
+
+@unittest.skipIf(incremental is None, "needs NumPy")
+class IncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        # And a small sphere, for an edit that only reaches a few tiles.
+        self.hittables = dielectrics_hittables() + [
+            Sphere(Vec3(-0.3, -0.4, -0.2), 0.1, Lambertian(Vec3(0.1, 0.1, 1)))
+        ]
+        self.camera = lens_camera()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state = os.path.join(directory.name, "state.npz")
+
+    def arrays(self, hittables, camera=None):
+        return parallel.scene_arrays(
+            wavefront.WavefrontScene.from_hittables(hittables),
+            wavefront.WavefrontCamera.from_camera(camera or self.camera)
+        )
+
+    def full_render(self, hittables, seed=7):
+        return wavefront.render(
+            wavefront.WavefrontScene.from_hittables(hittables), self.camera,
+            40, 20, 2, seed
+        )
+
+    def test_screen_bounds(self):
+        camera = wavefront.WavefrontCamera.from_camera(Camera(
+            Vec3(-2, -1, -1), Vec3(4, 0, 0), Vec3(0, 2, 0), Vec3(0, 0, 0)
+        ))
+        point = np.array([1.0, 0.5, -2])
+        self.assertEqual(
+            (0.625, 0.625, 0.625, 0.625),
+            incremental.screen_bounds(camera, point, point)
+        )
+        self.assertIsNone(incremental.screen_bounds(
+            camera, np.array([-1.0, -1, -1]), np.array([1.0, 1, 1])
+        ))
+
+        # With a lens, a point off the plane in focus is seen all over.
+        bounds = incremental.screen_bounds(
+            wavefront.WavefrontCamera.from_camera(self.camera), point, point
+        )
+        self.assertLess(bounds[0], bounds[2])
+        self.assertLess(bounds[1], bounds[3])
+
+    def test_changed_spheres(self):
+        old = incremental.sphere_rows(self.arrays(self.hittables))
+        shuffled = incremental.sphere_rows(self.arrays(self.hittables[::-1]))
+        self.assertEqual(0, len(incremental.changed_spheres(old, shuffled)))
+
+        recolored = list(self.hittables)
+        recolored[0] = Sphere(
+            Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.3, 0.8, 0.3))
+        )
+        changed = incremental.changed_spheres(
+            old, incremental.sphere_rows(self.arrays(recolored + recolored[:1]))
+        )
+        self.assertEqual(3, len(changed))
+
+    def test_plan(self):
+        moved = list(self.hittables)
+        moved[4] = Sphere(
+            Vec3(-0.3, -0.4, 0), 0.1, Lambertian(Vec3(0.1, 0.1, 1))
+        )
+        old, new = self.arrays(self.hittables), self.arrays(moved)
+
+        visible = incremental.plan(
+            old, new, 40, 20, 4, incremental.POLICIES["visible"]
+        )
+        self.assertFalse(visible.full)
+        nearby = incremental.plan(
+            old, new, 40, 20, 4, incremental.Policy(max_fraction=1.0)
+        )
+        self.assertLess(len(visible.tiles), len(nearby.tiles))
+        self.assertTrue(set(visible.tiles) <= set(nearby.tiles))
+        too_many = incremental.plan(
+            old, new, 40, 20, 4, incremental.Policy(max_fraction=0.01)
+        )
+        self.assertTrue(too_many.full)
+        self.assertEqual(50, len(too_many.tiles))
+
+        unchanged = incremental.plan(
+            old, self.arrays(self.hittables[::-1]), 40, 20, 4
+        )
+        self.assertEqual(([], False), unchanged[:2])
+        ground = list(self.hittables)
+        ground[1] = Sphere(
+            Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.8, 0.8, 0.8))
+        )
+        self.assertTrue(
+            incremental.plan(old, self.arrays(ground), 40, 20, 4).full
+        )
+        self.assertTrue(incremental.plan(
+            old, self.arrays(self.hittables, PositionableCamera(
+                Vec3(3, 3, 3), Vec3(0, 0, -1), Vec3(0, 1, 0), 20, 2
+            )), 40, 20, 4
+        ).full)
+
+    def render_moved(self, workers):
+        image, first = incremental.render(
+            self.hittables, self.camera, 40, 20, 2, self.state,
+            workers=workers, seed=7, tile_size=8
+        )
+        self.assertTrue(first.full)
+        self.assertTrue(np.array_equal(self.full_render(self.hittables), image))
+
+        moved = list(self.hittables)
+        moved[4] = Sphere(
+            Vec3(-0.3, -0.4, 0), 0.1, Lambertian(Vec3(0.1, 0.1, 1))
+        )
+        # Without the seed, which the state remembers.
+        stream = io.StringIO()
+        with Progress(15, 40 * 20 * 2, mode="json", stream=stream) as progress:
+            image, second = incremental.render(
+                moved, self.camera, 40, 20, 2, self.state, workers=workers,
+                tile_size=8, policy=incremental.POLICIES["visible"],
+                progress=progress
+            )
+        self.assertFalse(second.full)
+        self.assertLess(0, len(second.tiles))
+        reports = [json.loads(line) for line in stream.getvalue().splitlines()]
+        # Moved is where it was gone and where it is added.
+        self.assertEqual(
+            {"event": "note", "message": "Rendering %d tiles, since 2 spheres "
+             "changed" % len(second.tiles)},
+            reports[0]
+        )
+        self.assertEqual("done", reports[-1]["event"])
+        self.assertEqual(len(second.tiles), reports[-1]["done"])
+        self.assertEqual(len(second.tiles), reports[-1]["total"])
+        self.assertLess(0, reports[-1]["rays"])
+        expected = self.full_render(moved)
+        for tile in second.tiles:
+            self.assertTrue(np.array_equal(
+                expected[tile.y0:tile.y1, tile.x0:tile.x1],
+                image[tile.y0:tile.y1, tile.x0:tile.x1]
+            ))
+        # Elsewhere, only a bit of shadow and reflection is missing.
+        different = np.any(expected != image, axis=2)
+        self.assertLess(different.sum(), different.size // 20)
+
+        image, third = incremental.render(
+            moved, self.camera, 40, 20, 4, self.state, workers=workers,
+            tile_size=8
+        )
+        self.assertTrue(third.full)
+        self.assertIn("samples", third.reason)
+
+    def test_render(self):
+        self.render_moved(workers=1)
+
+    def test_render_parallel(self):
+        self.render_moved(workers=2)
+
+if __name__ == "__main__":
+    unittest.main()
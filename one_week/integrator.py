@@ -0,0 +1,108 @@
+"""
+The `color()` of the numbered scripts, as a loop.
+
+The scripts' version recurses once per bounce, makes a Vec3 at every level on
+the way back up and follows every path down to a depth of 50, whether or not
+what is left of it could still show up in the image. It also scatters before
+checking the depth, so the last scatter of a path that is too deep is thrown
+away.
+
+Here the path is followed in a loop which carries its throughput (the product
+of the attenuations so far) as three floats. Once a path has made
+`roulette_depth` bounces, it plays Russian roulette before each further one:
+it goes on with a probability equal to its brightest throughput channel and,
+if it does, its throughput is divided by that probability. The dim paths are
+the ones most likely to end, and the survivors make up for them exactly, so
+the expected color is unchanged. In a scene of dark Lambertians, like
+`scene_generator.random_scene`, most paths end after a handful of bounces.
+
+Nothing is computed for a path that is about to end: the depth and the
+roulette are checked before the material scatters.
+"""
+from one_week.hittable import HitRecord, Hittable
+from one_week.material import ReflectionRecord
+from one_week.ray import Ray
+from one_week.vec3 import Vec3
+from typing import Optional
+
+import random
+import sys
+
+# The near bound for the t of reflected rays (to avoid hitting the surface they
+# just left) and how deep a path may go.
+T_MIN: float = 0.001
+MAX_DEPTH: int = 50
+# How many bounces a path makes before it may be ended by Russian roulette.
+ROULETTE_DEPTH: int = 3
+
+def color(
+    ray: Ray, world: Hittable, depth: int=0, max_depth: int=MAX_DEPTH,
+    roulette_depth: Optional[int]=ROULETTE_DEPTH
+) -> Vec3:
+    """
+    Same arguments as the scripts' `color`, `depth` being how deep `ray`
+    already is. A `roulette_depth` of None turns Russian roulette off, which
+    gives exactly the scripts' paths.
+    """
+    uniform = random.random
+    r: float = 1.0
+    g: float = 1.0
+    b: float = 1.0
+
+    while True:
+        hit_attempt: Optional[HitRecord] = world.hit(
+            ray, T_MIN, sys.float_info.max
+        )
+        if hit_attempt is None:
+            direction: Vec3 = ray.direction
+            t: float = 0.5 * (direction.g / direction.length() + 1)
+            # The blue-to-white sky gradient.
+            return Vec3(
+                r * (1.0 - 0.5 * t), g * (1.0 - 0.3 * t), b
+            )
+
+        if depth >= max_depth:
+            break
+
+        if roulette_depth is not None and depth >= roulette_depth:
+            survival: float = max(r, g, b)
+            if survival < 1:
+                if uniform() >= survival:
+                    break
+                r /= survival
+                g /= survival
+                b /= survival
+
+        scattering: Optional[ReflectionRecord] = hit_attempt.material.scatter(
+            ray, hit_attempt
+        )
+        if scattering is None:
+            break
+        attenuation: Vec3 = scattering.attenuation
+        r *= attenuation.r
+        g *= attenuation.g
+        b *= attenuation.b
+        if not (r or g or b):
+            # Black from here on, like after hitting Vanta.
+            break
+
+        ray = scattering.scattering
+        depth += 1
+
+    return Vec3(0, 0, 0)
+
+def normal_color(ray: Ray, world: Hittable) -> Vec3:
+    """
+    The `color()` of 5_antialiasing: the normal at the first hit, mapped from
+    [-1, 1] to [0, 1], or the sky.
+    """
+    hit_attempt: Optional[HitRecord] = world.hit(ray, 0.0, sys.float_info.max)
+    if hit_attempt is None:
+        direction: Vec3 = ray.direction
+        t: float = 0.5 * (direction.g / direction.length() + 1)
+        return Vec3(1.0 - 0.5 * t, 1.0 - 0.3 * t, 1.0)
+
+    normal: Vec3 = hit_attempt.normal
+    return Vec3(
+        0.5 * (normal.r + 1), 0.5 * (normal.g + 1), 0.5 * (normal.b + 1)
+    )
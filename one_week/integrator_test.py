@@ -0,0 +1,70 @@
+from one_week.hittable import HittableList
+from one_week.integrator import color
+from one_week.material import Identity, Lambertian, Metal
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import random
+import unittest
+
+class CountingIdentity(Identity):
+
+    def __init__(self):
+        self.scatters = 0
+
+    def scatter(self, incident_ray, record):
+        self.scatters += 1
+        return super().scatter(incident_ray, record)
+
+class IntegratorTest(unittest.TestCase):
+
+    def test_sky(self):
+        world = HittableList([])
+        up = color(Ray(Vec3(0, 0, 0), Vec3(0, 2, 0)), world)
+        self.assertEqual(Vec3(0.5, 0.7, 1.0), up)
+        level = color(Ray(Vec3(0, 0, 0), Vec3(0, 0, -3)), world)
+        self.assertEqual(Vec3(0.75, 0.85, 1.0), level)
+
+    def test_vanta_is_black(self):
+        world = HittableList([Sphere(Vec3(0, 0, -1), 0.5)])
+        self.assertEqual(
+            Vec3(0, 0, 0), color(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), world)
+        )
+
+    def test_no_scatter_past_max_depth(self):
+        # Identity lets the ray through from where it started, so it hits the
+        # same sphere over and over.
+        material = CountingIdentity()
+        world = HittableList([Sphere(Vec3(0, 0, -1), 0.5, material)])
+        ray = Ray(Vec3(0, 0, 0), Vec3(0, 0, -1))
+
+        self.assertEqual(Vec3(0, 0, 0), color(ray, world, max_depth=5))
+        self.assertEqual(5, material.scatters)
+        material.scatters = 0
+        self.assertEqual(Vec3(0, 0, 0), color(ray, world, 3, max_depth=5))
+        self.assertEqual(2, material.scatters)
+
+    def test_roulette_is_unbiased(self):
+        world = HittableList([
+            Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.2, 0.1, 0.1))),
+            Sphere(Vec3(0, -100.5, -1), 100, Lambertian(Vec3(0.3, 0.3, 0.1))),
+            Sphere(Vec3(1, 0, -1), 0.5, Metal(Vec3(0.4, 0.3, 0.2), 0.3))
+        ])
+        ray = Ray(Vec3(0, 0, 0), Vec3(0.3, -0.3, -1))
+        samples = 4000
+
+        def mean(roulette_depth):
+            total = Vec3(0, 0, 0)
+            for _ in range(samples):
+                total += color(ray, world, roulette_depth=roulette_depth)
+            return total / samples
+
+        random.seed(16384)
+        expected = mean(None)
+        actual = mean(0)
+        for e, a in zip(expected.make_tuple(), actual.make_tuple()):
+            self.assertAlmostEqual(e, a, delta=0.006)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,16 @@
 from abc import ABC, abstractmethod
-from one_week.hittable import *
 from one_week.ray import Ray
+from one_week.rng import ball_point
 from one_week.vec3 import Vec3
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import math
 import random
 
+if TYPE_CHECKING:
+    # Only for the annotations; hittable imports this module.
+    from one_week.hittable import HitRecord
+
 # FIXME Rename this to ScatteringRecord. I'm just too lazy right now.
 class ReflectionRecord(object):
     """
@@ -19,6 +23,8 @@ class ReflectionRecord(object):
     Scattering is just the Ray that resulted from the reflection.
     """
 
+    __slots__ = ("attenuation", "scattering")
+
     def __init__(self, attenuation: Vec3, scattering: Ray):
         self.attenuation: Vec3 = attenuation
         self.scattering: Ray = scattering
@@ -59,8 +65,12 @@ class Lambertian(Material):
 
     def scatter(self, incident_ray: Ray, record: "HitRecord") -> ReflectionRecord:
         # Lots of Physics I don't understand :\
-        target: Vec3 = record.p + record.normal + random_unit_sphere_point()
-        scattered: Ray = Ray(record.p, target - record.p)
+        # The text aims at `target = p + normal + random_unit_sphere_point()`
+        # and then scatters along `target - p`. That is just the normal plus
+        # the random point, and the random point is new anyway, so add to it.
+        direction: Vec3 = random_unit_sphere_point()
+        direction += record.normal
+        scattered: Ray = Ray(record.p, direction)
         attenuation: Vec3 = self.albedo
         reflecord: ReflectionRecord = ReflectionRecord(attenuation, scattered)
         return reflecord
@@ -72,100 +82,84 @@ class Metal(Material):
         self.fuzz: float = fuzz if fuzz < 1 else 1
 
     def scatter(self, incident_ray: Ray, record: "HitRecord") -> ReflectionRecord:
-        reflected: Vec3 = reflect(
-            incident_ray.direction.unit_vector(), record.normal
-        )
-        scattered: Ray = Ray(
-            record.p, reflected + self.fuzz * random_unit_sphere_point()
-        )
-        return ReflectionRecord(self.albedo, scattered)
+        # The unit vector is new, so it may as well become the reflection.
+        reflected: Vec3 = incident_ray.direction.unit_vector()
+        reflect_into(reflected, reflected, record.normal)
+        reflected.iadd_scaled(random_unit_sphere_point(), self.fuzz)
+        return ReflectionRecord(self.albedo, Ray(record.p, reflected))
 
 class Dielectric(Material):
 
     def __init__(self, refractive_index: float):
         self.refractive_index: float = refractive_index
+        # Glass absorbs nothing. Shared by all the records this makes, since
+        # nobody modifies an attenuation in place.
+        self.__attenuation: Vec3 = Vec3(1, 1, 1)
 
     def __schlick_approximation(self, cosine: float):
         r0 : float = (1 - self.refractive_index) / (1 + self.refractive_index) ** 2
         return r0 + (1 - r0) * (1 - cosine) ** 5
 
     def scatter(self, incident_ray: Ray, record: "HitRecord") -> ReflectionRecord:
-        reflected: Vec3 = reflect(incident_ray.direction, record.normal)
-        attenuation: Vec3 = Vec3(1, 1, 1)
+        direction: Vec3 = incident_ray.direction
+        incidence: float = direction.dot(record.normal)
 
-        # These are just placeholders; the following conditional block is their
-        # actual "initial values".
-        outward_normal: Vec3 = Vec3(1, 1, 1)
+        # Except for outward_normal when entering, these are just placeholders;
+        # the following conditional block is their actual "initial values".
+        outward_normal: Vec3 = record.normal
         nint: float = 0
         cosine: float = 0
 
-        if incident_ray.direction.dot(record.normal) > 0:
-            outward_normal = -1 * record.normal
+        if incidence > 0:
+            outward_normal = -record.normal
             nint = self.refractive_index
-            cosine = (
-                self.refractive_index * incident_ray.direction.dot(record.normal) /
-                incident_ray.direction.length()
-            )
+            cosine = self.refractive_index * incidence / direction.length()
         else:
-            outward_normal = record.normal
             nint = 1 / self.refractive_index
-            cosine = -(
-                incident_ray.direction.dot(record.normal) / incident_ray.direction.length()
-            )
-
-        # All this convoluted mix-up with _refracted and refracted is just
-        # for type consistency.
-        refracted: Vec3 = Vec3(0, 0, 0)
-        _refracted: Optional[Vec3] = refract(
-            incident_ray.direction, outward_normal, nint
-        )
+            cosine = -(incidence / direction.length())
+
+        # Refraction goes straight into the scattered direction; only if that
+        # fails is it overwritten by the reflection.
+        scattered: Vec3 = Vec3()
         reflection_probability: float = 1
-        if _refracted is not None:
+        if refract_into(scattered, direction, outward_normal, nint):
             reflection_probability = self.__schlick_approximation(cosine)
-            refracted = _refracted
 
         if reflection_probability == 1:
-            return ReflectionRecord(attenuation, Ray(record.p, reflected))
-        else:
-            return ReflectionRecord(attenuation, Ray(record.p, refracted))
+            reflect_into(scattered, direction, record.normal)
+
+        return ReflectionRecord(self.__attenuation, Ray(record.p, scattered))
 
 
 def random_unit_sphere_point() -> Vec3:
     """
-    Pick a random point inside a unit sphere. To do this, we use a "rejection
-    method":
-
-    1. Pick a random point inside a cube with edges in the [-1, 1] range of all
-    axes. Note that the unit sphere is inside this cube and this cube is "easy"
-    to construct programmatically.
-    2. Check whether the point is inside the unit sphere. If it is not, generate
-    again. Do this until we get a point inside the unit sphere.
-
-    The time complexity of this procedure is left as an exercise to the reader.
+    Pick a random point inside a unit sphere.
+
+    The text does this with a "rejection method": pick a point in the cube
+    with edges in the [-1, 1] range of all axes, which contains the sphere and
+    is "easy" to construct programmatically, and pick again until the point
+    lands inside the sphere. Almost half the points miss, so that's close to
+    six random numbers a point on average. `rng.ball_point` maps three random
+    numbers straight to a point inside, with the same distribution, in about
+    half the time.
     """
-    # Shirley uses the following formula to generate a random point in the
-    # constraints specified:
-    #   2 * rand_vector - unit_vector
-    # Where rand_vector has components that range from [0, 1). While this is
-    # understandable enough, I'm experimenting with random.uniform instead.
-    rand_point: Vec3 = Vec3(
-        random.uniform(-1, 1),
-        random.uniform(-1, 1),
-        random.uniform(-1, 1)
-    )
-
-    while rand_point.squared_length() >= 1:
-        rand_point = Vec3(
-            random.uniform(-1, 1),
-            random.uniform(-1, 1),
-            random.uniform(-1, 1)
-        )
-
-    return rand_point
+    uniform = random.random
+    x, y, z = ball_point(uniform(), uniform(), uniform())
+    return Vec3(x, y, z)
 
 # TODO What is the n parameter in reflect and refract?
 def reflect(v: Vec3, n: Vec3) -> Vec3:
-    return v - 2 * v.dot(n) * n
+    return reflect_into(Vec3(), v, n)
+
+def reflect_into(destination: Vec3, v: Vec3, n: Vec3) -> Vec3:
+    """
+    Like reflect but the result is written into destination, which is also
+    returned. destination may be v itself.
+    """
+    scale: float = 2 * v.dot(n)
+    return destination.set(
+        v.r - scale * n.r, v.g - scale * n.g, v.b - scale * n.b
+    )
 
 # TODO Will nint be the ratio of refractive indices? --> VERIFY!
 def refract(v: Vec3, n: Vec3, nint: float) -> Optional[Vec3]:
@@ -173,13 +167,32 @@ def refract(v: Vec3, n: Vec3, nint: float) -> Optional[Vec3]:
     Return the refracting ray if the conditions are good for refraction. If it
     does not describe a refracting scenario, return None.
     """
-    uv: Vec3 = v.unit_vector()
-    dt: float = uv.dot(n)
-    discriminant: float = 1 - (nint ** 2) * (1 - dt ** 2)
+    refracted: Vec3 = Vec3()
+    if refract_into(refracted, v, n, nint):
+        return refracted
+
+    return None
+
+def refract_into(destination: Vec3, v: Vec3, n: Vec3, nint: float) -> bool:
+    """
+    Like refract but the result is written into destination. Return whether
+    there was a refraction at all; if not, destination is left untouched.
+    destination may be v itself.
+    """
+    length: float = v.length()
+    uv_x: float = v.r / length
+    uv_y: float = v.g / length
+    uv_z: float = v.b / length
+    dt: float = uv_x * n.r + uv_y * n.g + uv_z * n.b
+    discriminant: float = 1 - (nint * nint) * (1 - dt * dt)
 
     if discriminant > 0:
-        return (
-            nint * (uv - n * dt) - n * math.sqrt(discriminant)
+        root: float = math.sqrt(discriminant)
+        destination.set(
+            nint * (uv_x - n.r * dt) - n.r * root,
+            nint * (uv_y - n.g * dt) - n.g * root,
+            nint * (uv_z - n.b * dt) - n.b * root
         )
+        return True
 
-    return None
+    return False
@@ -0,0 +1,435 @@
+"""
+Render tiles on a pool of processes.
+
+The scene (packed the way one_week.wavefront wants it) and the camera are put
+into `multiprocessing.shared_memory` once. Worker processes attach to it when
+they start, then keep pulling tiles off a queue and writing the rendered pixels
+into one of a handful of tile-sized slots which also live in shared memory.
+Nothing but tile coordinates and slot numbers ever gets pickled after start-up,
+and the whole image is never in shared memory, so the size of the image is up
+to whoever takes the tiles (see `render_to_file`).
+
+Needs NumPy, like one_week.wavefront.
+"""
+from multiprocessing import shared_memory
+from one_week.camera import Camera
+from one_week.framebuffer import StreamingPPM
+from one_week.hittable import Hittable
+from one_week.progress import Progress
+from one_week.sampler import Sampler
+from one_week.sphere_array import SphereArray
+from one_week.tile import Tile, iter_tiles
+from one_week.tile_cache import TileCache, render_key
+from one_week.wavefront import MAX_DEPTH, WavefrontCamera, WavefrontScene
+from typing import (
+    Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+)
+
+import multiprocessing
+import numpy as np
+import os
+import queue
+import traceback
+
+import one_week.wavefront as wavefront
+
+# Big enough that a tile amortizes the per-stage overhead of the wavefront
+# tracer, small enough that there are plenty of tiles to go around.
+TILE_SIZE: int = 32
+# Tile slots per worker. More than one, so that workers need not wait for the
+# parent to be done with their last tile before starting on the next.
+SLOTS_PER_WORKER: int = 2
+
+class SharedArray(NamedTuple):
+    """
+    How to find a NumPy array in shared memory. This is what gets sent to the
+    workers, instead of the array itself.
+    """
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+        """
+        Map the array into this process. The SharedMemory must be kept around
+        (and eventually closed) for as long as the array is in use.
+        """
+        block = shared_memory.SharedMemory(name=self.name)
+        return block, np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf)
+
+def share(
+    array: np.ndarray, blocks: List[shared_memory.SharedMemory]
+) -> SharedArray:
+    """
+    Copy an array into a new shared memory block. The block is appended to
+    `blocks` so that the caller can release it when done.
+    """
+    # Zero-sized blocks are not allowed.
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    shared: np.ndarray = np.ndarray(
+        array.shape, dtype=array.dtype, buffer=block.buf
+    )
+    shared[...] = array
+    return SharedArray(block.name, array.shape, array.dtype.str)
+
+def scene_arrays(
+    scene: WavefrontScene, camera: WavefrontCamera
+) -> Dict[str, np.ndarray]:
+    """
+    Everything a worker needs to know about the scene, as plain arrays.
+    """
+    return {
+        "centers": scene.spheres.centers,
+        "radii": scene.spheres.radii,
+        "material_indices": scene.spheres.material_indices,
+        "kinds": scene.kinds,
+        "albedos": scene.albedos,
+        "fuzz": scene.fuzz,
+        "refractive_indices": scene.refractive_indices,
+        "camera": camera.pack()
+    }
+
+def scene_from_arrays(
+    arrays: Dict[str, np.ndarray]
+) -> Tuple[WavefrontScene, WavefrontCamera]:
+    """
+    The reverse of `scene_arrays`. The arrays are used in place, not copied.
+    """
+    spheres: SphereArray = SphereArray(
+        arrays["centers"], arrays["radii"], arrays["material_indices"], []
+    )
+    scene: WavefrontScene = WavefrontScene(
+        spheres, arrays["kinds"], arrays["albedos"], arrays["fuzz"],
+        arrays["refractive_indices"]
+    )
+    return scene, WavefrontCamera.unpack(arrays["camera"])
+
+def share_scene(
+    scene: WavefrontScene, camera: WavefrontCamera,
+    blocks: List[shared_memory.SharedMemory]
+) -> Dict[str, SharedArray]:
+    return {
+        key: share(array, blocks)
+        for key, array in scene_arrays(scene, camera).items()
+    }
+
+def attach_scene(
+    shared_scene: Dict[str, SharedArray],
+    blocks: List[shared_memory.SharedMemory]
+) -> Tuple[WavefrontScene, WavefrontCamera]:
+    """
+    The reverse of `share_scene`, done in the workers.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    for key, shared in shared_scene.items():
+        block, arrays[key] = shared.attach()
+        blocks.append(block)
+    return scene_from_arrays(arrays)
+
+class TileTask(NamedTuple):
+    """
+    Render `samples` samples per pixel of `tile`. `first_sample` is how many
+    samples per pixel the tile already had before this task, which keeps
+    later tasks on the same tile from repeating the random numbers of
+    earlier ones.
+    """
+    tile: Tile
+    samples: int
+    first_sample: int = 0
+
+def _worker(
+    shared_scene: Dict[str, SharedArray], shared_slots: SharedArray,
+    width: int, height: int, seed: int, shading: str, max_depth: int,
+    sampler: Optional[Sampler], tasks: multiprocessing.Queue,
+    done: multiprocessing.Queue
+):
+    blocks: List[shared_memory.SharedMemory] = []
+    try:
+        scene, camera = attach_scene(shared_scene, blocks)
+        slots_block, slots = shared_slots.attach()
+        blocks.append(slots_block)
+
+        while True:
+            job: Optional[Tuple[TileTask, int]] = tasks.get()
+            if job is None:
+                break
+            task, slot = job
+            tile: Tile = task.tile
+            rays: int = wavefront.traced_rays
+            try:
+                slots[slot, :tile.height, :tile.width] = wavefront.render_tile(
+                    scene, camera, width, height, tile.x0, tile.y0, tile.x1,
+                    tile.y1, task.samples, seed, shading, max_depth,
+                    task.first_sample, sampler
+                )
+                done.put((task, slot, wavefront.traced_rays - rays, None))
+            except Exception:
+                done.put((task, slot, 0, traceback.format_exc()))
+    finally:
+        # The arrays have to go before the blocks can be closed.
+        scene = camera = slots = None  # type: ignore
+        for block in blocks:
+            block.close()
+
+class TileRenderer(object):
+    """
+    A pool of worker processes, attached to a shared scene and tile slots.
+    Use it as a context manager, so that the processes and the shared memory
+    are released when done:
+
+        with TileRenderer(hittables, camera, width, height) as renderer:
+            for task, pixels in renderer.render(tasks):
+                ...
+    """
+
+    def __init__(
+        self, hittables: List[Hittable], camera: Camera, width: int,
+        height: int, workers: Optional[int]=None, seed: Optional[int]=None,
+        shading: str="path", max_depth: int=MAX_DEPTH,
+        tile_size: int=TILE_SIZE, sampler: Optional[Sampler]=None
+    ):
+        """
+        Spawns `workers` processes (as many as there are CPUs, by default).
+        Tiles can be at most tile_size x tile_size pixels.
+        """
+        self.width: int = width
+        self.height: int = height
+        self.tile_size: int = tile_size
+        self.workers: int = workers or os.cpu_count() or 1
+        self.seed: int = seed if seed is not None else wavefront.new_seed()
+        # How many rays the workers have traced, as of the last task done.
+        self.rays: int = 0
+        self.__blocks: List[shared_memory.SharedMemory] = []
+        self.__processes: List[multiprocessing.Process] = []
+        self.__tasks: multiprocessing.Queue = multiprocessing.Queue()
+        self.__done: multiprocessing.Queue = multiprocessing.Queue()
+        self.__slots: Optional[np.ndarray] = None
+
+        try:
+            scene: WavefrontScene = WavefrontScene.from_hittables(hittables)
+            shared_scene: Dict[str, SharedArray] = share_scene(
+                scene, WavefrontCamera.from_camera(camera), self.__blocks
+            )
+            shared_slots: SharedArray = share(
+                np.zeros((
+                    self.workers * SLOTS_PER_WORKER, tile_size, tile_size, 3
+                )),
+                self.__blocks
+            )
+            self.__slots = np.ndarray(
+                shared_slots.shape, dtype=shared_slots.dtype,
+                buffer=self.__blocks[-1].buf
+            )
+
+            for _ in range(self.workers):
+                process = multiprocessing.Process(
+                    target=_worker,
+                    args=(
+                        shared_scene, shared_slots, width, height,
+                        self.seed, shading, max_depth, sampler, self.__tasks,
+                        self.__done
+                    )
+                )
+                process.start()
+                self.__processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "TileRenderer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def render(
+        self, tasks: Iterable[TileTask]
+    ) -> Iterator[Tuple[TileTask, np.ndarray]]:
+        """
+        Hand out the tasks to the workers. Yield every task as soon as it is
+        done, along with the (tile height, tile width, 3) average colors of
+        the samples it rendered.
+
+        Tasks are taken from `tasks` only as fast as the workers get through
+        them, so it can be a generator of millions of them.
+
+        The pixels are a view of a shared tile slot, which gets reused as soon
+        as the next task is asked for. Copy them if they need to stick around.
+        """
+        remaining: Iterator[TileTask] = iter(tasks)
+        free_slots: List[int] = list(range(len(self.__slots)))
+        pending: int = 0
+
+        while True:
+            while free_slots:
+                task: Optional[TileTask] = next(remaining, None)
+                if task is None:
+                    break
+                tile: Tile = task.tile
+                if tile.width > self.tile_size or tile.height > self.tile_size:
+                    raise ValueError(
+                        "Tile %s is bigger than %s pixels a side" %
+                        (tile.index, self.tile_size)
+                    )
+                self.__tasks.put((task, free_slots.pop()))
+                pending += 1
+            if not pending:
+                break
+
+            task, slot, rays, error = self.__next_done()
+            pending -= 1
+            self.rays += rays
+            if error is not None:
+                raise RuntimeError(
+                    "Rendering tile %s failed:\n%s" % (task.tile.index, error)
+                )
+            tile = task.tile
+            yield task, self.__slots[slot, :tile.height, :tile.width]
+            free_slots.append(slot)
+
+    def __next_done(self) -> Tuple[TileTask, int, int, Optional[str]]:
+        while True:
+            try:
+                return self.__done.get(timeout=1)
+            except queue.Empty:
+                # A worker that crashed hard (think segfault or OOM kill)
+                # never reports back, so don't wait for it forever.
+                if any(process.exitcode for process in self.__processes):
+                    raise RuntimeError("A render worker died")
+
+    def close(self):
+        self.__slots = None
+        for _ in self.__processes:
+            # One "no more work" sentinel for every worker.
+            self.__tasks.put(None)
+        for process in self.__processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self.__processes = []
+        for block in self.__blocks:
+            block.close()
+            block.unlink()
+        self.__blocks = []
+
+def cache_key(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, seed: Optional[int], shading: str="path",
+    max_depth: int=MAX_DEPTH, sampler: Optional[Sampler]=None
+) -> Optional[str]:
+    """
+    What a render is known by in a TileCache. Nothing, without a seed.
+    """
+    if seed is None:
+        return None
+    return render_key(
+        scene_arrays(
+            WavefrontScene.from_hittables(hittables),
+            WavefrontCamera.from_camera(camera)
+        ),
+        width, height, samples, seed, shading, max_depth, sampler
+    )
+
+def render_tiles(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, workers: Optional[int]=None, seed: Optional[int]=None,
+    tile_size: int=TILE_SIZE, shading: str="path", max_depth: int=MAX_DEPTH,
+    sampler: Optional[Sampler]=None, cache: Optional[TileCache]=None,
+    tiles: Optional[Iterable[Tile]]=None, progress: Optional[Progress]=None
+) -> Iterator[Tuple[Tile, np.ndarray]]:
+    """
+    Every tile of the image (or just `tiles`, of at most tile_size a side),
+    as it gets done, with its pixels (which, like `TileRenderer.render`'s,
+    are only good until the next tile). Given a cache and a seed, the tiles
+    in the cache are read from there and only the others are rendered; the
+    workers aren't even started if there are none. Every tile is reported
+    to `progress`, if given.
+    """
+    # The rays of the tile rendered last, for `progress`.
+    rays: int = 0
+
+    def render_missing(
+        missing: Iterable[Tile]
+    ) -> Iterator[Tuple[Tile, np.ndarray]]:
+        nonlocal rays
+        rays_before: int = 0
+        with TileRenderer(
+            hittables, camera, width, height, workers, seed, shading,
+            max_depth, tile_size, sampler
+        ) as renderer:
+            for task, pixels in renderer.render(
+                TileTask(tile, samples) for tile in missing
+            ):
+                rays = renderer.rays - rays_before
+                rays_before = renderer.rays
+                yield task.tile, pixels
+
+    def report(
+        rendered: Iterable[Tuple[Tile, np.ndarray]]
+    ) -> Iterator[Tuple[Tile, np.ndarray]]:
+        nonlocal rays
+        for tile, pixels in rendered:
+            progress.update(  # type: ignore
+                1, tile.pixel_count * samples, rays
+            )
+            rays = 0
+            yield tile, pixels
+
+    if tiles is None:
+        tiles = iter_tiles(width, height, tile_size)
+    rendered: Iterator[Tuple[Tile, np.ndarray]] = (
+        render_missing(tiles) if cache is None else cache.render(
+            cache_key(
+                hittables, camera, width, height, samples, seed, shading,
+                max_depth, sampler
+            ),
+            tiles, render_missing
+        )
+    )
+    return report(rendered) if progress is not None else rendered
+
+def render(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, workers: Optional[int]=None, seed: Optional[int]=None,
+    tile_size: int=TILE_SIZE, shading: str="path", max_depth: int=MAX_DEPTH,
+    sampler: Optional[Sampler]=None, cache: Optional[TileCache]=None,
+    progress: Optional[Progress]=None
+) -> np.ndarray:
+    """
+    Like `wavefront.render`, but on `workers` processes (as many as there are
+    CPUs, by default). Return the (height, width, 3) linear colors.
+
+    Given the same seed, the result is the same no matter the number of
+    workers or the size of the tiles, and the same as `wavefront.render`'s.
+    """
+    image: np.ndarray = np.empty((height, width, 3))
+    for tile, pixels in render_tiles(
+        hittables, camera, width, height, samples, workers, seed, tile_size,
+        shading, max_depth, sampler, cache, progress=progress
+    ):
+        image[tile.y0:tile.y1, tile.x0:tile.x1] = pixels
+
+    return image
+
+def render_to_file(
+    hittables: List[Hittable], camera: Camera, width: int, height: int,
+    samples: int, filename: str, workers: Optional[int]=None,
+    seed: Optional[int]=None, tile_size: int=TILE_SIZE, shading: str="path",
+    max_depth: int=MAX_DEPTH, gamma_correct: bool=True,
+    sampler: Optional[Sampler]=None, cache: Optional[TileCache]=None,
+    progress: Optional[Progress]=None
+):
+    """
+    Like `render`, but stream the image into a binary PPM at `filename`
+    instead of keeping it in memory, so it can be as big as the disk allows.
+    Memory use is about a row of tiles, plus the tiles in flight.
+    """
+    with StreamingPPM(
+        filename, width, height, tile_size, gamma_correct
+    ) as ppm:
+        for tile, pixels in render_tiles(
+            hittables, camera, width, height, samples, workers, seed,
+            tile_size, shading, max_depth, sampler, cache, progress=progress
+        ):
+            ppm.write_tile(tile, pixels)
@@ -0,0 +1,67 @@
+from one_week.testing import dielectrics_hittables, lens_camera
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from one_week import parallel, wavefront
+    from one_week.framebuffer import quantize
+except ImportError:
+    parallel = None
+
+@unittest.skipIf(parallel is None, "needs NumPy")
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hittables = dielectrics_hittables()
+        self.camera = lens_camera()
+
+    def test_independent_of_worker_count(self):
+        one = parallel.render(
+            self.hittables, self.camera, 20, 10, 2, workers=1, seed=16,
+            tile_size=4
+        )
+        three = parallel.render(
+            self.hittables, self.camera, 20, 10, 2, workers=3, seed=16,
+            tile_size=4
+        )
+
+        other_tiles = parallel.render(
+            self.hittables, self.camera, 20, 10, 2, workers=2, seed=16,
+            tile_size=7
+        )
+        in_process = wavefront.render(
+            wavefront.WavefrontScene.from_hittables(self.hittables),
+            self.camera, 20, 10, 2, 16
+        )
+
+        self.assertEqual((10, 20, 3), one.shape)
+        self.assertTrue(np.array_equal(one, three))
+        self.assertTrue(np.array_equal(one, other_tiles))
+        self.assertTrue(np.array_equal(one, in_process))
+        # Every tile got rendered. (With two samples, a pixel can be black
+        # after both paths are absorbed.)
+        self.assertTrue((one.sum(axis=2) > 0).mean() > 0.95)
+
+    def test_render_to_file(self):
+        image = parallel.render(
+            self.hittables, self.camera, 21, 11, 1, workers=2, seed=32,
+            tile_size=4
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "streamed.ppm")
+            parallel.render_to_file(
+                self.hittables, self.camera, 21, 11, 1, path, workers=2,
+                seed=32, tile_size=4
+            )
+            with open(path, "rb") as ppm_file:
+                data = ppm_file.read()
+
+        self.assertEqual(
+            b"P6\n21 11\n255\n" + quantize(image).tobytes(), data
+        )
+
+if __name__ == "__main__":
+    unittest.main()
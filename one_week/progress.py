@@ -0,0 +1,241 @@
+"""
+How far along a render is, at most once in a while.
+
+The scripts used to print a line for every pixel (or every row), which at
+1200x800 is nearly a million writes to the terminal, each of which slows the
+render down a little and makes the logs useless. A `Progress` is told about
+every tile (or row, or frame) as it gets done, but only writes when at least
+`interval` seconds have gone by since it last did:
+
+    Rendering: 37/96 tiles (38%), 1.2M rays/s, 410k samples/s, ETA 0:00:41
+
+and a summary once the render is over:
+
+    Rendered 96 tiles in 12.3s: 4.1M rays (333k/s), 1.3M samples (105k/s)
+
+On a terminal, every report overwrites the one before. Anywhere else (a log
+file), every report is a line of its own, and they come ten times less often.
+
+In the "json" mode, for whatever schedules the renders, every report is
+instead one line of JSON, with `"event": "progress"` or `"event": "done"`:
+
+    {"event": "progress", "done": 37, "total": 96, "unit": "tiles", ...}
+
+and anything else the render has to say is an `"event": "note"`.
+
+Rays are the camera rays plus every bounce, as far as the tracer counts them:
+the scalar tracer does with a `RayCounter`, the NumPy one in
+`wavefront.traced_rays`, but the workers of a distributed render don't.
+Samples are camera rays: pixels times samples per pixel.
+"""
+from one_week.hittable import HitRecord, Hittable
+from one_week.ray import Ray
+from typing import IO, Any, Callable, Dict, List, Optional
+
+import json
+import sys
+import time
+
+MODES: List[str] = ["human", "json", "none"]
+# Seconds between reports on a terminal and in JSON, and in a log.
+INTERVAL: float = 1.0
+LOG_INTERVAL: float = 10.0
+
+def _count(count: float) -> str:
+    """
+    A big number, short: 1234567 is 1.2M.
+    """
+    for limit, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if count >= limit:
+            return "%.1f%s" % (count / limit, suffix)
+    return "%d" % count
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%d:%02d:%02d" % (hours, minutes, seconds)
+
+class RayCounter(Hittable):
+    """
+    Stands in for the world of the scalar tracer, counting the rays cast
+    into it. That's one more call per ray, next to nothing against the ray
+    itself.
+    """
+
+    def __init__(self, world: Hittable):
+        self.world: Hittable = world
+        self.rays: int = 0
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        self.rays += 1
+        return self.world.hit(ray, t_min, t_max)
+
+    def take(self) -> int:
+        """
+        The rays counted since the last time.
+        """
+        rays: int = self.rays
+        self.rays = 0
+        return rays
+
+class Progress(object):
+    """
+    Reports on `total` units (tiles, rows, frames) of `total_samples`
+    samples in all, to `stream` (standard error by default) in `mode` (one
+    of MODES). With `mode` "none", nothing is written but everything is
+    still counted.
+    """
+
+    def __init__(
+        self, total: int, total_samples: int=0, unit: str="tiles",
+        mode: str="human", interval: Optional[float]=None,
+        stream: Optional[IO[str]]=None,
+        clock: Callable[[], float]=time.monotonic
+    ):
+        if mode not in MODES:
+            raise ValueError(
+                "Unknown progress mode %s, expected one of %s" % (mode, MODES)
+            )
+        self.total: int = total
+        self.total_samples: int = total_samples
+        self.unit: str = unit
+        self.mode: str = mode
+        self.stream: IO[str] = stream if stream is not None else sys.stderr
+        self.__terminal: bool = mode == "human" and self.stream.isatty()
+        self.interval: float = (
+            interval if interval is not None
+            else INTERVAL if mode == "json" or self.__terminal
+            else LOG_INTERVAL
+        )
+        self.done: int = 0
+        self.samples: int = 0
+        self.rays: int = 0
+        self.__clock: Callable[[], float] = clock
+        self.__started: float = clock()
+        self.__reported: float = self.__started
+        self.__finished: bool = False
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # A render that failed isn't done, and gets no summary.
+        if exc_type is None:
+            self.finish()
+        elif self.__terminal:
+            self.stream.write("\n")
+
+    def update(self, done: int=1, samples: int=0, rays: int=0):
+        """
+        `done` more units are done, with `samples` samples and `rays` rays
+        between them.
+        """
+        self.done += done
+        self.samples += samples
+        self.rays += rays
+        now: float = self.__clock()
+        if now - self.__reported >= self.interval:
+            self.__reported = now
+            self.__write(self.report("progress"))
+
+    def report(self, event: str="progress") -> Dict[str, Any]:
+        """
+        Where the render is at, as the "json" mode writes it.
+        """
+        elapsed: float = self.__clock() - self.__started
+        if self.total_samples:
+            fraction: float = self.samples / self.total_samples
+        else:
+            fraction = self.done / self.total if self.total else 1.0
+        return {
+            "event": event,
+            "done": self.done,
+            "total": self.total,
+            "unit": self.unit,
+            "samples": self.samples,
+            "rays": self.rays if self.rays else None,
+            "elapsed": round(elapsed, 3),
+            "samples_per_second": (
+                round(self.samples / elapsed, 1) if elapsed > 0 else None
+            ),
+            "rays_per_second": (
+                round(self.rays / elapsed, 1) if elapsed > 0 and self.rays
+                else None
+            ),
+            # Assuming the rest goes as fast as what was done so far.
+            "eta": (
+                round(elapsed * (1 - fraction) / fraction, 1)
+                if 0 < fraction else None
+            ),
+        }
+
+    def note(self, message: str):
+        """
+        Say something about the render that isn't how far along it is, like
+        why it renders what it does. In the "json" mode, that's a line with
+        `"event": "note"` and the `message`.
+        """
+        if self.mode == "json":
+            self.stream.write(
+                json.dumps({"event": "note", "message": message}) + "\n"
+            )
+        elif self.mode == "human":
+            self.stream.write(
+                "%s%s\n" % ("\r\033[K" if self.__terminal else "", message)
+            )
+        self.stream.flush()
+
+    def finish(self):
+        """
+        Write the summary, once.
+        """
+        if not self.__finished:
+            self.__finished = True
+            self.__write(self.report("done"))
+
+    def __write(self, report: Dict[str, Any]):
+        if self.mode == "none":
+            return
+        if self.mode == "json":
+            self.stream.write(json.dumps(report) + "\n")
+        elif report["event"] == "done":
+            self.stream.write(
+                "%s%s\n" % ("\r\033[K" if self.__terminal else "",
+                            self.__summary(report))
+            )
+        elif self.__terminal:
+            self.stream.write("\r\033[K%s" % self.__line(report))
+        else:
+            self.stream.write("%s\n" % self.__line(report))
+        self.stream.flush()
+
+    def __line(self, report: Dict[str, Any]) -> str:
+        parts: List[str] = [
+            "%d/%d %s (%d%%)" % (
+                report["done"], report["total"], report["unit"],
+                100 * report["done"] // max(report["total"], 1)
+            )
+        ]
+        if report["rays_per_second"] is not None:
+            parts.append("%s rays/s" % _count(report["rays_per_second"]))
+        if report["samples_per_second"] is not None:
+            parts.append("%s samples/s" % _count(report["samples_per_second"]))
+        if report["eta"] is not None:
+            parts.append("ETA %s" % _duration(report["eta"]))
+        return "Rendering: %s" % ", ".join(parts)
+
+    def __summary(self, report: Dict[str, Any]) -> str:
+        elapsed: float = report["elapsed"]
+        parts: List[str] = []
+        if report["rays"] is not None:
+            parts.append("%s rays (%s/s)" % (
+                _count(report["rays"]),
+                _count(report["rays_per_second"] or 0)
+            ))
+        parts.append("%s samples (%s/s)" % (
+            _count(report["samples"]),
+            _count(report["samples_per_second"] or 0)
+        ))
+        return "Rendered %d %s in %.1fs: %s" % (
+            report["done"], report["unit"], elapsed, ", ".join(parts)
+        )
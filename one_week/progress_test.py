@@ -0,0 +1,168 @@
+from one_week.camera import Camera
+from one_week.engine import Scene, render
+from one_week.hittable import HittableList
+from one_week.material import Lambertian
+from one_week.progress import Progress, RayCounter
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+class Clock(object):
+    """
+    A clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ProgressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.stream = io.StringIO()
+
+    def lines(self):
+        return [
+            json.loads(line) for line in self.stream.getvalue().splitlines()
+        ]
+
+    def test_rate_limited(self):
+        progress = Progress(
+            10, 1000, mode="json", stream=self.stream, clock=self.clock
+        )
+        for done in range(4):
+            self.clock.now = done * 0.4
+            progress.update(1, 100, 300)
+        # Only the update at 1.2s was a second after the start.
+        self.assertEqual(1, len(self.lines()))
+        report = self.lines()[0]
+        self.assertEqual("progress", report["event"])
+        self.assertEqual(4, report["done"])
+        self.assertEqual(10, report["total"])
+        self.assertEqual(400, report["samples"])
+        self.assertEqual(1200, report["rays"])
+        self.assertEqual(333.3, report["samples_per_second"])
+        self.assertEqual(1000.0, report["rays_per_second"])
+        self.assertEqual(1.8, report["eta"])
+
+        self.clock.now = 2.0
+        progress.update(1, 100, 300)
+        self.assertEqual(1, len(self.lines()))
+        self.clock.now = 2.2
+        progress.update(1, 100, 300)
+        self.assertEqual(2, len(self.lines()))
+
+    def test_eta_by_samples(self):
+        # The first tile has most of the samples, so the rest goes quickly.
+        progress = Progress(
+            2, 100, mode="json", stream=self.stream, clock=self.clock
+        )
+        self.clock.now = 3.0
+        progress.update(1, 75)
+        self.assertEqual(1.0, self.lines()[0]["eta"])
+
+    def test_finish(self):
+        with Progress(
+            4, mode="json", stream=self.stream, clock=self.clock
+        ) as progress:
+            self.clock.now = 0.5
+            progress.update(4, 400)
+        progress.finish()
+        reports = self.lines()
+        self.assertEqual(1, len(reports))
+        self.assertEqual("done", reports[0]["event"])
+        self.assertEqual(4, reports[0]["done"])
+        self.assertEqual(800.0, reports[0]["samples_per_second"])
+        self.assertIsNone(reports[0]["rays"])
+        self.assertEqual(0.0, reports[0]["eta"])
+
+    def test_note(self):
+        Progress(4, mode="json", stream=self.stream).note("Resuming")
+        self.assertEqual(
+            [{"event": "note", "message": "Resuming"}], self.lines()
+        )
+        human = io.StringIO()
+        Progress(4, stream=human).note("Resuming")
+        self.assertEqual("Resuming\n", human.getvalue())
+        quiet = io.StringIO()
+        Progress(4, mode="none", stream=quiet).note("Resuming")
+        self.assertEqual("", quiet.getvalue())
+
+    def test_no_summary_on_failure(self):
+        with self.assertRaises(RuntimeError):
+            with Progress(4, mode="json", stream=self.stream):
+                raise RuntimeError()
+        self.assertEqual("", self.stream.getvalue())
+
+    def test_human(self):
+        progress = Progress(
+            96, unit="tiles", interval=1.0, stream=self.stream,
+            clock=self.clock
+        )
+        self.clock.now = 2.0
+        progress.update(48, 500000, 2000000)
+        self.clock.now = 4.0
+        progress.finish()
+        self.assertEqual(
+            "Rendering: 48/96 tiles (50%), 1.0M rays/s, 250.0k samples/s, "
+            "ETA 0:00:02\n"
+            "Rendered 48 tiles in 4.0s: 2.0M rays (500.0k/s), 500.0k "
+            "samples (125.0k/s)\n",
+            self.stream.getvalue()
+        )
+
+    def test_none(self):
+        with Progress(2, mode="none", stream=self.stream) as progress:
+            progress.update(2, 10)
+        self.assertEqual("", self.stream.getvalue())
+        self.assertEqual(2, progress.done)
+        with self.assertRaises(ValueError):
+            Progress(2, mode="xml")
+
+    def test_ray_counter(self):
+        counter = RayCounter(HittableList([
+            Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.5, 0.5, 0.5)))
+        ]))
+        self.assertIsNotNone(
+            counter.hit(Ray(Vec3(0, 0, 0), Vec3(0, 0, -1)), 0.001, 1e9)
+        )
+        self.assertIsNone(
+            counter.hit(Ray(Vec3(0, 0, 0), Vec3(0, 1, 0)), 0.001, 1e9)
+        )
+        self.assertEqual(2, counter.take())
+        self.assertEqual(0, counter.take())
+
+    def test_render(self):
+        scene = Scene(
+            [Sphere(Vec3(0, 0, -1), 0.5, Lambertian(Vec3(0.5, 0.5, 0.5)))],
+            Camera(
+                Vec3(-2, -1, -1), Vec3(4, 0, 0), Vec3(0, 2, 0), Vec3(0, 0, 0)
+            )
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                render(
+                    scene, 8, 4, 2, os.path.join(directory, "image.ppm"),
+                    backend="scalar", seed=1, progress="json"
+                )
+        reports = [json.loads(line) for line in stderr.getvalue().splitlines()]
+        self.assertEqual("done", reports[-1]["event"])
+        self.assertEqual("rows", reports[-1]["unit"])
+        self.assertEqual(4, reports[-1]["done"])
+        self.assertEqual(8 * 4 * 2, reports[-1]["samples"])
+        # At least one ray per sample.
+        self.assertGreaterEqual(reports[-1]["rays"], 8 * 4 * 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 from one_week.vec3 import Vec3
 
 class Ray(object):
-    
+
+    __slots__ = ("a", "b")
+
     def __init__(self, a: Vec3, b: Vec3):
         self.a = a
         self.b = b
@@ -18,4 +20,4 @@ class Ray(object):
         """
         Get a particular point in the 3D line represented by this Ray.
         """
-        return self.a + (t * self.b)
+        return self.b.mul_add(t, self.a)
@@ -0,0 +1,91 @@
+"""
+Random numbers that don't depend on who draws them first.
+
+A render that draws from one shared stream gets different random numbers for
+a pixel depending on what was drawn before it: which tile went to which
+worker, how the pixels were batched, how many samples another pixel took. So
+instead, every pixel (and, in the wavefront tracer, every sample of every
+pixel) gets a stream of its own, keyed by a hash of the render's seed and its
+coordinates: `mix(seed, pixel, sample)`.
+
+The hash is SplitMix64, which is also a generator: the k-th number of the
+stream started at `key` is `finalize(key + (k + 1) * GOLDEN)`, so any number
+of the stream can be had without drawing the ones before it. The wavefront
+tracer does exactly that, for whole arrays of paths at once (see
+`wavefront.PathRandom`). The scalar tracer just seeds Python's `random` with
+the key of every pixel: its numbers come one at a time, from all over the
+code, and nothing in pure Python beats the C Mersenne Twister at that (a
+pre-drawn batch of NumPy numbers, handed out one by one, takes about twice as
+long per number as `random.random`).
+
+The samplers for points in the unit ball and disk map uniform numbers
+directly, without rejection, so every point takes the same count of them.
+"""
+from typing import List, Tuple
+
+import math
+import random
+
+MASK: int = 0xFFFFFFFFFFFFFFFF
+# The increment of SplitMix64, 2^64 divided by the golden ratio.
+GOLDEN: int = 0x9E3779B97F4A7C15
+MIX_1: int = 0xBF58476D1CE4E5B9
+MIX_2: int = 0x94D049BB133111EB
+# 2^-53, to turn the top 53 bits of a number into a float in [0, 1).
+UNIT: float = 1.0 / (1 << 53)
+TAU: float = 2 * math.pi
+
+# How the samples of a pixel are spread, see one_week.sampler.
+SAMPLERS: List[str] = ["random", "stratified", "halton", "sobol"]
+
+def finalize(z: int) -> int:
+    """
+    The output function of SplitMix64, for a 64-bit z.
+    """
+    z = ((z ^ (z >> 30)) * MIX_1) & MASK
+    z = ((z ^ (z >> 27)) * MIX_2) & MASK
+    return z ^ (z >> 31)
+
+def mix(*values: int) -> int:
+    """
+    Hash a seed and any number of counters into the key of a stream.
+    """
+    key: int = 0
+    for value in values:
+        key = finalize(((key ^ (value & MASK)) + GOLDEN) & MASK)
+    return key
+
+def nth(key: int, n: int) -> float:
+    """
+    The n-th number, in [0, 1), of the stream keyed by `key`.
+    """
+    return (finalize((key + (n + 1) * GOLDEN) & MASK) >> 11) * UNIT
+
+def seed_pixel(seed: int, pixel: int, first_sample: int=0):
+    """
+    Seed `random` for the samples of `pixel` from `first_sample` on.
+    """
+    random.seed(mix(seed, pixel, first_sample))
+
+def ball_point(u1: float, u2: float, u3: float) -> Tuple[float, float, float]:
+    """
+    Map three uniform numbers to a uniformly distributed point in the unit
+    ball: a direction (uniform in height and angle around the vertical, which
+    covers the sphere evenly) and a distance, whose cube is uniform because
+    the volume within a distance r grows as r^3.
+    """
+    z: float = 2 * u1 - 1
+    angle: float = TAU * u2
+    radius: float = u3 ** (1 / 3)
+    ring: float = radius * math.sqrt(1 - z * z)
+    return ring * math.cos(angle), ring * math.sin(angle), radius * z
+
+def disk_point(u1: float, u2: float) -> Tuple[float, float]:
+    """
+    Map two uniform numbers to a uniformly distributed point in the unit
+    disk. Like in `ball_point`, the area within a distance r grows as r^2, so
+    that's the one uniform.
+    """
+    radius: float = math.sqrt(u1)
+    angle: float = TAU * u2
+    return radius * math.cos(angle), radius * math.sin(angle)
@@ -0,0 +1,79 @@
+from one_week import rng
+
+import math
+import random
+import unittest
+
+try:
+    import numpy as np
+    from one_week.wavefront import PathRandom, ball_points, disk_points
+except ImportError:
+    PathRandom = None
+
+class RngTest(unittest.TestCase):
+
+    def test_splitmix(self):
+        # The first outputs of the reference SplitMix64, seeded with 0.
+        self.assertEqual(0xE220A8397B1DCDAF, rng.finalize(rng.GOLDEN))
+        self.assertEqual(
+            0x6E789E6AA1B965F4, rng.finalize(2 * rng.GOLDEN & rng.MASK)
+        )
+
+    def test_streams(self):
+        key = rng.mix(1, 2, 3)
+        self.assertNotEqual(key, rng.mix(1, 3, 2))
+        self.assertNotEqual(key, rng.mix(1, 2, 4))
+        numbers = [rng.nth(key, n) for n in range(1000)]
+        self.assertTrue(all(0 <= number < 1 for number in numbers))
+        self.assertAlmostEqual(0.5, sum(numbers) / 1000, delta=0.05)
+
+    def test_seed_pixel(self):
+        rng.seed_pixel(5, 12)
+        first = [random.random() for _ in range(3)]
+        random.random()
+        rng.seed_pixel(5, 12)
+        self.assertEqual(first, [random.random() for _ in range(3)])
+
+    def test_ball_and_disk(self):
+        uniform = random.Random(11).random
+        points = [
+            rng.ball_point(uniform(), uniform(), uniform())
+            for _ in range(4000)
+        ]
+        radii = [math.sqrt(x * x + y * y + z * z) for x, y, z in points]
+        self.assertTrue(max(radii) <= 1)
+        # Half the volume of the ball is within 0.5^(1/3) of its center.
+        inner = sum(radius < 0.5 ** (1 / 3) for radius in radii)
+        self.assertAlmostEqual(0.5, inner / 4000, delta=0.03)
+        for axis in range(3):
+            self.assertAlmostEqual(
+                0, sum(point[axis] for point in points) / 4000, delta=0.03
+            )
+
+        disk = [rng.disk_point(uniform(), uniform()) for _ in range(4000)]
+        inner = sum(x * x + y * y < 0.5 for x, y in disk)
+        self.assertTrue(all(x * x + y * y <= 1 for x, y in disk))
+        self.assertAlmostEqual(0.5, inner / 4000, delta=0.03)
+
+    @unittest.skipIf(PathRandom is None, "needs NumPy")
+    def test_path_random_matches_scalar(self):
+        seed = (1 << 70) + 9
+        pixels = np.array([0, 7, 7, 123456])
+        samples = np.array([0, 0, 1, 99])
+        randoms = PathRandom(seed, pixels, samples)
+        for key, pixel in zip(randoms.keys, pixels):
+            self.assertEqual(rng.mix(seed, int(pixel)), int(key))
+
+        numbers = randoms.uniform(np.array([3, 1]), 5, 2)
+        self.assertEqual((2, 2), numbers.shape)
+        self.assertEqual(rng.nth(rng.mix(seed, 123456, 99), 6), numbers[0, 1])
+        self.assertEqual(rng.nth(rng.mix(seed, 7, 0), 5), numbers[1, 0])
+
+        uniforms = np.random.default_rng(0).random((5, 3))
+        for row, point in zip(uniforms, ball_points(uniforms)):
+            np.testing.assert_allclose(rng.ball_point(*row), point)
+        for row, point in zip(uniforms, disk_points(uniforms[:, :2])):
+            np.testing.assert_allclose(rng.disk_point(*row[:2]), point)
+
+if __name__ == "__main__":
+    unittest.main()
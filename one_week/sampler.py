@@ -0,0 +1,342 @@
+"""
+Where the wavefront tracer's random numbers come from.
+
+Every path asks for the numbers of its pixel and sample by dimension: the
+pixel jitter is dimensions 0 and 1, the point on the lens 2 and 3, then every
+bounce takes four more (see `wavefront.PathRandom`). The samplers here differ
+in how the samples of a pixel cover those dimensions:
+
+- _random_: every number independent of every other, like the scalar tracer.
+  The noise of n samples falls as 1/sqrt(n).
+- _stratified_: correlated multi-jittered sampling (Kensler, 2013). The n
+  samples of a pixel fall in n different cells of a grid over each pair of
+  dimensions, and in n different rows and columns of it. Needs to know n.
+- _halton_: the Halton sequence in bases 2 and 3, its samples shuffled like
+  Sobol's below and shifted by a random offset (a Cranley-Patterson
+  rotation).
+- _sobol_: the first two dimensions of Sobol's sequence, with the samples
+  shuffled and the values scrambled by hash-based Owen scrambling (Burley,
+  2020), which keeps every power of two of samples stratified, whatever the
+  pixel.
+
+Low-discrepancy sequences spread well over a handful of dimensions, not over
+the hundreds a path can use, so every pair of dimensions gets its own copy of
+the same 2D sequence ("padding"), shuffled and scrambled with a key of its
+own. That is also what keeps neighboring pixels, and the pairs of a pixel,
+from being correlated.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from abc import ABC, abstractmethod
+from one_week.rng import GOLDEN, MASK, MIX_1, MIX_2, SAMPLERS, UNIT
+from typing import List
+
+import numpy as np
+
+MASK_32: int = 0xFFFFFFFF
+# 2^-32, to turn a 32-bit number into a float in [0, 1).
+UNIT_32: float = 1.0 / (1 << 32)
+
+_GOLDEN: np.uint64 = np.uint64(GOLDEN)
+_MIX_1: np.uint64 = np.uint64(MIX_1)
+_MIX_2: np.uint64 = np.uint64(MIX_2)
+
+def finalize(z: np.ndarray) -> np.ndarray:
+    """
+    `rng.finalize` for an array of uint64, which wrap around on their own.
+    """
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+def mix(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    One step of `rng.mix` for arrays: `rng.mix(seed, a, b)` is
+    `mix(mix(mix(zeros, seed), a), b)`.
+    """
+    return finalize((keys ^ values.astype(np.uint64)) + _GOLDEN)
+
+def pixel_keys(seed: int, pixels: np.ndarray) -> np.ndarray:
+    """
+    `rng.mix(seed, pixel)` for every pixel.
+    """
+    seeds: np.ndarray = np.full(len(pixels), seed & MASK, dtype=np.uint64)
+    return mix(mix(np.zeros(len(pixels), dtype=np.uint64), seeds), pixels)
+
+def to_unit(bits: np.ndarray) -> np.ndarray:
+    """
+    The top 53 bits of 64-bit hashes as floats in [0, 1).
+    """
+    return (bits >> np.uint64(11)) * UNIT
+
+class Sampler(ABC):
+
+    @abstractmethod
+    def uniform(
+        self, keys: np.ndarray, samples: np.ndarray, dimension: int
+    ) -> np.ndarray:
+        """
+        Dimension `dimension` of sample `samples[i]` of the pixel keyed by
+        `keys[i]` (see `pixel_keys`), as floats in [0, 1).
+        """
+        pass
+
+class RandomSampler(Sampler):
+
+    def uniform(
+        self, keys: np.ndarray, samples: np.ndarray, dimension: int
+    ) -> np.ndarray:
+        # rng.nth(rng.mix(seed, pixel, sample), dimension)
+        return to_unit(finalize(
+            mix(keys, samples) + np.uint64((dimension + 1) * GOLDEN & MASK)
+        ))
+
+class PairSampler(Sampler):
+    """
+    A 2D sequence, padded to any number of dimensions: dimension d is
+    coordinate d % 2 of pair d // 2, and every pair of every pixel gets a
+    32-bit key of its own to shuffle and scramble the sequence with.
+    """
+
+    def uniform(
+        self, keys: np.ndarray, samples: np.ndarray, dimension: int
+    ) -> np.ndarray:
+        pair_keys: np.ndarray = mix(
+            keys, np.full(len(keys), dimension // 2, dtype=np.uint64)
+        ) >> np.uint64(32)
+        return self.coordinate(
+            samples.astype(np.uint64), pair_keys, dimension % 2
+        )
+
+    @abstractmethod
+    def coordinate(
+        self, samples: np.ndarray, pair_keys: np.ndarray, axis: int
+    ) -> np.ndarray:
+        """
+        Coordinate `axis` (0 or 1) of the given samples of the pairs keyed by
+        `pair_keys`.
+        """
+        pass
+
+class StratifiedSampler(PairSampler):
+
+    def __init__(self, samples: int):
+        """
+        `samples` is how many samples every pixel gets. The grid is made for
+        that many, and if a pixel gets more, every further `samples` of them
+        get a new grid.
+        """
+        self.samples: int = max(1, samples)
+        # As square a grid as can be had with exactly `samples` cells. A
+        # grid with cells to spare would leave the same ones empty in every
+        # pixel, which is a bias, not noise.
+        self.columns: int = max(
+            columns for columns in range(1, int(np.sqrt(self.samples)) + 1)
+            if self.samples % columns == 0
+        )
+        self.rows: int = self.samples // self.columns
+
+    def coordinate(
+        self, samples: np.ndarray, pair_keys: np.ndarray, axis: int
+    ) -> np.ndarray:
+        count: int = self.samples
+        columns: int = self.columns
+        rows: int = self.rows
+        # A new pattern for every `count` samples.
+        keys: np.ndarray = _hash32(
+            pair_keys ^ (samples // np.uint64(count)), 0x51633E2D
+        )
+        cells: np.ndarray = permute(
+            samples % np.uint64(count), count, keys
+        )
+        column: np.ndarray = cells % np.uint64(columns)
+        row: np.ndarray = cells // np.uint64(columns)
+        if axis == 0:
+            # Which column of the row, which is what makes the rows agree.
+            offset: np.ndarray = permute(
+                row, rows, (keys * np.uint64(0x63D83595)) & np.uint64(MASK_32)
+            )
+            jitter: np.ndarray = _float32(cells, keys, 0x711AD6A5)
+            return (column + (offset + jitter) / rows) / columns
+        offset = permute(
+            column, columns,
+            (keys * np.uint64(0xA511E9B3)) & np.uint64(MASK_32)
+        )
+        jitter = _float32(cells, keys, 0xA399D265)
+        return (row + (offset + jitter) / columns) / rows
+
+class HaltonSampler(PairSampler):
+
+    def coordinate(
+        self, samples: np.ndarray, pair_keys: np.ndarray, axis: int
+    ) -> np.ndarray:
+        # Every pair of dimensions takes the samples in an order of its own
+        # (see SobolSampler), or they would all be in step...
+        indices: np.ndarray = nested_uniform_scramble(samples, pair_keys)
+        values: np.ndarray = (
+            reverse_bits(indices) * UNIT_32 if axis == 0
+            else radical_inverse_3(indices)
+        )
+        # ...and shifts it around the unit square.
+        shift: np.ndarray = _hash32(pair_keys, 0x68E31DA4 + axis) * UNIT_32
+        values = values + shift
+        return values - np.floor(values)
+
+class SobolSampler(PairSampler):
+
+    def coordinate(
+        self, samples: np.ndarray, pair_keys: np.ndarray, axis: int
+    ) -> np.ndarray:
+        indices: np.ndarray = nested_uniform_scramble(samples, pair_keys)
+        bits: np.ndarray = (
+            reverse_bits(indices) if axis == 0 else sobol_second(indices)
+        )
+        scrambled: np.ndarray = nested_uniform_scramble(
+            bits, _hash32(pair_keys, 0x9E3779B9 + axis)
+        )
+        return scrambled * UNIT_32
+
+def make_sampler(name: str="random", samples: int=1) -> Sampler:
+    """
+    One of SAMPLERS, for renders of `samples` samples per pixel.
+    """
+    if name == "random":
+        return RandomSampler()
+    if name == "stratified":
+        return StratifiedSampler(samples)
+    if name == "halton":
+        return HaltonSampler()
+    if name == "sobol":
+        return SobolSampler()
+    raise ValueError("Unknown sampler %s, expected one of %s" % (name, SAMPLERS))
+
+def reverse_bits(x: np.ndarray) -> np.ndarray:
+    """
+    Reverse the lower 32 bits of each number. As a fraction of 2^32, that's
+    the base 2 radical inverse, the first dimension of both Halton and Sobol.
+    """
+    x = ((x >> np.uint64(1)) & np.uint64(0x55555555)) | \
+        ((x & np.uint64(0x55555555)) << np.uint64(1))
+    x = ((x >> np.uint64(2)) & np.uint64(0x33333333)) | \
+        ((x & np.uint64(0x33333333)) << np.uint64(2))
+    x = ((x >> np.uint64(4)) & np.uint64(0x0F0F0F0F)) | \
+        ((x & np.uint64(0x0F0F0F0F)) << np.uint64(4))
+    x = ((x >> np.uint64(8)) & np.uint64(0x00FF00FF)) | \
+        ((x & np.uint64(0x00FF00FF)) << np.uint64(8))
+    return ((x >> np.uint64(16)) | (x << np.uint64(16))) & np.uint64(MASK_32)
+
+def radical_inverse_3(x: np.ndarray) -> np.ndarray:
+    """
+    The digits of x in base 3, mirrored around the point.
+    """
+    result: np.ndarray = np.zeros(len(x))
+    scale: float = 1.0
+    x = x.copy()
+    while x.any():
+        scale /= 3
+        result += (x % np.uint64(3)) * scale
+        x //= np.uint64(3)
+    return result
+
+def _sobol_tables() -> List[np.ndarray]:
+    """
+    The second dimension of Sobol's sequence is linear in the bits of the
+    index, so it can be had a byte at a time: entry b of table k is the
+    contribution of byte k of the index being b.
+    """
+    columns: List[int] = []
+    v: int = 1 << 31
+    for _ in range(32):
+        columns.append(v)
+        v ^= v >> 1
+    tables: List[np.ndarray] = []
+    for byte in range(4):
+        table: np.ndarray = np.zeros(256, dtype=np.uint64)
+        for value in range(256):
+            bits: int = 0
+            for bit in range(8):
+                if value >> bit & 1:
+                    bits ^= columns[8 * byte + bit]
+            table[value] = bits
+        tables.append(table)
+    return tables
+
+_SOBOL_TABLES: List[np.ndarray] = _sobol_tables()
+
+def sobol_second(x: np.ndarray) -> np.ndarray:
+    """
+    The second dimension of Sobol's sequence for 32-bit indices, as 32-bit
+    fractions.
+    """
+    result: np.ndarray = np.zeros(len(x), dtype=np.uint64)
+    for byte, table in enumerate(_SOBOL_TABLES):
+        result ^= table[(x >> np.uint64(8 * byte)) & np.uint64(0xFF)]
+    return result
+
+def laine_karras_permutation(x: np.ndarray, seed: np.ndarray) -> np.ndarray:
+    """
+    A hash of 32-bit numbers in which every bit only depends on the bits
+    below it, so that reversing the bits before and after makes an Owen
+    scramble out of it. The constants are Burley's.
+    """
+    mask: np.uint64 = np.uint64(MASK_32)
+    x = (x + seed) & mask
+    x ^= (x * np.uint64(0x6C50B47C)) & mask
+    x ^= (x * np.uint64(0xB82F1E52)) & mask
+    x ^= (x * np.uint64(0xC7AFE638)) & mask
+    x ^= (x * np.uint64(0x8D22F6E6)) & mask
+    return x
+
+def nested_uniform_scramble(x: np.ndarray, seed: np.ndarray) -> np.ndarray:
+    """
+    Owen scramble 32-bit numbers: the same permutation of the first 2^k of
+    them, for any k, keeps them in the same 2^k strata.
+    """
+    return reverse_bits(laine_karras_permutation(reverse_bits(x), seed))
+
+def permute(x: np.ndarray, length: int, keys: np.ndarray) -> np.ndarray:
+    """
+    Kensler's hash-based permutation of the numbers below `length`, a
+    different one for every key. It permutes the next power of two, and
+    numbers which land past `length` go around again until they don't.
+    """
+    if length == 1:
+        return np.zeros(len(x), dtype=np.uint64)
+    mask: np.uint64 = np.uint64(MASK_32)
+    w: int = (1 << (length - 1).bit_length()) - 1
+    wide: np.uint64 = np.uint64(w)
+    x = x.copy()
+    pending: np.ndarray = np.arange(len(x))
+    while len(pending):
+        i: np.ndarray = x[pending]
+        p: np.ndarray = keys[pending]
+        i = i ^ p
+        i = (i * np.uint64(0xE170893D)) & mask
+        i ^= p >> np.uint64(16)
+        i ^= (i & wide) >> np.uint64(4)
+        i ^= p >> np.uint64(8)
+        i = (i * np.uint64(0x0929EB3F)) & mask
+        i ^= p >> np.uint64(23)
+        i ^= (i & wide) >> np.uint64(1)
+        i = (i * (np.uint64(1) | p >> np.uint64(27))) & mask
+        i = (i * np.uint64(0x6935FA69)) & mask
+        i ^= (i & wide) >> np.uint64(11)
+        i = (i * np.uint64(0x74DCB303)) & mask
+        i ^= (i & wide) >> np.uint64(2)
+        i = (i * np.uint64(0x9E501CC3)) & mask
+        i ^= (i & wide) >> np.uint64(2)
+        i = (i * np.uint64(0xC860A3DF)) & mask
+        i &= wide
+        i ^= i >> np.uint64(5)
+        x[pending] = i
+        pending = pending[i >= np.uint64(length)]
+    return (x + keys) % np.uint64(length)
+
+def _hash32(x: np.ndarray, salt: int) -> np.ndarray:
+    return finalize(x * np.uint64(salt) + _GOLDEN) >> np.uint64(32)
+
+def _float32(x: np.ndarray, keys: np.ndarray, salt: int) -> np.ndarray:
+    """
+    A float in [0, 1) that looks random, from a number and a key.
+    """
+    return _hash32(x ^ (keys << np.uint64(32)), salt) * UNIT_32
@@ -0,0 +1,100 @@
+import unittest
+
+try:
+    import numpy as np
+    from one_week import sampler
+except ImportError:
+    sampler = None
+
+@unittest.skipIf(sampler is None, "needs NumPy")
+class SamplerTest(unittest.TestCase):
+
+    def points(self, name, count, pixel=7, dimension=4):
+        keys = sampler.pixel_keys(5, np.full(count, pixel))
+        samples = np.arange(count)
+        made = sampler.make_sampler(name, count)
+        return (
+            made.uniform(keys, samples, dimension),
+            made.uniform(keys, samples, dimension + 1)
+        )
+
+    def test_in_unit_square(self):
+        for name in sampler.SAMPLERS:
+            for dimension in (0, 1, 7, 200):
+                x, y = self.points(name, 37, dimension=dimension)
+                self.assertTrue(((0 <= x) & (x < 1)).all(), name)
+                self.assertTrue(((0 <= y) & (y < 1)).all(), name)
+
+    def test_stratified(self):
+        for name in ("stratified", "sobol"):
+            for pixel in (0, 1, 1000):
+                x, y = self.points(name, 16, pixel)
+                # One sample in every cell of a 4x4 grid, and in every one of
+                # 16 rows and 16 columns.
+                cells = set(zip((4 * x).astype(int), (4 * y).astype(int)))
+                self.assertEqual(16, len(cells), name)
+                self.assertEqual(16, len(set((16 * x).astype(int))), name)
+                self.assertEqual(16, len(set((16 * y).astype(int))), name)
+
+    def test_sobol_is_progressive(self):
+        x, y = self.points("sobol", 64)
+        for count in (2, 4, 8, 16, 32, 64):
+            self.assertEqual(
+                count, len(set((count * x[:count]).astype(int)))
+            )
+
+    def test_pixels_differ(self):
+        for name in sampler.SAMPLERS:
+            first, _ = self.points(name, 8, pixel=1)
+            second, _ = self.points(name, 8, pixel=2)
+            self.assertFalse(np.array_equal(first, second), name)
+
+    def test_sobol_second(self):
+        indices = np.arange(300, dtype=np.uint64)
+        expected = []
+        for index in range(300):
+            value, column = 0, 1 << 31
+            while index:
+                if index & 1:
+                    value ^= column
+                index >>= 1
+                column ^= column >> 1
+            expected.append(value)
+        self.assertEqual(expected, list(sampler.sobol_second(indices)))
+
+    def test_permute(self):
+        for length in (1, 5, 16, 100):
+            keys = np.full(length, 0xDEADBEEF, dtype=np.uint64)
+            permuted = sampler.permute(
+                np.arange(length, dtype=np.uint64), length, keys
+            )
+            self.assertEqual(list(range(length)), sorted(permuted))
+
+    def test_lower_error(self):
+        # The area of a quarter disk, estimated in 2000 pixels at once.
+        pixels, count = 2000, 64
+        errors = {}
+        for name in sampler.SAMPLERS:
+            keys = sampler.pixel_keys(1, np.repeat(np.arange(pixels), count))
+            samples = np.tile(np.arange(count), pixels)
+            made = sampler.make_sampler(name, count)
+            x = made.uniform(keys, samples, 2)
+            y = made.uniform(keys, samples, 3)
+            estimates = (x * x + y * y < 1).reshape(pixels, count).mean(axis=1)
+            errors[name] = np.sqrt(((estimates - np.pi / 4) ** 2).mean())
+
+        self.assertAlmostEqual(
+            np.sqrt(np.pi / 4 * (1 - np.pi / 4) / count), errors["random"],
+            delta=0.005
+        )
+        # The edge of the disk keeps any of them from doing much better than
+        # half the error of random numbers, at this count.
+        for name in ("stratified", "halton", "sobol"):
+            self.assertLess(errors[name], errors["random"] / 1.5, name)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            sampler.make_sampler("blue noise")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,417 @@
+"""
+Scenes as JSON files, following the schemas in config-schema/.
+
+A scene file is an object with a `camera` (Camera.json), a list of `spheres`
+(Sphere.json) and the `materials` they refer to by name (Material.json), as
+laid out by Scene.json. A sphere without a material is Vanta.
+
+Loading one validates it against the schemas and builds the PositionableCamera,
+the Sphere and Material objects and a BVH over the spheres. For a big scene
+that is a lot of work, so the result is also compiled into a binary file in
+`cache_directory`, named after the SHA-256 of the scene file's contents. The
+next time the same scene is loaded, it comes straight from there: no parsing,
+no validation and no BVH build, just reading a few flat arrays.
+
+The cache file is laid out like a checkpoint (see one_week.checkpoint):
+
+    header      see HEADER below
+    camera      CAMERA_SIZE doubles, as in CompiledScene.camera_parameters
+    kinds       one signed byte per material, an index into MATERIAL_TYPES
+    materials   five doubles per material: albedo, fuzz, refractive index
+    spheres     four doubles per sphere: center and radius
+    indices     one int per sphere, the index of its material
+    names       the sphere names, as a JSON list in UTF-8
+    boxes       six doubles per BVH node
+    nodes       two ints per BVH node
+
+everything in little-endian. The spheres are in the order the leaves of the
+BVH hold them (see `BVH.flatten`).
+"""
+from array import array
+from one_week.bvh import BVH
+from one_week.camera import PositionableCamera
+from one_week.checkpoint import CheckpointError, read_array, write_array
+from one_week.engine import Scene
+from one_week.hittable import Hittable
+from one_week.material import (
+    Dielectric, Identity, Lambertian, Material, Metal, Vanta
+)
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import Any, Dict, List, Optional, Tuple
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+SCHEMA_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config-schema"
+)
+SCENE_SCHEMA: str = "https://github.com/skytreader/praytracing/Scene.schema.json"
+CAMERA_SCHEMA: str = "https://github.com/skytreader/praytracing/Camera.schema.json"
+CACHE_DIRECTORY: str = os.path.join(tempfile.gettempdir(), "praytracing-scenes")
+
+MAGIC: bytes = b"PRAYSCNE"
+VERSION: int = 1
+# magic, version, material count, sphere count, node count, names size
+HEADER: struct.Struct = struct.Struct("<8sIIIII")
+# camera_posn, camera_aim, up_vector, vfov, aspect_ratio, aperture, focus_dist
+CAMERA_SIZE: int = 13
+
+# The "type" of a Material.json, and the class it stands for.
+MATERIAL_TYPES: List[str] = [
+    "vanta", "identity", "lambertian", "metal", "dielectric"
+]
+MATERIAL_CLASSES: List[type] = [Vanta, Identity, Lambertian, Metal, Dielectric]
+
+class SceneFileError(Exception):
+    pass
+
+class CompiledScene(object):
+    """
+    A loaded scene: what a scene file describes, ready to render.
+    """
+
+    def __init__(
+        self, camera_parameters: Tuple[float, ...], hittables: List[Hittable],
+        world: BVH
+    ):
+        """
+        `camera_parameters` are the arguments of PositionableCamera, with the
+        vectors spelled out: CAMERA_SIZE floats.
+        """
+        self.camera_parameters: Tuple[float, ...] = camera_parameters
+        self.hittables: List[Hittable] = hittables
+        self.world: BVH = world
+        self.camera: PositionableCamera = make_camera(camera_parameters)
+
+    @property
+    def aspect_ratio(self) -> float:
+        return self.camera_parameters[10]
+
+    def scene(self, width: int, height: int) -> Scene:
+        """
+        For one_week.engine. The camera keeps the aspect ratio of the file.
+        """
+        return Scene(self.hittables, self.camera, world=self.world)
+
+def load_schemas(directory: str=SCHEMA_DIRECTORY) -> Dict[str, dict]:
+    """
+    Every schema in `directory`, by its $id.
+    """
+    schemas: Dict[str, dict] = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename)) as schema_file:
+                schema: dict = json.load(schema_file)
+            schemas[schema["$id"]] = schema
+    return schemas
+
+def validate(
+    value: Any, schema: dict, schemas: Dict[str, dict], path: str="scene"
+):
+    """
+    Check `value` against `schema`, raising a SceneFileError naming the first
+    offending part of it. Only what the schemas in config-schema use is
+    supported: $ref (to the $id of one of `schemas`), type, enum, properties,
+    required, additionalProperties and items.
+    """
+    if "$ref" in schema:
+        if schema["$ref"] not in schemas:
+            raise SceneFileError("Unknown schema %s" % schema["$ref"])
+        validate(value, schemas[schema["$ref"]], schemas, path)
+
+    expected: Optional[str] = schema.get("type")
+    if expected is not None and not _is_type(value, expected):
+        raise SceneFileError("%s should be of type %s" % (path, expected))
+    if "enum" in schema and value not in schema["enum"]:
+        raise SceneFileError(
+            "%s should be one of %s" % (path, ", ".join(schema["enum"]))
+        )
+
+    if isinstance(value, dict):
+        for name in schema.get("required", []):
+            if name not in value:
+                raise SceneFileError("%s is missing %s" % (path, name))
+        properties: dict = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        for name, item in value.items():
+            item_path: str = "%s.%s" % (path, name)
+            if name in properties:
+                validate(item, properties[name], schemas, item_path)
+            elif extra is False:
+                raise SceneFileError("%s is not allowed" % item_path)
+            elif isinstance(extra, dict):
+                validate(item, extra, schemas, item_path)
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            validate(item, schema["items"], schemas, "%s[%d]" % (path, i))
+
+def _is_type(value: Any, expected: str) -> bool:
+    # bool is an int as far as isinstance is concerned, but not for JSON.
+    if isinstance(value, bool):
+        return expected == "boolean"
+    return isinstance(value, {
+        "object": dict, "array": list, "string": str, "number": (int, float),
+        "integer": int, "boolean": bool, "null": type(None)
+    }[expected])
+
+def parse(
+    document: dict, schemas: Optional[Dict[str, dict]]=None
+) -> CompiledScene:
+    """
+    Validate a scene file's contents and build the scene.
+    """
+    if schemas is None:
+        schemas = load_schemas()
+    validate(document, schemas[SCENE_SCHEMA], schemas)
+
+    camera_parameters: Tuple[float, ...] = parse_camera(
+        document["camera"], schemas
+    )
+
+    materials: Dict[str, Material] = {
+        name: _material(name, description)
+        for name, description in document.get("materials", {}).items()
+    }
+    spheres: List[Hittable] = []
+    for i, sphere in enumerate(document["spheres"]):
+        material: Optional[Material] = None
+        if "material" in sphere:
+            if sphere["material"] not in materials:
+                raise SceneFileError(
+                    "scene.spheres[%d] has undefined material %s" %
+                    (i, sphere["material"])
+                )
+            material = materials[sphere["material"]]
+        spheres.append(Sphere(
+            _vector(sphere["center"]), float(sphere["radius"]), material,
+            sphere.get("name")
+        ))
+
+    world: BVH = BVH(spheres)
+    # Put the spheres in BVH order, which is the order they are cached in.
+    return CompiledScene(camera_parameters, world.flatten()[0], world)
+
+def parse_camera(
+    camera: dict, schemas: Optional[Dict[str, dict]]=None
+) -> Tuple[float, ...]:
+    """
+    Validate a Camera.json object and spell it out as CAMERA_SIZE floats,
+    see CompiledScene.
+    """
+    if schemas is None:
+        schemas = load_schemas()
+    validate(camera, schemas[CAMERA_SCHEMA], schemas, "camera")
+    # Same defaults as PositionableCamera.
+    return (
+        _vector(camera["camera_posn"]).make_tuple() +
+        _vector(camera["camera_aim"]).make_tuple() +
+        _vector(camera["up_vector"]).make_tuple() + (
+            float(camera["vfov"]), float(camera["aspect_ratio"]),
+            float(camera.get("aperture", 2)),
+            float(camera.get("focus_dist", 1))
+        )
+    )
+
+def make_camera(p: Tuple[float, ...]) -> PositionableCamera:
+    """
+    The camera that `parse_camera` spelled out.
+    """
+    return PositionableCamera(
+        Vec3(p[0], p[1], p[2]), Vec3(p[3], p[4], p[5]),
+        Vec3(p[6], p[7], p[8]), p[9], p[10], p[11], p[12]
+    )
+
+def _vector(vector: dict) -> Vec3:
+    # None of the components are required.
+    return Vec3(
+        float(vector.get("x", 0)), float(vector.get("y", 0)),
+        float(vector.get("z", 0))
+    )
+
+def _material(name: str, description: dict) -> Material:
+    kind: str = description["type"]
+    needs: Dict[str, List[str]] = {
+        "lambertian": ["albedo"], "metal": ["albedo"],
+        "dielectric": ["refractive_index"]
+    }
+    for field in needs.get(kind, []):
+        if field not in description:
+            raise SceneFileError(
+                "scene.materials.%s is a %s without %s" % (name, kind, field)
+            )
+
+    return _build_material(
+        MATERIAL_TYPES.index(kind),
+        _vector(description.get("albedo", {})).make_tuple(),
+        float(description.get("fuzz", 0)),
+        float(description.get("refractive_index", 1))
+    )
+
+def _build_material(
+    kind: int, albedo: Tuple[float, ...], fuzz: float, refractive_index: float
+) -> Material:
+    material_class: type = MATERIAL_CLASSES[kind]
+    if material_class is Lambertian:
+        return Lambertian(Vec3(*albedo))
+    elif material_class is Metal:
+        return Metal(Vec3(*albedo), fuzz)
+    elif material_class is Dielectric:
+        return Dielectric(refractive_index)
+    return material_class()
+
+def save(scene: CompiledScene, path: str):
+    """
+    Write the compiled scene to `path`, atomically, like `checkpoint.save`.
+    """
+    hittables, boxes, nodes = scene.world.flatten()
+    materials: List[Material] = []
+    material_indices: Dict[int, int] = {}
+    kinds: array = array("b")
+    material_data: array = array("d")
+    sphere_data: array = array("d")
+    indices: array = array("i")
+
+    for sphere in hittables:
+        if not isinstance(sphere, Sphere):
+            raise SceneFileError("Only spheres can be cached")
+        sphere_data.extend(sphere.center.make_tuple())
+        sphere_data.append(sphere.radius)
+        material: Material = sphere.material
+        if id(material) not in material_indices:
+            material_indices[id(material)] = len(materials)
+            materials.append(material)
+            kind, parameters = _material_data(material)
+            kinds.append(kind)
+            material_data.extend(parameters)
+        indices.append(material_indices[id(material)])
+
+    names: bytes = json.dumps(
+        [sphere.name for sphere in hittables]  # type: ignore
+    ).encode("utf-8")
+
+    temporary_path: str = "%s.tmp" % path
+    with open(temporary_path, "wb") as cache_file:
+        cache_file.write(HEADER.pack(
+            MAGIC, VERSION, len(materials), len(hittables), len(nodes) // 2,
+            len(names)
+        ))
+        write_array(cache_file, array("d", scene.camera_parameters))
+        write_array(cache_file, kinds)
+        write_array(cache_file, material_data)
+        write_array(cache_file, sphere_data)
+        write_array(cache_file, indices)
+        cache_file.write(names)
+        write_array(cache_file, boxes)
+        write_array(cache_file, nodes)
+
+    os.replace(temporary_path, path)
+
+def _material_data(material: Material) -> Tuple[int, Tuple[float, ...]]:
+    albedo: Tuple[float, ...] = (0.0, 0.0, 0.0)
+    fuzz: float = 0.0
+    refractive_index: float = 1.0
+    if isinstance(material, (Lambertian, Metal)):
+        albedo = material.albedo.make_tuple()
+    if isinstance(material, Metal):
+        fuzz = material.fuzz
+    if isinstance(material, Dielectric):
+        refractive_index = material.refractive_index
+
+    # Subclasses (with behavior of their own) can't be rebuilt from this.
+    if type(material) not in MATERIAL_CLASSES:
+        raise SceneFileError("Can't cache %s" % type(material).__name__)
+    return (
+        MATERIAL_CLASSES.index(type(material)),
+        albedo + (fuzz, refractive_index)
+    )
+
+def load_compiled(path: str) -> CompiledScene:
+    with open(path, "rb") as cache_file:
+        header: bytes = cache_file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise SceneFileError("%s is not a compiled scene" % path)
+        magic, version, material_count, sphere_count, node_count, names_size = (
+            HEADER.unpack(header)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise SceneFileError("%s is not a compiled scene" % path)
+
+        camera_parameters: array = array("d", bytes(8 * CAMERA_SIZE))
+        kinds: array = array("b", bytes(material_count))
+        material_data: array = array("d", bytes(8 * 5 * material_count))
+        sphere_data: array = array("d", bytes(8 * 4 * sphere_count))
+        indices: array = array("i", bytes(4 * sphere_count))
+        boxes: array = array("d", bytes(8 * 6 * node_count))
+        nodes: array = array("i", bytes(4 * 2 * node_count))
+        try:
+            read_array(cache_file, camera_parameters)
+            read_array(cache_file, kinds)
+            read_array(cache_file, material_data)
+            read_array(cache_file, sphere_data)
+            read_array(cache_file, indices)
+            names: List[str] = json.loads(
+                cache_file.read(names_size).decode("utf-8")
+            )
+            read_array(cache_file, boxes)
+            read_array(cache_file, nodes)
+        except (CheckpointError, ValueError) as error:
+            raise SceneFileError("%s is damaged: %s" % (path, error))
+
+    parameters: List[float] = material_data.tolist()
+    materials: List[Material] = [
+        _build_material(
+            kind, tuple(parameters[5 * i:5 * i + 3]), parameters[5 * i + 3],
+            parameters[5 * i + 4]
+        ) for i, kind in enumerate(kinds)
+    ]
+    spheres: List[float] = sphere_data.tolist()
+    hittables: List[Hittable] = [
+        Sphere(
+            Vec3(spheres[s], spheres[s + 1], spheres[s + 2]), spheres[s + 3],
+            materials[index], name
+        ) for s, index, name in zip(
+            range(0, len(spheres), 4), indices.tolist(), names
+        )
+    ]
+    return CompiledScene(
+        tuple(camera_parameters), hittables,
+        BVH.unflatten(hittables, boxes, nodes)
+    )
+
+def load(
+    path: str, cache_directory: Optional[str]=CACHE_DIRECTORY
+) -> CompiledScene:
+    """
+    Load a scene file, from the cache if it has been compiled before. A
+    `cache_directory` of None means no caching at all.
+    """
+    with open(path, "rb") as scene_file:
+        contents: bytes = scene_file.read()
+    if cache_directory is None:
+        return parse(_decode(path, contents))
+
+    cache_path: str = os.path.join(
+        cache_directory, "%s.scene" % hashlib.sha256(contents).hexdigest()
+    )
+    if os.path.exists(cache_path):
+        try:
+            return load_compiled(cache_path)
+        except SceneFileError:
+            # Left by an older version, or cut short. Compile it again.
+            pass
+
+    scene: CompiledScene = parse(_decode(path, contents))
+    os.makedirs(cache_directory, exist_ok=True)
+    save(scene, cache_path)
+    return scene
+
+def _decode(path: str, contents: bytes) -> dict:
+    try:
+        return json.loads(contents.decode("utf-8"))
+    except ValueError as error:
+        raise SceneFileError("%s is not valid JSON: %s" % (path, error))
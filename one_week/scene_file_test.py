@@ -0,0 +1,169 @@
+from one_week import scene_file
+from one_week.camera import PositionableCamera
+from one_week.material import Dielectric, Lambertian, Metal, Vanta
+from one_week.ray import Ray
+from one_week.scene_file import SceneFileError
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from unittest import mock
+
+import copy
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+SCENE = {
+    "camera": {
+        "camera_posn": {"x": 3, "y": 3, "z": 2},
+        "camera_aim": {"z": -1},
+        "up_vector": {"y": 1},
+        "vfov": 20,
+        "aspect_ratio": 2,
+        "aperture": 0.1,
+        "focus_dist": 4
+    },
+    "materials": {
+        "red": {"type": "lambertian", "albedo": {"x": 0.8, "y": 0.3, "z": 0.3}},
+        "gold": {
+            "type": "metal", "albedo": {"x": 0.8, "y": 0.6, "z": 0.2},
+            "fuzz": 0.3
+        },
+        "glass": {"type": "dielectric", "refractive_index": 1.5}
+    },
+    "spheres": [
+        {"center": {"z": -1}, "radius": 0.5, "material": "red", "name": "a"},
+        {"center": {"y": -100.5, "z": -1}, "radius": 100, "material": "red"},
+        {"center": {"x": 1, "z": -1}, "radius": 0.5, "material": "gold"},
+        {"center": {"x": -1, "z": -1}, "radius": 0.5, "material": "glass"},
+        {"center": {"x": 2, "z": -1}, "radius": 0.25}
+    ]
+}
+
+class SceneFileTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_directory = os.path.join(self.directory, "cache")
+        self.path = os.path.join(self.directory, "scene.json")
+        with open(self.path, "w") as scene:
+            json.dump(SCENE, scene)
+
+    def test_parse(self):
+        scene = scene_file.parse(SCENE)
+
+        self.assertIsInstance(scene.camera, PositionableCamera)
+        self.assertEqual(2, scene.aspect_ratio)
+        self.assertEqual(5, len(scene.hittables))
+        by_radius = sorted(scene.hittables, key=lambda sphere: sphere.radius)
+        self.assertIsInstance(by_radius[0].material, Vanta)
+        self.assertEqual(Vec3(2, 0, -1), by_radius[0].center)
+        materials = [type(sphere.material) for sphere in scene.hittables]
+        self.assertEqual(2, materials.count(Lambertian))
+        self.assertIn(Metal, materials)
+        self.assertIn(Dielectric, materials)
+        self.assertIn("a", [sphere.name for sphere in scene.hittables])
+
+    def test_invalid(self):
+        cases = [
+            ("camera", "scene is missing camera", lambda s: s.pop("camera")),
+            (
+                "vfov", "scene.camera.vfov should be of type number",
+                lambda s: s["camera"].update(vfov="wide")
+            ),
+            (
+                "material type", "scene.materials.red.type should be one of",
+                lambda s: s["materials"]["red"].update(type="plastic")
+            ),
+            (
+                "undefined material", "has undefined material chrome",
+                lambda s: s["spheres"][0].update(material="chrome")
+            ),
+            (
+                "albedo", "is a metal without albedo",
+                lambda s: s["materials"]["gold"].pop("albedo")
+            ),
+            (
+                "radius", r"scene.spheres\[2\].radius should be of type number",
+                lambda s: s["spheres"][2].update(radius=True)
+            )
+        ]
+        for name, message, break_scene in cases:
+            with self.subTest(name):
+                broken = copy.deepcopy(SCENE)
+                break_scene(broken)
+                with self.assertRaisesRegex(SceneFileError, message):
+                    scene_file.parse(broken)
+
+    def test_compiled_round_trip(self):
+        scene = scene_file.parse(SCENE)
+        path = os.path.join(self.directory, "scene.scene")
+        scene_file.save(scene, path)
+        loaded = scene_file.load_compiled(path)
+
+        self.assertEqual(scene.camera_parameters, loaded.camera_parameters)
+        self.assertEqual(
+            scene.camera.lower_left_corner, loaded.camera.lower_left_corner
+        )
+        for expected, actual in zip(scene.hittables, loaded.hittables):
+            self.assertEqual(expected.center, actual.center)
+            self.assertEqual(expected.radius, actual.radius)
+            self.assertEqual(expected.name, actual.name)
+            self.assertIs(type(expected.material), type(actual.material))
+        self.assertIs(loaded.hittables[0].material, loaded.hittables[1].material)
+
+        ray = Ray(Vec3(0, 0, 0), Vec3(0.9, -0.1, -1))
+        expected = scene.world.hit(ray, 0.001, sys.float_info.max)
+        actual = loaded.world.hit(ray, 0.001, sys.float_info.max)
+        self.assertEqual(expected.t, actual.t)
+
+    def test_load_uses_cache(self):
+        first = scene_file.load(self.path, self.cache_directory)
+        self.assertEqual(1, len(os.listdir(self.cache_directory)))
+
+        with mock.patch.object(
+            scene_file, "parse", side_effect=AssertionError("parsed again")
+        ):
+            second = scene_file.load(self.path, self.cache_directory)
+        self.assertEqual(first.camera_parameters, second.camera_parameters)
+
+        # Another scene, another cache entry.
+        with open(self.path, "a") as scene:
+            scene.write("\n")
+        scene_file.load(self.path, self.cache_directory)
+        self.assertEqual(2, len(os.listdir(self.cache_directory)))
+
+    def test_damaged_cache_is_rebuilt(self):
+        scene_file.load(self.path, self.cache_directory)
+        cache_path = os.path.join(
+            self.cache_directory, os.listdir(self.cache_directory)[0]
+        )
+        with open(cache_path, "r+b") as cache:
+            cache.truncate(100)
+
+        scene = scene_file.load(self.path, self.cache_directory)
+        self.assertEqual(5, len(scene.hittables))
+        self.assertGreater(os.path.getsize(cache_path), 100)
+
+    def test_uncacheable_material(self):
+        class Glowing(Lambertian):
+            pass
+
+        scene = scene_file.parse(SCENE)
+        scene.hittables[0].material = Glowing(Vec3(1, 1, 1))
+        with self.assertRaises(SceneFileError):
+            scene_file.save(scene, os.path.join(self.directory, "x.scene"))
+
+    def test_example_scene(self):
+        path = os.path.join(
+            os.path.dirname(scene_file.SCHEMA_DIRECTORY), "scenes",
+            "8_dielectrics.json"
+        )
+        scene = scene_file.load(path, None)
+        self.assertEqual(4, len(scene.hittables))
+
+if __name__ == "__main__":
+    unittest.main()
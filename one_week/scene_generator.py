@@ -1,18 +1,21 @@
+"""
+Render the cover of Ray Tracing in One Weekend. At full size, that takes a
+while: pass --checkpoint to be able to --resume it.
+"""
+from one_week import engine
 from one_week.camera import Camera, PositionableCamera
-from one_week.hittable import HitRecord, Hittable, HittableList
-from one_week.material import Dielectric, Lambertian, Metal, ReflectionRecord
-from one_week.ppm import PPM
-from one_week.ray import Ray
+from one_week.engine import Scene
+from one_week.hittable import Hittable
+from one_week.material import Dielectric, Lambertian, Metal
 from one_week.sphere import Sphere
-from one_week.utils import _derive_ppm_filename
 from one_week.vec3 import Vec3
-from typing import List, Optional
+from typing import List
 
-import math
 import random
-import sys
 
-UNIT_VEC3: Vec3 = Vec3(1, 1, 1)
+WIDTH: int = 1200
+HEIGHT: int = 800
+SAMPLES: int = 10
 
 def random_scene(
     x_min: int, x_max: int, z_min: int, z_max: int
@@ -67,60 +70,22 @@ def random_scene(
 
     return world
 
-def color(ray: Ray, world: HittableList, depth: int) -> Vec3:
-    # Some reflected rays hit not at zero but at some near-zero value due to
-    # floating point shennanigans. So we try to compensate for that.
-    hit_attempt: Optional[HitRecord] = world.hit(ray, 0.001, sys.float_info.max)
-    if hit_attempt is not None:
-        scattering: ReflectionRecord = hit_attempt.material.scatter(ray, hit_attempt)
-        # FIXME Is it really worthwhile to check if reflection is not None here?
-        # All our Materials assume that a hit has been made, and therefore some
-        # reflection should happen (unless it is Vanta).
-        if depth < 50 and scattering is not None:
-            # Compare this with the hard-coded reflection in 6_matterial.
-            return scattering.attenuation * color(scattering.scattering, world, depth + 1)
-        else:
-            return Vec3(0, 0, 0)
-    else:
-        unit_direction: Vec3 = ray.direction.unit_vector()
-        t: float = 0.5 * (unit_direction.y + 1)
-        return ((1.0 - t) * UNIT_VEC3) + (t * Vec3(0.5, 0.7, 1.0))
-
-if __name__ == "__main__":
-    width: int = 1200
-    height: int = 800
-    sampling_size: int = 10
-    ppm: PPM = PPM(width, height)
-    spam: List[Hittable] = random_scene(-11, 11, -11, 11)
-    world = HittableList(spam)
-    print(spam)
-
+def camera(width: int, height: int) -> Camera:
     lookfrom: Vec3 = Vec3(13, 2, 3)
     lookat: Vec3 = Vec3(0, 0, 0)
-    focus_distance: float = 10.0;
+    focus_distance: float = 10.0
     aperture: float = 0.1
 
-    camera: Camera = PositionableCamera(
+    return PositionableCamera(
         lookfrom, lookat, Vec3(0, 1, 0), 20, width / height, aperture,
         focus_distance
     )
 
-    for j in range(height - 1, -1, -1):
-        for i in range(width):
-            print("Tracing on row %s, col %s" % (j, i))
-            accumulator: Vec3 = Vec3(0, 0, 0)
-
-            for sample in range(sampling_size):
-                u: float = float(i + random.random()) / width
-                v: float = float(j + random.random()) / height
-                r: Ray = camera.get_ray(u, v)
-                accumulator += color(r, world, 0)
+def scene(width: int, height: int) -> Scene:
+    """
+    The cover, with a new random_scene every time.
+    """
+    return Scene(random_scene(-11, 11, -11, 11), camera(width, height))
 
-            accumulator /= sampling_size
-            accumulator.map(math.sqrt)
-            accumulator *= 255.9
-            accumulator.map(int)
-
-            ppm.set_pixel((height - 1) - j, i, accumulator)
-
-    ppm.write(_derive_ppm_filename())
+if __name__ == "__main__":
+    engine.run(scene, WIDTH, HEIGHT, SAMPLES)
@@ -0,0 +1,801 @@
+"""
+A render service: a long-running process taking render jobs over HTTP.
+
+Rendering from a shell loop pays for a fresh interpreter, the imports, the
+scene build and a new pool of processes every time. The service pays for
+them once. Scenes stay built and packed for the wavefront tracer (in shared
+memory, see one_week.parallel) for as long as they keep getting used, and the
+worker processes stay up, holding on to the scenes they have seen.
+
+Start it with:
+
+    python -m one_week serve --port 7878
+
+and talk to it in JSON:
+
+    POST   /jobs               start a job, see `JobRequest` for the fields
+    GET    /jobs               every job and how far along it is
+    GET    /jobs/ID            one of them
+    GET    /jobs/ID/events     progress and tiles as they are rendered
+    GET    /jobs/ID/image      the image so far, as a binary PPM
+    DELETE /jobs/ID            cancel it
+    GET    /scenes             the scenes being kept warm
+
+For example:
+
+    curl -d '{"scene": "scene_generator", "width": 600, "height": 400,
+              "samples": 16, "seed": 3}' localhost:7878/jobs
+    curl -N localhost:7878/jobs/1/events
+
+The events are newline-delimited JSON, sent as they happen: a "progress"
+event whenever a tile is done, preceded by a "tile" event with its pixels (as
+base64 of the RGB bytes that go in the PPM, unless asked for with
+`?tiles=0`), and a last event with the status the job ended up in. A client
+connecting late gets what it missed first.
+
+Scene files are only read from the scenes directory (`serve
+--scenes-directory DIRECTORY`), and images only written into the output
+directory (`serve --output-directory DIRECTORY`), if the service has them.
+
+Only the last `HISTORY` jobs that are over are kept, images and all. Older
+ones are gone (410) rather than unknown (404).
+
+Given a TileCache (`serve --cache DIRECTORY`), the tiles of jobs with a seed
+are kept, and a job asking for the same thing again (the same scene, camera,
+size, samples, seed and sampler) takes them from there.
+
+Jobs run one at a time, in the order they came in, each on all the workers.
+Needs NumPy, like one_week.parallel.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from one_week import engine, scene_file
+from one_week.camera import Camera
+from one_week.engine import Scene
+from one_week.framebuffer import ppm_header, quantize
+from one_week.parallel import (
+    TILE_SIZE, SharedArray, attach_scene, scene_arrays, share_scene
+)
+from one_week.rng import SAMPLERS
+from one_week.sampler import make_sampler
+from one_week.tile import Tile, split_tiles
+from one_week.tile_cache import TileCache, render_key
+from one_week.wavefront import MAX_DEPTH, WavefrontCamera, WavefrontScene
+from typing import (
+    Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Union
+)
+
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import multiprocessing
+import numpy as np
+import os
+import random
+import time
+import urllib.parse
+
+import one_week.wavefront as wavefront
+
+PORT: int = 7878
+# Scenes kept built and shared. The least recently used goes first.
+WARM_SCENES: int = 8
+# Tiles in flight per worker, so that none of them waits for the next one.
+TILES_PER_WORKER: int = 2
+# Jobs kept once they're over. An image at 1200x800 is 23MB.
+HISTORY: int = 16
+
+class RequestError(Exception):
+    """
+    Something wrong with a request, to be answered with `status`.
+    """
+
+    def __init__(self, message: str, status: int=400):
+        super().__init__(message)
+        self.status: int = status
+
+class JobRequest(NamedTuple):
+    """
+    What to render. `scene` is the name of a scene module of one_week (like
+    "8_dielectrics"), the name of a JSON scene file in the service's scenes
+    directory, or the contents of one.
+    A `camera` (a Camera.json object) replaces the scene's own. `seed` seeds
+    the scene, if it's random, as well as the render. If `output` is given,
+    the image is also written there when done, within the service's output
+    directory.
+    """
+    scene: Union[str, dict]
+    width: int
+    height: int
+    samples: int
+    seed: Optional[int] = None
+    camera: Optional[dict] = None
+    sampler: str = "random"
+    max_depth: int = MAX_DEPTH
+    tile_size: int = TILE_SIZE
+    output: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, document: Any) -> "JobRequest":
+        if not isinstance(document, dict):
+            raise RequestError("Expected a JSON object")
+        unknown: List[str] = sorted(set(document) - set(cls._fields))
+        if unknown:
+            raise RequestError("Unknown fields %s" % ", ".join(unknown))
+        if "scene" not in document:
+            raise RequestError("No scene")
+        scene: Any = document["scene"]
+        if not isinstance(scene, (str, dict)):
+            raise RequestError("scene is a name, a path or a scene object")
+        # Importing a module runs it, so only the scenes of one_week. Not
+        # one_week.__main__ either, which would run the command line.
+        if isinstance(scene, str) and not scene.endswith(".json") and (
+            any(character in scene for character in "./\\") or
+            scene.startswith("_")
+        ):
+            raise RequestError(
+                "scene is a scene module of one_week, like 8_dielectrics, or "
+                "a .json file"
+            )
+
+        defaults: Dict[str, int] = {
+            "width": engine.WIDTH, "height": engine.HEIGHT,
+            "samples": engine.SAMPLES
+        }
+        if isinstance(scene, str) and not scene.endswith(".json"):
+            module = _load_module(scene)
+            defaults = {
+                key.lower(): getattr(module, key, value)
+                for key, value in (
+                    ("WIDTH", engine.WIDTH), ("HEIGHT", engine.HEIGHT),
+                    ("SAMPLES", engine.SAMPLES)
+                )
+            }
+        fields: Dict[str, Any] = dict(defaults)
+        fields.update(document)
+
+        for name in ("width", "height", "samples", "max_depth", "tile_size"):
+            if name in fields and not (
+                isinstance(fields[name], int) and fields[name] > 0
+            ):
+                raise RequestError("%s must be a positive integer" % name)
+        if fields.get("seed") is not None and not isinstance(
+            fields["seed"], int
+        ):
+            raise RequestError("seed must be an integer")
+        if fields.get("output") is not None and not isinstance(
+            fields["output"], str
+        ):
+            raise RequestError("output must be a file name")
+        if fields.get("sampler", "random") not in SAMPLERS:
+            raise RequestError(
+                "Unknown sampler %s, expected one of %s" %
+                (fields["sampler"], SAMPLERS)
+            )
+        if fields.get("camera") is not None:
+            try:
+                scene_file.parse_camera(fields["camera"])
+            except scene_file.SceneFileError as error:
+                raise RequestError(str(error))
+        return cls(**fields)
+
+def _load_module(name: str):
+    try:
+        return engine.load_scene(name)
+    except (ImportError, ValueError) as error:
+        raise RequestError("No scene %s: %s" % (name, error))
+
+class WarmScene(object):
+    """
+    A scene, built and in shared memory for the workers.
+    """
+
+    def __init__(self, key: str, scene: Scene, size: Tuple[int, int]):
+        """
+        `size` is the width and height the scene was made for.
+        """
+        self.key: str = key
+        self.scene: Scene = scene
+        self.size: Tuple[int, int] = size
+        self.blocks: List[shared_memory.SharedMemory] = []
+        # Kept for the keys of the tile cache, which take the camera of
+        # every job.
+        self.packed: WavefrontScene = WavefrontScene.from_hittables(
+            scene.hittables
+        )
+        self.shared: Dict[str, SharedArray] = share_scene(
+            self.packed, WavefrontCamera.from_camera(scene.camera), self.blocks
+        )
+        self.jobs: int = 0
+
+    def release(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+# The scenes a worker process is attached to, oldest first, with the blocks
+# they are in. They go by the name of a block rather than the key of the
+# scene: a random scene built again has the same key.
+_attached: Dict[
+    str, Tuple[List[shared_memory.SharedMemory], WavefrontScene]
+] = collections.OrderedDict()
+
+def _render_tile(
+    shared: Dict[str, SharedArray], camera: np.ndarray,
+    width: int, height: int, tile: Tile, samples: int, seed: int,
+    shading: str, max_depth: int, sampler: str
+) -> np.ndarray:
+    """
+    Render a tile, in a worker process.
+    """
+    key: str = shared["centers"].name
+    if key in _attached:
+        _attached.move_to_end(key)  # type: ignore
+    else:
+        blocks: List[shared_memory.SharedMemory] = []
+        _attached[key] = (blocks, attach_scene(shared, blocks)[0])
+        while len(_attached) > WARM_SCENES:
+            _, (old_blocks, _) = _attached.popitem(last=False)  # type: ignore
+            for block in old_blocks:
+                block.close()
+    scene: WavefrontScene = _attached[key][1]
+    return wavefront.render_tile(
+        scene, WavefrontCamera.unpack(camera), width, height, tile.x0,
+        tile.y0, tile.x1, tile.y1, samples, seed, shading, max_depth, 0,
+        make_sampler(sampler, samples)
+    )
+
+class Job(object):
+
+    def __init__(self, job_id: int, request: JobRequest):
+        self.id: int = job_id
+        self.request: JobRequest = request
+        self.status: str = "queued"
+        self.error: Optional[str] = None
+        # Where to write the image, once checked by the service.
+        self.output: Optional[str] = None
+        self.scene_key: Optional[str] = None
+        self.warm: bool = False
+        self.tiles_cached: int = 0
+        self.tiles: List[Tile] = split_tiles(
+            request.width, request.height, request.tile_size
+        )
+        # In the order they got done.
+        self.finished: List[Tile] = []
+        self.image: np.ndarray = np.zeros((request.height, request.width, 3))
+        self.gamma_correct: bool = True
+        self.submitted: float = time.time()
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.changed: asyncio.Condition = asyncio.Condition()
+
+    @property
+    def over(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def describe(self) -> Dict[str, Any]:
+        request: Dict[str, Any] = self.request._asdict()
+        if isinstance(request["scene"], dict):
+            request["scene"] = "(inline)"
+        return {
+            "id": self.id, "status": self.status, "error": self.error,
+            "request": request, "scene": self.scene_key,
+            "scene_was_warm": self.warm, "tiles": len(self.tiles),
+            "tiles_done": len(self.finished),
+            "tiles_cached": self.tiles_cached,
+            "submitted": self.submitted, "started": self.started,
+            "ended": self.ended,
+            "seconds": (
+                (self.ended or time.time()) - self.started
+                if self.started is not None else None
+            )
+        }
+
+    def tile_event(self, tile: Tile) -> Dict[str, Any]:
+        pixels: np.ndarray = quantize(
+            self.image[tile.y0:tile.y1, tile.x0:tile.x1], self.gamma_correct
+        )
+        return {
+            "event": "tile", "index": tile.index, "x0": tile.x0,
+            "y0": tile.y0, "x1": tile.x1, "y1": tile.y1,
+            "pixels": base64.b64encode(pixels.tobytes()).decode("ascii")
+        }
+
+    def progress_event(self) -> Dict[str, Any]:
+        return {
+            "event": "progress", "tiles_done": len(self.finished),
+            "tiles": len(self.tiles)
+        }
+
+    def ppm(self) -> bytes:
+        return ppm_header(self.request.width, self.request.height) + quantize(
+            self.image, self.gamma_correct
+        ).tobytes()
+
+    async def notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def events(self, tiles: bool=True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Everything that happened so far, then everything that happens next,
+        until the job is over.
+        """
+        sent: int = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(
+                    lambda: len(self.finished) > sent or self.over
+                )
+            while sent < len(self.finished):
+                if tiles:
+                    yield self.tile_event(self.finished[sent])
+                sent += 1
+                yield dict(self.progress_event(), tiles_done=sent)
+            if self.over and sent == len(self.finished):
+                yield dict(self.describe(), event=self.status)
+                return
+
+class RenderService(object):
+    """
+    The jobs, the warm scenes and the workers. `serve` puts it on HTTP.
+    """
+
+    def __init__(
+        self, workers: Optional[int]=None, warm_scenes: int=WARM_SCENES,
+        cache: Optional[TileCache]=None, history: int=HISTORY,
+        output_directory: Optional[str]=None,
+        scenes_directory: Optional[str]=None
+    ):
+        """
+        With a cache, the tiles of jobs with a seed are kept there, and jobs
+        asking for the same thing again take them from there. Of the jobs
+        that are over, the last `history` are kept. Jobs can only write
+        their images into `output_directory`, and only render scene files
+        from `scenes_directory`: neither at all without one.
+        """
+        self.workers: int = workers or os.cpu_count() or 1
+        self.warm_scenes: int = warm_scenes
+        self.cache: Optional[TileCache] = cache
+        self.history: int = history
+        self.output_directory: Optional[str] = output_directory
+        self.scenes_directory: Optional[str] = scenes_directory
+        # In the order they were submitted.
+        self.jobs: Dict[int, Job] = {}
+        self.scenes: "collections.OrderedDict[str, WarmScene]" = (
+            collections.OrderedDict()
+        )
+        # Forking from a process that already runs threads (the event loop's
+        # executor builds scenes) can copy a held lock into the worker.
+        self.__pool: ProcessPoolExecutor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context(
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+        )
+        self.__queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self.__runner: Optional[asyncio.Task] = None
+        self.__next_id: int = 1
+
+    def submit(self, request: JobRequest) -> Job:
+        output: Optional[str] = self.__output(request)
+        if isinstance(request.scene, str) and request.scene.endswith(".json"):
+            request = request._replace(scene=self.__scene_file(request))
+        job: Job = Job(self.__next_id, request)
+        job.output = output
+        self.__next_id += 1
+        self.jobs[job.id] = job
+        self.__queue.put_nowait(job)
+        if self.__runner is None:
+            self.__runner = asyncio.ensure_future(self.__run_jobs())
+        return job
+
+    def __output(self, request: JobRequest) -> Optional[str]:
+        """
+        The file to write the request's image to, which has to be in the
+        output directory (symbolic links followed).
+        """
+        if request.output is None:
+            return None
+        if self.output_directory is None:
+            raise RequestError("This service has no output directory")
+        directory: str = os.path.realpath(self.output_directory)
+        path: str = os.path.realpath(os.path.join(directory, request.output))
+        if (
+            path == directory or
+            os.path.commonpath([directory, path]) != directory
+        ):
+            raise RequestError(
+                "output is a file name within the output directory"
+            )
+        return path
+
+    def __scene_file(self, request: JobRequest) -> str:
+        """
+        The scene file the request names, which has to be in the scenes
+        directory (symbolic links followed). Whether it exists is only found
+        out then, so a client can't probe the rest of the file system.
+        """
+        if self.scenes_directory is None:
+            raise RequestError("This service has no scenes directory")
+        directory: str = os.path.realpath(self.scenes_directory)
+        path: str = os.path.realpath(
+            os.path.join(directory, request.scene)  # type: ignore
+        )
+        if os.path.commonpath([directory, path]) != directory:
+            raise RequestError(
+                "scene is a file name within the scenes directory"
+            )
+        return path
+
+    async def cancel(self, job: Job):
+        if not job.over:
+            job.status = "cancelled"
+            job.ended = time.time()
+            await job.notify()
+            self.__forget()
+
+    def __forget(self):
+        """
+        Let go of the jobs that are over, all but the last `history` of them
+        to end. Whoever is still streaming their events keeps them until
+        done.
+        """
+        over: List[Job] = sorted(
+            (job for job in self.jobs.values() if job.over),
+            key=lambda job: job.ended or 0
+        )
+        for job in over[:max(len(over) - self.history, 0)]:
+            del self.jobs[job.id]
+
+    async def __run_jobs(self):
+        while True:
+            job: Job = await self.__queue.get()
+            if job.status == "queued":
+                await self.__run(job)
+
+    async def __run(self, job: Job):
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        request: JobRequest = job.request
+        job.status = "running"
+        job.started = time.time()
+        await job.notify()
+        try:
+            # Building a scene can take a while, so it's done on another
+            # thread and the server keeps serving. The warm scenes are only
+            # ever looked at and changed on this one.
+            job.scene_key = await loop.run_in_executor(
+                None, self.__scene_key, request
+            )
+            warm: Optional[WarmScene] = self.scenes.get(job.scene_key)
+            job.warm = warm is not None
+            if warm is None:
+                warm = await loop.run_in_executor(
+                    None, self.__warm, job.scene_key, request
+                )
+                self.scenes[job.scene_key] = warm
+                while len(self.scenes) > self.warm_scenes:
+                    _, old = self.scenes.popitem(last=False)
+                    old.release()
+            self.scenes.move_to_end(job.scene_key)
+            warm.jobs += 1
+            camera, key = await loop.run_in_executor(
+                None, self.__camera, warm, request
+            )
+            job.gamma_correct = warm.scene.gamma_correct
+            packed_camera: np.ndarray = camera.pack()
+            seed: int = (
+                request.seed if request.seed is not None
+                else wavefront.new_seed()
+            )
+            remaining = iter(job.tiles)
+            running: Dict[asyncio.Future, Tile] = {}
+            while True:
+                while (
+                    job.status == "running" and
+                    len(running) < self.workers * TILES_PER_WORKER
+                ):
+                    tile: Optional[Tile] = next(remaining, None)
+                    if tile is None:
+                        break
+                    cached: Optional[np.ndarray] = (
+                        self.cache.get(key, tile)
+                        if self.cache is not None and key is not None
+                        else None
+                    )
+                    if cached is not None:
+                        job.image[tile.y0:tile.y1, tile.x0:tile.x1] = cached
+                        job.finished.append(tile)
+                        job.tiles_cached += 1
+                        continue
+                    running[loop.run_in_executor(
+                        self.__pool, _render_tile, warm.shared,
+                        packed_camera, request.width, request.height, tile,
+                        request.samples, seed, warm.scene.shading,
+                        request.max_depth, request.sampler
+                    )] = tile
+                if not running:
+                    break
+                done, _ = await asyncio.wait(
+                    list(running), return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    tile = running.pop(future)
+                    pixels: np.ndarray = future.result()
+                    job.image[tile.y0:tile.y1, tile.x0:tile.x1] = pixels
+                    job.finished.append(tile)
+                    if self.cache is not None and key is not None:
+                        self.cache.put(key, tile, pixels)
+                await job.notify()
+
+            if job.status == "running":
+                if job.output is not None:
+                    with open(job.output, "wb") as output:
+                        output.write(job.ppm())
+                job.status = "done"
+        except Exception as error:
+            job.status = "failed"
+            job.error = "%s: %s" % (type(error).__name__, error)
+        if job.ended is None:
+            job.ended = time.time()
+        await job.notify()
+        self.__forget()
+
+    @staticmethod
+    def __scene_key(request: JobRequest) -> str:
+        """
+        What the request's scene is kept warm by: its contents, or for a
+        module, its name and the seed it's made with.
+        """
+        if isinstance(request.scene, dict):
+            return "inline:%s" % hashlib.sha256(
+                json.dumps(request.scene, sort_keys=True).encode("utf-8")
+            ).hexdigest()[:16]
+        if request.scene.endswith(".json"):
+            with open(request.scene, "rb") as scene_file_handle:
+                return "%s:%s" % (
+                    request.scene,
+                    hashlib.sha256(scene_file_handle.read()).hexdigest()[:16]
+                )
+        return "%s:%s" % (request.scene, request.seed)
+
+    def __warm(self, key: str, request: JobRequest) -> WarmScene:
+        return WarmScene(
+            key, self.__build(request), (request.width, request.height)
+        )
+
+    def __camera(
+        self, warm: WarmScene, request: JobRequest
+    ) -> Tuple[WavefrontCamera, Optional[str]]:
+        """
+        The camera to render the job with and its key in the tile cache, if
+        it has one.
+        """
+        camera: Camera = warm.scene.camera
+        if request.camera is not None:
+            camera = scene_file.make_camera(
+                scene_file.parse_camera(request.camera)
+            )
+        elif (
+            isinstance(request.scene, str) and
+            not request.scene.endswith(".json") and
+            warm.size != (request.width, request.height)
+        ):
+            # Some module scenes fit the camera to the image, and say how.
+            module = _load_module(request.scene)
+            if callable(getattr(module, "camera", None)):
+                camera = module.camera(request.width, request.height)
+        packed_camera: WavefrontCamera = WavefrontCamera.from_camera(camera)
+        key: Optional[str] = None
+        if self.cache is not None and request.seed is not None:
+            key = render_key(
+                scene_arrays(warm.packed, packed_camera), request.width,
+                request.height, request.samples, request.seed,
+                warm.scene.shading, request.max_depth,
+                make_sampler(request.sampler, request.samples)
+            )
+        return packed_camera, key
+
+    @staticmethod
+    def __build(request: JobRequest) -> Scene:
+        if isinstance(request.scene, dict):
+            return scene_file.parse(request.scene).scene(
+                request.width, request.height
+            )
+        if request.scene.endswith(".json"):
+            return scene_file.load(request.scene).scene(
+                request.width, request.height
+            )
+        if request.seed is not None:
+            random.seed(request.seed)
+        return _load_module(request.scene).scene(request.width, request.height)
+
+    def close(self):
+        if self.__runner is not None:
+            self.__runner.cancel()
+        self.__pool.shutdown(wait=True)
+        for warm in self.scenes.values():
+            warm.release()
+        self.scenes.clear()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """
+        One HTTP request. Every response closes the connection.
+        """
+        try:
+            try:
+                method, target, body = await _read_request(reader)
+                await self.__route(method, target, body, writer)
+            except RequestError as error:
+                await _respond(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __route(
+        self, method: str, target: str, body: bytes,
+        writer: asyncio.StreamWriter
+    ):
+        url = urllib.parse.urlsplit(target)
+        query: Dict[str, List[str]] = urllib.parse.parse_qs(url.query)
+        parts: List[str] = [part for part in url.path.split("/") if part]
+
+        if parts == ["jobs"] and method == "POST":
+            try:
+                document: Any = json.loads(body.decode("utf-8"))
+            except ValueError as error:
+                raise RequestError("Not JSON: %s" % error)
+            job: Job = self.submit(JobRequest.from_json(document))
+            await _respond(writer, 202, job.describe())
+        elif parts == ["jobs"] and method == "GET":
+            await _respond(writer, 200, [
+                job.describe() for job in self.jobs.values()
+            ])
+        elif parts == ["scenes"] and method == "GET":
+            await _respond(writer, 200, [
+                {
+                    "key": warm.key, "spheres": len(warm.scene.hittables),
+                    "jobs": warm.jobs
+                } for warm in self.scenes.values()
+            ])
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.__job(parts[1])
+            action: Tuple[str, str] = (
+                method, parts[2] if len(parts) == 3 else ""
+            )
+            if action == ("GET", ""):
+                await _respond(writer, 200, job.describe())
+            elif action == ("DELETE", ""):
+                await self.cancel(job)
+                await _respond(writer, 200, job.describe())
+            elif action == ("GET", "image"):
+                await _respond(
+                    writer, 200, job.ppm(), "image/x-portable-pixmap"
+                )
+            elif action == ("GET", "events"):
+                tiles: bool = query.get("tiles", ["1"])[-1] not in ("0", "no")
+                await _stream(writer, job.events(tiles))
+            else:
+                raise RequestError("Not found", 404)
+        else:
+            raise RequestError("Not found", 404)
+
+    def __job(self, job_id: str) -> Job:
+        if not job_id.isdigit() or int(job_id) >= self.__next_id:
+            raise RequestError("No job %s" % job_id, 404)
+        if int(job_id) not in self.jobs:
+            raise RequestError("Job %s is gone" % job_id, 410)
+        return self.jobs[int(job_id)]
+
+_REASONS: Dict[int, str] = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    410: "Gone", 413: "Payload Too Large"
+}
+# Scene objects can be big, but not this big.
+MAX_BODY: int = 64 << 20
+
+async def _read_request(
+    reader: asyncio.StreamReader
+) -> Tuple[str, str, bytes]:
+    request_line: List[str] = (
+        await reader.readline()
+    ).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise RequestError("Bad request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line: bytes = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length: int = int(headers.get("content-length", "0") or "0")
+    if length > MAX_BODY:
+        raise RequestError("Request too big", 413)
+    body: bytes = await reader.readexactly(length)
+    return request_line[0].upper(), request_line[1], body
+
+async def _respond(
+    writer: asyncio.StreamWriter, status: int, content: Any,
+    content_type: str="application/json"
+):
+    body: bytes = (
+        content if isinstance(content, bytes)
+        else (json.dumps(content) + "\n").encode("utf-8")
+    )
+    writer.write(
+        (
+            "HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n"
+            "Connection: close\r\n\r\n" %
+            (status, _REASONS[status], content_type, len(body))
+        ).encode("latin-1") + body
+    )
+    await writer.drain()
+
+async def _stream(
+    writer: asyncio.StreamWriter, events: AsyncIterator[Dict[str, Any]]
+):
+    """
+    Send every event as a line of JSON, in its own HTTP chunk, as soon as
+    it's there.
+    """
+    writer.write(
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+        b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+    )
+    async for event in events:
+        line: bytes = (json.dumps(event) + "\n").encode("utf-8")
+        writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+async def serve(
+    host: str="127.0.0.1", port: int=PORT, workers: Optional[int]=None,
+    cache: Optional[TileCache]=None, history: int=HISTORY,
+    output_directory: Optional[str]=None,
+    scenes_directory: Optional[str]=None
+):
+    """
+    Run a RenderService on `host`:`port` until cancelled.
+    """
+    service: RenderService = RenderService(
+        workers, cache=cache, history=history,
+        output_directory=output_directory, scenes_directory=scenes_directory
+    )
+    server = await asyncio.start_server(service.handle, host, port)
+    print(
+        "Rendering on %d workers, at http://%s:%d/" % (
+            service.workers, host, server.sockets[0].getsockname()[1]
+        ),
+        flush=True
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def run(
+    host: str="127.0.0.1", port: int=PORT, workers: Optional[int]=None,
+    cache: Optional[TileCache]=None, history: int=HISTORY,
+    output_directory: Optional[str]=None,
+    scenes_directory: Optional[str]=None
+):
+    """
+    `serve` until interrupted.
+    """
+    try:
+        asyncio.run(serve(
+            host, port, workers, cache, history, output_directory,
+            scenes_directory
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,294 @@
+import asyncio
+import base64
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from one_week import engine, service, wavefront
+    from one_week.framebuffer import quantize
+except ImportError:
+    service = None
+
+SCENES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scenes"
+)
+
+async def request(port, method, path, document=None):
+    """
+    Return the status and the body, de-chunked.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if document is None else json.dumps(document).encode("utf-8")
+    writer.write(
+        b"%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n%s" %
+        (method.encode(), path.encode(), len(body), body)
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    if b"Transfer-Encoding: chunked" in head:
+        chunks = b""
+        while True:
+            size, _, content = content.partition(b"\r\n")
+            size = int(size, 16)
+            if not size:
+                break
+            chunks += content[:size]
+            content = content[size + 2:]
+        content = chunks
+    return status, content
+
+@unittest.skipIf(service is None, "needs NumPy")
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = service.RenderService(workers=2)
+        self.server = await asyncio.start_server(
+            self.service.handle, "127.0.0.1", 0
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+
+    def expected(self, width, height, samples, seed):
+        scene = engine.load_scene("8_dielectrics").scene(width, height)
+        return quantize(wavefront.render(
+            wavefront.WavefrontScene.from_hittables(scene.hittables),
+            scene.camera, width, height, samples, seed
+        ))
+
+    async def test_render(self):
+        status, content = await request(self.port, "POST", "/jobs", {
+            "scene": "8_dielectrics", "width": 20, "height": 10,
+            "samples": 2, "seed": 16, "tile_size": 8
+        })
+        self.assertEqual(202, status)
+        job = json.loads(content)
+
+        status, content = await request(
+            self.port, "GET", "/jobs/%d/events" % job["id"]
+        )
+        events = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual("done", events[-1]["event"])
+        self.assertEqual(6, events[-1]["tiles_done"])
+        self.assertEqual(
+            [1, 2, 3, 4, 5, 6],
+            [event["tiles_done"] for event in events
+             if event["event"] == "progress"]
+        )
+
+        status, ppm = await request(
+            self.port, "GET", "/jobs/%d/image" % job["id"]
+        )
+        expected = self.expected(20, 10, 2, 16)
+        self.assertEqual(b"P6\n20 10\n255\n" + expected.tobytes(), ppm)
+        for event in events:
+            if event["event"] == "tile":
+                pixels = np.frombuffer(
+                    base64.b64decode(event["pixels"]), dtype=np.uint8
+                ).reshape(event["y1"] - event["y0"], event["x1"] - event["x0"], 3)
+                self.assertTrue(np.array_equal(
+                    expected[event["y0"]:event["y1"], event["x0"]:event["x1"]],
+                    pixels
+                ))
+
+    async def test_warm_scene(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.service.output_directory = directory
+            output = os.path.join(directory, "second.ppm")
+            for samples, path in ((1, None), (2, "second.ppm")):
+                status, content = await request(self.port, "POST", "/jobs", {
+                    "scene": "8_dielectrics", "width": 20, "height": 10,
+                    "samples": samples, "seed": 16, "output": path
+                })
+                job = json.loads(content)
+                await request(
+                    self.port, "GET", "/jobs/%d/events?tiles=0" % job["id"]
+                )
+            with open(output, "rb") as ppm:
+                self.assertEqual(
+                    b"P6\n20 10\n255\n" + self.expected(20, 10, 2, 16).tobytes(),
+                    ppm.read()
+                )
+
+        status, content = await request(self.port, "GET", "/jobs/2")
+        self.assertTrue(json.loads(content)["scene_was_warm"])
+        status, content = await request(self.port, "GET", "/scenes")
+        scenes = json.loads(content)
+        self.assertEqual(1, len(scenes))
+        self.assertEqual(2, scenes[0]["jobs"])
+
+    async def test_warm_scene_resized(self):
+        contents = []
+        for width, height in ((8, 4), (6, 6)):
+            status, content = await request(self.port, "POST", "/jobs", {
+                "scene": "scene_generator", "width": width, "height": height,
+                "samples": 1, "seed": 3
+            })
+            job = json.loads(content)
+            await request(
+                self.port, "GET", "/jobs/%d/events?tiles=0" % job["id"]
+            )
+            status, content = await request(
+                self.port, "GET", "/jobs/%d/image" % job["id"]
+            )
+            contents.append(content)
+            if width == 8:
+                # Only the camera is made again, without drawing numbers.
+                state = random.getstate()
+        self.assertEqual(state, random.getstate())
+        status, content = await request(self.port, "GET", "/jobs/2")
+        self.assertTrue(json.loads(content)["scene_was_warm"])
+
+        scene_generator = engine.load_scene("scene_generator")
+        random.seed(3)
+        scene = scene_generator.scene(6, 6)
+        expected = quantize(wavefront.render(
+            wavefront.WavefrontScene.from_hittables(scene.hittables),
+            scene.camera, 6, 6, 1, 3
+        ))
+        self.assertEqual(b"P6\n6 6\n255\n" + expected.tobytes(), contents[1])
+
+    async def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.service.cache = service.TileCache(directory)
+            tiles_cached = []
+            for seed in (16, 16, None):
+                status, content = await request(self.port, "POST", "/jobs", {
+                    "scene": "8_dielectrics", "width": 20, "height": 10,
+                    "samples": 2, "seed": seed, "tile_size": 8
+                })
+                job = json.loads(content)
+                status, content = await request(
+                    self.port, "GET", "/jobs/%d/events?tiles=0" % job["id"]
+                )
+                tiles_cached.append(
+                    json.loads(content.splitlines()[-1])["tiles_cached"]
+                )
+                status, ppm = await request(
+                    self.port, "GET", "/jobs/%d/image" % job["id"]
+                )
+                if seed is not None:
+                    self.assertEqual(
+                        b"P6\n20 10\n255\n" +
+                        self.expected(20, 10, 2, 16).tobytes(),
+                        ppm
+                    )
+            self.assertEqual([0, 6, 0], tiles_cached)
+
+    async def test_camera(self):
+        camera = {
+            "camera_posn": {"x": 0, "y": 1, "z": 3},
+            "camera_aim": {"x": 0, "y": 0, "z": -1},
+            "up_vector": {"y": 1}, "vfov": 30, "aspect_ratio": 2
+        }
+        status, content = await request(self.port, "POST", "/jobs", {
+            "scene": "8_dielectrics", "width": 8, "height": 4, "samples": 1,
+            "camera": camera
+        })
+        job = json.loads(content)
+        status, content = await request(
+            self.port, "GET", "/jobs/%d/events?tiles=0" % job["id"]
+        )
+        self.assertEqual("done", json.loads(content.splitlines()[-1])["event"])
+
+    async def test_cancel(self):
+        status, content = await request(self.port, "POST", "/jobs", {
+            "scene": "8_dielectrics", "width": 200, "height": 100,
+            "samples": 50, "tile_size": 4
+        })
+        job = json.loads(content)
+        status, content = await request(
+            self.port, "DELETE", "/jobs/%d" % job["id"]
+        )
+        self.assertEqual("cancelled", json.loads(content)["status"])
+        status, content = await request(
+            self.port, "GET", "/jobs/%d/events?tiles=0" % job["id"]
+        )
+        last = json.loads(content.splitlines()[-1])
+        self.assertEqual("cancelled", last["event"])
+        self.assertLess(last["tiles_done"], last["tiles"])
+
+    async def test_history(self):
+        self.service.history = 1
+        for _ in range(3):
+            status, content = await request(self.port, "POST", "/jobs", {
+                "scene": "8_dielectrics", "width": 4, "height": 2,
+                "samples": 1
+            })
+            await request(
+                self.port, "GET",
+                "/jobs/%d/events?tiles=0" % json.loads(content)["id"]
+            )
+        self.assertEqual([3], list(self.service.jobs))
+        self.assertEqual(410, (await request(self.port, "GET", "/jobs/1"))[0])
+        self.assertEqual(200, (await request(self.port, "GET", "/jobs/3"))[0])
+        self.assertEqual(404, (await request(self.port, "GET", "/jobs/4"))[0])
+
+    async def test_bad_requests(self):
+        for document in (
+            [], {"width": 10}, {"scene": "no_such_scene"},
+            {"scene": "8_dielectrics", "samples": 0},
+            {"scene": "8_dielectrics", "sampler": "blue noise"},
+            {"scene": "8_dielectrics", "camera": {"vfov": 20}},
+            {"scene": "8_dielectrics", "colour": "red"},
+            {"scene": "one_week.vec3"}, {"scene": "../8_dielectrics"},
+            {"scene": "__main__"},
+            # No output directory, or scenes directory.
+            {"scene": "8_dielectrics", "output": "image.ppm"},
+            {"scene": "8_dielectrics.json"}
+        ):
+            status, content = await request(self.port, "POST", "/jobs", document)
+            self.assertEqual(400, status, document)
+            self.assertIn("error", json.loads(content))
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.service.output_directory = directory
+            for output in ("../image.ppm", "/tmp/image.ppm", ".", 3):
+                status, content = await request(self.port, "POST", "/jobs", {
+                    "scene": "8_dielectrics", "output": output
+                })
+                self.assertEqual(400, status, output)
+
+        self.assertEqual(404, (await request(self.port, "GET", "/jobs/7"))[0])
+        self.assertEqual(404, (await request(self.port, "GET", "/nothing"))[0])
+
+    async def test_scene_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.service.scenes_directory = directory
+            shutil.copy(
+                os.path.join(SCENES, "8_dielectrics.json"), directory
+            )
+            # Nothing outside the directory is looked at, whether it's there
+            # or not.
+            for scene in (
+                "/etc/nothere.json", "../8_dielectrics.json",
+                os.path.join(SCENES, "8_dielectrics.json")
+            ):
+                status, content = await request(
+                    self.port, "POST", "/jobs", {"scene": scene}
+                )
+                self.assertEqual(400, status, scene)
+                self.assertNotIn("nothere", json.loads(content)["error"])
+
+            status, content = await request(self.port, "POST", "/jobs", {
+                "scene": "8_dielectrics.json", "width": 8, "height": 4,
+                "samples": 1, "seed": 2
+            })
+            self.assertEqual(202, status)
+            job = json.loads(content)["id"]
+            await request(self.port, "GET", "/jobs/%d/events?tiles=0" % job)
+            status, content = await request(self.port, "GET", "/jobs/%d" % job)
+            self.assertEqual("done", json.loads(content)["status"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+from one_week.aabb import AABB
 from one_week.hittable import HitRecord, Hittable
 from one_week.material import Material, Vanta
 from one_week.ray import Ray
@@ -22,43 +23,55 @@ class Sphere(Hittable):
         if name is not None:
             self.name = name
 
-    def __decide_conjugate(
-        self, t_min: float, t_max: float, neg_conjugate: float,
-        pos_conjugate: float
-    ) -> Optional[float]:
-        # TODO Experiment: Check for pos_conjugate first. What happens?
-        if t_min < neg_conjugate < t_max:
-            return neg_conjugate
-        elif t_min < pos_conjugate < t_max:
-            return pos_conjugate
-        else:
-            return None
-
     def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
-        origin_to_center: Vec3 = ray.origin - self.center
+        # This is the hottest function of the whole tracer so everything is
+        # done on plain floats: the only objects made are for an actual hit.
+        origin: Vec3 = ray.a
+        direction: Vec3 = ray.b
+        center: Vec3 = self.center
+        dx: float = direction.r
+        dy: float = direction.g
+        dz: float = direction.b
+        # origin_to_center, component by component.
+        ox: float = origin.r - center.r
+        oy: float = origin.g - center.g
+        oz: float = origin.b - center.b
         # The following are just "components" of the quadratic formula, derived
         # from vectors and with some redundant 2's canceled out to begin with.
-        a: float = ray.direction.dot(ray.direction)
-        b: float = origin_to_center.dot(ray.direction)
-        c: float = origin_to_center.dot(origin_to_center) - (self.radius ** 2)
-        discriminant: float = (b ** 2) - (a * c)
+        a: float = dx * dx + dy * dy + dz * dz
+        b: float = ox * dx + oy * dy + oz * dz
+        c: float = ox * ox + oy * oy + oz * oz - self.radius * self.radius
+        discriminant: float = b * b - a * c
 
         if discriminant > 0:
-            neg_conjugate: float = (-b - math.sqrt(discriminant)) / a
-            # The original C++ code, again, saves on stack space by re-using a
-            # generic variable `temp`. But heh, I figured can't I skimp a bit on
-            # the manual optimization and leave that up to the interpeter?
-            pos_conjugate: float = (-b + math.sqrt(discriminant)) / a
+            root: float = math.sqrt(discriminant)
+            # The nearer root (the "negative conjugate") wins if it is within
+            # bounds, else the farther one (the "positive conjugate") gets a
+            # chance.
+            # TODO Experiment: Check for pos_conjugate first. What happens?
+            t: float = (-b - root) / a
+            if not t_min < t < t_max:
+                t = (-b + root) / a
+                if not t_min < t < t_max:
+                    return None
 
-            # Also this code was "refactored" from the original C++ to read more
-            # Pythonic.
-            chosen_conjugate = self.__decide_conjugate(
-                t_min, t_max, neg_conjugate, pos_conjugate
+            p: Vec3 = Vec3(
+                origin.r + t * dx, origin.g + t * dy, origin.b + t * dz
+            )
+            normal: Vec3 = Vec3(
+                (p.r - center.r) / self.radius,
+                (p.g - center.g) / self.radius,
+                (p.b - center.b) / self.radius
             )
-            if chosen_conjugate is not None:
-                t = chosen_conjugate
-                p = ray.point_at_parameter(t)
-                normal = (p - self.center) / self.radius
-                return HitRecord(t, p, normal, self.material)
-        
+            return HitRecord(t, p, normal, self.material)
+
         return None
+
+    def bounding_box(self) -> Optional[AABB]:
+        # abs because of the hollow glass sphere trick described in
+        # 8_dielectrics, where the radius is negative.
+        extent: float = abs(self.radius)
+        return AABB(
+            self.center - Vec3(extent, extent, extent),
+            self.center + Vec3(extent, extent, extent)
+        )
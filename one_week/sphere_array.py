@@ -0,0 +1,230 @@
+"""
+A structure-of-arrays store for spheres.
+
+Instead of N Sphere objects, each with its own Vec3 center and float radius,
+every center goes into one (N, 3) NumPy array and every radius into one (N,)
+array. A ray is then tested against all spheres at once by solving the same
+quadratic as `Sphere.hit`, only with arrays in place of floats. The Python
+interpreter does a dozen or so operations per ray no matter how many spheres
+there are; the per-sphere work happens inside NumPy.
+
+Needs NumPy, unlike the rest of one_week.
+"""
+from one_week.aabb import AABB
+from one_week.hittable import HitRecord, Hittable
+from one_week.material import Material
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+class SphereArray(Hittable):
+
+    # Upper bound on the (rays x spheres) elements `hit_batch` works on at a
+    # time.
+    BATCH_ELEMENTS: int = 1 << 20
+
+    def __init__(
+        self,
+        centers: np.ndarray,
+        radii: np.ndarray,
+        material_indices: np.ndarray,
+        materials: List[Material]
+    ):
+        """
+        `centers` is an (N, 3) array, `radii` and `material_indices` are (N,)
+        arrays. The material of sphere `i` is
+        `materials[material_indices[i]]`.
+
+        Use `SphereArray.from_spheres` to build one from the usual list of
+        Sphere objects.
+        """
+        super().__init__()
+        self.centers: np.ndarray = np.ascontiguousarray(centers, dtype=np.float64)
+        self.radii: np.ndarray = np.ascontiguousarray(radii, dtype=np.float64)
+        self.material_indices: np.ndarray = np.ascontiguousarray(
+            material_indices, dtype=np.int32
+        )
+        self.materials: List[Material] = materials
+        # The only part of the quadratic that doesn't depend on the ray.
+        self.squared_radii: np.ndarray = self.radii ** 2
+        # ...and its counterpart for `hit_batch`.
+        self.__center_terms: np.ndarray = (
+            np.einsum("ij,ij->i", self.centers, self.centers) - self.squared_radii
+        )
+
+    @classmethod
+    def from_spheres(cls, hittables: List[Hittable]) -> "SphereArray":
+        """
+        Pack a list of Sphere objects (like the one scene_generator.random_scene
+        returns). Spheres sharing the same Material object share the same
+        material index.
+        """
+        count: int = len(hittables)
+        centers: np.ndarray = np.empty((count, 3), dtype=np.float64)
+        radii: np.ndarray = np.empty(count, dtype=np.float64)
+        material_indices: np.ndarray = np.empty(count, dtype=np.int32)
+        materials: List[Material] = []
+        seen_materials: Dict[int, int] = {}
+
+        for i, hittable in enumerate(hittables):
+            if not isinstance(hittable, Sphere):
+                raise ValueError(
+                    "SphereArray can only hold spheres, got %s" % type(hittable)
+                )
+            centers[i] = hittable.center.make_tuple()
+            radii[i] = hittable.radius
+            material_key: int = id(hittable.material)
+            if material_key not in seen_materials:
+                seen_materials[material_key] = len(materials)
+                materials.append(hittable.material)
+            material_indices[i] = seen_materials[material_key]
+
+        return cls(centers, radii, material_indices, materials)
+
+    def move(self, centers: np.ndarray, radii: np.ndarray):
+        """
+        Put the spheres somewhere else, keeping their materials: what an
+        animation does between frames, instead of packing every sphere again.
+        """
+        self.centers[...] = centers
+        self.radii[...] = radii
+        self.squared_radii = self.radii ** 2
+        self.__center_terms = (
+            np.einsum("ij,ij->i", self.centers, self.centers) - self.squared_radii
+        )
+
+    def __len__(self) -> int:
+        return len(self.radii)
+
+    def hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[HitRecord]:
+        """
+        Same contract as HittableList.hit: the record returned is for the
+        sphere closest to the source of the Ray.
+        """
+        if not len(self.radii):
+            return None
+
+        direction: np.ndarray = np.array(
+            ray.direction.make_tuple(), dtype=np.float64
+        )
+        origin_to_center: np.ndarray = (
+            np.array(ray.origin.make_tuple(), dtype=np.float64) - self.centers
+        )
+        # See Sphere.hit for where these come from.
+        a: float = float(direction.dot(direction))
+        b: np.ndarray = origin_to_center.dot(direction)
+        c: np.ndarray = (
+            np.einsum("ij,ij->i", origin_to_center, origin_to_center) -
+            self.squared_radii
+        )
+        discriminant: np.ndarray = b * b - a * c
+
+        # Spheres with a non-positive discriminant get a NaN root, and NaN
+        # never passes the (t_min, t_max) checks below.
+        with np.errstate(invalid="ignore"):
+            root: np.ndarray = np.sqrt(
+                np.where(discriminant > 0, discriminant, np.nan)
+            )
+        neg_conjugate: np.ndarray = (-b - root) / a
+        pos_conjugate: np.ndarray = (-b + root) / a
+        # Just like Sphere.__decide_conjugate, the nearer root wins if it is
+        # within bounds.
+        chosen: np.ndarray = np.where(
+            (t_min < neg_conjugate) & (neg_conjugate < t_max), neg_conjugate,
+            np.where(
+                (t_min < pos_conjugate) & (pos_conjugate < t_max),
+                pos_conjugate, np.inf
+            )
+        )
+        closest: int = int(np.argmin(chosen))
+        t: float = float(chosen[closest])
+
+        if t == np.inf:
+            return None
+
+        p: Vec3 = ray.point_at_parameter(t)
+        center: Vec3 = Vec3(*self.centers[closest].tolist())
+        normal: Vec3 = (p - center) / float(self.radii[closest])
+        return HitRecord(
+            t, p, normal, self.materials[self.material_indices[closest]]
+        )
+
+    def hit_batch(
+        self, origins: np.ndarray, directions: np.ndarray, t_min: float,
+        t_max: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `hit` for a whole batch of rays at once. `origins` and `directions` are
+        (R, 3) arrays, one row per ray.
+
+        Return two (R,) arrays: the t of the closest hit of every ray, and the
+        index of the sphere it hit. Rays that hit nothing get a t of infinity
+        and an index of -1.
+        """
+        ray_count: int = len(origins)
+        t: np.ndarray = np.full(ray_count, np.inf)
+        index: np.ndarray = np.full(ray_count, -1, dtype=np.intp)
+        if not len(self.radii) or not ray_count:
+            return t, index
+
+        # The quadratic is computed for every (ray, sphere) pair, so split the
+        # rays such that the (rays, spheres) temporaries stay within a few MB.
+        chunk: int = max(1, self.BATCH_ELEMENTS // len(self.radii))
+        for start in range(0, ray_count, chunk):
+            stop: int = min(start + chunk, ray_count)
+            t[start:stop], index[start:stop] = self.__hit_chunk(
+                origins[start:stop], directions[start:stop], t_min, t_max
+            )
+
+        return t, index
+
+    def __hit_chunk(
+        self, origins: np.ndarray, directions: np.ndarray, t_min: float,
+        t_max: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Same quadratic as in `hit`, but the dot products involving
+        # (origin - center) are expanded so that they become matrix products
+        # instead of an (R, N, 3) temporary:
+        #   (o - c) . d = o . d - c . d
+        #   (o - c) . (o - c) = o . o - 2 o . c + c . c
+        a: np.ndarray = np.einsum("ij,ij->i", directions, directions)[:, np.newaxis]
+        b: np.ndarray = (
+            np.einsum("ij,ij->i", origins, directions)[:, np.newaxis] -
+            directions.dot(self.centers.T)
+        )
+        c: np.ndarray = (
+            np.einsum("ij,ij->i", origins, origins)[:, np.newaxis] -
+            2 * origins.dot(self.centers.T) +
+            self.__center_terms
+        )
+        discriminant: np.ndarray = b * b - a * c
+
+        with np.errstate(invalid="ignore"):
+            root: np.ndarray = np.sqrt(
+                np.where(discriminant > 0, discriminant, np.nan)
+            )
+        neg_conjugate: np.ndarray = (-b - root) / a
+        pos_conjugate: np.ndarray = (-b + root) / a
+        chosen: np.ndarray = np.where(
+            (t_min < neg_conjugate) & (neg_conjugate < t_max), neg_conjugate,
+            np.where(
+                (t_min < pos_conjugate) & (pos_conjugate < t_max),
+                pos_conjugate, np.inf
+            )
+        )
+        closest: np.ndarray = np.argmin(chosen, axis=1)
+        t: np.ndarray = chosen[np.arange(len(chosen)), closest]
+        return t, np.where(t < np.inf, closest, -1)
+
+    def bounding_box(self) -> Optional[AABB]:
+        if not len(self.radii):
+            return None
+
+        extents: np.ndarray = np.abs(self.radii)[:, np.newaxis]
+        return AABB(
+            Vec3(*(self.centers - extents).min(axis=0).tolist()),
+            Vec3(*(self.centers + extents).max(axis=0).tolist())
+        )
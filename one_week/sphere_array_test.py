@@ -0,0 +1,82 @@
+from one_week.hittable import HittableList
+from one_week.material import Lambertian, Metal
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+
+import random
+import sys
+import unittest
+
+try:
+    from one_week.sphere_array import SphereArray
+except ImportError:
+    SphereArray = None
+
+@unittest.skipIf(SphereArray is None, "needs NumPy")
+class SphereArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(2048)
+        self.matte = Lambertian(Vec3(0.5, 0.5, 0.5))
+        self.shiny = Metal(Vec3(0.8, 0.8, 0.8), 0.1)
+        self.spheres = [
+            Sphere(
+                Vec3(rng.uniform(-5, 5), rng.uniform(-1, 1), rng.uniform(-5, 5)),
+                rng.uniform(0.1, 0.8),
+                rng.choice((self.matte, self.shiny))
+            ) for _ in range(50)
+        ]
+        self.rays = [
+            Ray(
+                Vec3(rng.uniform(-6, 6), rng.uniform(0, 3), rng.uniform(-6, 6)),
+                Vec3(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1))
+            ) for _ in range(300)
+        ]
+
+    def test_same_hits_as_hittable_list(self):
+        hittable_list = HittableList(self.spheres)
+        sphere_array = SphereArray.from_spheres(self.spheres)
+
+        for ray in self.rays:
+            expected = hittable_list.hit(ray, 0.001, sys.float_info.max)
+            actual = sphere_array.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertAlmostEqual(expected.t, actual.t)
+                self.assertIs(expected.material, actual.material)
+                self.assertAlmostEqual(expected.normal.x, actual.normal.x)
+                self.assertAlmostEqual(expected.normal.y, actual.normal.y)
+                self.assertAlmostEqual(expected.normal.z, actual.normal.z)
+
+    def test_shared_materials_are_packed_once(self):
+        sphere_array = SphereArray.from_spheres(self.spheres)
+        self.assertEqual(2, len(sphere_array.materials))
+        self.assertEqual(50, len(sphere_array))
+
+    def test_move(self):
+        sphere_array = SphereArray.from_spheres(self.spheres)
+        for sphere in self.spheres:
+            sphere.center = sphere.center + Vec3(0.5, 0, 0)
+            sphere.radius *= 1.5
+        sphere_array.move(
+            [sphere.center.make_tuple() for sphere in self.spheres],
+            [sphere.radius for sphere in self.spheres]
+        )
+        moved = SphereArray.from_spheres(self.spheres)
+
+        for ray in self.rays:
+            expected = moved.hit(ray, 0.001, sys.float_info.max)
+            actual = sphere_array.hit(ray, 0.001, sys.float_info.max)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertEqual(expected.t, actual.t)
+
+    def test_only_spheres(self):
+        with self.assertRaises(ValueError):
+            SphereArray.from_spheres([HittableList([])])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Scenes for the tests, so that every test module doesn't carry its own copy.
+
+Everything is made anew on every call: tests move spheres about.
+"""
+from one_week.camera import Camera, PositionableCamera
+from one_week.engine import Scene
+from one_week.hittable import Hittable
+from one_week.ray import Ray
+from one_week.sphere import Sphere
+from one_week.vec3 import Vec3
+from typing import List, Tuple
+
+import importlib
+import random
+
+def dielectrics() -> Scene:
+    """
+    The scene of 8_dielectrics: a glass sphere between a matte and a metal
+    one, on a ground sphere, through the camera of the numbered scripts.
+    """
+    # Its camera doesn't depend on the size.
+    return importlib.import_module("one_week.8_dielectrics").scene(4, 2)
+
+def dielectrics_hittables() -> List[Hittable]:
+    return dielectrics().hittables
+
+def lens_camera() -> PositionableCamera:
+    """
+    A camera looking down at the spheres of `dielectrics` from above and to
+    the side, with a small lens: the tiled renderers see a bit of everything
+    in every tile.
+    """
+    lookfrom: Vec3 = Vec3(3, 3, 2)
+    lookat: Vec3 = Vec3(0, 0, -1)
+    return PositionableCamera(
+        lookfrom, lookat, Vec3(0, 1, 0), 20, 2, 0.1,
+        (lookfrom - lookat).length()
+    )
+
+def scripts_camera() -> Camera:
+    """
+    The fixed camera of the numbered scripts, for a 2:1 image.
+    """
+    return Camera(
+        Vec3(-2, -1, -1), Vec3(4, 0, 0), Vec3(0, 2, 0), Vec3(0, 0, 0)
+    )
+
+def random_spheres(seed: int=1024) -> Tuple[List[Sphere], List[Ray]]:
+    """
+    200 small spheres scattered over a ground sphere, and 500 rays through
+    them from all over, for the accelerators to hit the same as a
+    HittableList.
+    """
+    rng: random.Random = random.Random(seed)
+    spheres: List[Sphere] = [
+        Sphere(
+            Vec3(
+                rng.uniform(-10, 10), rng.uniform(-1, 1), rng.uniform(-10, 10)
+            ),
+            rng.uniform(0.1, 0.8)
+        ) for _ in range(200)
+    ]
+    spheres.append(Sphere(Vec3(0, -1000, 0), 1000))
+    rays: List[Ray] = [
+        Ray(
+            Vec3(rng.uniform(-12, 12), rng.uniform(0, 3), rng.uniform(-12, 12)),
+            Vec3(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1))
+        ) for _ in range(500)
+    ]
+    return spheres, rays
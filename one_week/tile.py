@@ -0,0 +1,58 @@
+"""
+Tiles: rectangular pieces of an image which can be rendered independently of
+each other.
+"""
+from typing import Iterator, List, NamedTuple
+
+class Tile(NamedTuple):
+    """
+    The pixels in columns [x0, x1) and rows [y0, y1). Rows are counted from the
+    top of the image, like in PPM.
+
+    `index` is the position of the tile in the list `split_tiles` returns, so a
+    tile can be identified without its coordinates.
+    """
+    index: int
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+    @property
+    def width(self) -> int:
+        return self.x1 - self.x0
+
+    @property
+    def height(self) -> int:
+        return self.y1 - self.y0
+
+    @property
+    def pixel_count(self) -> int:
+        return self.width * self.height
+
+def iter_tiles(width: int, height: int, tile_size: int) -> Iterator[Tile]:
+    """
+    The same tiles as `split_tiles`, one at a time. Gigapixel images have
+    millions of tiles, which had better not all be in a list.
+    """
+    index: int = 0
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            yield Tile(
+                index, x0, y0, min(x0 + tile_size, width),
+                min(y0 + tile_size, height)
+            )
+            index += 1
+
+def count_tiles(width: int, height: int, tile_size: int) -> int:
+    """
+    How many tiles `iter_tiles` yields, without making them.
+    """
+    return -(-width // tile_size) * -(-height // tile_size)
+
+def split_tiles(width: int, height: int, tile_size: int) -> List[Tile]:
+    """
+    Cover a width x height image with tiles of at most tile_size x tile_size
+    pixels, in reading order (left to right, top to bottom).
+    """
+    return list(iter_tiles(width, height, tile_size))
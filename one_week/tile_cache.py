@@ -0,0 +1,205 @@
+"""
+A disk cache of rendered tiles, so that rendering the same thing again costs
+next to nothing.
+
+A render is known by its key: a hash of everything its pixels depend on,
+which is the packed scene and camera (see `parallel.scene_arrays`), the size
+of the image, the samples per pixel, the seed, the sampler, the shading and
+the maximum depth. Every tile goes in a .npy file of its linear colors, named
+after the key and the tile's bounds. Rendering something that's all in the
+cache reads it back instead; rendering something that's partly there (a
+render that was interrupted, say) only renders the tiles that aren't.
+
+Pixels come out the same whatever the tiles (see `wavefront.render_tile`), but
+tiles only match tiles of the same bounds, so a render with a different tile
+size misses. Renders without a seed are never cached: nothing would ever ask
+for them again.
+
+When the files add up to more than the cache's size, the ones least recently
+used go. Their modification times are what says when they were last used.
+
+Needs NumPy, like one_week.wavefront.
+"""
+from one_week.sampler import Sampler
+from one_week.tile import Tile
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+)
+
+import collections
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+
+CACHE_DIRECTORY: str = os.path.join(tempfile.gettempdir(), "praytracing-tiles")
+MAX_BYTES: int = 1 << 30
+# Part of every key. Bump it whenever the tracer changes what it renders, so
+# that tiles from before don't pass for tiles from after.
+VERSION: int = 1
+
+def render_key(
+    arrays: Dict[str, np.ndarray], width: int, height: int, samples: int,
+    seed: int, shading: str, max_depth: int, sampler: Optional[Sampler]
+) -> str:
+    """
+    The key of a render of the scene and camera packed in `arrays`.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array: np.ndarray = np.ascontiguousarray(arrays[name])
+        digest.update(
+            ("%s %s %s\n" % (name, array.dtype.str, array.shape)).encode()
+        )
+        digest.update(array.tobytes())
+    sampler_description: Dict[str, Any] = {}
+    if sampler is not None:
+        # The stratified sampler's grid, for one.
+        sampler_description = dict(
+            vars(sampler), sampler=type(sampler).__name__
+        )
+    digest.update(json.dumps({
+        "version": VERSION, "width": width, "height": height,
+        "samples": samples, "seed": seed, "shading": shading,
+        "max_depth": max_depth, "sampler": sampler_description
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+class TileCache(object):
+    """
+    Tiles on disk, under `directory`, taking up at most about `max_bytes`.
+    Several processes can share a directory; each keeps to the size on its
+    own.
+    """
+
+    def __init__(
+        self, directory: str=CACHE_DIRECTORY, max_bytes: int=MAX_BYTES
+    ):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        os.makedirs(directory, exist_ok=True)
+        # File name to size, least recently used first.
+        self.__files: "collections.OrderedDict[str, int]" = (
+            collections.OrderedDict()
+        )
+        self.__bytes: int = 0
+        found: List[Tuple[float, str, int]] = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.__files[name] = size
+            self.__bytes += size
+
+    @property
+    def size(self) -> int:
+        """
+        How many bytes of tiles there are, as far as this process knows.
+        """
+        return self.__bytes
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def __name(key: str, tile: Tile) -> str:
+        return "%s-%d-%d-%d-%d.npy" % (key, tile.x0, tile.y0, tile.x1, tile.y1)
+
+    def get(self, key: str, tile: Tile) -> Optional[np.ndarray]:
+        """
+        The pixels of `tile` in the render keyed `key`, if they are here.
+        """
+        name: str = self.__name(key, tile)
+        try:
+            pixels: np.ndarray = np.load(self.__path(name))
+            os.utime(self.__path(name))
+        except (OSError, ValueError):
+            # Not there, evicted by another process, or half-written by one
+            # that died.
+            self.__forget(name)
+            self.misses += 1
+            return None
+        if pixels.shape != (tile.height, tile.width, 3):
+            self.misses += 1
+            return None
+        if name not in self.__files:
+            self.__files[name] = pixels.nbytes
+            self.__bytes += pixels.nbytes
+        self.__files.move_to_end(name)
+        self.hits += 1
+        return pixels
+
+    def put(self, key: str, tile: Tile, pixels: np.ndarray):
+        """
+        Keep the pixels of `tile` in the render keyed `key`, making room
+        for them if need be.
+        """
+        name: str = self.__name(key, tile)
+        # Written elsewhere and moved in place, so that nobody reads half a
+        # tile.
+        handle, temporary = tempfile.mkstemp(
+            dir=self.directory, suffix=".part"
+        )
+        try:
+            with os.fdopen(handle, "wb") as tile_file:
+                np.save(tile_file, np.asarray(pixels, dtype=np.float64))
+            size: int = os.path.getsize(temporary)
+            os.replace(temporary, self.__path(name))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.__forget(name)
+        self.__files[name] = size
+        self.__bytes += size
+        self.__evict()
+
+    def __forget(self, name: str):
+        size: Optional[int] = self.__files.pop(name, None)
+        if size is not None:
+            self.__bytes -= size
+
+    def __evict(self):
+        while self.__bytes > self.max_bytes and len(self.__files) > 1:
+            name, size = self.__files.popitem(last=False)
+            self.__bytes -= size
+            try:
+                os.unlink(self.__path(name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for name in list(self.__files):
+            self.__forget(name)
+            try:
+                os.unlink(self.__path(name))
+            except FileNotFoundError:
+                pass
+
+    def render(
+        self, key: Optional[str], tiles: Iterable[Tile],
+        render: Callable[[Iterable[Tile]], Iterable[Tuple[Tile, np.ndarray]]]
+    ) -> Iterator[Tuple[Tile, np.ndarray]]:
+        """
+        Every one of `tiles` with its pixels, in no particular order. The
+        ones in the cache come from there, first. The others are handed to
+        `render`, but only if there are any, and added to the cache as they
+        come back. Without a key, everything is rendered and nothing kept.
+        """
+        if key is None:
+            yield from render(tiles)
+            return
+        missing: List[Tile] = []
+        for tile in tiles:
+            pixels: Optional[np.ndarray] = self.get(key, tile)
+            if pixels is None:
+                missing.append(tile)
+            else:
+                yield tile, pixels
+        if missing:
+            for tile, pixels in render(missing):
+                self.put(key, tile, pixels)
+                yield tile, pixels
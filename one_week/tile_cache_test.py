@@ -0,0 +1,115 @@
+from one_week.testing import dielectrics_hittables, lens_camera
+from one_week.tile import Tile, split_tiles
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from one_week import parallel, wavefront
+    from one_week.sampler import make_sampler
+    from one_week.tile_cache import TileCache, render_key
+except ImportError:
+    parallel = None
+
+@unittest.skipIf(parallel is None, "needs NumPy")
+class TileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hittables = dielectrics_hittables()
+        self.camera = lens_camera()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def render(self, cache, seed=16):
+        return parallel.render(
+            self.hittables, self.camera, 20, 10, 2, workers=2, seed=seed,
+            tile_size=8, cache=cache
+        )
+
+    def test_render_again(self):
+        expected = wavefront.render(
+            wavefront.WavefrontScene.from_hittables(self.hittables),
+            self.camera, 20, 10, 2, 16
+        )
+        cache = TileCache(self.directory)
+        self.assertTrue(np.array_equal(expected, self.render(cache)))
+        self.assertEqual((0, 6), (cache.hits, cache.misses))
+
+        # Another process, as far as the cache can tell.
+        cache = TileCache(self.directory)
+        self.assertTrue(np.array_equal(expected, self.render(cache)))
+        self.assertEqual((6, 0), (cache.hits, cache.misses))
+
+        # Half done, as by a render that was interrupted.
+        for name in sorted(os.listdir(self.directory))[:3]:
+            os.unlink(os.path.join(self.directory, name))
+        cache = TileCache(self.directory)
+        self.assertTrue(np.array_equal(expected, self.render(cache)))
+        self.assertEqual((3, 3), (cache.hits, cache.misses))
+
+    def test_no_seed(self):
+        cache = TileCache(self.directory)
+        self.render(cache, seed=None)
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_keys(self):
+        arrays = parallel.scene_arrays(
+            wavefront.WavefrontScene.from_hittables(self.hittables),
+            wavefront.WavefrontCamera.from_camera(self.camera)
+        )
+        arguments = (20, 10, 2, 16, "path", 50, make_sampler("random"))
+        key = render_key(arrays, *arguments)
+        self.assertEqual(key, render_key(dict(arrays), *arguments))
+
+        moved = dict(arrays, centers=arrays["centers"] + 0.001)
+        self.assertNotEqual(key, render_key(moved, *arguments))
+        for changed in (
+            (20, 10, 2, 17, "path", 50, make_sampler("random")),
+            (20, 10, 4, 16, "path", 50, make_sampler("random")),
+            (20, 10, 2, 16, "normals", 50, make_sampler("random")),
+            (20, 10, 2, 16, "path", 50, make_sampler("sobol")),
+            (20, 10, 2, 16, "path", 50, make_sampler("stratified", 4))
+        ):
+            self.assertNotEqual(key, render_key(arrays, *changed), changed)
+        self.assertNotEqual(
+            render_key(arrays, 20, 10, 4, 16, "path", 50,
+                       make_sampler("stratified", 4)),
+            render_key(arrays, 20, 10, 4, 16, "path", 50,
+                       make_sampler("stratified", 2))
+        )
+
+    def test_least_recently_used_go(self):
+        tiles = split_tiles(16, 4, 4)
+        pixels = np.zeros((4, 4, 3))
+        cache = TileCache(self.directory)
+        cache.put("key", tiles[0], pixels)
+        tile_bytes = cache.size
+        cache = TileCache(self.directory, max_bytes=3 * tile_bytes)
+        for tile in tiles[1:3]:
+            cache.put("key", tile, pixels + tile.index)
+        self.assertIsNotNone(cache.get("key", tiles[0]))
+        cache.put("key", tiles[3], pixels)
+
+        self.assertEqual(3 * tile_bytes, cache.size)
+        self.assertIsNone(cache.get("key", tiles[1]))
+        self.assertEqual(2, cache.get("key", tiles[2])[0, 0, 0])
+        self.assertIsNotNone(cache.get("key", tiles[0]))
+        self.assertEqual(3, len(os.listdir(self.directory)))
+
+        cache.clear()
+        self.assertEqual(0, cache.size)
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_wrong_tile(self):
+        cache = TileCache(self.directory)
+        cache.put("key", Tile(0, 0, 0, 4, 4), np.zeros((4, 4, 3)))
+        with open(os.path.join(self.directory, "key-0-4-4-8.npy"), "wb") as bad:
+            bad.write(b"not a tile")
+        self.assertIsNone(cache.get("key", Tile(1, 0, 4, 4, 8)))
+        self.assertIsNone(cache.get("other", Tile(0, 0, 0, 4, 4)))
+
+if __name__ == "__main__":
+    unittest.main()
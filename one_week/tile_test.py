@@ -0,0 +1,17 @@
+from one_week.tile import count_tiles, split_tiles
+
+import unittest
+
+class TileTest(unittest.TestCase):
+
+    def test_count(self):
+        for width, height, tile_size in [(7, 10, 3), (32, 64, 32), (1, 1, 8)]:
+            self.assertEqual(
+                len(split_tiles(width, height, tile_size)),
+                count_tiles(width, height, tile_size)
+            )
+        # Without making the 2,442,969 tiles of a 50k x 50k image.
+        self.assertEqual(1563 ** 2, count_tiles(50000, 50000, 32))
+
+if __name__ == "__main__":
+    unittest.main()
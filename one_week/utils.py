@@ -1,6 +1,16 @@
+from typing import Optional
+
 import sys
 
-def _derive_ppm_filename() -> str:
-    my_filename: str = sys.argv[0].split("/")[-1]
-    sans_extension: str = my_filename.rsplit(".", 1)[0]
-    return "/tmp/%s.ppm" % sans_extension
+def _derive_filename(extension: str, name: Optional[str]=None) -> str:
+    """
+    /tmp/<name>.<extension>, name being that of the running script unless
+    given.
+    """
+    if name is None:
+        my_filename: str = sys.argv[0].split("/")[-1]
+        name = my_filename.rsplit(".", 1)[0]
+    return "/tmp/%s.%s" % (name, extension)
+
+def _derive_ppm_filename(name: Optional[str]=None) -> str:
+    return _derive_filename("ppm", name)
@@ -11,8 +11,16 @@ class Vec3(object):
     This represents vectors in the î, ĵ, k-hat sense: they are vectors with the
     origin implied to be at (0, 0, 0). And hence they have magnitude _and_
     direction. This "normalizes" vectors that originate from any point in space.
+
+    A render makes millions of these so, besides the usual operators (which
+    always make a new Vec3), there are "fused" methods that do a couple of
+    operations with at most one new object: see `mul_add`, `iadd_scaled` and
+    `set`.
     """
 
+    # No per-instance __dict__: smaller and faster to make.
+    __slots__ = ("r", "g", "b")
+
     def __init__(self, r: float=0.0, g: float=0.0, b: float=0.0):
         self.r: float = r
         self.g: float = g
@@ -36,11 +44,11 @@ class Vec3(object):
         convention, __len__ should return an integer.
         """
         return math.sqrt(
-            self.r ** 2 + self.g ** 2 + self.b ** 2
+            self.r * self.r + self.g * self.g + self.b * self.b
         )
 
     def squared_length(self) -> float:
-        return self.r ** 2 + self.g ** 2 + self.b ** 2
+        return self.r * self.r + self.g * self.g + self.b * self.b
 
     def __add__(self, other) -> "Vec3":
         return Vec3(self.r + other.r, self.g + other.g, self.b + other.b)
@@ -59,15 +67,20 @@ class Vec3(object):
 
     def __truediv__(self, other) -> "Vec3":
         if isinstance(other, Vec3):
-            return Vec3(self.r / other.r, self.g - other.g, self.b - other.b)
+            return Vec3(self.r / other.r, self.g / other.g, self.b / other.b)
         else:
             return Vec3(self.r / other, self.g / other, self.b / other)
 
     def make_tuple(self) -> tuple:
         return (self.r, self.g, self.b)
 
+    def __neg__(self) -> "Vec3":
+        return Vec3(-self.r, -self.g, -self.b)
+
     def dot(self, other) -> float:
-        return sum((self * other).make_tuple())
+        # Spelled out, instead of summing the components of self * other, since
+        # that makes a Vec3 and a tuple only to throw them away.
+        return self.r * other.r + self.g * other.g + self.b * other.b
 
     def cross(self, other) -> "Vec3":
         return Vec3(
@@ -112,8 +125,38 @@ class Vec3(object):
 
         return self
 
+    def mul_add(self, scale: float, addend: "Vec3") -> "Vec3":
+        """
+        self * scale + addend, as one new Vec3 instead of two.
+        """
+        return Vec3(
+            self.r * scale + addend.r,
+            self.g * scale + addend.g,
+            self.b * scale + addend.b
+        )
+
+    def iadd_scaled(self, other: "Vec3", scale: float) -> "Vec3":
+        """
+        self += other * scale, without making any new Vec3.
+        """
+        self.r += other.r * scale
+        self.g += other.g * scale
+        self.b += other.b * scale
+        return self
+
+    def set(self, r: float, g: float, b: float) -> "Vec3":
+        """
+        Overwrite all components, for when a Vec3 can be reused instead of
+        making a new one.
+        """
+        self.r = r
+        self.g = g
+        self.b = b
+        return self
+
     def unit_vector(self) -> "Vec3":
-        return self / self.length()
+        length: float = self.length()
+        return Vec3(self.r / length, self.g / length, self.b / length)
 
     def __eq__(self, other) -> bool:
         return (
@@ -30,5 +30,30 @@ class Vec3Test(unittest.TestCase):
         a /= 3
         self.assertEqual(lowest_terms_a, a)
 
+    def test_truediv(self):
+        a = Vec3(3, 6, 9)
+        self.assertEqual(Vec3(1, 2, 3), a / 3)
+        self.assertEqual(Vec3(1, 3, 9), a / Vec3(3, 2, 1))
+
+    def test_mul_add(self):
+        a = Vec3(2.0, 1.0, -1.0)
+        b = Vec3(-3.0, 4.0, 1.0)
+
+        self.assertEqual(a * 3 + b, a.mul_add(3, b))
+        self.assertEqual(Vec3(2.0, 1.0, -1.0), a)
+
+    def test_iadd_scaled(self):
+        a = Vec3(2.0, 1.0, -1.0)
+        b = Vec3(-3.0, 4.0, 1.0)
+        expected = a + b * 0.5
+
+        same = a.iadd_scaled(b, 0.5)
+        self.assertIs(a, same)
+        self.assertEqual(expected, a)
+
+    def test_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            Vec3().w = 1
+
 if __name__ == "__main__":
     unittest.main()
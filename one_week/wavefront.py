@@ -0,0 +1,653 @@
+"""
+A wavefront (breadth-first) path tracer.
+
+The `color()` functions of the numbered scripts follow one ray at a time, all
+the way down, recursing up to 50 levels deep. Here, every camera ray of a tile
+(or of a whole frame) is followed at the same time, one bounce per iteration.
+Each iteration goes through the same stages:
+
+1. _intersect_: find the closest hit of every live path.
+2. _accumulate_: paths that hit nothing pick up the sky color and are done.
+3. _scatter_: the rest bounce off whatever material they hit.
+4. _compact_: paths which can no longer contribute anything are dropped.
+
+Between 2 and 3, paths deep enough play the same Russian roulette as in
+one_week.integrator.
+
+Every stage is a handful of NumPy operations over all live paths, so the
+interpreter overhead is paid once per bounce instead of once per ray.
+
+The random numbers of every path are its own (see `PathRandom`): they depend
+on the seed, the pixel and the sample, not on which paths were traced
+alongside it. So a render comes out the same whether it is done in one go, by
+tiles or by a pool of workers.
+
+The materials are the same as in one_week.material, down to their quirks (for
+instance, Dielectric only ever reflects on total internal reflection), so the
+images match the ones the scripts produce.
+"""
+from one_week.camera import Camera, PositionableCamera
+from one_week.hittable import Hittable
+from one_week.integrator import MAX_DEPTH, ROULETTE_DEPTH, T_MIN
+from one_week.material import (
+    Dielectric, Identity, Lambertian, Material, Metal, Vanta
+)
+from one_week.rng import MASK, TAU
+from one_week.sampler import RandomSampler, Sampler, pixel_keys
+from one_week.sphere_array import SphereArray
+from one_week.vec3 import Vec3
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+VANTA: int = 0
+IDENTITY: int = 1
+LAMBERTIAN: int = 2
+METAL: int = 3
+DIELECTRIC: int = 4
+
+# Upper bound on how many paths are traced together by `render`.
+BATCH_SIZE: int = 1 << 18
+
+# Which of its random numbers a path uses for what. The camera ray takes the
+# first CAMERA_DIMENSIONS, then every bounce takes BOUNCE_DIMENSIONS more.
+JITTER_DIMENSION: int = 0
+LENS_DIMENSION: int = 2
+CAMERA_DIMENSIONS: int = 4
+ROULETTE_DIMENSION: int = 0
+SCATTER_DIMENSION: int = 1
+BOUNCE_DIMENSIONS: int = 4
+
+# How many rays this process has traced so far, for progress reports (see
+# one_week.progress). One add per bounce of a whole batch, so it's free.
+traced_rays: int = 0
+
+SKY_BOTTOM: np.ndarray = np.array([1.0, 1.0, 1.0])
+SKY_TOP: np.ndarray = np.array([0.5, 0.7, 1.0])
+
+class WavefrontScene(object):
+    """
+    A SphereArray, plus its materials flattened into arrays, so that scattering
+    can also be done in bulk.
+    """
+
+    def __init__(
+        self,
+        spheres: SphereArray,
+        kinds: np.ndarray,
+        albedos: np.ndarray,
+        fuzz: np.ndarray,
+        refractive_indices: np.ndarray
+    ):
+        """
+        Material `i` (as in `spheres.material_indices`) is described by row
+        `i` of every other array. Only the arrays matter here, so `spheres`
+        need not carry its Material objects.
+
+        Use `WavefrontScene.from_hittables` to build one from the usual list
+        of Sphere objects.
+        """
+        self.spheres: SphereArray = spheres
+        self.kinds: np.ndarray = kinds
+        self.albedos: np.ndarray = albedos
+        self.fuzz: np.ndarray = fuzz
+        self.refractive_indices: np.ndarray = refractive_indices
+
+    @classmethod
+    def from_sphere_array(cls, spheres: SphereArray) -> "WavefrontScene":
+        material_count: int = len(spheres.materials)
+        kinds: np.ndarray = np.empty(material_count, dtype=np.int8)
+        albedos: np.ndarray = np.zeros((material_count, 3))
+        fuzz: np.ndarray = np.zeros(material_count)
+        refractive_indices: np.ndarray = np.ones(material_count)
+
+        for i, material in enumerate(spheres.materials):
+            kinds[i] = material_kind(material)
+            if isinstance(material, (Lambertian, Metal)):
+                albedos[i] = material.albedo.make_tuple()
+            if isinstance(material, Metal):
+                fuzz[i] = material.fuzz
+            if isinstance(material, Dielectric):
+                refractive_indices[i] = material.refractive_index
+
+        return cls(spheres, kinds, albedos, fuzz, refractive_indices)
+
+    @classmethod
+    def from_hittables(cls, hittables: List[Hittable]) -> "WavefrontScene":
+        return cls.from_sphere_array(SphereArray.from_spheres(hittables))
+
+class WavefrontCamera(object):
+    """
+    The vectors of a Camera (or PositionableCamera) as arrays. A plain Camera
+    is just a PositionableCamera without a lens.
+    """
+
+    # Length of the array `pack` returns.
+    PACKED_SIZE: int = 19
+
+    def __init__(
+        self,
+        origin: np.ndarray,
+        lower_left_corner: np.ndarray,
+        h_movement: np.ndarray,
+        v_movement: np.ndarray,
+        horizontal_axis: np.ndarray,
+        vertical_axis: np.ndarray,
+        lens_radius: float
+    ):
+        self.origin: np.ndarray = origin
+        self.lower_left_corner: np.ndarray = lower_left_corner
+        self.h_movement: np.ndarray = h_movement
+        self.v_movement: np.ndarray = v_movement
+        self.horizontal_axis: np.ndarray = horizontal_axis
+        self.vertical_axis: np.ndarray = vertical_axis
+        self.lens_radius: float = lens_radius
+
+    @classmethod
+    def from_camera(cls, camera: Camera) -> "WavefrontCamera":
+        if isinstance(camera, PositionableCamera):
+            return cls(
+                as_array(camera.origin), as_array(camera.lower_left_corner),
+                as_array(camera.h_movement), as_array(camera.v_movement),
+                as_array(camera.horizontal_axis),
+                as_array(camera.vertical_axis), camera.lens_radius
+            )
+        return cls(
+            as_array(camera.origin), as_array(camera.lower_left_corner),
+            as_array(camera.h_movement), as_array(camera.v_movement),
+            np.zeros(3), np.zeros(3), 0.0
+        )
+
+    def pack(self) -> np.ndarray:
+        """
+        Everything in one flat array, for when the camera has to be shipped
+        somewhere else (like another process).
+        """
+        return np.concatenate((
+            self.origin, self.lower_left_corner, self.h_movement,
+            self.v_movement, self.horizontal_axis, self.vertical_axis,
+            [self.lens_radius]
+        ))
+
+    @classmethod
+    def unpack(cls, packed: np.ndarray) -> "WavefrontCamera":
+        return cls(
+            packed[0:3], packed[3:6], packed[6:9], packed[9:12], packed[12:15],
+            packed[15:18], float(packed[18])
+        )
+
+class AOVs(NamedTuple):
+    """
+    Arbitrary output variables: what the camera rays of every pixel hit
+    first, averaged over its samples like its color is. A denoiser (see
+    one_week.denoise) tells the edges of the image from its noise by them.
+
+    `normals` and `albedos` are (height, width, 3), `depths` (height, width).
+    Where nothing is hit, the normal and the depth are zero and the albedo is
+    the sky's color. Glass has a white albedo, like Identity.
+    """
+    normals: np.ndarray
+    albedos: np.ndarray
+    depths: np.ndarray
+
+class PathRandom(object):
+    """
+    The random numbers of a batch of paths, which a Sampler (see
+    one_week.sampler) makes out of the pixel and the sample of each. With the
+    default RandomSampler, every path has a stream of one_week.rng keyed by
+    `rng.mix(seed, pixel, sample)`.
+    """
+
+    def __init__(
+        self, seed: int, pixels: np.ndarray, samples: np.ndarray,
+        sampler: Optional[Sampler]=None
+    ):
+        """
+        `pixels` are counted row by row from the top left, like in PPM.
+        """
+        self.keys: np.ndarray = pixel_keys(seed, pixels)
+        self.samples: np.ndarray = samples
+        self.sampler: Sampler = sampler or RandomSampler()
+
+    def uniform(
+        self, paths: np.ndarray, dimension: int, count: int=1
+    ) -> np.ndarray:
+        """
+        Dimensions `dimension` to `dimension + count - 1` of the samples of
+        `paths`, as a (len(paths), count) array of floats in [0, 1).
+        """
+        keys: np.ndarray = self.keys[paths]
+        samples: np.ndarray = self.samples[paths]
+        return np.stack([
+            self.sampler.uniform(keys, samples, d)
+            for d in range(dimension, dimension + count)
+        ], axis=1)
+
+def new_seed() -> int:
+    return int(np.random.SeedSequence().entropy) & MASK
+
+def as_array(vector: Vec3) -> np.ndarray:
+    return np.array(vector.make_tuple(), dtype=np.float64)
+
+def material_kind(material: Material) -> int:
+    # Exact types, since a subclass might scatter in a way we don't know of.
+    kinds = {
+        Vanta: VANTA, Identity: IDENTITY, Lambertian: LAMBERTIAN,
+        Metal: METAL, Dielectric: DIELECTRIC
+    }
+    if type(material) not in kinds:
+        raise ValueError(
+            "The wavefront tracer does not know how %s scatters" %
+            type(material).__name__
+        )
+    return kinds[type(material)]
+
+def ball_points(uniforms: np.ndarray) -> np.ndarray:
+    """
+    `rng.ball_point` for a (N, 3) array of uniform numbers.
+    """
+    z: np.ndarray = 2 * uniforms[:, 0] - 1
+    angles: np.ndarray = TAU * uniforms[:, 1]
+    radii: np.ndarray = np.cbrt(uniforms[:, 2])
+    rings: np.ndarray = radii * np.sqrt(1 - z * z)
+    return np.stack(
+        (rings * np.cos(angles), rings * np.sin(angles), radii * z), axis=1
+    )
+
+def disk_points(uniforms: np.ndarray) -> np.ndarray:
+    """
+    `rng.disk_point` for a (N, 2) array of uniform numbers.
+    """
+    radii: np.ndarray = np.sqrt(uniforms[:, 0])
+    angles: np.ndarray = TAU * uniforms[:, 1]
+    return np.stack((radii * np.cos(angles), radii * np.sin(angles)), axis=1)
+
+def sky(directions: np.ndarray) -> np.ndarray:
+    """
+    The blue-to-white gradient every script uses as background.
+    """
+    lengths: np.ndarray = np.sqrt(np.einsum("ij,ij->i", directions, directions))
+    t: np.ndarray = (0.5 * (directions[:, 1] / lengths + 1))[:, np.newaxis]
+    return (1.0 - t) * SKY_BOTTOM + t * SKY_TOP
+
+def reflect(v: np.ndarray, n: np.ndarray) -> np.ndarray:
+    return v - 2 * np.einsum("ij,ij->i", v, n)[:, np.newaxis] * n
+
+def scatter(
+    scene: WavefrontScene, origins: np.ndarray, directions: np.ndarray,
+    points: np.ndarray, normals: np.ndarray, materials: np.ndarray,
+    offsets: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    `Material.scatter` for a batch of hits, `offsets` being a random point in
+    the unit ball for each. Return the origins and directions of the
+    scattered rays and the attenuation of every hit.
+    """
+    kinds: np.ndarray = scene.kinds[materials]
+    new_origins: np.ndarray = points.copy()
+    new_directions: np.ndarray = directions.copy()
+    attenuations: np.ndarray = np.zeros_like(directions)
+
+    lambertian: np.ndarray = np.flatnonzero(kinds == LAMBERTIAN)
+    if len(lambertian):
+        new_directions[lambertian] = (
+            normals[lambertian] + offsets[lambertian]
+        )
+        attenuations[lambertian] = scene.albedos[materials[lambertian]]
+
+    metal: np.ndarray = np.flatnonzero(kinds == METAL)
+    if len(metal):
+        incident: np.ndarray = directions[metal]
+        unit_incident: np.ndarray = incident / np.sqrt(
+            np.einsum("ij,ij->i", incident, incident)
+        )[:, np.newaxis]
+        new_directions[metal] = (
+            reflect(unit_incident, normals[metal]) +
+            scene.fuzz[materials[metal]][:, np.newaxis] * offsets[metal]
+        )
+        attenuations[metal] = scene.albedos[materials[metal]]
+
+    dielectric: np.ndarray = np.flatnonzero(kinds == DIELECTRIC)
+    if len(dielectric):
+        new_directions[dielectric] = refract_or_reflect(
+            directions[dielectric], normals[dielectric],
+            scene.refractive_indices[materials[dielectric]]
+        )
+        attenuations[dielectric] = 1
+
+    # Identity lets the incident ray through untouched, origin and all.
+    identity: np.ndarray = np.flatnonzero(kinds == IDENTITY)
+    if len(identity):
+        new_origins[identity] = origins[identity]
+        attenuations[identity] = 1
+
+    # And Vanta keeps the zero attenuation.
+    return new_origins, new_directions, attenuations
+
+def refract_or_reflect(
+    directions: np.ndarray, normals: np.ndarray, refractive_indices: np.ndarray
+) -> np.ndarray:
+    """
+    What `Dielectric.scatter` does: refract if possible, otherwise reflect.
+    """
+    incidence: np.ndarray = np.einsum("ij,ij->i", directions, normals)
+    exiting: np.ndarray = (incidence > 0)[:, np.newaxis]
+    outward_normals: np.ndarray = np.where(exiting, -normals, normals)
+    nint: np.ndarray = np.where(
+        exiting[:, 0], refractive_indices, 1 / refractive_indices
+    )[:, np.newaxis]
+
+    unit_directions: np.ndarray = directions / np.sqrt(
+        np.einsum("ij,ij->i", directions, directions)
+    )[:, np.newaxis]
+    dt: np.ndarray = np.einsum(
+        "ij,ij->i", unit_directions, outward_normals
+    )[:, np.newaxis]
+    discriminant: np.ndarray = 1 - (nint ** 2) * (1 - dt ** 2)
+    refracted: np.ndarray = (
+        nint * (unit_directions - outward_normals * dt) -
+        outward_normals * np.sqrt(np.maximum(discriminant, 0))
+    )
+
+    return np.where(discriminant > 0, refracted, reflect(directions, normals))
+
+def trace_paths(
+    scene: WavefrontScene, origins: np.ndarray, directions: np.ndarray,
+    randoms: PathRandom, max_depth: int=MAX_DEPTH,
+    roulette_depth: Optional[int]=ROULETTE_DEPTH
+) -> np.ndarray:
+    """
+    The wavefront equivalent of `integrator.color`, for (R, 3) arrays of ray
+    origins and directions, whose random streams are those of `randoms`.
+    Return the (R, 3) colors.
+    """
+    global traced_rays
+    colors: np.ndarray = np.zeros((len(origins), 3))
+    throughputs: np.ndarray = np.ones((len(origins), 3))
+    # Which row of `colors` each live path ends up in.
+    paths: np.ndarray = np.arange(len(origins))
+
+    for depth in range(max_depth + 1):
+        if not len(paths):
+            break
+
+        # Intersect.
+        t, hits = scene.spheres.hit_batch(origins, directions, T_MIN, np.inf)
+        traced_rays += len(origins)
+
+        # Accumulate. A path is done the moment it escapes to the sky, so its
+        # color can be written directly.
+        missed: np.ndarray = hits < 0
+        if missed.any():
+            colors[paths[missed]] = throughputs[missed] * sky(directions[missed])
+
+        # The scripts return black for anything hit at the maximum depth. And
+        # unlike them, we don't bother scattering first.
+        if depth == max_depth:
+            break
+
+        hit: np.ndarray = ~missed
+        origins = origins[hit]
+        directions = directions[hit]
+        throughputs = throughputs[hit]
+        paths = paths[hit]
+        t = t[hit]
+        hits = hits[hit]
+
+        bounce: int = CAMERA_DIMENSIONS + depth * BOUNCE_DIMENSIONS
+
+        # Roulette, before paying for the scatter of paths that won't go on.
+        if roulette_depth is not None and depth >= roulette_depth:
+            survival: np.ndarray = np.minimum(throughputs.max(axis=1), 1)
+            survived: np.ndarray = randoms.uniform(
+                paths, bounce + ROULETTE_DIMENSION
+            )[:, 0] < survival
+            origins = origins[survived]
+            directions = directions[survived]
+            throughputs = (
+                throughputs[survived] / survival[survived][:, np.newaxis]
+            )
+            paths = paths[survived]
+            t = t[survived]
+            hits = hits[survived]
+
+        # Scatter.
+        points: np.ndarray = origins + t[:, np.newaxis] * directions
+        normals: np.ndarray = (
+            (points - scene.spheres.centers[hits]) /
+            scene.spheres.radii[hits][:, np.newaxis]
+        )
+        origins, directions, attenuations = scatter(
+            scene, origins, directions, points, normals,
+            scene.spheres.material_indices[hits],
+            ball_points(randoms.uniform(paths, bounce + SCATTER_DIMENSION, 3))
+        )
+        throughputs = throughputs * attenuations
+
+        # Compact: a path that lost all its throughput (like one that hit Vanta)
+        # will end up black no matter what it hits next.
+        alive: np.ndarray = throughputs.any(axis=1)
+        if not alive.all():
+            origins = origins[alive]
+            directions = directions[alive]
+            throughputs = throughputs[alive]
+            paths = paths[alive]
+
+    return colors
+
+def trace_normals(
+    scene: WavefrontScene, origins: np.ndarray, directions: np.ndarray
+) -> np.ndarray:
+    """
+    The `color()` of 5_antialiasing: shade by the normal at the first hit.
+    """
+    global traced_rays
+    t, hits = scene.spheres.hit_batch(origins, directions, 0.0, np.inf)
+    traced_rays += len(origins)
+    colors: np.ndarray = sky(directions)
+    hit: np.ndarray = hits >= 0
+    points: np.ndarray = origins[hit] + t[hit][:, np.newaxis] * directions[hit]
+    normals: np.ndarray = (
+        (points - scene.spheres.centers[hits[hit]]) /
+        scene.spheres.radii[hits[hit]][:, np.newaxis]
+    )
+    colors[hit] = 0.5 * (normals + 1)
+    return colors
+
+def first_hits(
+    scene: WavefrontScene, origins: np.ndarray, directions: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The (R, 3) normals, (R, 3) albedos and (R,) distances of the first hits
+    of a batch of rays, as `AOVs` has them.
+    """
+    t, hits = scene.spheres.hit_batch(origins, directions, T_MIN, np.inf)
+    hit: np.ndarray = hits >= 0
+    normals: np.ndarray = np.zeros_like(directions)
+    albedos: np.ndarray = sky(directions)
+    depths: np.ndarray = np.zeros(len(directions))
+
+    points: np.ndarray = origins[hit] + t[hit][:, np.newaxis] * directions[hit]
+    normals[hit] = (
+        (points - scene.spheres.centers[hits[hit]]) /
+        scene.spheres.radii[hits[hit]][:, np.newaxis]
+    )
+    materials: np.ndarray = scene.spheres.material_indices[hits[hit]]
+    kinds: np.ndarray = scene.kinds[materials]
+    albedos[hit] = np.where(
+        np.isin(kinds, (LAMBERTIAN, METAL))[:, np.newaxis],
+        scene.albedos[materials],
+        np.where((kinds == VANTA)[:, np.newaxis], 0.0, 1.0)
+    )
+    depths[hit] = t[hit] * np.sqrt(
+        np.einsum("ij,ij->i", directions[hit], directions[hit])
+    )
+    return normals, albedos, depths
+
+def camera_rays(
+    camera: WavefrontCamera, s: np.ndarray, t: np.ndarray,
+    randoms: PathRandom
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `camera.get_ray(s, t)` for arrays of s and t, the rays drawing from the
+    streams of `randoms`. Return the (R, 3) origins and directions.
+    """
+    directions: np.ndarray = (
+        camera.lower_left_corner +
+        s[:, np.newaxis] * camera.h_movement +
+        t[:, np.newaxis] * camera.v_movement -
+        camera.origin
+    )
+    origins: np.ndarray = np.broadcast_to(camera.origin, directions.shape).copy()
+
+    if camera.lens_radius:
+        disk: np.ndarray = camera.lens_radius * disk_points(
+            randoms.uniform(np.arange(len(s)), LENS_DIMENSION, 2)
+        )
+        offsets: np.ndarray = (
+            disk[:, 0:1] * camera.horizontal_axis +
+            disk[:, 1:2] * camera.vertical_axis
+        )
+        origins += offsets
+        directions -= offsets
+
+    return origins, directions
+
+def pixel_rays(
+    camera: WavefrontCamera, width: int, height: int, rows: np.ndarray,
+    cols: np.ndarray, samples: int, seed: int,
+    first_samples: np.ndarray, sampler: Optional[Sampler]=None
+) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray, PathRandom]]:
+    """
+    The jittered camera rays through the given pixels, `samples` each, in
+    batches of at most about BATCH_SIZE rays. For every batch, yield the
+    range of pixels it covers, the ray origins and directions (the samples
+    of a pixel next to each other) and their random streams.
+    """
+    pixel_count: int = len(rows)
+    # Keep every batch below BATCH_SIZE paths by splitting the pixels.
+    pixels_per_batch: int = max(1, BATCH_SIZE // max(samples, 1))
+
+    for start in range(0, pixel_count, pixels_per_batch):
+        stop: int = min(start + pixels_per_batch, pixel_count)
+        batch_rows: np.ndarray = np.repeat(rows[start:stop], samples)
+        batch_cols: np.ndarray = np.repeat(cols[start:stop], samples)
+        randoms: PathRandom = PathRandom(
+            seed, batch_rows * width + batch_cols,
+            np.repeat(first_samples[start:stop], samples) +
+            np.tile(np.arange(samples), stop - start), sampler
+        )
+        jitter: np.ndarray = randoms.uniform(
+            np.arange(len(batch_rows)), JITTER_DIMENSION, 2
+        )
+        # The scripts count j from the bottom.
+        s: np.ndarray = (batch_cols + jitter[:, 0]) / width
+        t: np.ndarray = ((height - 1 - batch_rows) + jitter[:, 1]) / height
+        origins, directions = camera_rays(camera, s, t, randoms)
+        yield start, stop, origins, directions, randoms
+
+def render_pixels(
+    scene: WavefrontScene, camera: Union[Camera, WavefrontCamera],
+    width: int, height: int, rows: np.ndarray, cols: np.ndarray,
+    samples: int, seed: int, shading: str="path", max_depth: int=MAX_DEPTH,
+    first_samples: Union[int, np.ndarray]=0, sampler: Optional[Sampler]=None
+) -> np.ndarray:
+    """
+    Trace `samples` jittered rays through each of the given pixels and return
+    their (P, 3) average colors, before gamma correction. The samples of each
+    pixel are numbered from `first_samples` on (one number for all pixels, or
+    one for each), which is what `sampler` draws their numbers by.
+
+    Rows are counted from the top of the image, like in PPM.
+    """
+    if not isinstance(camera, WavefrontCamera):
+        camera = WavefrontCamera.from_camera(camera)
+    sums: np.ndarray = np.zeros((len(rows), 3))
+
+    for start, stop, origins, directions, randoms in pixel_rays(
+        camera, width, height, rows, cols, samples, seed,
+        np.broadcast_to(first_samples, (len(rows),)), sampler
+    ):
+        if shading == "normals":
+            colors: np.ndarray = trace_normals(scene, origins, directions)
+        else:
+            colors = trace_paths(
+                scene, origins, directions, randoms, max_depth
+            )
+
+        sums[start:stop] = colors.reshape(stop - start, samples, 3).sum(axis=1)
+
+    return sums / samples
+
+def render_tile(
+    scene: WavefrontScene, camera: Union[Camera, WavefrontCamera],
+    width: int, height: int, x0: int, y0: int, x1: int, y1: int,
+    samples: int, seed: int, shading: str="path", max_depth: int=MAX_DEPTH,
+    first_sample: int=0, sampler: Optional[Sampler]=None
+) -> np.ndarray:
+    """
+    Render the pixels in columns [x0, x1) and rows [y0, y1) as a
+    (y1 - y0, x1 - x0, 3) array of linear colors.
+    """
+    rows, cols = np.mgrid[y0:y1, x0:x1]
+    colors: np.ndarray = render_pixels(
+        scene, camera, width, height, rows.ravel(), cols.ravel(), samples,
+        seed, shading, max_depth, first_sample, sampler
+    )
+    return colors.reshape(y1 - y0, x1 - x0, 3)
+
+def render_aovs(
+    scene: WavefrontScene, camera: Union[Camera, WavefrontCamera],
+    width: int, height: int, samples: int, seed: Optional[int]=None,
+    sampler: Optional[Sampler]=None
+) -> AOVs:
+    """
+    The AOVs of a whole frame. With the seed and sampler of a render, the
+    rays are the very camera rays of its samples.
+    """
+    if not isinstance(camera, WavefrontCamera):
+        camera = WavefrontCamera.from_camera(camera)
+    if seed is None:
+        seed = new_seed()
+    rows, cols = np.mgrid[0:height, 0:width]
+    normals: np.ndarray = np.zeros((height * width, 3))
+    albedos: np.ndarray = np.zeros((height * width, 3))
+    depths: np.ndarray = np.zeros(height * width)
+
+    for start, stop, origins, directions, _ in pixel_rays(
+        camera, width, height, rows.ravel(), cols.ravel(), samples, seed,
+        np.zeros(height * width, dtype=np.int64), sampler
+    ):
+        batch_normals, batch_albedos, batch_depths = first_hits(
+            scene, origins, directions
+        )
+        normals[start:stop] = batch_normals.reshape(
+            stop - start, samples, 3
+        ).mean(axis=1)
+        albedos[start:stop] = batch_albedos.reshape(
+            stop - start, samples, 3
+        ).mean(axis=1)
+        depths[start:stop] = batch_depths.reshape(
+            stop - start, samples
+        ).mean(axis=1)
+
+    return AOVs(
+        normals.reshape(height, width, 3), albedos.reshape(height, width, 3),
+        depths.reshape(height, width)
+    )
+
+def render(
+    scene: WavefrontScene, camera: Union[Camera, WavefrontCamera],
+    width: int, height: int, samples: int, seed: Optional[int]=None,
+    shading: str="path", max_depth: int=MAX_DEPTH,
+    sampler: Optional[Sampler]=None
+) -> np.ndarray:
+    """
+    Render a whole frame as a (height, width, 3) array of linear colors.
+    """
+    if seed is None:
+        seed = new_seed()
+    return render_tile(
+        scene, camera, width, height, 0, 0, width, height, samples, seed,
+        shading, max_depth, 0, sampler
+    )
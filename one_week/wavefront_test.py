@@ -0,0 +1,122 @@
+from one_week.hittable import HittableList
+from one_week.integrator import color, normal_color
+from one_week.material import Lambertian
+from one_week.sphere import Sphere
+from one_week.testing import dielectrics
+from one_week.vec3 import Vec3
+
+import random
+import unittest
+
+try:
+    import numpy as np
+    from one_week import sampler, wavefront
+except ImportError:
+    wavefront = None
+
+@unittest.skipIf(wavefront is None, "needs NumPy")
+class WavefrontTest(unittest.TestCase):
+
+    def setUp(self):
+        scene = dielectrics()
+        self.hittables = scene.hittables
+        self.camera = scene.camera
+
+    def test_normals_match_scalar(self):
+        world = HittableList(self.hittables)
+        scene = wavefront.WavefrontScene.from_hittables(self.hittables)
+        rng = random.Random(4096)
+        uvs = [(rng.random(), rng.random()) for _ in range(200)]
+        origins, directions = wavefront.camera_rays(
+            wavefront.WavefrontCamera.from_camera(self.camera),
+            np.array([u for u, _ in uvs]), np.array([v for _, v in uvs]),
+            wavefront.PathRandom(0, np.arange(200), np.zeros(200, dtype=int))
+        )
+
+        colors = wavefront.trace_normals(scene, origins, directions)
+        for (u, v), actual in zip(uvs, colors):
+            expected = normal_color(self.camera.get_ray(u, v), world)
+            for e, a in zip(expected.make_tuple(), actual):
+                self.assertAlmostEqual(e, a)
+
+    def test_paths_converge_to_scalar(self):
+        world = HittableList(self.hittables)
+        scene = wavefront.WavefrontScene.from_hittables(self.hittables)
+        width, height, samples = 8, 4, 256
+        random.seed(8192)
+
+        image = wavefront.render(
+            scene, self.camera, width, height, samples, 8192
+        )
+        for row in range(height):
+            for col in range(width):
+                expected = Vec3(0, 0, 0)
+                for _ in range(samples):
+                    u = (col + random.random()) / width
+                    v = (height - 1 - row + random.random()) / height
+                    expected += color(
+                        self.camera.get_ray(u, v), world, 0
+                    )
+                expected /= samples
+                for e, a in zip(expected.make_tuple(), image[row, col]):
+                    self.assertAlmostEqual(e, a, delta=0.1)
+
+    def test_vanta_paths_are_black(self):
+        scene = wavefront.WavefrontScene.from_hittables(
+            [Sphere(Vec3(0, 0, -1), 100)]
+        )
+        image = wavefront.render(scene, self.camera, 4, 2, 2)
+        self.assertEqual(0, image.max())
+
+    def test_samples_independent_of_batching(self):
+        scene = wavefront.WavefrontScene.from_hittables(self.hittables)
+        whole = wavefront.render(scene, self.camera, 8, 4, 6, 64)
+
+        # The same pixels, by tile, in two runs of samples each.
+        tile = sum(
+            samples * wavefront.render_tile(
+                scene, self.camera, 8, 4, 2, 1, 7, 3, samples, 64,
+                first_sample=first_sample
+            ) for first_sample, samples in ((0, 2), (2, 4))
+        ) / 6
+        np.testing.assert_allclose(whole[1:3, 2:7], tile)
+
+        other_seed = wavefront.render(scene, self.camera, 8, 4, 6, 65)
+        self.assertFalse(np.array_equal(whole, other_seed))
+
+    def test_samplers_converge(self):
+        scene = wavefront.WavefrontScene.from_hittables(self.hittables)
+        reference = wavefront.render(scene, self.camera, 8, 4, 512, 96)
+        for name in sampler.SAMPLERS:
+            image = wavefront.render(
+                scene, self.camera, 8, 4, 64, 97,
+                sampler=sampler.make_sampler(name, 64)
+            )
+            self.assertLess(np.abs(image - reference).mean(), 0.03, name)
+
+    def test_aovs(self):
+        scene = wavefront.WavefrontScene.from_hittables(self.hittables)
+        aovs = wavefront.render_aovs(scene, self.camera, 40, 20, 4, 3)
+        self.assertEqual((20, 40, 3), aovs.normals.shape)
+        self.assertEqual((20, 40), aovs.depths.shape)
+
+        # The middle of the matte sphere, looked at head on.
+        np.testing.assert_allclose([0, 0, 1], aovs.normals[10, 20], atol=0.1)
+        np.testing.assert_allclose([0.8, 0.3, 0.3], aovs.albedos[10, 20])
+        self.assertAlmostEqual(0.5, aovs.depths[10, 20], delta=0.05)
+        # Glass is white, and the sky has no normal or depth.
+        np.testing.assert_allclose([1, 1, 1], aovs.albedos[10, 10])
+        np.testing.assert_array_equal([0, 0, 0], aovs.normals[0, 20])
+        self.assertEqual(0, aovs.depths[0, 20])
+
+    def test_unknown_material(self):
+        class Glowing(Lambertian):
+            pass
+
+        with self.assertRaises(ValueError):
+            wavefront.WavefrontScene.from_hittables(
+                [Sphere(Vec3(0, 0, -1), 0.5, Glowing(Vec3(1, 1, 1)))]
+            )
+
+if __name__ == "__main__":
+    unittest.main()